@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Report the partition key distribution of a CSV file before loading it.
+
+One pass with bounded memory (count-min sketch plus heavy-hitter tracking)
+finds the most frequent partition keys, their share of the rows and the WCU/s
+each of them receives at a given load rate. Keys above the per-partition
+limit will be throttled however the input is shuffled; load such files with
+--pace-hot-keys.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from src.skew import DEFAULT_SKETCH_WIDTH, DEFAULT_TOP_K, PARTITION_WCU_LIMIT, analyze_csv
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Analyze partition key skew of a CSV file",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Top 20 keys of the id column, rated at 10,000 rows/s
+  python analyze_skew.py --csv data.csv --load-rate 10000
+
+  # Another key column, more heavy hitters, JSON output
+  python analyze_skew.py --csv data.csv --partition-key customer_id --top 50 --json
+        """,
+    )
+    parser.add_argument("--csv", type=str, required=True, help="Path to input CSV file")
+    parser.add_argument(
+        "--partition-key",
+        type=str,
+        default="id",
+        help="Partition key column (default: id)",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=DEFAULT_TOP_K,
+        help=f"Number of heavy hitters to report (default: {DEFAULT_TOP_K})",
+    )
+    parser.add_argument(
+        "--load-rate",
+        type=float,
+        default=None,
+        help="Planned load rate in rows/s, used to estimate WCU/s per key",
+    )
+    parser.add_argument(
+        "--partition-wcu",
+        type=float,
+        default=PARTITION_WCU_LIMIT,
+        help=f"Write limit of one partition in WCU/s (default: {PARTITION_WCU_LIMIT:.0f})",
+    )
+    parser.add_argument(
+        "--sketch-width",
+        type=int,
+        default=DEFAULT_SKETCH_WIDTH,
+        help=f"Counters per count-min sketch row (default: {DEFAULT_SKETCH_WIDTH})",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    if not Path(args.csv).exists():
+        print(f"Error: CSV file not found: {args.csv}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        report = analyze_csv(
+            args.csv, partition_key=args.partition_key, top_k=args.top, width=args.sketch_width
+        )
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(report.to_dict(args.load_rate, args.partition_wcu), indent=2))
+        return
+
+    max_rate = report.max_load_rate(args.partition_wcu)
+    print("=" * 60)
+    print("Partition Key Skew")
+    print("=" * 60)
+    print(f"CSV File:        {args.csv}")
+    print(f"Partition Key:   {args.partition_key}")
+    print(f"Rows:            {report.total_records:,}")
+    print(f"Avg Item WCU:    {report.average_item_wcu:.2f}")
+    print(f"Count Error:     +{report.error_bound:,} rows at most")
+    print(f"Top Key Share:   {report.top_share:.2%}")
+    print(
+        f"Max Load Rate:   {max_rate:,.0f} rows/s before the top key exceeds "
+        f"{args.partition_wcu:,.0f} WCU/s"
+    )
+    print("=" * 60)
+    header = f"{'Key':<30} {'Rows':>12} {'Share':>8}"
+    if args.load_rate is not None:
+        header += f" {'WCU/s':>10}"
+    print(header)
+    for k in report.heavy_hitters:
+        line = f"{k.key[:30]:<30} {k.count:>12,} {k.share:>8.2%}"
+        if args.load_rate is not None:
+            wcu = report.key_wcu(k, args.load_rate)
+            line += f" {wcu:>10,.0f}{'  HOT' if wcu > args.partition_wcu else ''}"
+        print(line)
+
+    if args.load_rate is not None:
+        hot = report.hot_keys(args.load_rate, args.partition_wcu)
+        if hot:
+            print(
+                f"\n{len(hot)} key(s) exceed the partition limit at {args.load_rate:,.0f} rows/s; "
+                "load with --pace-hot-keys or lower the rate"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Benchmark the async and threaded loaders offline.
+
+Every case loads a generated CSV into an in-process DynamoDB stand-in
+(src.local_dynamodb) with injectable per-request latency, throttling and
+partially processed batches, so results are reproducible and need no AWS
+account. The sweep covers loaders x workers x batch sizes x dataset sizes.
+
+Results can be written as JSON and compared against a saved baseline; the
+script exits with status 1 when a case's throughput drops by more than the
+tolerance.
+"""
+
+import argparse
+import json
+import logging
+import sys
+
+from src.benchmark import LOADERS, FaultProfile, find_regressions, run_benchmark, sweep
+from src.csv_generator import WORKLOAD_PROFILES
+from src.logging_config import setup_logging
+
+
+def int_list(value: str) -> list[int]:
+    """Parse a comma-separated list of integers."""
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the loaders against a local DynamoDB stand-in",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Default sweep: every loader, 4/10/20 workers, 1k and 10k rows, 5ms per request
+  python benchmark_loaders.py
+
+  # Save a baseline, then fail CI if throughput drops by more than 20%
+  python benchmark_loaders.py --output baseline.json
+  python benchmark_loaders.py --baseline baseline.json --tolerance 0.2
+
+  # Compare batch sizes under throttling and partial batch failures
+  python benchmark_loaders.py --loaders threaded --batch-sizes 5,10,25 \\
+      --throttle-rate 0.05 --unprocessed-rate 0.02
+
+  # Load Zipf-skewed keys and large items instead of uniform rows
+  python benchmark_loaders.py --workload mixed --records 10000
+        """,
+    )
+    parser.add_argument(
+        "--loaders",
+        type=lambda value: [part.strip() for part in value.split(",") if part.strip()],
+        default=list(LOADERS),
+        help=f"Comma-separated loaders to run (default: {','.join(LOADERS)})",
+    )
+    parser.add_argument(
+        "--workers", type=int_list, default=[4, 10, 20], help="Worker counts (default: 4,10,20)"
+    )
+    parser.add_argument(
+        "--batch-sizes", type=int_list, default=[25], help="Batch sizes (default: 25)"
+    )
+    parser.add_argument(
+        "--records",
+        type=int_list,
+        default=[1000, 10000],
+        help="Dataset sizes (default: 1000,10000)",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.005,
+        help="Seconds each BatchWriteItem request takes (default: 0.005)",
+    )
+    parser.add_argument(
+        "--latency-jitter",
+        type=float,
+        default=0.0,
+        help="Extra random seconds added to each request (default: 0)",
+    )
+    parser.add_argument(
+        "--throttle-rate",
+        type=float,
+        default=0.0,
+        help="Probability that a request is throttled (default: 0)",
+    )
+    parser.add_argument(
+        "--unprocessed-rate",
+        type=float,
+        default=0.0,
+        help="Probability that an item comes back in UnprocessedItems (default: 0)",
+    )
+    parser.add_argument(
+        "--max-retries", type=int, default=3, help="Loader retry limit (default: 3)"
+    )
+    parser.add_argument(
+        "--workload",
+        choices=sorted(WORKLOAD_PROFILES),
+        default="uniform",
+        help="CSVGenerator workload profile of the datasets (default: uniform)",
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case, median reported")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for shuffles and faults")
+    parser.add_argument(
+        "--data-dir",
+        type=str,
+        default="benchmark_data",
+        help="Directory for generated datasets (default: benchmark_data)",
+    )
+    parser.add_argument("--output", "-o", type=str, default=None, help="Write results as JSON")
+    parser.add_argument("--baseline", type=str, default=None, help="Baseline JSON to compare")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed relative throughput drop against --baseline (default: 0.2)",
+    )
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Show loader logs")
+    args = parser.parse_args()
+
+    setup_logging(level=logging.INFO if args.verbose else logging.ERROR)
+
+    try:
+        cases = sweep(args.loaders, args.workers, args.batch_sizes, args.records)
+        faults = FaultProfile(
+            latency=args.latency,
+            latency_jitter=args.latency_jitter,
+            throttle_rate=args.throttle_rate,
+            unprocessed_rate=args.unprocessed_rate,
+        )
+        baseline = None
+        if args.baseline:
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Running {len(cases)} benchmark cases...", file=sys.stderr)
+    report = run_benchmark(
+        cases,
+        faults,
+        data_dir=args.data_dir,
+        max_retries=args.max_retries,
+        repeat=args.repeat,
+        seed=args.seed,
+        workload=args.workload,
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print("=" * 100)
+        print(
+            f"{'Case':<32} {'Seconds':>8} {'Rec/s':>10} {'p50 ms':>7} {'p99 ms':>7} "
+            f"{'Requests':>9} {'Throttled':>9} {'Unproc.':>8} {'Failed':>6}"
+        )
+        print("=" * 100)
+        for r in report["results"]:
+            latency = r["latency_seconds"]
+            print(
+                f"{r['case']:<32} {r['seconds']:>8.3f} {r['records_per_second']:>10,.0f} "
+                f"{latency['p50'] * 1000:>7.1f} {latency['p99'] * 1000:>7.1f} "
+                f"{r['requests']:>9,} {r['throttled_requests']:>9,} "
+                f"{r['unprocessed_items']:>8,} {r['failed_writes']:>6,}"
+            )
+
+    if baseline is not None:
+        regressions = find_regressions(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\nThroughput regressions ({len(regressions)}):", file=sys.stderr)
+            for message in regressions:
+                print(f"  - {message}", file=sys.stderr)
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} of the baseline", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
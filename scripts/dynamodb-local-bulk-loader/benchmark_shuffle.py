@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark shuffle strategies against the full in-memory shuffle.
+
+The input is the sorted-timestamp CSV produced by CSVGenerator. For a table
+keyed by time, writing that file in order sends every write to the same key
+range. Each strategy is scored on:
+
+- time and peak Python memory (tracemalloc) to shuffle the stream
+- hot range share: the file is cut into N contiguous key ranges (stand-ins for
+  partitions); for every window of consecutive writes we take the largest share
+  of writes landing in one range and average it. 1/N is a perfect spread, 1.0
+  means every write in the window hits the same range.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+from src.csv_generator import CSVGenerator
+from src.shuffle import get_shuffle_strategy
+
+
+def hot_range_share(positions: list[int], num_ranges: int, write_window: int) -> float:
+    """Average largest per-range share across windows of consecutive writes."""
+    total = len(positions)
+    range_size = max(1, -(-total // num_ranges))
+    shares = []
+    for start in range(0, total - write_window + 1, write_window):
+        window = positions[start : start + write_window]
+        counts = Counter(pos // range_size for pos in window)
+        shares.append(max(counts.values()) / len(window))
+    return sum(shares) / len(shares) if shares else 0.0
+
+
+def run_strategy(
+    csv_file: str, name: str, window_size: int, num_ranges: int, write_window: int
+) -> dict:
+    """Shuffle the file with one strategy and measure it."""
+    strategy = get_shuffle_strategy(name, window_size=window_size, seed=42)
+
+    def rows():
+        with open(csv_file, encoding="utf-8", newline="") as f:
+            for pos, row in enumerate(csv.DictReader(f)):
+                row["_pos"] = pos
+                yield row
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    # Keep only the original positions so the measurement does not retain rows
+    # Strategies that read the file themselves tag rows with their byte offset
+    shuffled = strategy.iter_file(csv_file, row_id_key="_pos")
+    if shuffled is None:
+        shuffled = strategy.shuffle(rows())
+    positions = [row["_pos"] for row in shuffled]
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if strategy.reads_files:
+        row_numbers = {offset: pos for pos, offset in enumerate(sorted(positions))}
+        positions = [row_numbers[offset] for offset in positions]
+
+    return {
+        "strategy": name,
+        "window_size": None if name in ("full", "index") else window_size,
+        "records": len(positions),
+        "seconds": round(elapsed, 3),
+        "peak_memory_mb": round(peak / 1024 / 1024, 2),
+        "hot_range_share": round(hot_range_share(positions, num_ranges, write_window), 4),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark loader shuffle strategies on sorted-timestamp data",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Generate 100k rows and compare all strategies
+  python benchmark_shuffle.py --count 100000
+
+  # Reuse an existing CSV and emit JSON
+  python benchmark_shuffle.py --csv sample_1m.csv --json
+        """,
+    )
+    parser.add_argument("--csv", type=str, default=None, help="Existing CSV file to shuffle")
+    parser.add_argument(
+        "--count", "-c", type=int, default=100000, help="Rows to generate if --csv is not given"
+    )
+    parser.add_argument(
+        "--window-size", type=int, default=10000, help="Window for streaming strategies"
+    )
+    parser.add_argument(
+        "--ranges", type=int, default=100, help="Contiguous key ranges used for scoring"
+    )
+    parser.add_argument(
+        "--write-window", type=int, default=1000, help="Consecutive writes per scoring window"
+    )
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    csv_file = args.csv
+    if csv_file is None:
+        csv_file = f"benchmark_shuffle_{args.count}.csv"
+        if not Path(csv_file).exists():
+            print(f"Generating {args.count:,} sorted-timestamp records...", file=sys.stderr)
+            CSVGenerator(output_file=csv_file, num_records=args.count).generate()
+
+    results = []
+    with open(csv_file, encoding="utf-8", newline="") as f:
+        in_order = list(range(sum(1 for _ in csv.DictReader(f))))
+    results.append(
+        {
+            "strategy": "none",
+            "window_size": None,
+            "records": len(in_order),
+            "seconds": 0.0,
+            "peak_memory_mb": 0.0,
+            "hot_range_share": round(hot_range_share(in_order, args.ranges, args.write_window), 4),
+        }
+    )
+    for name in ("full", "index", "window", "bucket", "hash"):
+        results.append(
+            run_strategy(csv_file, name, args.window_size, args.ranges, args.write_window)
+        )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'Strategy':<10} {'Window':>8} {'Seconds':>8} {'Peak MB':>9} {'Hot share':>10}")
+    for r in results:
+        window = r["window_size"] if r["window_size"] else "-"
+        print(
+            f"{r['strategy']:<10} {window:>8} {r['seconds']:>8.3f} "
+            f"{r['peak_memory_mb']:>9.2f} {r['hot_range_share']:>10.4f}"
+        )
+    print(f"\nPerfect spread: {1 / args.ranges:.4f} (1 / {args.ranges} ranges)")
+
+
+if __name__ == "__main__":
+    main()
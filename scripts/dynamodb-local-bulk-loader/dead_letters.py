@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Inspect and replay the dead-letter file of a bulk load.
+
+The loaders write the items they gave up on to a dead-letter file, one typed
+DynamoDB JSON item per line with its error code and attempt count. `summary`
+counts them by error code; `replay` writes only those items again with the
+async loader (same batching, retries, rate limiting and concurrency), and
+collects the items that fail again in a new dead-letter file.
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+from src.async_loader import AsyncDynamoDBLoader
+from src.dead_letter import read_dead_letters, summarize
+from src.readers import DynamoDBJsonReader
+
+
+def print_summary(path: str) -> None:
+    """Print the number of dead-lettered items per error code."""
+    counts = summarize(path)
+    batches = {entry.get("batch_id") for entry in read_dead_letters(path)}
+    print("=" * 60)
+    print("Dead Letters")
+    print("=" * 60)
+    print(f"File:          {path}")
+    print(f"Items:         {sum(counts.values()):,}")
+    print(f"Batches:       {len(batches):,}")
+    print("=" * 60)
+    print(f"{'Error Code':<45} {'Items':>12}")
+    for code, count in counts.most_common():
+        print(f"{code[:45]:<45} {count:>12,}")
+
+
+def replay(args: argparse.Namespace) -> int:
+    """Write the items of a dead-letter file to a table.
+
+    Returns:
+        Process exit code
+    """
+    output = args.dead_letter or f"{Path(args.file).with_suffix('')}.replay.ddbjson"
+    if Path(output).resolve() == Path(args.file).resolve():
+        print("Error: --dead-letter must differ from the file being replayed", file=sys.stderr)
+        return 1
+
+    print("=" * 60)
+    print("Dead-Letter Replay")
+    print("=" * 60)
+    print(f"Input File:    {args.file}")
+    print(f"Table:         {args.table}")
+    print(f"Region:        {args.region}")
+    print(f"Workers:       {args.workers}")
+    print(f"Batch Size:    {args.batch_size}")
+    print(f"Max Retries:   {args.max_retries}")
+    print(f"Write Budget:  {f'{args.max_wcu:,.0f} WCU/s' if args.max_wcu else 'unlimited'}")
+    print(f"Dead Letters:  {output}")
+    print("=" * 60)
+
+    loader = AsyncDynamoDBLoader(
+        table_name=args.table,
+        region=args.region,
+        max_workers=args.workers,
+        batch_size=args.batch_size,
+        max_retries=args.max_retries,
+        max_wcu=args.max_wcu,
+        streaming=True,
+        reader=DynamoDBJsonReader(),
+        dead_letter_file=output,
+    )
+    result = asyncio.run(loader.load_csv(args.file))
+
+    print("\n" + "=" * 60)
+    print("Replay Results")
+    print("=" * 60)
+    print(f"Total Records:     {result.total_records:,}")
+    print(f"Successful Writes: {result.successful_writes:,}")
+    print(f"Failed Writes:     {result.failed_writes:,}")
+    if result.dead_lettered:
+        print(f"Dead-Lettered:     {result.dead_lettered:,} ({output})")
+    print(f"Duration:          {result.duration_seconds:.2f} seconds")
+    print("=" * 60)
+    return 1 if result.failed_writes else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Inspect and replay the dead-letter file of a bulk load",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Count failed items by error code
+  python dead_letters.py summary data.csv.dead-letter.ddbjson
+
+  # Write the failed items again (items failing again go to failed.replay.ddbjson)
+  python dead_letters.py replay failed.ddbjson --table MyTable
+
+  # Replay slowly into a table that is serving traffic
+  python dead_letters.py replay failed.ddbjson --table MyTable --workers 4 --max-wcu 500
+        """,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    summary_parser = commands.add_parser("summary", help="Count dead-lettered items by error code")
+    summary_parser.add_argument("file", type=str, help="Dead-letter file")
+
+    replay_parser = commands.add_parser("replay", help="Write dead-lettered items to a table")
+    replay_parser.add_argument("file", type=str, help="Dead-letter file")
+    replay_parser.add_argument("--table", "-t", type=str, required=True, help="DynamoDB table name")
+    replay_parser.add_argument(
+        "--region", "-r", type=str, default="us-east-1", help="AWS region (default: us-east-1)"
+    )
+    replay_parser.add_argument(
+        "--workers", "-w", type=int, default=10, help="Concurrent writers (default: 10)"
+    )
+    replay_parser.add_argument(
+        "--batch-size", "-b", type=int, default=25, help="Items per batch (default: 25)"
+    )
+    replay_parser.add_argument(
+        "--max-retries", type=int, default=3, help="Retry attempts per item (default: 3)"
+    )
+    replay_parser.add_argument(
+        "--max-wcu",
+        type=float,
+        default=None,
+        help="Write capacity units per second the replay may consume (default: unlimited)",
+    )
+    replay_parser.add_argument(
+        "--dead-letter",
+        type=str,
+        default=None,
+        help="File receiving items that fail again (default: <file>.replay.ddbjson)",
+    )
+    args = parser.parse_args()
+
+    if not Path(args.file).exists():
+        print(f"Error: dead-letter file not found: {args.file}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        if args.command == "summary":
+            print_summary(args.file)
+        else:
+            sys.exit(replay(args))
+    except Exception as e:
+        print(f"\nError: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
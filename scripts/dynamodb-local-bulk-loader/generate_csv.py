@@ -7,10 +7,30 @@ if written sequentially, demonstrating the need for shuffling in the loader impl
 """
 
 import argparse
+import dataclasses
+import os
 import sys
+import time
 from pathlib import Path
 
-from src.csv_generator import CSVGenerator
+from src.csv_generator import (
+    DEFAULT_CHUNK_BYTES,
+    DEFAULT_CHUNK_SIZE,
+    WORKLOAD_PROFILES,
+    CSVGenerator,
+    get_workload_profile,
+)
+
+# Command-line options overriding a field of the chosen workload profile
+PROFILE_OPTIONS = (
+    "partition_keys",
+    "key_skew",
+    "sort_keys_per_partition",
+    "item_size_median",
+    "item_size_sigma",
+    "burst_every",
+    "burst_rows",
+)
 
 
 def main() -> None:
@@ -25,8 +45,26 @@ Examples:
   # Generate 1 million records for production-scale testing
   python generate_csv.py --output sample_1m.csv --count 1000000
 
+  # Generate 100 million records on 8 processes, reproducibly
+  python generate_csv.py --output sample_100m.csv --count 100000000 --workers 8 --seed 42
+
   # Generate 100 records for quick testing
   python generate_csv.py --output sample_100.csv --count 100
+
+  # Zipfian partition keys: a few of 10,000 keys take most of the writes
+  python generate_csv.py --output zipf_1m.csv --count 1000000 --profile zipf
+
+  # Start from a profile and override its settings
+  python generate_csv.py --output orders.csv --count 1000000 --profile mixed \
+      --partition-keys 1000 --item-size-median 4096
+
+Workload profiles (tables must be keyed on id and sk when keys repeat):
+  uniform      Unique UUID keys, ~100 character descriptions (default)
+  zipf         10,000 partition keys with Zipfian skew 1.1
+  one-to-many  20 sort keys per partition key
+  large-items  Log-normal descriptions, median 8KB, up to the 400KB item limit
+  bursty       Every 1,000 rows, 200 rows to one key 1ms apart
+  mixed        All of the above
         """,
     )
 
@@ -46,12 +84,105 @@ Examples:
         help="Number of records to generate (default: 10000)",
     )
 
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes generating chunks (default: CPU count)",
+    )
+
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"Rows generated and written at a time (default: {DEFAULT_CHUNK_SIZE}, "
+        f"fewer for large items so a chunk stays under {DEFAULT_CHUNK_BYTES >> 20} MB)",
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed for reproducible data; the same seed and chunk size give the same "
+        "file for any number of workers (default: random)",
+    )
+
+    parser.add_argument(
+        "--profile",
+        "-p",
+        choices=sorted(WORKLOAD_PROFILES),
+        default="uniform",
+        help="Workload profile shaping keys, item sizes and bursts (default: uniform)",
+    )
+
+    parser.add_argument(
+        "--partition-keys",
+        type=int,
+        default=None,
+        help="Distinct partition keys; rows get an sk column",
+    )
+
+    parser.add_argument(
+        "--key-skew",
+        type=float,
+        default=None,
+        help="Zipf exponent of partition key popularity (0 is uniform)",
+    )
+
+    parser.add_argument(
+        "--sort-keys-per-partition",
+        type=int,
+        default=None,
+        help="Consecutive rows sharing one partition key",
+    )
+
+    parser.add_argument(
+        "--item-size-median",
+        type=int,
+        default=None,
+        help="Median description size in bytes, drawn log-normally up to the 400KB item limit",
+    )
+
+    parser.add_argument(
+        "--item-size-sigma",
+        type=float,
+        default=None,
+        help="Spread of the log-normal item sizes",
+    )
+
+    parser.add_argument(
+        "--burst-every",
+        type=int,
+        default=None,
+        help="Rows per burst cycle (use with --burst-rows)",
+    )
+
+    parser.add_argument(
+        "--burst-rows",
+        type=int,
+        default=None,
+        help="Rows at the end of each cycle written to one key, 1ms apart",
+    )
+
     args = parser.parse_args()
 
     # Validate count
     if args.count <= 0:
         print(f"Error: Count must be positive, got {args.count}", file=sys.stderr)
         sys.exit(1)
+    if args.workers < 1 or args.chunk_size < 1:
+        print("Error: --workers and --chunk-size must be at least 1", file=sys.stderr)
+        sys.exit(1)
+
+    overrides = {
+        name: getattr(args, name) for name in PROFILE_OPTIONS if getattr(args, name) is not None
+    }
+    try:
+        profile = dataclasses.replace(get_workload_profile(args.profile), **overrides)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
 
     # Create output directory if needed
     output_path = Path(args.output)
@@ -61,9 +192,20 @@ Examples:
     print(f"Output file: {args.output}")
 
     try:
-        generator = CSVGenerator(output_file=args.output, num_records=args.count)
+        generator = CSVGenerator(
+            output_file=args.output,
+            num_records=args.count,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            seed=args.seed,
+            profile=profile,
+        )
+        print(f"Workers: {generator.workers}, seed: {generator.seed}")
+        print(f"Profile: {args.profile}, columns: {','.join(profile.fieldnames)}")
+        start = time.perf_counter()
         generator.generate()
-        print(f"✓ Successfully generated {args.count:,} records")
+        elapsed = time.perf_counter() - start
+        print(f"✓ Successfully generated {args.count:,} records in {elapsed:.1f}s")
         print(f"✓ File saved to: {args.output}")
     except Exception as e:
         print(f"Error generating CSV: {e}", file=sys.stderr)
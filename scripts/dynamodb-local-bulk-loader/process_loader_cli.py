@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+CLI script for the multi-process DynamoDB CSV bulk loader.
+
+This script splits the CSV into newline-aligned byte ranges and loads each range
+in its own process with an async writer pool, so throughput scales with cores
+until the table's write capacity is reached.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from src.async_loader import DEFAULT_ASYNC_WORKERS
+from src.item_size import MAX_REQUEST_BYTES
+from src.process_loader import ProcessPoolDynamoDBLoader
+from src.schema import INFER_SCHEMA, ItemSchema
+from src.shuffle import DEFAULT_WINDOW_SIZE
+from src.skew import DEFAULT_KEY_WCU
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load CSV data into DynamoDB using one async writer per process",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Load CSV with one process per CPU core
+  python process_loader_cli.py --csv sample_1m.csv --table MyTable
+
+  # Use 8 processes with 20 async workers each
+  python process_loader_cli.py --csv sample_1m.csv --table MyTable --processes 8 --workers 20
+
+  # Use at most half of a 10,000 WCU table across all processes
+  python process_loader_cli.py --csv sample_1m.csv --table MyTable --max-wcu 10000 --target-utilization 0.5
+
+  # Journal progress, then pick up where an interrupted run stopped
+  python process_loader_cli.py --csv sample_1m.csv --table MyTable --checkpoint load.ckpt
+  python process_loader_cli.py --csv sample_1m.csv --table MyTable --checkpoint load.ckpt --resume
+
+  # Even out request latency for large items: at most 2MB and 200 WCU per request
+  python process_loader_cli.py --csv data.csv --table MyTable --max-request-kb 2048 --max-request-wcu 200
+
+  # Keep items that still fail after their retries, then replay only those
+  python process_loader_cli.py --csv data.csv --table MyTable --dead-letter failed.ddbjson
+  python dead_letters.py replay failed.ddbjson --table MyTable
+
+  # Store numeric columns as numbers, serializing straight to wire format
+  python process_loader_cli.py --csv data.csv --table MyTable --schema infer
+  python process_loader_cli.py --csv data.csv --table MyTable --schema amount:N,active:BOOL
+
+  # Keep heavily repeated partition keys below the per-partition write limit
+  python process_loader_cli.py --csv data.csv --table MyTable --pace-hot-keys --partition-key customer_id
+        """,
+    )
+
+    parser.add_argument(
+        "--csv",
+        type=str,
+        required=True,
+        help="Path to input CSV file",
+    )
+
+    parser.add_argument(
+        "--table",
+        "-t",
+        type=str,
+        required=True,
+        help="DynamoDB table name",
+    )
+
+    parser.add_argument(
+        "--region",
+        "-r",
+        type=str,
+        default="us-east-1",
+        help="AWS region (default: us-east-1)",
+    )
+
+    parser.add_argument(
+        "--processes",
+        "-p",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: CPU count)",
+    )
+
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=DEFAULT_ASYNC_WORKERS,
+        help=f"Async workers per process (default: {DEFAULT_ASYNC_WORKERS})",
+    )
+
+    parser.add_argument(
+        "--batch-size",
+        "-b",
+        type=int,
+        default=25,
+        help="Batch size for write operations (default: 25, max: 25)",
+    )
+
+    parser.add_argument(
+        "--max-request-kb",
+        type=int,
+        default=MAX_REQUEST_BYTES // 1024,
+        help="Item payload per request in KB; batches of large items are closed early "
+        f"(default: {MAX_REQUEST_BYTES // 1024}, the BatchWriteItem limit; minimum 400)",
+    )
+
+    parser.add_argument(
+        "--max-request-wcu",
+        type=int,
+        default=None,
+        help="Write capacity units per request, so batches of large items do not "
+        "drain the write budget in bursts (default: unlimited)",
+    )
+
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=3,
+        help="Maximum retry attempts for failed operations (default: 3)",
+    )
+
+    parser.add_argument(
+        "--max-wcu",
+        type=float,
+        default=None,
+        help="Write capacity units per second available to the load, shared by all processes "
+        "(default: unlimited)",
+    )
+
+    parser.add_argument(
+        "--target-utilization",
+        type=float,
+        default=1.0,
+        help="Fraction of --max-wcu to consume, e.g. 0.5 to leave half for live traffic "
+        "(default: 1.0)",
+    )
+
+    parser.add_argument(
+        "--shuffle-window",
+        type=int,
+        default=DEFAULT_WINDOW_SIZE,
+        help=f"Records held by each process's window shuffle (default: {DEFAULT_WINDOW_SIZE})",
+    )
+
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default=None,
+        help="Journal file recording written rows so an interrupted load can be resumed "
+        "(default with --resume: <csv>.checkpoint)",
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip rows recorded in the checkpoint journal by a previous run",
+    )
+
+    parser.add_argument(
+        "--dead-letter",
+        type=str,
+        default=None,
+        help="File receiving items that could not be written "
+        "(default: <input>.dead-letter.ddbjson, created only on failure)",
+    )
+
+    parser.add_argument(
+        "--dedupe",
+        choices=["none", "batch"],
+        default="batch",
+        help="Drop rows whose primary key repeats before they reach BatchWriteItem: "
+        "'batch' coalesces duplicates within a batch, later row wins (default: batch)",
+    )
+
+    parser.add_argument(
+        "--schema",
+        type=str,
+        default=None,
+        help='Column types ("infer", or e.g. "amount:N,active:BOOL"); items are sent in '
+        "wire format through a low-level client (default: every value as a string)",
+    )
+
+    parser.add_argument(
+        "--pace-hot-keys",
+        action="store_true",
+        help="Analyze partition key skew first and pace writes to heavy keys so each "
+        "stays below --hot-key-wcu",
+    )
+
+    parser.add_argument(
+        "--partition-key",
+        type=str,
+        default="id",
+        help="Partition key column analyzed by --pace-hot-keys (default: id)",
+    )
+
+    parser.add_argument(
+        "--hot-key-wcu",
+        type=float,
+        default=DEFAULT_KEY_WCU,
+        help=f"WCU/s allowed per heavy key with --pace-hot-keys (default: {DEFAULT_KEY_WCU:.0f})",
+    )
+
+    args = parser.parse_args()
+
+    # Validate CSV file exists
+    csv_path = Path(args.csv)
+    if not csv_path.exists():
+        print(f"Error: CSV file not found: {args.csv}", file=sys.stderr)
+        sys.exit(1)
+
+    checkpoint = args.checkpoint
+    if args.resume and checkpoint is None:
+        checkpoint = f"{args.csv}.checkpoint"
+
+    dead_letter = args.dead_letter or f"{args.csv}.dead-letter.ddbjson"
+
+    write_budget = "unlimited"
+    if args.max_wcu:
+        write_budget = (
+            f"{args.max_wcu * args.target_utilization:,.0f} WCU/s "
+            f"({args.target_utilization:.0%} of {args.max_wcu:,.0f})"
+        )
+
+    hot_keys = "no"
+    if args.pace_hot_keys:
+        hot_keys = f"paced at {args.hot_key_wcu:,.0f} WCU/s per key ({args.partition_key})"
+
+    print("=" * 60)
+    print("Multi-Process DynamoDB CSV Loader")
+    print("=" * 60)
+    print(f"CSV File:      {args.csv}")
+    print(f"Table:         {args.table}")
+    print(f"Region:        {args.region}")
+    print(f"Processes:     {args.processes if args.processes else 'auto (CPU count)'}")
+    print(f"Workers:       {args.workers} per process")
+    request_limit = f"{args.batch_size} items, {args.max_request_kb:,} KB"
+    if args.max_request_wcu:
+        request_limit += f", {args.max_request_wcu:,} WCU"
+    print(f"Batch Size:    {request_limit}")
+    print(f"Max Retries:   {args.max_retries}")
+    print(f"Write Budget:  {write_budget}")
+    print(f"Checkpoint:    {checkpoint or 'none'}{' (resume)' if args.resume else ''}")
+    print(f"Dead Letters:  {dead_letter}")
+    print(f"Dedupe:        {args.dedupe}")
+    print(f"Schema:        {args.schema or 'none (strings)'}")
+    print(f"Hot Keys:      {hot_keys}")
+    print("=" * 60)
+
+    try:
+        schema = args.schema
+        if schema is not None and schema != INFER_SCHEMA:
+            schema = ItemSchema.parse(schema)
+        loader = ProcessPoolDynamoDBLoader(
+            table_name=args.table,
+            region=args.region,
+            num_processes=args.processes,
+            workers_per_process=args.workers,
+            batch_size=args.batch_size,
+            max_request_bytes=args.max_request_kb * 1024,
+            max_request_wcu=args.max_request_wcu,
+            max_retries=args.max_retries,
+            max_wcu=args.max_wcu,
+            target_utilization=args.target_utilization,
+            checkpoint_file=checkpoint,
+            resume=args.resume,
+            dead_letter_file=dead_letter,
+            dedupe=None if args.dedupe == "none" else args.dedupe,
+            schema=schema,
+            shuffle_window=args.shuffle_window,
+            pace_hot_keys=args.pace_hot_keys,
+            partition_key=args.partition_key,
+            max_key_wcu=args.hot_key_wcu,
+        )
+
+        result = loader.load_csv(args.csv)
+
+        print("\n" + "=" * 60)
+        print("Load Results")
+        print("=" * 60)
+        print(f"Total Records:     {result.total_records:,}")
+        if result.skipped_records:
+            print(f"Skipped (resumed): {result.skipped_records:,}")
+        if result.duplicate_records:
+            print(f"Duplicate Keys:    {result.duplicate_records:,} (superseded, not written)")
+        print(f"Successful Writes: {result.successful_writes:,}")
+        print(f"Failed Writes:     {result.failed_writes:,}")
+        if result.dead_lettered:
+            print(f"Dead-Lettered:     {result.dead_lettered:,} ({dead_letter})")
+        print(f"Success Rate:      {result.success_rate():.2f}%")
+        print(f"Duration:          {result.duration_seconds:.2f} seconds")
+        print("=" * 60)
+
+        if result.errors:
+            print(f"\nErrors encountered ({len(result.errors)}):")
+            for error in result.errors[:10]:  # Show first 10 errors
+                print(f"  - {error}")
+            if len(result.errors) > 10:
+                print(f"  ... and {len(result.errors) - 10} more errors")
+
+        if result.dead_lettered:
+            print("\nReplay the failed items with:")
+            print(f"  python dead_letters.py replay {dead_letter} --table {args.table}")
+
+        if result.failed_writes > 0 or result.errors:
+            sys.exit(1)
+
+    except Exception as e:
+        print(f"\nError: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,18 +14,31 @@
 """Async Python implementation for loading CSV data into DynamoDB."""
 
 import asyncio
-import csv
-import random
+import contextlib
 import time
+from collections.abc import AsyncIterator, Iterable, Mapping, Sequence
 from typing import Any
 
 import aioboto3
 from botocore.config import Config
-from botocore.exceptions import ClientError
 
+from src.autotune import TuningProfiles
+from src.batch_write import BatchWriteItemWriter, put_requests
+from src.checkpoint import ROW_ID_KEY, CheckpointJournal, pop_row_ids, written_row_ids
+from src.concurrency import AIMDController, AsyncAdaptiveLimiter
+from src.dead_letter import DeadLetterFile, outcome_dead_letters
+from src.dedupe import BATCH, DEDUPE_MODES, FILE, key_attributes_from
+from src.item_size import MAX_REQUEST_BYTES, wire_write_units, write_units
+from src.loader_base import BaseLoader
 from src.logging_config import get_logger
 from src.models import BatchResult, LoaderConfig, LoadResult
-from src.retry_handler import RetryHandler
+from src.rate_limiter import TokenBucket
+from src.readers import RecordReader, get_reader, materialize
+from src.retry_handler import DEFAULT_BREAKER_THRESHOLD
+from src.schema import INFER_SCHEMA, ItemSchema
+from src.shuffle import FullShuffle, ShuffleStrategy, WindowShuffle
+from src.skew import HotKeyPacer
+from src.telemetry import LoadTelemetry
 
 logger = get_logger(__name__)
 
@@ -34,9 +47,11 @@ logger = get_logger(__name__)
 DEFAULT_ASYNC_WORKERS = 10
 
 
-class AsyncDynamoDBLoader:
+class AsyncDynamoDBLoader(BaseLoader):
     """Async loader for CSV data into DynamoDB using aioboto3."""
 
+    tuning_name = "async"
+
     def __init__(
         self,
         table_name: str,
@@ -44,6 +59,31 @@ class AsyncDynamoDBLoader:
         max_workers: int | None = None,
         batch_size: int = 25,
         max_retries: int = 3,
+        streaming: bool = False,
+        queue_size: int | None = None,
+        shuffle: ShuffleStrategy | None = None,
+        adaptive_concurrency: bool = False,
+        max_concurrency: int | None = None,
+        max_wcu: float | None = None,
+        target_utilization: float = 1.0,
+        rate_limiter: TokenBucket | None = None,
+        checkpoint_file: str | None = None,
+        resume: bool = False,
+        schema: ItemSchema | str | None = None,
+        session: Any = None,
+        telemetry: LoadTelemetry | None = None,
+        hot_key_pacer: HotKeyPacer | None = None,
+        reader: RecordReader | str | None = None,
+        dead_letter_file: str | None = None,
+        dedupe: str | None = BATCH,
+        key_attributes: Sequence[str] | None = None,
+        max_request_bytes: int = MAX_REQUEST_BYTES,
+        max_request_wcu: int | None = None,
+        auto_tune: bool = False,
+        tuning_profiles: TuningProfiles | None = None,
+        retry_jitter: str = "additive",
+        retry_budget: float | None = None,
+        breaker_threshold: int | None = DEFAULT_BREAKER_THRESHOLD,
     ):
         """Initialize async loader with configuration.
 
@@ -55,32 +95,181 @@ class AsyncDynamoDBLoader:
                         Async loader doesn't benefit from matching CPU cores.
             batch_size: Number of records per batch
             max_retries: Maximum retry attempts for failed operations
+            streaming: If True, stream the CSV through a bounded queue to a fixed
+                        pool of writer coroutines instead of reading it into memory.
+            queue_size: Maximum number of batches buffered between the reader
+                        and the worker coroutines. Defaults to 2 * the number
+                        of workers.
+            shuffle: Strategy used to reorder records before batching.
+                        If None, uses FullShuffle, or WindowShuffle in streaming mode.
+                        IndexShuffle shuffles a CSV file as a whole while holding
+                        only an index of row offsets (and always streams).
+            adaptive_concurrency: If True, max_workers is only the starting point.
+                        In-flight batches grow while writes succeed and are cut
+                        when DynamoDB throttles (AIMD), up to max_concurrency.
+            max_concurrency: Ceiling for adaptive concurrency.
+                        Defaults to max(64, max_workers).
+            max_wcu: Optional write capacity (WCU/s) available to the load.
+                        Every request is charged its estimated WCUs (item size
+                        rounded up per 1KB) against a token bucket.
+            target_utilization: Fraction of max_wcu to consume (0-1], leaving
+                        the rest for other traffic on the table.
+            rate_limiter: Token bucket to charge instead of creating one from
+                        max_wcu. Share one bucket between loaders to give them
+                        a common budget.
+            checkpoint_file: Optional journal of written rows, appended while
+                        the load runs (see src.checkpoint).
+            resume: If True, skip the rows already recorded in checkpoint_file.
+            schema: Column types for the wire-format fast path: an ItemSchema,
+                        or "infer" to infer one from the first rows of the CSV.
+                        Items are then serialized once and sent through a
+                        low-level client, and numeric columns are stored as N.
+                        If None, items go through the resource API as strings.
+            session: aioboto3 Session (or a compatible stand-in such as
+                        src.local_dynamodb.AsyncLocalSession) used to create
+                        resources and clients. A new Session is created if None.
+            telemetry: Optional LoadTelemetry fed with every request's latency,
+                        retries, throttling and consumed capacity (see src.telemetry)
+            hot_key_pacer: Optional HotKeyPacer that holds writes to heavy
+                        partition keys below the per-partition limit
+                        (see src.skew.analyze_csv)
+            reader: Input reader (see src.readers), or its name: "csv",
+                        "jsonl", "dynamodb-json" or "parquet". If None, the
+                        reader is picked from the file extension.
+            dead_letter_file: Optional file that receives the items the load
+                        gave up on, with their error code and attempt count
+                        (see src.dead_letter). It is valid DynamoDB JSON
+                        input, so the failed items can be replayed.
+            dedupe: How duplicate primary keys are removed before they reach
+                        BatchWriteItem, which rejects a request containing the
+                        same key twice (see src.dedupe): "batch" coalesces
+                        duplicates within each batch, "file" also keeps only
+                        the last row of every key across the whole file
+                        (last write wins), None sends rows as they are.
+            key_attributes: Primary key attribute names. If None, they are
+                        read with DescribeTable when dedupe is enabled.
+            max_request_bytes: Item payload per BatchWriteItem request; batches
+                        are closed before they exceed it (see src.batch_packer).
+                        Lower it to even out request latency for large items.
+            max_request_wcu: Optional write capacity units per request, so
+                        batches of large items do not drain the write budget
+                        in bursts.
+            auto_tune: If True, the first seconds of each load probe
+                        concurrency levels from max_workers up to
+                        max_concurrency and lock in the fastest one that is
+                        not throttled (see src.autotune). Replaces
+                        adaptive_concurrency.
+            tuning_profiles: Optional store of tuned levels. With auto_tune,
+                        a load starts at the level saved for its table and
+                        host instead of probing, and saves the level it finds.
+            retry_jitter: Backoff jitter strategy: "additive", "full" or
+                        "decorrelated" (see RetryHandler.calculate_delay).
+            retry_budget: Retries allowed per first request (e.g. 0.2), shared
+                        by all workers, so a throttling storm is not amplified
+                        by retries. Items still unprocessed once it is spent
+                        fail. None (the default) or 0 disables the budget.
+            breaker_threshold: Consecutive permanent errors (missing table,
+                        invalid items, ...) after which batches fail without
+                        calling DynamoDB. None or 0 disables the breaker.
         """
         # Use optimal default for async loader if not specified
         if max_workers is None:
             max_workers = DEFAULT_ASYNC_WORKERS
             logger.info(f"Using {max_workers} async workers (optimal for async loader)")
         
+        if auto_tune and adaptive_concurrency:
+            raise ValueError("auto_tune and adaptive_concurrency cannot be combined")
         self.config = LoaderConfig(
             table_name=table_name,
             region=region,
             max_workers=max_workers,
             batch_size=batch_size,
             max_retries=max_retries,
+            queue_size=queue_size,
+            adaptive_concurrency=adaptive_concurrency or auto_tune,
+            max_concurrency=max_concurrency,
+            max_wcu=max_wcu,
+            target_utilization=target_utilization,
+            max_request_bytes=max_request_bytes,
+            max_request_wcu=max_request_wcu,
+            retry_jitter=retry_jitter,
+            retry_budget=retry_budget,
+            breaker_threshold=breaker_threshold,
         )
+        self.streaming = streaming
+        if resume and not checkpoint_file:
+            raise ValueError("resume requires a checkpoint_file")
+        self.checkpoint_file = checkpoint_file
+        self.resume = resume
+        # Journal for the current load when checkpointing is enabled
+        self.journal: CheckpointJournal | None = None
+        self.dead_letter_file = dead_letter_file
+        # Dead-letter file for the current load
+        self.dead_letters: DeadLetterFile | None = None
+
+        if dedupe is not None and dedupe not in DEDUPE_MODES:
+            raise ValueError(f"dedupe must be one of {DEDUPE_MODES} or None, got {dedupe!r}")
+        self.dedupe = dedupe
+        self.key_attributes = tuple(key_attributes) if key_attributes else None
+        # Duplicate rows dropped, and rows over the item size limit, in the current load
+        self.duplicates = 0
+        self.oversized = 0
+
+        if isinstance(schema, str) and schema != INFER_SCHEMA:
+            raise ValueError(f"schema must be an ItemSchema or {INFER_SCHEMA!r}, got {schema!r}")
+        self.schema = schema
+        # Resolved schema and low-level client for the current load (fast path)
+        self.item_schema: ItemSchema | None = schema if isinstance(schema, ItemSchema) else None
+        self.wire_client: Any = None
+        self.session = session
+        self.reader = get_reader(reader) if isinstance(reader, str) else reader
+        # Controller for the current load when adaptive concurrency is enabled
+        self.concurrency_controller: AIMDController | None = None
+        self.auto_tune = auto_tune
+        self.tuning_profiles = tuning_profiles
+
+        if shuffle is None:
+            shuffle = WindowShuffle() if streaming else FullShuffle()
+        elif streaming and not shuffle.bounded_memory and not shuffle.reads_files:
+            logger.warning(
+                f"{type(shuffle).__name__} holds every record in memory; "
+                "streaming mode will not keep memory bounded"
+            )
+        self.shuffle_strategy = shuffle
+        if dedupe == FILE and shuffle.reads_files:
+            raise ValueError(
+                f"dedupe={FILE!r} reads rows in file order; {type(shuffle).__name__} does not"
+            )
         # Validate configuration on initialization
         self.config.validate()
 
-        self.retry_handler = RetryHandler(
+        # Classifies errors and holds the retry budget and breaker of all workers
+        self.retry_handler = self.config.create_retry_handler()
+        
+        # WCU budget shared by every worker of this loader
+        budget = self.config.write_budget()
+        if rate_limiter is None and budget is not None:
+            rate_limiter = TokenBucket(rate=budget)
+            logger.info(f"Limiting writes to {budget:,.0f} WCU/s")
+        self.rate_limiter = rate_limiter
+
+        # Low-level writer: resubmits only UnprocessedItems, never whole batches
+        self.item_writer = BatchWriteItemWriter(
+            table_name=table_name,
+            retry_handler=self.retry_handler,
             max_retries=max_retries,
-            base_delay=self.config.base_delay,
-            max_delay=self.config.max_delay,
+            on_throttle=self._on_throttle,
+            rate_limiter=rate_limiter,
+            telemetry=telemetry,
+            key_pacer=hot_key_pacer,
         )
-        
+        self.telemetry = telemetry
+        self.hot_key_pacer = hot_key_pacer
+
         # Configure boto3 with optimized connection pool
         # Connection pool size should match or exceed worker count
         self.boto_config = Config(
-            max_pool_connections=max_workers + 5,  # Add buffer for overhead
+            max_pool_connections=self._concurrency_slots() + 5,  # Add buffer for overhead
             retries={'max_attempts': 0}  # Disable boto3 retries (we handle our own)
         )
 
@@ -91,9 +280,47 @@ class AsyncDynamoDBLoader:
         1. Reads all records from the CSV file
         2. Shuffles the records to prevent hot partitions
         3. Splits records into batches
-        4. Processes batches concurrently using async workers
+        4. Writes the batches with a fixed pool of worker coroutines
         5. Returns statistics about the load operation
 
+        When the loader was created with ``streaming=True``, or with an
+        IndexShuffle, the file is never materialised; see
+        ``_load_csv_streaming``. With a checkpoint_file, the
+        rows that were written are journaled, and ``resume=True`` skips the
+        rows a previous run already wrote. With a dead_letter_file, items that
+        could not be written are saved there instead of being dropped.
+
+        Args:
+            csv_file: Path to the CSV file
+
+        Returns:
+            LoadResult with operation statistics
+        """
+        self.item_schema = self._resolve_schema(csv_file)
+        self.journal = self._open_journal(csv_file)
+        self.dead_letters = self._open_dead_letters()
+        try:
+            if self.streaming or self.shuffle_strategy.reads_files:
+                result = await self._load_csv_streaming(csv_file)
+            else:
+                result = await self._load_csv_in_memory(csv_file)
+        finally:
+            if self.journal is not None:
+                self.journal.close()
+            if self.dead_letters is not None:
+                self.dead_letters.close()
+        if self.journal is not None:
+            result.skipped_records = self.journal.skipped
+        if self.dead_letters is not None:
+            result.dead_lettered = self.dead_letters.count
+        return result
+
+    async def _load_csv_in_memory(self, csv_file: str) -> LoadResult:
+        """Load CSV file by reading it into memory and shuffling it as a whole.
+
+        The records are then written by the same fixed worker pool as in
+        streaming mode (see ``_write_batches``).
+
         Args:
             csv_file: Path to the CSV file
 
@@ -102,12 +329,16 @@ class AsyncDynamoDBLoader:
         """
         start_time = time.time()
         logger.info(f"Starting CSV load from {csv_file}")
+        self.duplicates = self.oversized = 0
+        await self._resolve_key_attributes()
 
         # Read CSV file into memory
-        # Note: For very large files (>1M records), consider streaming or using Spark loader
+        # Note: For very large files (>1M records), use streaming=True or the Spark loader
         records = self._read_csv(csv_file)
         total_records = len(records)
         logger.info(f"Read {total_records} records from CSV")
+        if self.telemetry is not None:
+            self.telemetry.total_records = total_records
 
         if total_records == 0:
             logger.warning("No records to load")
@@ -123,117 +354,267 @@ class AsyncDynamoDBLoader:
         # Without shuffling, sequential writes to sorted data (e.g., by timestamp)
         # would target the same partition key range, causing throttling.
         # Shuffling distributes writes randomly across all partitions.
-        logger.info("Shuffling records to prevent hot partitions")
-        random.shuffle(records)
-
-        # Split into batches of configured size (max 25 for DynamoDB BatchWriteItem)
-        batches = self._create_batches(records)
-        logger.info(f"Created {len(batches)} batches of size {self.config.batch_size}")
-
-        # Process batches concurrently with worker pool
-        successful_writes = 0
-        failed_writes = 0
-        errors = []
+        logger.info(
+            f"Shuffling records to prevent hot partitions ({type(self.shuffle_strategy).__name__})"
+        )
+        records = list(self.shuffle_strategy.shuffle(records))
+
+        # Batches of at most batch_size records (max 25 for DynamoDB BatchWriteItem),
+        # packed lazily as the workers take them
+        totals = LoadResult(
+            total_records=0,
+            successful_writes=0,
+            failed_writes=0,
+            duration_seconds=0.0,
+        )
 
         # Use async context manager for proper resource cleanup
         # aioboto3 handles connection pooling and cleanup automatically
-        async with aioboto3.Session().resource(
+        async with self._session().resource(
             "dynamodb", 
             region_name=self.config.region,
             config=self.boto_config
-        ) as dynamodb:
+        ) as dynamodb, self._wire_client():
             table = await dynamodb.Table(self.config.table_name)
+            await self._write_batches(table, self._iter_batches(records), totals)
 
-            # Semaphore limits concurrent operations
-            # This implements the worker pool pattern for controlled parallelism
-            semaphore = asyncio.Semaphore(self.config.max_workers)
-
-            async def process_batch_with_semaphore(
-                batch_id: int, batch: list[dict[str, Any]]
-            ) -> BatchResult:
-                """Process a batch with semaphore to limit concurrency.
-
-                The semaphore ensures only max_workers batches are processed
-                simultaneously, preventing resource exhaustion and rate limiting.
-                """
-                async with semaphore:
-                    return await self._write_batch(table, batch_id, batch)
-
-            # Create all tasks upfront for maximum concurrency
-            # asyncio.gather() executes them concurrently, respecting semaphore limits
-            tasks = [process_batch_with_semaphore(i, batch) for i, batch in enumerate(batches)]
-            # return_exceptions=True prevents one failure from canceling all tasks
-            batch_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            # Aggregate results
-            for result in batch_results:
-                if isinstance(result, Exception):
-                    # Handle exceptions from gather
-                    error_msg = f"Batch processing failed: {result}"
-                    logger.error(error_msg)
-                    errors.append(error_msg)
-                    failed_writes += self.config.batch_size
-                elif isinstance(result, BatchResult):
-                    if result.successful:
-                        successful_writes += result.items_count
-                    else:
-                        failed_writes += result.items_count
-                        if result.error:
-                            errors.append(result.error)
-
-        duration = time.time() - start_time
+        totals.duration_seconds = time.time() - start_time
+        self._count_dropped(totals)
+        if self.concurrency_controller is not None:
+            logger.info(f"Adaptive concurrency settled at {self.concurrency_controller.limit}")
+            self._save_tuning()
         logger.info(
-            f"Load complete: {successful_writes} successful, {failed_writes} failed, "
-            f"duration: {duration:.2f}s"
+            f"Load complete: {totals.successful_writes} successful, "
+            f"{totals.failed_writes} failed, duration: {totals.duration_seconds:.2f}s"
         )
 
-        return LoadResult(
-            total_records=total_records,
-            successful_writes=successful_writes,
-            failed_writes=failed_writes,
-            duration_seconds=duration,
-            errors=errors,
+        return totals
+
+    async def _load_csv_streaming(self, csv_file: str) -> LoadResult:
+        """Load CSV file into DynamoDB without holding it in memory.
+
+        A producer coroutine reads the CSV row by row, groups rows into batches
+        and puts them on a bounded asyncio.Queue. A fixed pool of long-lived
+        writer coroutines drains the queue. Because the queue is bounded, the
+        producer blocks as soon as the writers fall behind, so memory use is
+        roughly queue_size * batch_size rows regardless of file size, and the
+        first batch is written as soon as it has been read.
+
+        Rows pass through the configured shuffle strategy on their way to the
+        queue. The default WindowShuffle holds a fixed window of rows, which
+        keeps sorted input spread across partitions without materialising it.
+
+        Args:
+            csv_file: Path to the CSV file
+
+        Returns:
+            LoadResult with operation statistics
+        """
+        logger.info(f"Starting streaming CSV load from {csv_file}")
+        return await self.load_records(
+            self._iter_csv(csv_file), shuffled=self.shuffle_strategy.reads_files
         )
 
-    def _read_csv(self, csv_file: str) -> list[dict[str, Any]]:
-        """Read CSV file and return list of records.
+    async def load_records(
+        self, records: Iterable[Mapping[str, Any]], shuffled: bool = False
+    ) -> LoadResult:
+        """Stream an iterable of records into DynamoDB through the worker pool.
+
+        This is the streaming pipeline behind ``streaming=True``. It accepts
+        any record iterator (a CSV byte range, another reader, a replay file),
+        shuffles it with the configured strategy and writes it with bounded
+        memory.
 
         Args:
-            csv_file: Path to CSV file
+            records: Records to write, consumed lazily
+            shuffled: True if the records were already shuffled while the file
+                      was read (IndexShuffle); they are then written in order
 
         Returns:
-            List of dictionaries representing CSV records
+            LoadResult with operation statistics
         """
-        records = []
-        with open(csv_file, encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                records.append(row)
-        return records
+        start_time = time.time()
+        self.duplicates = self.oversized = 0
+        await self._resolve_key_attributes()
+
+        result = LoadResult(
+            total_records=0,
+            successful_writes=0,
+            failed_writes=0,
+            duration_seconds=0.0,
+        )
+        async with self._session().resource(
+            "dynamodb",
+            region_name=self.config.region,
+            config=self.boto_config
+        ) as dynamodb, self._wire_client():
+            table = await dynamodb.Table(self.config.table_name)
+            if not shuffled:
+                records = self.shuffle_strategy.shuffle(records)
+            batches = self._iter_batches(records)
+            await self._write_batches(table, batches, result)
+
+        result.duration_seconds = time.time() - start_time
+        self._count_dropped(result)
+        if self.concurrency_controller is not None:
+            logger.info(f"Adaptive concurrency settled at {self.concurrency_controller.limit}")
+            self._save_tuning()
+        logger.info(
+            f"Load complete: {result.successful_writes} successful, "
+            f"{result.failed_writes} failed, duration: {result.duration_seconds:.2f}s"
+        )
+        return result
+
+    async def _write_batches(
+        self, table: Any, batches: Iterable[list[dict[str, Any]]], result: LoadResult
+    ) -> None:
+        """Write batches with a fixed pool of long-lived worker coroutines.
 
-    def _create_batches(self, records: list[dict[str, Any]]) -> list[list[dict[str, Any]]]:
-        """Split records into batches.
+        One worker is started per concurrency slot, whatever the number of
+        batches, and every worker sends its requests through the same client
+        (and connection pool). Batches are handed over through a bounded
+        asyncio.Queue, so the number of coroutines, pending batches and
+        scheduler work stays constant while the load runs instead of growing
+        with the row count.
 
         Args:
-            records: List of records
+            table: aioboto3 DynamoDB table resource
+            batches: Batches to write, consumed lazily
+            result: Totals updated with every batch
+        """
+        slots = self._concurrency_slots()
+        queue: asyncio.Queue[tuple[int, list[dict[str, Any]]] | None] = asyncio.Queue(
+            maxsize=self.config.queue_size or slots * 2
+        )
+        limiter = self._create_limiter()
+
+        async def worker() -> None:
+            """Write batches until a None sentinel arrives."""
+            while True:
+                entry = await queue.get()
+                if entry is None:
+                    return
+                batch_id, batch = entry
+                try:
+                    async with limiter:
+                        batch_result = await self._write_batch(table, batch_id, batch)
+                except Exception as e:
+                    error_msg = f"Batch {batch_id} processing failed: {e}"
+                    logger.error(error_msg)
+                    self._dead_letter_batch(batch_id, batch, e)
+                    batch_result = BatchResult(
+                        batch_id=batch_id,
+                        items_count=len(batch),
+                        successful=False,
+                        retry_count=0,
+                        error=error_msg,
+                    )
+                result.add_batch_result(batch_result)
+
+        workers = [asyncio.create_task(worker()) for _ in range(slots)]
+        try:
+            for batch_id, batch in enumerate(batches):
+                result.total_records += len(batch)
+                await queue.put((batch_id, batch))
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        except BaseException:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+
+    def _create_limiter(self) -> asyncio.Semaphore | AsyncAdaptiveLimiter:
+        """Create the concurrency gate for one load.
 
         Returns:
-            List of batches, where each batch is a list of records
+            A fixed-size semaphore, or a limiter driven by AIMD or the
+            auto-tuner when adaptive concurrency or auto-tuning is enabled
+        """
+        if not self.config.adaptive_concurrency:
+            self.concurrency_controller = None
+            return asyncio.Semaphore(self.config.max_workers)
+        self.concurrency_controller = self._create_controller()
+        return AsyncAdaptiveLimiter(self.concurrency_controller)
+
+    def _session(self) -> Any:
+        """Session used to create DynamoDB resources and clients."""
+        return self.session if self.session is not None else aioboto3.Session()
+
+    @contextlib.asynccontextmanager
+    async def _wire_client(self) -> AsyncIterator[None]:
+        """Open the low-level client used by the wire-format fast path.
+
+        Does nothing unless a schema is set. Otherwise the table's key types
+        are read once with DescribeTable so that the schema cannot change them.
+        """
+        if self.item_schema is None:
+            self.item_writer.item_units = write_units
+            yield
+            return
+
+        async with self._session().client(
+            "dynamodb", region_name=self.config.region, config=self.boto_config
+        ) as client:
+            try:
+                response = await client.describe_table(TableName=self.config.table_name)
+                definitions = response["Table"]["AttributeDefinitions"]
+                self.item_schema = self.item_schema.with_key_types(definitions)
+            except Exception as e:
+                logger.warning(f"Could not read key types with DescribeTable, using schema as is: {e}")
+            self.item_writer.item_units = wire_write_units
+            self.wire_client = client
+            try:
+                yield
+            finally:
+                self.wire_client = None
+
+    async def _resolve_key_attributes(self) -> None:
+        """Read the table's primary key with DescribeTable when dedupe needs it."""
+        if self.dedupe is None or self.key_attributes is not None:
+            return
+        try:
+            async with self._session().client(
+                "dynamodb", region_name=self.config.region, config=self.boto_config
+            ) as client:
+                response = await client.describe_table(TableName=self.config.table_name)
+            self.key_attributes = key_attributes_from(response)
+        except Exception as e:
+            if self.dedupe == FILE:
+                raise ValueError(
+                    f"dedupe={FILE!r} needs the table's key attributes; "
+                    f"pass key_attributes or allow DescribeTable: {e}"
+                ) from e
+            logger.warning(f"Could not read the table key with DescribeTable, not deduplicating: {e}")
+            return
+        logger.info(f"Deduplicating rows by {', '.join(self.key_attributes)} ({self.dedupe})")
+
+    def _on_duplicate(self, record: Mapping[str, Any]) -> None:
+        """Count a row replaced by a later row with the same key.
+
+        Its checkpoint row id is journaled right away: the later row carries
+        the value the table ends up with, so a resumed load must not write it.
         """
-        batches = []
-        for i in range(0, len(records), self.config.batch_size):
-            batch = records[i : i + self.config.batch_size]
-            batches.append(batch)
-        return batches
+        self.duplicates += 1
+        if self.journal is not None:
+            row_id = record.get(ROW_ID_KEY)
+            if row_id is not None:
+                # Called from the batch packer on the event loop: buffer only
+                self.journal.add([row_id])
 
     async def _write_batch(
         self, table: Any, batch_id: int, items: list[dict[str, Any]]
     ) -> BatchResult:
         """Write a batch of items to DynamoDB with retry logic.
 
-        Uses the retry handler to implement exponential backoff with jitter.
-        This handles transient errors (throttling, network issues) gracefully
-        while failing fast on permanent errors (validation, permissions).
+        Calls BatchWriteItem directly through the table's client, or, when a
+        schema is set, serializes the batch to wire format once and sends it
+        through the low-level client. Only the items DynamoDB returns in
+        UnprocessedItems are resubmitted, each with its own attempt counter and
+        exponential backoff with jitter. Exceptions that fail the whole request
+        (throttling, network issues) are retried by the retry handler. Items
+        that already landed are never rewritten.
 
         Args:
             table: aioboto3 DynamoDB table resource
@@ -243,57 +624,21 @@ class AsyncDynamoDBLoader:
         Returns:
             BatchResult with operation status
         """
-        retry_count = 0
-
-        async def write_operation() -> None:
-            """Actual write operation to be retried.
-
-            Uses batch_writer for efficient batch writes with automatic
-            retry of unprocessed items within the batch.
-            """
-            nonlocal retry_count
+        # Columnar readers yield row views; rows become dictionaries only here
+        items = materialize(items)
+        journal = self.journal
+        row_ids = pop_row_ids(items) if journal is not None else None
+        if self.item_schema is None:
+            outcome = await self.item_writer.write_async(table.meta.client, put_requests(items))
+        else:
+            wire_items = self.item_schema.serialize_batch(items)
+            outcome = await self.item_writer.write_async(self.wire_client, put_requests(wire_items))
+        result = self._batch_result(batch_id, items, outcome)
+        if self.dead_letters is not None and outcome.failed:
+            self.dead_letters.write(outcome_dead_letters(batch_id, outcome, self.item_schema))
+        if journal is not None and row_ids is not None:
+            # The append and fsync run on a thread, not on the event loop
+            if journal.add(written_row_ids(items, row_ids, result.failed_items)):
+                await asyncio.to_thread(journal.flush)
+        return result
 
-            # batch_writer automatically handles:
-            # - Batching items into groups of 25 (DynamoDB limit)
-            # - Retrying unprocessed items from partial failures
-            # - Efficient connection reuse
-            async with table.batch_writer() as batch:
-                for item in items:
-                    await batch.put_item(Item=item)
-
-        try:
-            # Delegate retry logic to RetryHandler
-            # This implements exponential backoff: delay = base_delay * (2^attempt) + jitter
-            await self.retry_handler.retry_async(write_operation)
-
-            logger.debug(f"Batch {batch_id} written successfully ({len(items)} items)")
-            return BatchResult(
-                batch_id=batch_id,
-                items_count=len(items),
-                successful=True,
-                retry_count=retry_count,
-            )
-
-        except ClientError as e:
-            # DynamoDB-specific errors (throttling, validation, etc.)
-            error_code = e.response.get("Error", {}).get("Code", "Unknown")
-            error_msg = f"Batch {batch_id} failed after retries: {error_code} - {e}"
-            logger.error(error_msg)
-            return BatchResult(
-                batch_id=batch_id,
-                items_count=len(items),
-                successful=False,
-                retry_count=self.config.max_retries,
-                error=error_msg,
-            )
-        except Exception as e:
-            # Unexpected errors (network, programming errors, etc.)
-            error_msg = f"Batch {batch_id} failed with unexpected error: {e}"
-            logger.error(error_msg)
-            return BatchResult(
-                batch_id=batch_id,
-                items_count=len(items),
-                successful=False,
-                retry_count=self.config.max_retries,
-                error=error_msg,
-            )
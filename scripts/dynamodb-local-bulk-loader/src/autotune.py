@@ -0,0 +1,374 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Self-calibrating concurrency for the first seconds of a load.
+
+The default worker counts (10 coroutines, one thread per CPU core) were
+measured on one machine against one table. With auto-tuning, a load spends
+its first few seconds probing instead. It writes at the starting concurrency
+for a probe window, then doubles the concurrency while throughput keeps
+improving and throttling stays rare. The best level is locked in for the
+rest of the load.
+
+The result is saved in a profile per (loader, table, region, host), so later
+loads of the same table from the same machine start at the tuned level
+without probing again.
+"""
+
+import json
+import os
+import socket
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from src.concurrency import DEFAULT_MAX_CONCURRENCY, AIMDController
+from src.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Seconds each concurrency level is measured for
+DEFAULT_PROBE_SECONDS = 2.0
+# Share of throttled requests above which a level is rejected
+DEFAULT_MAX_THROTTLE_RATE = 0.02
+# Relative throughput gain a higher level must bring to be kept
+DEFAULT_MIN_GAIN = 0.05
+DEFAULT_PROFILE_FILE = str(Path.home() / ".dynamodb-local-bulk-loader" / "tuning-profiles.json")
+
+
+@dataclass
+class Probe:
+    """Throughput measured at one concurrency level."""
+
+    limit: int
+    batches_per_second: float
+    throttle_rate: float
+
+
+class AutoTuner(AIMDController):
+    """Probes concurrency levels at the start of a load, then locks in the best.
+
+    A drop-in replacement for AIMDController: the adaptive limiters read
+    ``limit`` and the loaders report every successful batch and throttled
+    request. Levels are measured in successful batches per second over
+    ``probe_seconds`` windows. A level is rejected when more than
+    ``max_throttle_rate`` of its requests were throttled.
+
+    Once locked, the limit no longer grows. It is still cut by
+    ``decrease_factor`` after any window whose throttle rate exceeds
+    ``max_throttle_rate``, so a table that loses capacity mid-load is not
+    hammered at the tuned level.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        max_limit: int = DEFAULT_MAX_CONCURRENCY,
+        min_limit: int = 1,
+        probe_seconds: float = DEFAULT_PROBE_SECONDS,
+        max_throttle_rate: float = DEFAULT_MAX_THROTTLE_RATE,
+        min_gain: float = DEFAULT_MIN_GAIN,
+        step_factor: float = 2.0,
+        decrease_factor: float = 0.5,
+        locked: bool = False,
+        probes: Sequence[Probe] = (),
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize tuner.
+
+        Args:
+            initial_limit: First concurrency level probed
+            max_limit: Highest level probed
+            min_limit: Lower bound for the limit
+            probe_seconds: Seconds each level is measured for
+            max_throttle_rate: Share of throttled requests above which a
+                        level is rejected
+            min_gain: Relative throughput gain a higher level must bring
+                        for probing to continue
+            step_factor: Multiplier from one probed level to the next
+            decrease_factor: Multiplier applied to a locked limit after a
+                        window with too much throttling
+            locked: Start locked at initial_limit without probing (for a
+                        saved profile)
+            probes: Levels measured by an earlier load, compared with the
+                        ones probed now
+            clock: Monotonic clock, replaceable in tests
+        """
+        super().__init__(
+            initial_limit,
+            max_limit=max_limit,
+            min_limit=min_limit,
+            decrease_factor=decrease_factor,
+        )
+        if probe_seconds <= 0:
+            raise ValueError(f"probe_seconds must be greater than 0, got {probe_seconds}")
+        if not 0 <= max_throttle_rate < 1:
+            raise ValueError(f"max_throttle_rate must be between 0 and 1, got {max_throttle_rate}")
+        if step_factor <= 1:
+            raise ValueError(f"step_factor must be greater than 1, got {step_factor}")
+        self.probe_seconds = probe_seconds
+        self.max_throttle_rate = max_throttle_rate
+        self.min_gain = min_gain
+        self.step_factor = step_factor
+        self.locked = locked
+        # True when the limit came from a saved profile rather than probing
+        self.from_profile = locked
+        self.probes: list[Probe] = list(probes)
+        self._clock = clock
+        self._window_start: float | None = None
+        self._successes = 0
+        self._throttles = 0
+
+    @property
+    def best(self) -> Probe | None:
+        """Lowest probed level reaching the top throughput, without too much throttling.
+
+        A higher level only counts as better when it is at least min_gain
+        faster, since more concurrency for the same throughput only adds load.
+        """
+        best = None
+        for probe in self.probes:
+            if probe.throttle_rate > self.max_throttle_rate:
+                continue
+            if best is None or probe.batches_per_second >= best.batches_per_second * (
+                1 + self.min_gain
+            ):
+                best = probe
+        return best
+
+    def on_success(self) -> None:
+        """Record a successful batch write."""
+        with self._lock:
+            self._successes += 1
+            self._advance()
+
+    def on_throttle(self) -> None:
+        """Record a throttled request."""
+        with self._lock:
+            self.throttle_events += 1
+            self._throttles += 1
+            self._advance()
+
+    def _advance(self) -> None:
+        """Close the current window once it has lasted probe_seconds."""
+        now = self._clock()
+        if self._window_start is None:
+            # Windows start with the first response, not with connection setup
+            self._window_start = now
+            return
+        elapsed = now - self._window_start
+        if elapsed < self.probe_seconds:
+            return
+        events = self._successes + self._throttles
+        probe = Probe(
+            limit=self.limit,
+            batches_per_second=self._successes / elapsed,
+            throttle_rate=self._throttles / events if events else 0.0,
+        )
+        self._window_start = now
+        self._successes = self._throttles = 0
+
+        if self.locked:
+            if probe.throttle_rate > self.max_throttle_rate and self.limit > self.min_limit:
+                previous = self.limit
+                self._limit = max(self._limit * self.decrease_factor, float(self.min_limit))
+                logger.info(
+                    f"{probe.throttle_rate:.1%} of requests throttled, "
+                    f"reducing tuned concurrency {previous} -> {self.limit}"
+                )
+            return
+
+        self.probes.append(probe)
+        logger.info(
+            f"Auto-tune: concurrency {probe.limit} wrote {probe.batches_per_second:,.1f} "
+            f"batches/s, {probe.throttle_rate:.1%} throttled"
+        )
+        best = self.best
+        if best is None:
+            # Throttled from the first level: back off instead of probing higher
+            self._lock_in(max(int(self.limit * self.decrease_factor), self.min_limit))
+        elif best is not probe or self.limit >= self.max_limit:
+            self._lock_in(best.limit)
+        else:
+            self._step_up()
+
+    def _step_up(self) -> None:
+        """Move on to the next level to probe."""
+        next_limit = max(self.limit + 1, round(self.limit * self.step_factor))
+        self._limit = float(min(next_limit, self.max_limit))
+
+    def _lock_in(self, limit: int) -> None:
+        """Fix the limit for the rest of the load."""
+        self._limit = float(limit)
+        self.locked = True
+        logger.info(f"Auto-tune: locked in concurrency {limit} after {len(self.probes)} probes")
+
+
+@dataclass
+class TuningProfile:
+    """Settings found by auto-tuning a load."""
+
+    workers: int
+    batch_size: int
+    batches_per_second: float
+    tuned_at: str
+    # False when the load ended while probing; the next load probes on from workers
+    complete: bool = True
+
+
+def host_id() -> str:
+    """Identifier of this machine for tuning profiles."""
+    return f"{socket.gethostname()}/{os.cpu_count()}cpu"
+
+
+def profile_key(loader: str, table_name: str, region: str, host: str | None = None) -> str:
+    """Key of the tuning profile of a loader, table and host."""
+    return f"{loader}/{region}/{table_name}@{host or host_id()}"
+
+
+def create_tuner(
+    initial_limit: int,
+    max_limit: int,
+    batch_size: int,
+    profile: TuningProfile | None = None,
+) -> AutoTuner:
+    """Create the tuner of a load, starting from a saved profile when there is one.
+
+    Args:
+        initial_limit: First concurrency level probed without a profile
+        max_limit: Highest level probed
+        batch_size: Batch size of the load; a profile tuned with another
+                    batch size is not reused
+        profile: Saved profile for this loader, table and host
+
+    Returns:
+        AutoTuner locked at the profile's workers, probing the levels above
+        them when the profile is incomplete, or probing from initial_limit
+    """
+    if profile is not None and profile.batch_size == batch_size:
+        workers = min(profile.workers, max_limit)
+        if profile.complete or workers >= max_limit:
+            logger.info(
+                f"Using tuned concurrency {workers} from a profile saved {profile.tuned_at}"
+            )
+            return AutoTuner(initial_limit=workers, max_limit=max_limit, locked=True)
+        measured = Probe(
+            limit=workers, batches_per_second=profile.batches_per_second, throttle_rate=0.0
+        )
+        tuner = AutoTuner(initial_limit=workers, max_limit=max_limit, probes=[measured])
+        tuner._step_up()
+        logger.info(
+            f"Resuming auto-tuning at concurrency {tuner.limit} "
+            f"({workers} wrote {profile.batches_per_second:,.1f} batches/s)"
+        )
+        return tuner
+    logger.info(f"Auto-tuning concurrency from {initial_limit} up to {max_limit}")
+    return AutoTuner(initial_limit=initial_limit, max_limit=max_limit)
+
+
+class TuningProfiles:
+    """Tuning profiles saved in a JSON file, keyed by ``profile_key``."""
+
+    def __init__(self, path: str = DEFAULT_PROFILE_FILE, refresh: bool = False):
+        """Initialize profile store.
+
+        Args:
+            path: JSON file holding the profiles (created on first save)
+            refresh: Ignore saved profiles, so loads probe again and
+                        overwrite them
+        """
+        self.path = path
+        self.refresh = refresh
+
+    def get(self, key: str) -> TuningProfile | None:
+        """Saved profile for a key, or None."""
+        if self.refresh:
+            return None
+        entry = self._read().get(key)
+        if entry is None:
+            return None
+        try:
+            complete = entry.get("complete", True)
+            if not isinstance(complete, bool):
+                raise ValueError(f"complete must be true or false, got {complete!r}")
+            return TuningProfile(
+                workers=int(entry["workers"]),
+                batch_size=int(entry["batch_size"]),
+                batches_per_second=float(entry["batches_per_second"]),
+                tuned_at=str(entry["tuned_at"]),
+                complete=complete,
+            )
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Ignoring malformed tuning profile {key} in {self.path}: {e}")
+            return None
+
+    def save(self, key: str, profile: TuningProfile) -> None:
+        """Add or replace the profile of a key."""
+        profiles = self._read()
+        profiles[key] = asdict(profile)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(profiles, f, indent=2, sort_keys=True)
+        os.replace(temporary, self.path)
+
+    def record(self, key: str, batch_size: int, tuner: AutoTuner) -> TuningProfile | None:
+        """Save the level a load's tuner found.
+
+        A load that ended while probing saves its best level so far as an
+        incomplete profile, so that short loads of the same table carry on
+        probing where the previous one stopped. Nothing is saved when the
+        limit came from a complete profile, or when no level was free of
+        throttling.
+
+        Returns:
+            The saved profile, or None
+        """
+        if tuner.from_profile:
+            return None
+        best = tuner.best
+        if best is None:
+            logger.info("No probed level was free of throttling; no tuning profile saved")
+            return None
+        profile = TuningProfile(
+            workers=tuner.limit if tuner.locked else best.limit,
+            batch_size=batch_size,
+            batches_per_second=round(best.batches_per_second, 1),
+            tuned_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            complete=tuner.locked,
+        )
+        self.save(key, profile)
+        if profile.complete:
+            logger.info(f"Saved tuned concurrency {profile.workers} for {key} to {self.path}")
+        else:
+            logger.info(
+                f"Load finished while auto-tuning; the next load of {key} probes on "
+                f"from concurrency {profile.workers}"
+            )
+        return profile
+
+    def _read(self) -> dict[str, Any]:
+        """All saved profiles, empty when the file is missing or unreadable."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                profiles = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read tuning profiles from {self.path}: {e}")
+            return {}
+        return profiles if isinstance(profiles, dict) else {}
@@ -0,0 +1,178 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Size-aware packing of records into BatchWriteItem requests.
+
+A BatchWriteItem request holds at most 25 items and 16MB, and every item is
+at most 400KB. Slicing records into groups of ``batch_size`` ignores their
+size: one request of large items can take far longer than its neighbours and
+burn a large share of a write budget at once, and an item over 400KB fails
+the whole request it is in, over and over on every retry.
+
+``BatchPacker`` fills each request in load order until the next record would
+exceed one of three limits:
+
+- ``max_items`` records (the loader's batch_size)
+- ``max_bytes`` of item payload (16MB by default; lower it to even out
+  request latency)
+- ``max_wcu`` write capacity units (optional), so no single request drains
+  the rate limiter's bucket in one go
+
+Record sizes are computed as DynamoDB computes item sizes (see
+src.item_size). Records over the 400KB item limit never reach the wire: they
+are handed to ``on_oversized``, which the loaders route to the dead-letter
+file. Repeated primary keys are coalesced on the way (see src.dedupe).
+
+With the default limits 25 valid items can never reach 16MB (25 x 400KB is
+10MB), so the byte limit only binds when it is lowered.
+"""
+
+import math
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from typing import Any
+
+from src.checkpoint import ROW_ID_KEY
+from src.dedupe import Key, record_key
+from src.item_size import (
+    MAX_BATCH_ITEMS,
+    MAX_ITEM_BYTES,
+    MAX_REQUEST_BYTES,
+    WCU_BYTES,
+    attribute_value_size,
+    wire_value_size,
+)
+
+
+def record_size(record: Mapping[str, Any], wire_format: bool = False) -> int:
+    """Stored size of a record in bytes, ignoring the checkpoint row id.
+
+    Args:
+        record: Record as Python values, or an item in wire format
+        wire_format: Whether the values are AttributeValues
+
+    Returns:
+        Item size as DynamoDB computes it
+    """
+    value_size = wire_value_size if wire_format else attribute_value_size
+    size = 0
+    for name, value in record.items():
+        if name == ROW_ID_KEY:
+            continue
+        size += len(name) if name.isascii() else len(name.encode("utf-8"))
+        # Fast path for CSV values: an ASCII string is one byte per character
+        if type(value) is str and value.isascii():
+            size += len(value)
+        else:
+            size += value_size(value)
+    return size
+
+
+class BatchPacker:
+    """Fills BatchWriteItem requests up to their count, payload and WCU limits."""
+
+    def __init__(
+        self,
+        max_items: int = MAX_BATCH_ITEMS,
+        max_bytes: int = MAX_REQUEST_BYTES,
+        max_wcu: int | None = None,
+        wire_format: bool = False,
+        key_attributes: Sequence[str] | None = None,
+        on_duplicate: Callable[[Any], None] | None = None,
+        on_oversized: Callable[[Any, int], None] | None = None,
+    ):
+        """Initialize packer.
+
+        Args:
+            max_items: Records per request
+            max_bytes: Item payload bytes per request
+            max_wcu: Optional write capacity units per request. A single
+                     item above it still gets a request of its own.
+            wire_format: Whether records are already AttributeValues
+            key_attributes: Primary key attribute names. If set, a record
+                     whose key is already in the request being filled
+                     replaces the earlier record (later record wins).
+            on_duplicate: Called with every record that was replaced
+            on_oversized: Called with every record over the 400KB item
+                     limit and its size; such records are never packed
+        """
+        if max_items <= 0:
+            raise ValueError(f"max_items must be greater than 0, got {max_items}")
+        if max_bytes < MAX_ITEM_BYTES:
+            raise ValueError(f"max_bytes must be at least {MAX_ITEM_BYTES}, got {max_bytes}")
+        if max_wcu is not None and max_wcu <= 0:
+            raise ValueError(f"max_wcu must be greater than 0, got {max_wcu}")
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.max_wcu = max_wcu
+        self.wire_format = wire_format
+        self.key_attributes = tuple(key_attributes) if key_attributes else None
+        self.on_duplicate = on_duplicate
+        self.on_oversized = on_oversized
+
+    def pack(self, records: Iterable[Any]) -> Iterator[list[Any]]:
+        """Group records into requests.
+
+        Args:
+            records: Records in load order
+
+        Yields:
+            Non-empty lists of records within every limit
+        """
+        batch: list[Any] = []
+        sizes: list[int] = []
+        positions: dict[Key, int] = {}
+        total_bytes = total_wcu = 0
+        for record in records:
+            size = record_size(record, self.wire_format)
+            if size > MAX_ITEM_BYTES:
+                if self.on_oversized is not None:
+                    self.on_oversized(record, size)
+                continue
+            wcu = max(1, math.ceil(size / WCU_BYTES))
+
+            key = None
+            if self.key_attributes is not None:
+                key = record_key(record, self.key_attributes)
+            if key is not None and key in positions:
+                # Later record wins: take the earlier one out of the request
+                position = positions.pop(key)
+                if self.on_duplicate is not None:
+                    self.on_duplicate(batch[position])
+                del batch[position]
+                removed = sizes.pop(position)
+                total_bytes -= removed
+                total_wcu -= max(1, math.ceil(removed / WCU_BYTES))
+                # Shifting the later positions costs O(batch size) per duplicate,
+                # which stays small: a request holds at most max_items records
+                positions = {k: i if i < position else i - 1 for k, i in positions.items()}
+
+            if batch and (
+                total_bytes + size > self.max_bytes
+                or (self.max_wcu is not None and total_wcu + wcu > self.max_wcu)
+            ):
+                yield batch
+                batch, sizes, positions = [], [], {}
+                total_bytes = total_wcu = 0
+
+            if key is not None:
+                positions[key] = len(batch)
+            batch.append(record)
+            sizes.append(size)
+            total_bytes += size
+            total_wcu += wcu
+            if len(batch) >= self.max_items:
+                yield batch
+                batch, sizes, positions = [], [], {}
+                total_bytes = total_wcu = 0
+        if batch:
+            yield batch
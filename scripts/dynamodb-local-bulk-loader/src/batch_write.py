@@ -0,0 +1,369 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Low-level BatchWriteItem writer with item-level retries.
+
+``table.batch_writer()`` hides UnprocessedItems, so the loaders used to retry
+a whole batch when anything in it failed. That rewrote (and paid for) items
+that had already been stored. This writer calls BatchWriteItem directly. It
+resubmits only the requests DynamoDB returns in ``UnprocessedItems``, and
+tracks an attempt counter per request, so retry cost scales with the number
+of items that actually failed.
+"""
+
+import asyncio
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from src.error_handler import is_throttling_error
+from src.item_size import write_units
+from src.logging_config import get_logger
+from src.rate_limiter import TokenBucket
+from src.retry_handler import RetryHandler
+from src.skew import HotKeyPacer
+from src.telemetry import LoadTelemetry
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class PendingWrite:
+    """A single write request and the number of times it came back unprocessed."""
+
+    request: dict[str, Any]
+    #: Position of the request in the list passed to the writer
+    index: int
+    attempts: int = 0
+    #: Estimated WCUs, filled in the first time the request is charged
+    units: int | None = None
+    #: Number of BatchWriteItem calls that carried the request
+    sent: int = 0
+
+    @property
+    def item(self) -> dict[str, Any]:
+        """Item (PutRequest) or key (DeleteRequest) carried by the request."""
+        if "PutRequest" in self.request:
+            item: dict[str, Any] = self.request["PutRequest"]["Item"]
+        else:
+            item = self.request["DeleteRequest"]["Key"]
+        return item
+
+
+@dataclass
+class BatchWriteOutcome:
+    """Result of writing one batch of requests."""
+
+    total: int
+    failed: list[PendingWrite] = field(default_factory=list)
+    rounds: int = 0
+    error: Exception | None = None
+    #: Why unprocessed requests were given up on, when no error was raised
+    #: (the last reason if there were several)
+    reason: str | None = None
+
+    @property
+    def successful(self) -> bool:
+        """True if every request in the batch was written."""
+        return not self.failed
+
+
+PUT = "put"
+DELETE = "delete"
+OPERATIONS = (PUT, DELETE)
+
+# Reasons for giving up on requests that came back unprocessed
+BUDGET_EXHAUSTED = "still unprocessed, retry budget exhausted"
+UNMATCHED = "still unprocessed, UnprocessedItems held a request that was not sent"
+
+# Wraps a batch of items or keys in BatchWriteItem request entries
+RequestBuilder = Callable[[list[dict[str, Any]]], list[dict[str, Any]]]
+
+
+def put_requests(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Wrap items in BatchWriteItem PutRequest entries.
+
+    Args:
+        items: Items to write
+
+    Returns:
+        List of PutRequest entries
+    """
+    return [{"PutRequest": {"Item": item}} for item in items]
+
+
+def delete_requests(keys: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Wrap primary keys in BatchWriteItem DeleteRequest entries.
+
+    Args:
+        keys: Primary keys of the items to delete
+
+    Returns:
+        List of DeleteRequest entries
+    """
+    return [{"DeleteRequest": {"Key": key}} for key in keys]
+
+
+class BatchWriteItemWriter:
+    """Write batches with BatchWriteItem, retrying only unprocessed requests.
+
+    Whole-request failures (exceptions raised by the call) are retried by the
+    RetryHandler, because nothing in the request was written. Requests returned
+    in ``UnprocessedItems`` are resubmitted on their own after a backoff, and
+    each one is given up on once it has come back more than ``max_retries`` times.
+    Every resubmitted round takes a retry from the handler's RetryBudget (only
+    a batch's first call earns budget), and its call is refused like any other
+    while the circuit breaker is open.
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        retry_handler: RetryHandler,
+        max_retries: int,
+        on_throttle: Callable[[], None] | None = None,
+        rate_limiter: TokenBucket | None = None,
+        item_units: Callable[[dict[str, Any]], int] = write_units,
+        telemetry: LoadTelemetry | None = None,
+        key_pacer: HotKeyPacer | None = None,
+    ):
+        """Initialize writer.
+
+        Args:
+            table_name: Name of the DynamoDB table
+            retry_handler: Handler for whole-request retries and backoff delays
+            max_retries: Maximum resubmissions per unprocessed request
+            on_throttle: Optional callback invoked when DynamoDB throttles
+                         (throttling exception or non-empty UnprocessedItems)
+            rate_limiter: Optional token bucket charged before every request,
+                          one token per estimated write capacity unit
+            item_units: Function estimating an item's WCUs (``wire_write_units``
+                        when items are already in wire format)
+            telemetry: Optional telemetry fed with every call's latency,
+                        errors and consumed capacity. Requests then ask for
+                        ``ReturnConsumedCapacity=TOTAL``.
+            key_pacer: Optional HotKeyPacer charged with the WCUs of hot
+                        partition keys before every request (see src.skew)
+        """
+        self.table_name = table_name
+        self.retry_handler = retry_handler
+        self.max_retries = max_retries
+        self.on_throttle = on_throttle
+        self.rate_limiter = rate_limiter
+        self.item_units = item_units
+        self.telemetry = telemetry
+        self.key_pacer = key_pacer
+
+    def write_sync(self, client: Any, requests: list[dict[str, Any]]) -> BatchWriteOutcome:
+        """Write requests with a synchronous boto3 client.
+
+        Args:
+            client: boto3 DynamoDB client (``table.meta.client`` for Python types)
+            requests: PutRequest / DeleteRequest entries (max 25)
+
+        Returns:
+            BatchWriteOutcome describing requests that could not be written
+        """
+        outcome = BatchWriteOutcome(total=len(requests))
+        pending = [PendingWrite(request, index=i) for i, request in enumerate(requests)]
+
+        def send() -> dict[str, Any]:
+            outcome.rounds += 1
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire_sync(self._cost(pending))
+            if self.key_pacer is not None:
+                self.key_pacer.acquire_sync(self._charges(pending))
+            for p in pending:
+                p.sent += 1
+            started = time.perf_counter()
+            try:
+                response: dict[str, Any] = client.batch_write_item(**self._params(pending))
+            except Exception as e:
+                self._report_error(e, started)
+                raise
+            self._report_response(response, len(pending), started)
+            return response
+
+        # Only the first round earns retry budget; later rounds are retries
+        call = self.retry_handler.retry_sync
+        while pending:
+            try:
+                response = call(send)
+            except Exception as e:
+                outcome.failed.extend(pending)
+                outcome.error = e
+                self._report_failed(outcome)
+                return outcome
+            call = self.retry_handler.resubmit_sync
+
+            pending = self._collect_unprocessed(response, pending, outcome)
+            if pending and not self.retry_handler.try_resubmit():
+                outcome.failed.extend(pending)
+                outcome.reason = BUDGET_EXHAUSTED
+                break
+            if pending:
+                time.sleep(self._backoff(pending))
+
+        self._report_failed(outcome)
+        return outcome
+
+    async def write_async(self, client: Any, requests: list[dict[str, Any]]) -> BatchWriteOutcome:
+        """Write requests with an aioboto3 client.
+
+        Args:
+            client: aioboto3 DynamoDB client (``table.meta.client`` for Python types)
+            requests: PutRequest / DeleteRequest entries (max 25)
+
+        Returns:
+            BatchWriteOutcome describing requests that could not be written
+        """
+        outcome = BatchWriteOutcome(total=len(requests))
+        pending = [PendingWrite(request, index=i) for i, request in enumerate(requests)]
+
+        async def send() -> dict[str, Any]:
+            outcome.rounds += 1
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async(self._cost(pending))
+            if self.key_pacer is not None:
+                await self.key_pacer.acquire_async(self._charges(pending))
+            for p in pending:
+                p.sent += 1
+            started = time.perf_counter()
+            try:
+                response: dict[str, Any] = await client.batch_write_item(**self._params(pending))
+            except Exception as e:
+                self._report_error(e, started)
+                raise
+            self._report_response(response, len(pending), started)
+            return response
+
+        # Only the first round earns retry budget; later rounds are retries
+        call = self.retry_handler.retry_async
+        while pending:
+            try:
+                response = await call(send)
+            except Exception as e:
+                outcome.failed.extend(pending)
+                outcome.error = e
+                self._report_failed(outcome)
+                return outcome
+            call = self.retry_handler.resubmit_async
+
+            pending = self._collect_unprocessed(response, pending, outcome)
+            if pending and not self.retry_handler.try_resubmit():
+                outcome.failed.extend(pending)
+                outcome.reason = BUDGET_EXHAUSTED
+                break
+            if pending:
+                await asyncio.sleep(self._backoff(pending))
+
+        self._report_failed(outcome)
+        return outcome
+
+    def _cost(self, pending: list[PendingWrite]) -> float:
+        """Tokens (estimated WCUs) charged to the rate limiter for sending ``pending``."""
+        total = 0
+        for p in pending:
+            if p.units is None:
+                p.units = self.item_units(p.item)
+            total += p.units
+        return float(total)
+
+    def _charges(self, pending: list[PendingWrite]) -> list[tuple[dict[str, Any], float]]:
+        """(item, WCUs) pairs charged to the hot-key pacer for sending ``pending``."""
+        self._cost(pending)
+        return [(p.item, float(p.units or 0)) for p in pending]
+
+    def _params(self, pending: list[PendingWrite]) -> dict[str, Any]:
+        """BatchWriteItem parameters for sending ``pending``."""
+        params: dict[str, Any] = {"RequestItems": {self.table_name: [p.request for p in pending]}}
+        if self.telemetry is not None:
+            params["ReturnConsumedCapacity"] = "TOTAL"
+        return params
+
+    def _report_response(self, response: dict[str, Any], sent: int, started: float) -> None:
+        """Feed a completed call into telemetry."""
+        if self.telemetry is not None:
+            self.telemetry.record_response(time.perf_counter() - started, sent, response)
+
+    def _report_error(self, error: Exception, started: float) -> None:
+        """Forward throttling exceptions to the throttle callback and telemetry."""
+        if self.telemetry is not None:
+            self.telemetry.record_error(time.perf_counter() - started, error)
+        if self.on_throttle is not None and is_throttling_error(error):
+            self.on_throttle()
+
+    def _report_failed(self, outcome: BatchWriteOutcome) -> None:
+        """Count requests that were given up on."""
+        if self.telemetry is not None and outcome.failed:
+            self.telemetry.record_failed(len(outcome.failed))
+
+    def _collect_unprocessed(
+        self,
+        response: dict[str, Any],
+        pending: list[PendingWrite],
+        outcome: BatchWriteOutcome,
+    ) -> list[PendingWrite]:
+        """Match UnprocessedItems back to pending requests and bump their attempts.
+
+        Requests that have exhausted their retries are moved to ``outcome.failed``
+        and ``outcome.reason`` says so.
+        If an unprocessed request matches none of ``pending``, every pending
+        request is failed.
+
+        Returns:
+            Requests to resubmit in the next round
+        """
+        unprocessed = response.get("UnprocessedItems", {}).get(self.table_name, [])
+        if not unprocessed:
+            return []
+
+        if self.on_throttle is not None:
+            self.on_throttle()
+
+        remaining = list(pending)
+        matched: list[PendingWrite] = []
+        for request in unprocessed:
+            for index, entry in enumerate(remaining):
+                if entry.request == request:
+                    matched.append(remaining.pop(index))
+                    break
+            else:
+                # Without a match there is no telling which item is unwritten: fail
+                # them all, so none is reported (or journaled) as written
+                logger.error(
+                    f"UnprocessedItems holds a request that was not sent; "
+                    f"failing all {len(pending)} pending requests"
+                )
+                outcome.failed.extend(pending)
+                outcome.reason = UNMATCHED
+                return []
+
+        retry: list[PendingWrite] = []
+        for match in matched:
+            match.attempts += 1
+            if match.attempts > self.max_retries:
+                outcome.failed.append(match)
+                outcome.reason = f"still unprocessed after {self.max_retries} retries"
+            else:
+                retry.append(match)
+
+        if retry:
+            logger.debug(f"Resubmitting {len(retry)} unprocessed items")
+        return retry
+
+    def _backoff(self, pending: list[PendingWrite]) -> float:
+        """Delay before resubmitting, based on the most-retried pending request."""
+        attempt = max(p.attempts for p in pending) - 1
+        return self.retry_handler.calculate_delay(attempt)
@@ -0,0 +1,283 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Offline loader benchmarks against the LocalDynamoDB stand-in.
+
+A benchmark sweeps loaders, worker counts, batch sizes and dataset sizes.
+Each case loads a generated CSV into a fresh ``LocalDynamoDB`` with the same
+fault profile (latency, throttling, unprocessed items) and seed, and records
+wall-clock throughput together with the stand-in's request counters. Results
+are plain dictionaries so they can be written as JSON and compared against a
+saved baseline to catch regressions.
+"""
+
+import asyncio
+import itertools
+import os
+import platform
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from src.async_loader import AsyncDynamoDBLoader
+from src.csv_generator import CSVGenerator, get_workload_profile
+from src.local_dynamodb import AsyncLocalSession, LocalDynamoDB, LocalSession
+from src.logging_config import get_logger
+from src.shuffle import FullShuffle, WindowShuffle
+from src.telemetry import LoadTelemetry
+from src.threaded_loader import ThreadedDynamoDBLoader
+
+logger = get_logger(__name__)
+
+# Loader variants a benchmark can run
+LOADERS = ("async", "async-stream", "threaded")
+
+BENCHMARK_TABLE = "benchmark-table"
+
+
+@dataclass(frozen=True)
+class BenchmarkCase:
+    """One point of a benchmark sweep."""
+
+    loader: str
+    workers: int
+    batch_size: int
+    records: int
+
+    @property
+    def key(self) -> str:
+        """Stable identifier used to match cases against a baseline."""
+        return f"{self.loader}/w{self.workers}/b{self.batch_size}/n{self.records}"
+
+
+@dataclass(frozen=True)
+class FaultProfile:
+    """Behaviour injected into the LocalDynamoDB stand-in."""
+
+    latency: float = 0.005
+    latency_jitter: float = 0.0
+    throttle_rate: float = 0.0
+    unprocessed_rate: float = 0.0
+
+
+def sweep(
+    loaders: list[str], workers: list[int], batch_sizes: list[int], records: list[int]
+) -> list[BenchmarkCase]:
+    """Build the cartesian product of benchmark parameters.
+
+    Args:
+        loaders: Loader names from ``LOADERS``
+        workers: Worker counts
+        batch_sizes: Batch sizes (1-25)
+        records: Dataset sizes
+
+    Returns:
+        Benchmark cases, dataset size varying slowest
+
+    Raises:
+        ValueError: If a loader name is unknown
+    """
+    for loader in loaders:
+        if loader not in LOADERS:
+            raise ValueError(f"Unknown loader {loader!r}, expected one of {LOADERS}")
+    return [
+        BenchmarkCase(loader=loader, workers=w, batch_size=b, records=n)
+        for n, loader, w, b in itertools.product(records, loaders, workers, batch_sizes)
+    ]
+
+
+def ensure_dataset(records: int, data_dir: str, workload: str = "uniform") -> str:
+    """Return the path of a generated CSV with ``records`` rows, creating it once.
+
+    Args:
+        records: Number of rows
+        data_dir: Directory where generated datasets are cached
+        workload: Name of the CSVGenerator workload profile
+
+    Returns:
+        Path to the CSV file
+    """
+    suffix = "" if workload == "uniform" else f"_{workload}"
+    path = Path(data_dir) / f"benchmark_{records}{suffix}.csv"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        logger.info(f"Generating {records:,} {workload} records into {path}")
+        CSVGenerator(
+            output_file=str(path),
+            num_records=records,
+            profile=get_workload_profile(workload),
+        ).generate()
+    return str(path)
+
+
+def _create_loader(
+    case: BenchmarkCase,
+    db: LocalDynamoDB,
+    max_retries: int,
+    seed: int,
+    telemetry: LoadTelemetry,
+) -> Any:
+    """Create the loader for a case, pointed at the stand-in."""
+    if case.loader == "threaded":
+        return ThreadedDynamoDBLoader(
+            table_name=BENCHMARK_TABLE,
+            max_workers=case.workers,
+            batch_size=case.batch_size,
+            max_retries=max_retries,
+            shuffle=FullShuffle(seed=seed),
+            session=LocalSession(db),
+            telemetry=telemetry,
+        )
+    streaming = case.loader == "async-stream"
+    return AsyncDynamoDBLoader(
+        table_name=BENCHMARK_TABLE,
+        max_workers=case.workers,
+        batch_size=case.batch_size,
+        max_retries=max_retries,
+        streaming=streaming,
+        shuffle=WindowShuffle(seed=seed) if streaming else FullShuffle(seed=seed),
+        session=AsyncLocalSession(db),
+        telemetry=telemetry,
+    )
+
+
+def run_case(
+    case: BenchmarkCase,
+    csv_file: str,
+    faults: FaultProfile,
+    max_retries: int = 3,
+    repeat: int = 1,
+    seed: int = 42,
+    key_attributes: tuple[str, ...] = ("id",),
+) -> dict[str, Any]:
+    """Run one benchmark case ``repeat`` times and summarise it.
+
+    Args:
+        case: Benchmark parameters
+        csv_file: CSV file with ``case.records`` rows
+        faults: Fault profile for the stand-in
+        max_retries: Loader retry limit
+        repeat: Number of runs (the median is reported)
+        seed: Seed for the shuffle and the stand-in's fault injection
+        key_attributes: Primary key of the stand-in's table
+
+    Returns:
+        Dictionary with the case parameters, timings, stand-in counters and
+        telemetry (latency percentiles, retries, WCU) of the median run
+    """
+    runs = []
+    for _ in range(repeat):
+        db = LocalDynamoDB(
+            key_attributes=key_attributes, seed=seed, store_items=False, **asdict(faults)
+        )
+        telemetry = LoadTelemetry()
+        loader = _create_loader(case, db, max_retries, seed, telemetry)
+        start = time.perf_counter()
+        if case.loader == "threaded":
+            result = loader.load_csv(csv_file)
+        else:
+            result = asyncio.run(loader.load_csv(csv_file))
+        seconds = time.perf_counter() - start
+        runs.append((seconds, result, db.stats, telemetry.snapshot()))
+
+    seconds, result, stats, metrics = sorted(runs, key=lambda run: run[0])[len(runs) // 2]
+    return {
+        "case": case.key,
+        **asdict(case),
+        "seconds": round(seconds, 4),
+        "all_seconds": [round(run[0], 4) for run in runs],
+        "records_per_second": round(result.total_records / seconds, 1) if seconds else 0.0,
+        "successful_writes": result.successful_writes,
+        "failed_writes": result.failed_writes,
+        **stats.to_dict(),
+        "latency_seconds": metrics["latency_seconds"],
+        "errors_by_code": metrics["errors_by_code"],
+        "consumed_wcu": metrics["consumed_wcu"],
+    }
+
+
+def run_benchmark(
+    cases: list[BenchmarkCase],
+    faults: FaultProfile,
+    data_dir: str,
+    max_retries: int = 3,
+    repeat: int = 1,
+    seed: int = 42,
+    workload: str = "uniform",
+) -> dict[str, Any]:
+    """Run every case and return a JSON-serialisable report.
+
+    Args:
+        cases: Cases from ``sweep``
+        faults: Fault profile for the stand-in
+        data_dir: Directory where generated datasets are cached
+        max_retries: Loader retry limit
+        repeat: Runs per case
+        seed: Seed for the shuffle and fault injection
+        workload: CSVGenerator workload profile of the datasets
+
+    Returns:
+        Report with the environment, settings and one result per case
+    """
+    # Profiles that repeat partition keys add a sort key to every row
+    key_attributes = ("id", "sk") if get_workload_profile(workload).repeats_keys else ("id",)
+    results = []
+    for case in cases:
+        csv_file = ensure_dataset(case.records, data_dir, workload)
+        logger.info(f"Running {case.key}")
+        results.append(run_case(case, csv_file, faults, max_retries, repeat, seed, key_attributes))
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "settings": {
+            **asdict(faults),
+            "max_retries": max_retries,
+            "repeat": repeat,
+            "seed": seed,
+            "workload": workload,
+        },
+        "results": results,
+    }
+
+
+def find_regressions(
+    report: dict[str, Any], baseline: dict[str, Any], tolerance: float = 0.2
+) -> list[str]:
+    """Compare throughput against a baseline report.
+
+    Args:
+        report: Report from ``run_benchmark``
+        baseline: Earlier report with the same cases
+        tolerance: Allowed relative drop in records per second
+
+    Returns:
+        One message per case whose throughput dropped by more than
+        ``tolerance`` (cases missing from the baseline are ignored)
+    """
+    expected = {r["case"]: r["records_per_second"] for r in baseline.get("results", [])}
+    regressions = []
+    for r in report["results"]:
+        before = expected.get(r["case"])
+        if not before:
+            continue
+        change = (r["records_per_second"] - before) / before
+        if change < -tolerance:
+            regressions.append(
+                f"{r['case']}: {r['records_per_second']:,.0f} rec/s vs "
+                f"{before:,.0f} rec/s baseline ({change:+.0%})"
+            )
+    return regressions
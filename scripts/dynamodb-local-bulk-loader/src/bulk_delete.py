@@ -0,0 +1,150 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Parallel bulk delete (truncate) of a DynamoDB table.
+
+Emptying a table by deleting and recreating it is slow once it has global
+secondary indexes, and loses its settings. ``BulkDeleter`` instead empties
+it in place:
+
+1. A parallel segmented Scan (see src.scan) reads only the key attributes.
+2. The keys stream through the threaded loader's write path as
+   DeleteRequest batches, with the same concurrency (fixed or adaptive),
+   per-item retries of UnprocessedItems and WCU rate limiting as a load.
+
+Memory stays bounded: the scan stops reading while the writers are behind.
+Reads can be budgeted separately with ``max_rcu``.
+
+The write budget charges each delete one WCU (the size of the key), while
+DynamoDB charges the size of the deleted item; with large items set
+``max_wcu`` lower accordingly. Items written while the delete runs may
+survive it, and deletes that fail are reported rather than dead-lettered:
+running the delete again removes whatever is left.
+"""
+
+from typing import Any
+
+import boto3
+
+from src.batch_write import DELETE
+from src.dedupe import BATCH, key_attributes_from
+from src.logging_config import get_logger
+from src.models import LoadResult
+from src.rate_limiter import TokenBucket
+from src.retry_handler import RetryHandler
+from src.scan import DEFAULT_SEGMENTS, ParallelScan, scan_client
+from src.schema import PassthroughSchema
+from src.shuffle import WindowShuffle
+from src.telemetry import LoadTelemetry
+from src.threaded_loader import ThreadedDynamoDBLoader
+
+logger = get_logger(__name__)
+
+
+class BulkDeleter:
+    """Deletes every item of a table with a parallel scan and batched deletes."""
+
+    def __init__(
+        self,
+        table_name: str,
+        region: str = "us-east-1",
+        segments: int = DEFAULT_SEGMENTS,
+        max_workers: int | None = None,
+        max_retries: int = 3,
+        adaptive_concurrency: bool = False,
+        max_concurrency: int | None = None,
+        max_wcu: float | None = None,
+        target_utilization: float = 1.0,
+        max_rcu: float | None = None,
+        page_size: int | None = None,
+        session: Any = None,
+        telemetry: LoadTelemetry | None = None,
+    ):
+        """Initialize bulk deleter.
+
+        Args:
+            table_name: Name of the DynamoDB table to empty
+            region: AWS region
+            segments: Parallel scan segments (reader threads)
+            max_workers: Concurrent delete batches (default: CPU count)
+            max_retries: Maximum retry attempts per request and per item
+            adaptive_concurrency: Grow and shrink the number of in-flight
+                        delete batches with throttling (AIMD)
+            max_concurrency: Ceiling for adaptive concurrency
+            max_wcu: Optional write capacity (WCU/s) the deletes may consume
+            target_utilization: Fraction of max_wcu to consume (0-1]
+            max_rcu: Optional read capacity (RCU/s) the scan may consume
+            page_size: Maximum keys per Scan call
+            session: boto3 Session (or a stand-in such as
+                        src.local_dynamodb.LocalSession). A new Session is
+                        created if None.
+            telemetry: Optional LoadTelemetry fed with every delete request
+        """
+        if max_rcu is not None and max_rcu <= 0:
+            raise ValueError(f"max_rcu must be greater than 0, got {max_rcu}")
+        self.table_name = table_name
+        self.region = region
+        self.segments = segments
+        self.max_retries = max_retries
+        self.max_rcu = max_rcu
+        self.page_size = page_size
+        self.session = session
+        self.telemetry = telemetry
+        # Keys arrive in wire format and are sent as they are
+        self.loader = ThreadedDynamoDBLoader(
+            table_name=table_name,
+            region=region,
+            max_workers=max_workers,
+            max_retries=max_retries,
+            shuffle=WindowShuffle(),
+            adaptive_concurrency=adaptive_concurrency,
+            max_concurrency=max_concurrency,
+            max_wcu=max_wcu,
+            target_utilization=target_utilization,
+            schema=PassthroughSchema(),
+            session=session,
+            telemetry=telemetry,
+            dedupe=BATCH,
+        )
+        # Scan of the last run, for its page and RCU counters
+        self.scan: ParallelScan | None = None
+
+    def delete_all(self) -> LoadResult:
+        """Delete every item of the table.
+
+        Returns:
+            LoadResult in which total_records counts the keys scanned and
+            successful_writes the items deleted
+        """
+        session = self.session or boto3.Session(region_name=self.region)
+        self.loader.session = session
+        client = scan_client(session, self.segments)
+        description = client.describe_table(TableName=self.table_name)
+        key_attributes = key_attributes_from(description)
+        self.loader.key_attributes = key_attributes
+        if self.telemetry is not None and self.telemetry.total_records is None:
+            # Refreshed by DynamoDB about every six hours: good enough for an ETA
+            self.telemetry.total_records = description["Table"].get("ItemCount")
+        logger.info(f"Deleting every item of {self.table_name} by {', '.join(key_attributes)}")
+
+        self.scan = ParallelScan(
+            client,
+            self.table_name,
+            segments=self.segments,
+            attributes=key_attributes,
+            page_size=self.page_size,
+            rate_limiter=TokenBucket(rate=self.max_rcu) if self.max_rcu else None,
+            retry_handler=RetryHandler(max_retries=max(self.max_retries, 5)),
+        )
+        with self.scan:
+            return self.loader.write_stream(self.scan, operation=DELETE)
@@ -0,0 +1,292 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Append-only checkpoint journal for resumable loads.
+
+Every source row gets a stable id: its row number, or its byte offset for the
+process pool loader and for loads shuffled through an offset index. The id
+travels with the record through the shuffle under ``ROW_ID_KEY`` and is
+removed just before the write. When a batch finishes, the ids of the rows
+DynamoDB accepted are appended to the journal, so shuffled ordering does not
+matter.
+
+The journal is a one-line JSON header that fingerprints the source file,
+followed by 8-byte little-endian row ids. Ids are buffered in memory and
+appended (and fsynced) at most once per ``flush_interval``, so the write path
+only pays for a list append. A crash can lose the last interval of ids; those
+rows are written again on resume, which is safe because PutItem is idempotent.
+
+On ``--resume`` the ids are loaded into a sorted ``array('Q')`` (8 bytes per
+row; they are sorted in runs and merged, never held as one set of Python
+integers) and rows are skipped while the file is read, before shuffling.
+"""
+
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+from array import array
+from collections.abc import Iterable, Iterator, MutableMapping
+from typing import Any
+
+from src.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Record attribute that carries the source row id between reader and writer
+ROW_ID_KEY = "__checkpoint_row_id"
+
+JOURNAL_VERSION = 1
+
+# Row id kinds: position of the row in the file, or byte offset of its line
+ROW_NUMBER = "row"
+BYTE_OFFSET = "offset"
+
+
+def _sorted_unique(ids: array, run_length: int = 1 << 20) -> array:
+    """Sort row ids and drop duplicates, staying close to 8 bytes per id.
+
+    Runs of ``run_length`` ids are sorted separately, so only one run is
+    held as Python integers at a time, and the sorted runs are merged into
+    a new array, skipping repeated ids.
+
+    Args:
+        ids: Row ids in any order
+        run_length: Ids sorted at a time
+
+    Returns:
+        Sorted array of distinct row ids
+    """
+    runs = [array("Q", sorted(ids[i : i + run_length])) for i in range(0, len(ids), run_length)]
+    del ids
+    unique = array("Q")
+    for row_id in heapq.merge(*runs):
+        if not unique or unique[-1] != row_id:
+            unique.append(row_id)
+    return unique
+
+
+def tag_rows(
+    records: Iterable[MutableMapping[str, Any]],
+) -> Iterator[MutableMapping[str, Any]]:
+    """Attach the row number to each record under ``ROW_ID_KEY``.
+
+    Args:
+        records: Records in file order
+
+    Yields:
+        The same records, tagged with their row number
+    """
+    for row_number, record in enumerate(records):
+        record[ROW_ID_KEY] = row_number
+        yield record
+
+
+def pop_row_ids(items: list[dict[str, Any]]) -> list[int]:
+    """Remove the row ids from a batch so they are not written to DynamoDB.
+
+    Args:
+        items: Tagged records in one batch
+
+    Returns:
+        Row ids in the same order as ``items``
+    """
+    return [item.pop(ROW_ID_KEY) for item in items]
+
+
+def written_row_ids(
+    items: list[dict[str, Any]], row_ids: list[int], failed_items: list[dict[str, Any]]
+) -> list[int]:
+    """Select the row ids of the items that were written.
+
+    Args:
+        items: Items in the batch
+        row_ids: Row ids returned by ``pop_row_ids`` for the batch
+        failed_items: Items (the same objects) that could not be written
+
+    Returns:
+        Row ids of the written items
+    """
+    if not failed_items:
+        return row_ids
+    failed = {id(item) for item in failed_items}
+    return [row_id for item, row_id in zip(items, row_ids, strict=True) if id(item) not in failed]
+
+
+class CheckpointJournal:
+    """Durable record of the source rows a load has written."""
+
+    def __init__(
+        self,
+        path: str,
+        source: str,
+        id_kind: str = ROW_NUMBER,
+        flush_interval: float = 1.0,
+    ):
+        """Initialize journal (no file is touched until ``start`` or ``attach``).
+
+        Args:
+            path: Journal file path
+            source: Source file whose rows are tracked
+            id_kind: ``ROW_NUMBER`` or ``BYTE_OFFSET``
+            flush_interval: Maximum seconds between appends to the file
+        """
+        stat = os.stat(source)
+        self.path = path
+        self.header = {
+            "version": JOURNAL_VERSION,
+            "source": os.path.abspath(source),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "ids": id_kind,
+        }
+        self.flush_interval = flush_interval
+        self.completed = array("Q")
+        # Rows dropped by skip_completed during the current load
+        self.skipped = 0
+        self._pending = array("Q")
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._fd: int | None = None
+
+    def start(self, resume: bool = False) -> None:
+        """Open the journal for a load.
+
+        Args:
+            resume: If True, load the ids of an existing journal so that
+                    ``skip_completed`` drops them. Otherwise any existing
+                    journal is replaced.
+
+        Raises:
+            ValueError: If the existing journal was written for another file
+        """
+        if resume and os.path.exists(self.path):
+            self.completed = self.load_completed()
+            logger.info(f"Resuming from {self.path}: {len(self.completed)} rows already written")
+            self.attach()
+            return
+
+        if resume:
+            logger.warning(f"No checkpoint found at {self.path}, starting from the beginning")
+        with open(self.path, "wb") as f:
+            f.write(json.dumps(self.header).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.attach()
+
+    def attach(self) -> None:
+        """Open an existing journal for appending (e.g. from a worker process)."""
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+
+    def load_completed(self) -> array:
+        """Read the row ids stored in the journal.
+
+        Returns:
+            Sorted array of row ids
+
+        Raises:
+            ValueError: If the journal was written for another file
+        """
+        with open(self.path, "rb") as f:
+            header = json.loads(f.readline() or b"{}")
+            if header != self.header:
+                raise ValueError(
+                    f"Checkpoint {self.path} was written for a different source or "
+                    f"version ({header.get('source')}); remove it to start over"
+                )
+            data = f.read()
+
+        ids = array("Q")
+        # A crash can leave a torn final entry; drop it
+        ids.frombytes(data[: len(data) - len(data) % ids.itemsize])
+        del data
+        if sys.byteorder != "little":
+            ids.byteswap()
+        return _sorted_unique(ids)
+
+    def skip_completed(
+        self, records: Iterable[MutableMapping[str, Any]]
+    ) -> Iterator[MutableMapping[str, Any]]:
+        """Drop records whose row id is already in the journal.
+
+        Records must arrive in increasing row id order (file order), which
+        lets this walk the sorted id array instead of searching it.
+
+        Args:
+            records: Tagged records in file order
+
+        Yields:
+            Records that still need to be written
+        """
+        completed = self.completed
+        index = 0
+        for record in records:
+            row_id = record[ROW_ID_KEY]
+            while index < len(completed) and completed[index] < row_id:
+                index += 1
+            if index < len(completed) and completed[index] == row_id:
+                self.skipped += 1
+                continue
+            yield record
+
+    def record(self, row_ids: Iterable[int]) -> None:
+        """Buffer written row ids, appending them if the flush interval passed.
+
+        Args:
+            row_ids: Ids of rows DynamoDB accepted
+        """
+        if self.add(row_ids):
+            self.flush()
+
+    def add(self, row_ids: Iterable[int]) -> bool:
+        """Buffer written row ids without touching the file.
+
+        Used where the append and fsync must not block the caller (the async
+        loader's event loop), which then calls ``flush`` from a thread.
+
+        Args:
+            row_ids: Ids of rows DynamoDB accepted
+
+        Returns:
+            True if the flush interval has passed
+        """
+        with self._lock:
+            self._pending.extend(row_ids)
+            return time.monotonic() - self._last_flush >= self.flush_interval
+
+    def flush(self) -> None:
+        """Append and fsync all buffered row ids."""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        """Flush buffered row ids and close the journal."""
+        with self._lock:
+            self._flush_locked()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def _flush_locked(self) -> None:
+        """Write buffered ids in one append (caller holds the lock)."""
+        self._last_flush = time.monotonic()
+        if not self._pending or self._fd is None:
+            return
+        if sys.byteorder != "little":
+            self._pending.byteswap()
+        # A single O_APPEND write, so processes sharing the journal never interleave entries
+        os.write(self._fd, self._pending.tobytes())
+        os.fsync(self._fd)
+        self._pending = array("Q")
@@ -0,0 +1,411 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Transparent decompression of gzip, bzip2 and zstd input files.
+
+``open_output`` is the writing counterpart used by exports: it opens a text
+stream that is compressed on the way to disk.
+
+``open_input`` opens a file for reading whether or not it is compressed.
+Compression is detected from the extension (``.gz``, ``.bz2``, ``.zst``) or,
+failing that, from the file's magic bytes.
+
+Compressed files are decompressed on a background thread that reads ahead
+into a small bounded queue of chunks. zlib, bz2 and zstd release the GIL
+while they decompress, so decompression overlaps with CSV parsing and the
+loaders' network writes instead of being a separate step that needs disk
+space for the whole uncompressed file. Memory use is bounded by the queue
+(``max_chunks * chunk_size`` bytes of decompressed data).
+
+zstd needs the ``zstandard`` package (``pip install 'dynamodb-local-bulk-loader[zstd]'``)
+unless the Python standard library provides ``compression.zstd``.
+"""
+
+import bz2
+import gzip
+import io
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import IO, Any, BinaryIO
+
+from src.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+GZIP = "gzip"
+BZIP2 = "bz2"
+ZSTD = "zstd"
+
+COMPRESSIONS = (GZIP, BZIP2, ZSTD)
+# Suffix appended to the names of compressed output files
+COMPRESSION_SUFFIXES = {GZIP: ".gz", BZIP2: ".bz2", ZSTD: ".zst"}
+
+COMPRESSION_EXTENSIONS = {
+    ".gz": GZIP,
+    ".gzip": GZIP,
+    ".bz2": BZIP2,
+    ".zst": ZSTD,
+    ".zstd": ZSTD,
+}
+
+_MAGIC = (
+    (b"\x1f\x8b", GZIP),
+    (b"BZh", BZIP2),
+    (b"\x28\xb5\x2f\xfd", ZSTD),
+)
+
+# Decompressed bytes handed from the background thread per chunk
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+# Chunks decompressed ahead of the reader
+DEFAULT_MAX_CHUNKS = 8
+
+# Decompressed bytes read to estimate the compression ratio
+_RATIO_SAMPLE_BYTES = 4 * 1024 * 1024
+
+
+def detect_compression(path: str) -> str | None:
+    """Detect the compression of a file.
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        "gzip", "bz2", "zstd", or None for an uncompressed file
+    """
+    compression = COMPRESSION_EXTENSIONS.get(Path(path).suffix.lower())
+    if compression is not None:
+        return compression
+    with open(path, "rb") as f:
+        head = f.read(4)
+    for magic, name in _MAGIC:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def strip_compression_suffix(path: str) -> str:
+    """Return ``path`` without a compression extension (``data.csv.gz`` -> ``data.csv``)."""
+    p = Path(path)
+    if p.suffix.lower() in COMPRESSION_EXTENSIONS:
+        return str(p.with_suffix(""))
+    return path
+
+
+def _decompressing_reader(fileobj: IO[bytes] | io.RawIOBase, compression: str) -> IO[bytes]:
+    """Wrap a compressed binary file object in a decompressing reader.
+
+    Args:
+        fileobj: Compressed input, positioned at the start
+        compression: "gzip", "bz2" or "zstd"
+
+    Returns:
+        Binary stream of the decompressed content
+    """
+    if compression == GZIP:
+        return gzip.GzipFile(fileobj=fileobj, mode="rb")  # type: ignore[return-value]
+    if compression == BZIP2:
+        return bz2.BZ2File(fileobj, mode="rb")
+    try:
+        from compression import zstd  # type: ignore[import-not-found]
+
+        stream: BinaryIO = zstd.ZstdFile(fileobj, mode="rb")
+        return stream
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(
+            "Reading .zst files requires zstandard: pip install 'dynamodb-local-bulk-loader[zstd]'"
+        ) from e
+    reader: BinaryIO = zstandard.ZstdDecompressor().stream_reader(fileobj, read_across_frames=True)
+    return reader
+
+
+def open_decompressed(path: str, compression: str | None = None) -> IO[bytes]:
+    """Open a file as a decompressed binary stream (in the calling thread).
+
+    Args:
+        path: Path to the file
+        compression: Compression name, detected if None
+
+    Returns:
+        Binary stream of the decompressed content; closing it closes the file
+    """
+    compression = compression or detect_compression(path)
+    raw = open(path, "rb")
+    if compression is None:
+        return raw
+    try:
+        return io.BufferedReader(_ClosingReader(_decompressing_reader(raw, compression), raw))
+    except BaseException:
+        raw.close()
+        raise
+
+
+class _ClosingReader(io.RawIOBase):
+    """Decompressed stream that also closes the underlying file."""
+
+    def __init__(self, stream: IO[bytes], raw: IO[bytes]):
+        super().__init__()
+        self._stream = stream
+        self._raw = raw
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        data = self._stream.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def read(self, size: int = -1) -> bytes:
+        return self._stream.read(size)
+
+    def close(self) -> None:
+        if not self.closed:
+            try:
+                self._stream.close()
+            finally:
+                self._raw.close()
+        super().close()
+
+
+class _CountingReader(io.RawIOBase):
+    """Raw reader that counts the bytes read from the underlying file."""
+
+    def __init__(self, raw: io.BufferedIOBase):
+        super().__init__()
+        self.raw = raw
+        self.count = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        n = self.raw.readinto(buffer)
+        self.count += n
+        return n
+
+
+class ThreadedDecompressor(io.RawIOBase):
+    """Raw binary stream fed by a decompressing background thread.
+
+    The thread decompresses ``chunk_size`` bytes at a time into a queue of at
+    most ``max_chunks`` chunks, so it stays a few chunks ahead of the reader
+    and stops when the reader falls behind. Errors raised while decompressing
+    are re-raised by ``readinto``. Closing the stream stops the thread.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        compression: str | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_chunks: int = DEFAULT_MAX_CHUNKS,
+    ):
+        """Initialize decompressor and start its thread.
+
+        Args:
+            path: Path to the compressed file
+            compression: Compression name, detected if None
+            chunk_size: Decompressed bytes per chunk
+            max_chunks: Chunks buffered ahead of the reader
+        """
+        super().__init__()
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be greater than 0, got {chunk_size}")
+        if max_chunks <= 0:
+            raise ValueError(f"max_chunks must be greater than 0, got {max_chunks}")
+        # Open in the caller so a missing file or module fails immediately
+        self._source = open_decompressed(path, compression)
+        self.chunk_size = chunk_size
+        self._chunks: queue.Queue[bytes | None] = queue.Queue(maxsize=max_chunks)
+        self._pending = memoryview(b"")
+        self._eof = False
+        self._error: BaseException | None = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"decompress-{Path(path).name}", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        """Decompress the source into the queue (background thread)."""
+        try:
+            with self._source:
+                while not self._stop.is_set():
+                    chunk = self._source.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    self._put(chunk)
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._put(None)
+
+    def _put(self, chunk: bytes | None) -> None:
+        """Queue a chunk, giving up if the reader has closed the stream."""
+        while not self._stop.is_set():
+            try:
+                self._chunks.put(chunk, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        """Copy decompressed bytes into ``buffer``.
+
+        Returns:
+            Number of bytes copied, 0 at the end of the file
+
+        Raises:
+            Exception: Whatever the decompression thread raised
+        """
+        while not self._pending:
+            if self._eof:
+                return 0
+            chunk = self._chunks.get()
+            if chunk is None:
+                self._eof = True
+                if self._error is not None:
+                    raise self._error
+                return 0
+            self._pending = memoryview(chunk)
+        n = min(len(buffer), len(self._pending))
+        buffer[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+    def close(self) -> None:
+        if not self.closed:
+            self._stop.set()
+            # Unblock a thread waiting for queue space
+            while True:
+                try:
+                    self._chunks.get_nowait()
+                except queue.Empty:
+                    break
+            self._thread.join(timeout=5)
+        super().close()
+
+
+def open_input(
+    path: str,
+    encoding: str = "utf-8",
+    newline: str | None = None,
+    threaded: bool = True,
+) -> IO[str]:
+    """Open an input file as text, decompressing it if needed.
+
+    Args:
+        path: Path to the file
+        encoding: Text encoding
+        newline: Newline handling, as for ``open`` ("" for CSV)
+        threaded: Decompress on a background thread (False decompresses in
+                  the calling thread, e.g. for short reads)
+
+    Returns:
+        Text stream of the (decompressed) content
+    """
+    compression = detect_compression(path)
+    if compression is None:
+        return open(path, encoding=encoding, newline=newline)
+    logger.debug(f"Decompressing {path} ({compression})")
+    binary: IO[bytes]
+    if threaded:
+        binary = io.BufferedReader(ThreadedDecompressor(path, compression))
+    else:
+        binary = open_decompressed(path, compression)
+    return io.TextIOWrapper(binary, encoding=encoding, newline=newline)
+
+
+def _compressing_writer(path: str, compression: str) -> BinaryIO:
+    """Open a binary stream that writes ``path`` compressed."""
+    if compression == GZIP:
+        # Level 6 is several times faster than the default 9 for a few % in size
+        return gzip.open(path, "wb", compresslevel=6)  # type: ignore[return-value]
+    if compression == BZIP2:
+        return bz2.open(path, "wb")  # type: ignore[return-value]
+    try:
+        from compression import zstd
+
+        stream: BinaryIO = zstd.ZstdFile(path, mode="wb")
+        return stream
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(
+            "Writing .zst files requires zstandard: pip install 'dynamodb-local-bulk-loader[zstd]'"
+        ) from e
+    writer: BinaryIO = zstandard.ZstdCompressor().stream_writer(open(path, "wb"))
+    return writer
+
+
+def open_output(
+    path: str,
+    compression: str | None = None,
+    encoding: str = "utf-8",
+    newline: str | None = None,
+) -> IO[str]:
+    """Open an output file as text, compressing it if requested.
+
+    Args:
+        path: Path to the file (the caller picks its suffix, see
+              COMPRESSION_SUFFIXES)
+        compression: "gzip", "bz2", "zstd", or None for plain text
+        encoding: Text encoding
+        newline: Newline handling, as for ``open`` ("" for CSV)
+
+    Returns:
+        Writable text stream; closing it finishes the compressed file
+    """
+    if compression is None:
+        return open(path, "w", encoding=encoding, newline=newline)
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"compression must be one of {COMPRESSIONS} or None, got {compression!r}")
+    binary = io.BufferedWriter(_compressing_writer(path, compression), buffer_size=1024 * 1024)
+    return io.TextIOWrapper(binary, encoding=encoding, newline=newline)
+
+
+def estimate_uncompressed_size(path: str) -> int:
+    """Estimate the decompressed size of a file.
+
+    Compressed files are sampled: the compression ratio of the first few MB
+    is extrapolated to the whole file.
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        Estimated size in bytes (the file size if it is not compressed)
+    """
+    size = os.path.getsize(path)
+    compression = detect_compression(path)
+    if compression is None:
+        return size
+    with open(path, "rb") as raw:
+        counting = _CountingReader(raw)
+        stream = _decompressing_reader(counting, compression)
+        decompressed = len(stream.read(_RATIO_SAMPLE_BYTES))
+    if decompressed < _RATIO_SAMPLE_BYTES or not counting.count:
+        # The whole file fitted in the sample
+        return decompressed
+    return round(size * decompressed / counting.count)
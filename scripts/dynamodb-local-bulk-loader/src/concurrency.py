@@ -0,0 +1,182 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Adaptive concurrency control driven by throttling feedback.
+
+A fixed worker count is only right for the table it was measured against.
+The AIMD (additive increase, multiplicative decrease) controller here works
+like TCP congestion control. While writes succeed, the number of in-flight
+batches grows by about one per round of successful batches. When DynamoDB
+throttles a write, the limit is cut by a constant factor. The load settles
+just below the table's real write capacity.
+"""
+
+import asyncio
+import threading
+import time
+from types import TracebackType
+
+from src.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Upper bound on in-flight batches when adaptive concurrency is enabled
+DEFAULT_MAX_CONCURRENCY = 64
+
+
+class AIMDController:
+    """Additive-increase / multiplicative-decrease concurrency limit (thread-safe)."""
+
+    def __init__(
+        self,
+        initial_limit: int,
+        max_limit: int = DEFAULT_MAX_CONCURRENCY,
+        min_limit: int = 1,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5,
+        cooldown: float = 1.0,
+    ):
+        """Initialize controller.
+
+        Args:
+            initial_limit: Starting number of in-flight batches
+            max_limit: Upper bound for the limit
+            min_limit: Lower bound for the limit
+            increase: Limit added per round of successful batches (one round =
+                      ``limit`` successes, so growth is linear in time)
+            decrease_factor: Multiplier applied to the limit on throttling
+            cooldown: Minimum seconds between two decreases, so a burst of
+                      throttles from the same round only cuts the limit once
+        """
+        if min_limit <= 0:
+            raise ValueError(f"min_limit must be greater than 0, got {min_limit}")
+        if max_limit < min_limit:
+            raise ValueError(
+                f"max_limit must be >= min_limit, got max_limit={max_limit}, min_limit={min_limit}"
+            )
+        if not 0 < decrease_factor < 1:
+            raise ValueError(f"decrease_factor must be between 0 and 1, got {decrease_factor}")
+        if increase <= 0:
+            raise ValueError(f"increase must be greater than 0, got {increase}")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._last_decrease = float("-inf")
+        self._lock = threading.Lock()
+        self.throttle_events = 0
+
+    @property
+    def limit(self) -> int:
+        """Current number of batches allowed in flight."""
+        return int(self._limit)
+
+    def on_success(self) -> None:
+        """Record a successful batch write (additive increase)."""
+        with self._lock:
+            self._limit = min(self._limit + self.increase / self._limit, float(self.max_limit))
+
+    def on_throttle(self) -> None:
+        """Record a throttled write (multiplicative decrease)."""
+        with self._lock:
+            self.throttle_events += 1
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            previous = self.limit
+            self._limit = max(self._limit * self.decrease_factor, float(self.min_limit))
+        logger.info(f"Throttling detected, reducing concurrency {previous} -> {self.limit}")
+
+
+class AsyncAdaptiveLimiter:
+    """Asyncio gate that admits at most ``controller.limit`` concurrent holders.
+
+    Drop-in replacement for ``asyncio.Semaphore`` whose size follows an
+    AIMDController.
+    """
+
+    def __init__(self, controller: AIMDController):
+        """Initialize limiter.
+
+        Args:
+            controller: Controller supplying the current limit
+        """
+        self.controller = controller
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        """Wait until a slot is free under the current limit."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.controller.limit)
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        """Release a slot and wake waiters (the limit may have grown)."""
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    async def __aenter__(self) -> "AsyncAdaptiveLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        await self.release()
+
+
+class ThreadAdaptiveLimiter:
+    """Thread gate that admits at most ``controller.limit`` concurrent holders."""
+
+    def __init__(self, controller: AIMDController):
+        """Initialize limiter.
+
+        Args:
+            controller: Controller supplying the current limit
+        """
+        self.controller = controller
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        """Block until a slot is free under the current limit."""
+        with self._condition:
+            self._condition.wait_for(lambda: self.in_flight < self.controller.limit)
+            self.in_flight += 1
+
+    def release(self) -> None:
+        """Release a slot and wake waiters (the limit may have grown)."""
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def __enter__(self) -> "ThreadAdaptiveLimiter":
+        self.acquire()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.release()
@@ -11,16 +11,341 @@
 #  CONDITIONS OF ANY KIND, either express or implied. See the License for the
 #  specific language governing permissions and limitations under the License.
 #
-"""CSV data generator for testing DynamoDB bulk loader."""
+"""CSV data generator for testing DynamoDB bulk loader.
+
+Records are generated and written in chunks, so memory stays constant
+however many rows are requested. Each chunk is built column by column from
+its own random generator, seeded from the generator's seed and the chunk
+index. A file therefore only depends on the seed and the chunk size, and
+chunks can be generated in worker processes and written in order.
+
+Cheap columns (ids, timestamps, amounts, categories, statuses) are produced
+in bulk from one draw per column. Faker is slow (a few hundred microseconds
+per value), so each chunk draws a small pool of names, emails and
+descriptions from Faker and samples the rows from that pool.
+
+A ``WorkloadProfile`` shapes the data after access patterns seen in
+production: partition keys drawn with Zipfian skew, several sort keys per
+partition key, log-normal item sizes up to the 400KB item limit, and bursts
+of rows written to one key within a few milliseconds. The default profile
+generates the uniform data above.
+"""
 
 import csv
-import uuid
+import io
+import math
+import random
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from decimal import Decimal
+from functools import lru_cache
+from itertools import accumulate
 from pathlib import Path
 
 from faker import Faker
 
+from src.item_size import MAX_ITEM_BYTES
+
+# Rows generated (and written) at a time
+DEFAULT_CHUNK_SIZE = 50_000
+# Bytes of CSV text a chunk may hold; chunks of large rows get fewer rows
+DEFAULT_CHUNK_BYTES = 64 * 1024 * 1024
+# CSV bytes of a row without its description, and of a default description
+ROW_BYTES_WITHOUT_DESCRIPTION = 128
+DEFAULT_DESCRIPTION_BYTES = 100
+# Distinct Faker values drawn per chunk for each text column
+FAKER_POOL_SIZE = 256
+
+FIELDNAMES = [
+    "id",
+    "timestamp",
+    "category",
+    "user_name",
+    "email",
+    "amount",
+    "status",
+    "description",
+]
+
+# Room left for the other attributes of an item with the largest description
+MAX_DESCRIPTION_BYTES = MAX_ITEM_BYTES - 1024
+
+
+@dataclass(frozen=True)
+class WorkloadProfile:
+    """Shape of the generated data: key distribution, item sizes and bursts.
+
+    Whenever partition keys repeat, rows get an ``sk`` column (the row
+    number, zero-padded) next to ``id``, so every row is a distinct item of
+    a table keyed on ``id`` and ``sk``.
+    """
+
+    # Distinct partition keys (key-00000000 is the hottest); None gives every
+    # partition a fresh UUID
+    partition_keys: int | None = None
+    # Zipf exponent of partition key popularity: 0 is uniform, about 1 is
+    # typical of user or product ids
+    key_skew: float = 0.0
+    # Consecutive rows sharing one partition key, each with its own sort key
+    sort_keys_per_partition: int = 1
+    # Median description length in bytes, drawn log-normally; None keeps the
+    # ~100 character Faker text
+    item_size_median: int | None = None
+    # Spread of the log-normal item size distribution
+    item_size_sigma: float = 1.0
+    # Every burst_every rows, the last burst_rows of them go to one partition
+    # key, 1 millisecond apart instead of 1 second
+    burst_every: int = 0
+    burst_rows: int = 0
+
+    def __post_init__(self) -> None:
+        if self.partition_keys is not None and self.partition_keys < 1:
+            raise ValueError(f"partition_keys must be at least 1, got {self.partition_keys}")
+        if self.key_skew < 0:
+            raise ValueError(f"key_skew must be >= 0, got {self.key_skew}")
+        if self.sort_keys_per_partition < 1:
+            raise ValueError(
+                f"sort_keys_per_partition must be at least 1, got {self.sort_keys_per_partition}"
+            )
+        if self.item_size_median is not None and not (
+            1 <= self.item_size_median <= MAX_DESCRIPTION_BYTES
+        ):
+            raise ValueError(
+                f"item_size_median must be between 1 and {MAX_DESCRIPTION_BYTES}, "
+                f"got {self.item_size_median}"
+            )
+        if self.item_size_sigma < 0:
+            raise ValueError(f"item_size_sigma must be >= 0, got {self.item_size_sigma}")
+        if self.burst_every < 0 or self.burst_rows < 0:
+            raise ValueError("burst_every and burst_rows must be >= 0")
+        if self.burst_rows and self.burst_rows >= self.burst_every:
+            raise ValueError(
+                f"burst_rows ({self.burst_rows}) must be less than burst_every ({self.burst_every})"
+            )
+
+    @property
+    def repeats_keys(self) -> bool:
+        """True when rows share partition keys and need a sort key."""
+        return (
+            self.partition_keys is not None
+            or self.sort_keys_per_partition > 1
+            or self.burst_rows > 0
+        )
+
+    @property
+    def expected_row_bytes(self) -> int:
+        """Mean CSV bytes of a generated row.
+
+        Description lengths are log-normal with median ``item_size_median``,
+        so their mean is ``median * exp(sigma**2 / 2)`` (capped like the
+        lengths themselves).
+        """
+        if self.item_size_median is None:
+            return ROW_BYTES_WITHOUT_DESCRIPTION + DEFAULT_DESCRIPTION_BYTES
+        mean = self.item_size_median * math.exp(self.item_size_sigma**2 / 2)
+        return ROW_BYTES_WITHOUT_DESCRIPTION + math.ceil(min(mean, MAX_DESCRIPTION_BYTES))
+
+    @property
+    def fieldnames(self) -> list[str]:
+        """CSV columns, with ``sk`` after ``id`` when partition keys repeat."""
+        if not self.repeats_keys:
+            return list(FIELDNAMES)
+        return ["id", "sk", *FIELDNAMES[1:]]
+
+
+WORKLOAD_PROFILES = {
+    # Unique UUID keys and short descriptions
+    "uniform": WorkloadProfile(),
+    # A few keys take most writes, as with popular users or products
+    "zipf": WorkloadProfile(partition_keys=10_000, key_skew=1.1),
+    # Item collections, such as the lines of an order
+    "one-to-many": WorkloadProfile(sort_keys_per_partition=20),
+    # Items from a few KB to the 400KB limit
+    "large-items": WorkloadProfile(item_size_median=8 * 1024, item_size_sigma=1.5),
+    # Flash-sale style runs of writes to one key
+    "bursty": WorkloadProfile(burst_every=1000, burst_rows=200),
+    # All of the above at once
+    "mixed": WorkloadProfile(
+        partition_keys=100_000,
+        key_skew=1.0,
+        sort_keys_per_partition=5,
+        item_size_median=2048,
+        item_size_sigma=1.2,
+        burst_every=5000,
+        burst_rows=500,
+    ),
+}
+
+
+def get_workload_profile(name: str) -> WorkloadProfile:
+    """Look up a predefined workload profile by name.
+
+    Raises:
+        ValueError: If the profile name is unknown
+    """
+    if name not in WORKLOAD_PROFILES:
+        raise ValueError(
+            f"Unknown workload profile {name!r}, expected one of {sorted(WORKLOAD_PROFILES)}"
+        )
+    return WORKLOAD_PROFILES[name]
+
+
+# Faker instance of this process, reseeded for every chunk
+_faker: Faker | None = None
+
+
+def _process_faker() -> Faker:
+    """Faker instance of the current process, created on first use."""
+    global _faker
+    if _faker is None:
+        _faker = Faker()
+    return _faker
+
+
+def _uuid4_strings(rng: random.Random, count: int) -> list[str]:
+    """Format ``count`` random version 4 UUIDs from a single draw of random bytes."""
+    digits = rng.randbytes(16 * count).hex()
+    return [
+        f"{digits[i : i + 8]}-{digits[i + 8 : i + 12]}-4{digits[i + 13 : i + 16]}-"
+        f"{'89ab'[int(digits[i + 16], 16) & 3]}{digits[i + 17 : i + 20]}-{digits[i + 20 : i + 32]}"
+        for i in range(0, 32 * count, 32)
+    ]
+
+
+@lru_cache(maxsize=4)
+def _zipf_cum_weights(keys: int, skew: float) -> list[float]:
+    """Cumulative Zipf weights of key ranks 0..keys-1, computed once per process."""
+    return list(accumulate(1.0 / (rank**skew) for rank in range(1, keys + 1)))
+
+
+def _row_milliseconds(profile: WorkloadProfile, start: int, count: int) -> list[int]:
+    """Milliseconds from the base time of each row; rows in a burst are 1ms apart."""
+    steady = profile.burst_every - profile.burst_rows
+    cycle_ms = steady * 1000 + profile.burst_rows
+    offsets = []
+    for row in range(start, start + count):
+        cycle, position = divmod(row, profile.burst_every)
+        if position < steady:
+            offset = position * 1000
+        else:
+            offset = steady * 1000 + position - steady
+        offsets.append(cycle * cycle_ms + offset)
+    return offsets
+
+
+def _partition_keys(
+    rng: random.Random, seed: int, profile: WorkloadProfile, start: int, count: int
+) -> list[str]:
+    """Partition key of each row of a chunk starting at a partition boundary."""
+    fanout = profile.sort_keys_per_partition
+    groups = -(-count // fanout)
+    if profile.partition_keys is None:
+        group_keys = _uuid4_strings(rng, groups)
+    else:
+        width = len(str(profile.partition_keys - 1))
+        ranks = rng.choices(
+            range(profile.partition_keys),
+            cum_weights=_zipf_cum_weights(profile.partition_keys, profile.key_skew),
+            k=groups,
+        )
+        group_keys = [f"key-{rank:0{width}d}" for rank in ranks]
+    keys = [group_keys[i // fanout] for i in range(count)]
+
+    if profile.burst_rows:
+        steady = profile.burst_every - profile.burst_rows
+        burst_keys: dict[int, str] = {}
+        for i, row in enumerate(range(start, start + count)):
+            cycle, position = divmod(row, profile.burst_every)
+            if position < steady:
+                continue
+            if cycle not in burst_keys:
+                # Seeded per burst, so a burst spanning two chunks keeps its key
+                burst_rng = random.Random(f"{seed}/burst/{cycle}")
+                if profile.partition_keys is None:
+                    burst_keys[cycle] = _uuid4_strings(burst_rng, 1)[0]
+                else:
+                    width = len(str(profile.partition_keys - 1))
+                    burst_keys[cycle] = (
+                        f"key-{burst_rng.randrange(profile.partition_keys):0{width}d}"
+                    )
+            keys[i] = burst_keys[cycle]
+    return keys
+
+
+def _sized_texts(
+    rng: random.Random, profile: WorkloadProfile, descriptions: list[str], count: int
+) -> list[str]:
+    """Descriptions with log-normally distributed lengths, capped below the item limit."""
+    filler = " ".join(descriptions)
+    filler *= -(-MAX_DESCRIPTION_BYTES // len(filler))
+    mu = math.log(profile.item_size_median or 1)
+    lengths = (int(rng.lognormvariate(mu, profile.item_size_sigma)) for _ in range(count))
+    return [filler[: min(max(length, 1), MAX_DESCRIPTION_BYTES)] for length in lengths]
+
+
+def generate_chunk(
+    seed: int, index: int, start: int, count: int, profile: WorkloadProfile | None = None
+) -> str:
+    """Generate the CSV rows of one chunk (runs in a worker process when parallel).
+
+    Args:
+        seed: Seed of the whole file
+        index: Chunk number, mixed into the chunk's seed
+        start: Row number of the chunk's first record, which sets its timestamp
+        count: Number of rows in the chunk
+        profile: Shape of the generated data (default: uniform)
+
+    Returns:
+        The chunk's rows as CSV text, without a header
+    """
+    profile = profile or WorkloadProfile()
+    rng = random.Random(f"{seed}/{index}")
+    faker = _process_faker()
+    faker.seed_instance(rng.getrandbits(64))
+    pool_size = min(count, FAKER_POOL_SIZE)
+    names = [faker.name() for _ in range(pool_size)]
+    emails = [faker.email() for _ in range(pool_size)]
+    descriptions = [faker.text(max_nb_chars=100) for _ in range(pool_size)]
+
+    # Timestamps ascend across the whole file (hot partition scenario)
+    if profile.burst_rows:
+        timestamps = [
+            (CSVGenerator.BASE_TIME + timedelta(milliseconds=offset)).isoformat(
+                timespec="milliseconds"
+            )
+            for offset in _row_milliseconds(profile, start, count)
+        ]
+    else:
+        first = CSVGenerator.BASE_TIME + timedelta(seconds=start)
+        timestamps = [(first + timedelta(seconds=i)).isoformat() for i in range(count)]
+    cents = rng.choices(range(100, 100_001), k=count)
+
+    if profile.repeats_keys:
+        ids = _partition_keys(rng, seed, profile, start, count)
+    else:
+        # UUID v4 for primary key (random, well-distributed)
+        ids = _uuid4_strings(rng, count)
+
+    columns = [
+        ids,
+        timestamps,
+        rng.choices(CSVGenerator.CATEGORIES, k=count),
+        rng.choices(names, k=count),
+        rng.choices(emails, k=count),
+        [f"{c // 100}.{c % 100:02d}" for c in cents],
+        rng.choices(CSVGenerator.STATUSES, k=count),
+        rng.choices(descriptions, k=count)
+        if profile.item_size_median is None
+        else _sized_texts(rng, profile, descriptions, count),
+    ]
+    if profile.repeats_keys:
+        columns.insert(1, [f"{row:012d}" for row in range(start, start + count)])
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(zip(*columns, strict=True))
+    return buffer.getvalue()
+
 
 class CSVGenerator:
     """Generate realistic CSV test data with patterns that could cause hot partitions."""
@@ -28,106 +353,94 @@ class CSVGenerator:
     # Predefined categories and statuses for realistic data
     CATEGORIES = ["Electronics", "Books", "Clothing", "Home", "Sports", "Toys", "Food"]
     STATUSES = ["pending", "processing", "completed", "cancelled", "refunded"]
+    BASE_TIME = datetime(2024, 1, 1, 0, 0, 0)
 
-    def __init__(self, output_file: str, num_records: int = 10000):
+    def __init__(
+        self,
+        output_file: str,
+        num_records: int = 10000,
+        workers: int = 1,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        seed: int | None = None,
+        profile: WorkloadProfile | None = None,
+    ):
         """Initialize CSV generator.
 
         Args:
             output_file: Path to output CSV file
             num_records: Number of records to generate (default: 10000)
+            workers: Processes generating chunks; 1 generates them in this
+                        process (default: 1)
+            chunk_size: Rows generated and written at a time, lowered so
+                        that a chunk of the profile's expected row size
+                        holds at most ``DEFAULT_CHUNK_BYTES``
+            seed: Seed of the generated data; the same seed and chunk size
+                        produce the same file for any number of workers.
+                        None draws a fresh seed, so separate files get
+                        distinct ids
+            profile: Shape of the generated data (default: uniform keys
+                        and ~100 character descriptions)
         """
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}")
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
         self.output_file = Path(output_file)
         self.num_records = num_records
-        self.faker = Faker()
-        # Set seed for reproducible data generation in tests
-        Faker.seed(42)
+        self.workers = workers
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(64)
+        self.profile = profile or WorkloadProfile()
+        chunk_size = min(chunk_size, max(1, DEFAULT_CHUNK_BYTES // self.profile.expected_row_bytes))
+        # Chunks start on a partition boundary so each group of sort keys is
+        # generated by one chunk
+        fanout = self.profile.sort_keys_per_partition
+        self.chunk_size = -(-chunk_size // fanout) * fanout
 
     def generate(self) -> None:
         """Generate CSV file with sorted timestamps.
 
         Creates records with chronologically sorted timestamps to simulate
         a hot partition scenario if written sequentially to DynamoDB.
-        
+
         Hot Partition Scenario:
         - Records have timestamps in ascending order (2024-01-01 00:00:00, 00:00:01, etc.)
         - If written to DynamoDB in this order without shuffling, all writes
           would target the same partition key range at the same time
         - This causes throttling as one partition receives all the write load
         - The shuffle pattern in the loaders randomizes write order to prevent this
-        
-        All required fields are generated with realistic data using Faker.
-        """
-        # Generate all records first
-        records = self._generate_records()
-
-        # Write to CSV file
-        self._write_csv(records)
-
-    def _generate_records(self) -> list[dict]:
-        """Generate all records with sorted timestamps.
-
-        Creates records with incrementing timestamps (1 second apart) to
-        demonstrate a hot partition scenario. In a real-world scenario,
-        this could represent:
-        - Time-series data (sensor readings, logs, events)
-        - Sequential transaction data
-        - Batch-processed records with creation timestamps
-        
-        Without shuffling before writing to DynamoDB, these sorted timestamps
-        would cause all writes to target the same partition, leading to throttling.
-
-        Returns:
-            List of record dictionaries with all required fields
-        """
-        records = []
-        base_time = datetime(2024, 1, 1, 0, 0, 0)
-
-        for i in range(self.num_records):
-            # Create timestamps in ascending order (hot partition scenario)
-            # Each record is 1 second after the previous one
-            timestamp = base_time + timedelta(seconds=i)
-
-            record = {
-                # UUID v4 for primary key (random, well-distributed)
-                "id": str(uuid.uuid4()),
-                # Sorted timestamp (creates hot partition if written sequentially)
-                "timestamp": timestamp.isoformat(),
-                # Realistic attributes using Faker
-                "category": self.faker.random_element(elements=self.CATEGORIES),
-                "user_name": self.faker.name(),
-                "email": self.faker.email(),
-                # Convert to string to avoid Decimal serialization issues
-                "amount": str(Decimal(str(round(self.faker.random.uniform(1.0, 1000.0), 2)))),
-                "status": self.faker.random_element(elements=self.STATUSES),
-                "description": self.faker.text(max_nb_chars=100),
-            }
-            records.append(record)
-
-        return records
-
-    def _write_csv(self, records: list[dict]) -> None:
-        """Write records to CSV file.
 
-        Args:
-            records: List of record dictionaries to write
+        Chunks are written as soon as they are generated, in order, so at
+        most a few chunks per worker are held in memory.
         """
         # Ensure output directory exists
         self.output_file.parent.mkdir(parents=True, exist_ok=True)
 
-        # Define field order
-        fieldnames = [
-            "id",
-            "timestamp",
-            "category",
-            "user_name",
-            "email",
-            "amount",
-            "status",
-            "description",
-        ]
-
-        # Write CSV with headers
         with open(self.output_file, "w", newline="", encoding="utf-8") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(records)
+            csv.writer(csvfile).writerow(self.profile.fieldnames)
+            for text in self._chunk_texts():
+                csvfile.write(text)
+
+    def _chunks(self) -> Iterator[tuple[int, int, int]]:
+        """Yield (index, start, count) of every chunk."""
+        for index, start in enumerate(range(0, self.num_records, self.chunk_size)):
+            yield index, start, min(self.chunk_size, self.num_records - start)
+
+    def _chunk_texts(self) -> Iterator[str]:
+        """Yield the CSV text of every chunk, in file order."""
+        if self.workers == 1:
+            for index, start, count in self._chunks():
+                yield generate_chunk(self.seed, index, start, count, self.profile)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            # Two chunks in flight per worker keeps every process busy while
+            # bounding the text waiting to be written
+            pending: deque[Future[str]] = deque()
+            for index, start, count in self._chunks():
+                pending.append(
+                    executor.submit(generate_chunk, self.seed, index, start, count, self.profile)
+                )
+                if len(pending) >= 2 * self.workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
@@ -0,0 +1,263 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Dead-letter file for items a load gave up on.
+
+Items that are still unprocessed after their retries, or whose request failed
+for good, are appended to a dead-letter file instead of being dropped. Each
+line is one item in the DynamoDB JSON format of DynamoDB's export to S3,
+together with why it failed::
+
+    {"Item": {"id": {"S": "a"}, ...}, "error_code": "ProvisionedThroughputExceededException",
+     "error": "...", "attempts": 4, "batch_id": 17}
+
+Because the items are typed, the file is valid input for the
+``dynamodb-json`` reader: replaying it writes exactly the failed items, with
+the same types, through the same loader machinery (see ``dead_letters.py``).
+
+The file is created on the first failure, so a clean load leaves no file
+behind. Entries are appended with one ``O_APPEND`` write per batch, which
+lets the threads of a loader and the processes of the process pool loader
+share one file.
+"""
+
+import base64
+import json
+import os
+import threading
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import Any
+
+from src.batch_write import BatchWriteOutcome
+from src.checkpoint import ROW_ID_KEY
+from src.error_handler import error_code
+from src.logging_config import get_logger
+from src.readers import ColumnarRow
+from src.schema import ItemSchema
+
+logger = get_logger(__name__)
+
+# Error code recorded for items DynamoDB kept returning in UnprocessedItems
+UNPROCESSED = "UnprocessedItems"
+# Error code recorded for items over the item size limit, which are never sent
+ITEM_TOO_LARGE = "ItemSizeLimitExceeded"
+
+
+def encode_binary(value: dict[str, Any]) -> dict[str, Any]:
+    """Base64-encode binary values of an AttributeValue, recursively (as exports do)."""
+    ((kind, inner),) = value.items()
+    if kind == "B":
+        return {"B": base64.b64encode(inner).decode("ascii")}
+    if kind == "BS":
+        return {"BS": [base64.b64encode(member).decode("ascii") for member in inner]}
+    if kind == "L":
+        return {"L": [encode_binary(element) for element in inner]}
+    if kind == "M":
+        return {"M": {name: encode_binary(element) for name, element in inner.items()}}
+    return value
+
+
+@dataclass
+class DeadLetter:
+    """One item a load gave up on."""
+
+    #: Item in wire format (attribute name to AttributeValue)
+    item: dict[str, Any]
+    error_code: str
+    error: str
+    #: Number of BatchWriteItem calls that carried the item
+    attempts: int
+    batch_id: int | None = None
+
+    def to_json(self) -> str:
+        """Serialize as one line of the dead-letter file."""
+        item = {name: encode_binary(value) for name, value in self.item.items()}
+        return json.dumps(
+            {
+                "Item": item,
+                "error_code": self.error_code,
+                "error": self.error,
+                "attempts": self.attempts,
+                "batch_id": self.batch_id,
+            }
+        )
+
+
+def outcome_dead_letters(
+    batch_id: int, outcome: BatchWriteOutcome, schema: ItemSchema | None
+) -> list[DeadLetter]:
+    """Dead letters for the requests a BatchWriteItem writer gave up on.
+
+    Args:
+        batch_id: Identifier of the batch
+        outcome: Outcome reported by the writer
+        schema: Schema the items were serialized with, or None if they were
+                sent as Python values through the resource API
+
+    Returns:
+        One DeadLetter per failed request
+    """
+    if outcome.error is not None:
+        code, message = error_code(outcome.error), str(outcome.error)
+    else:
+        code, message = UNPROCESSED, outcome.reason or "still unprocessed after retries"
+    plain = ItemSchema() if schema is None else None
+    return [
+        DeadLetter(
+            item=p.item if plain is None else plain.serialize(p.item),
+            error_code=code,
+            error=message,
+            attempts=p.sent,
+            batch_id=batch_id,
+        )
+        for p in outcome.failed
+    ]
+
+
+def batch_dead_letters(
+    batch_id: int,
+    items: Iterable[Any],
+    error: Exception,
+    schema: ItemSchema | None,
+) -> list[DeadLetter]:
+    """Dead letters for a batch that raised before or while it was written.
+
+    Args:
+        batch_id: Identifier of the batch
+        items: Records of the batch as they were read (row views and
+               checkpoint row ids are allowed)
+        error: Exception raised while writing the batch
+        schema: Schema used by the load, or None for the resource API
+
+    Returns:
+        One DeadLetter per record that could be serialized
+    """
+    return record_dead_letters(items, error_code(error), str(error), schema, batch_id)
+
+
+def record_dead_letters(
+    items: Iterable[Any],
+    code: str,
+    message: str,
+    schema: ItemSchema | None,
+    batch_id: int | None = None,
+) -> list[DeadLetter]:
+    """Dead letters for records that were never sent.
+
+    Args:
+        items: Records as they were read (row views and checkpoint row ids
+               are allowed)
+        code: Error code to record
+        message: Error message to record
+        schema: Schema used by the load, or None for the resource API
+        batch_id: Identifier of the batch, if the records were in one
+
+    Returns:
+        One DeadLetter per record that could be serialized
+    """
+    serializer = schema or ItemSchema()
+    dead_letters = []
+    for record in items:
+        record = record.to_dict() if isinstance(record, ColumnarRow) else dict(record)
+        record.pop(ROW_ID_KEY, None)
+        try:
+            item = serializer.serialize(record)
+        except Exception as e:
+            logger.error(f"Could not dead-letter a failed record (batch {batch_id}): {e}")
+            continue
+        dead_letters.append(
+            DeadLetter(
+                item=item,
+                error_code=code,
+                error=message,
+                attempts=0,
+                batch_id=batch_id,
+            )
+        )
+    return dead_letters
+
+
+class DeadLetterFile:
+    """Append-only dead-letter file shared by the writers of a load."""
+
+    def __init__(self, path: str):
+        """Initialize dead-letter file.
+
+        Args:
+            path: Path of the file (created on the first failure)
+        """
+        self.path = path
+        # Items written by this process
+        self.count = 0
+        self._lock = threading.Lock()
+        self._fd: int | None = None
+
+    def start(self) -> None:
+        """Remove the file left by a previous load, so it only lists this load's failures."""
+        if os.path.exists(self.path):
+            logger.info(f"Replacing dead-letter file {self.path}")
+            os.remove(self.path)
+
+    def write(self, dead_letters: list[DeadLetter]) -> None:
+        """Append dead letters in a single write.
+
+        Args:
+            dead_letters: Failed items of one batch
+        """
+        if not dead_letters:
+            return
+        data = "".join(entry.to_json() + "\n" for entry in dead_letters).encode("utf-8")
+        with self._lock:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            # A single O_APPEND write, so concurrent writers never interleave lines
+            os.write(self._fd, data)
+            os.fsync(self._fd)
+            self.count += len(dead_letters)
+        logger.warning(f"Wrote {len(dead_letters)} failed items to {self.path}")
+
+    def close(self) -> None:
+        """Close the file."""
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+def read_dead_letters(path: str) -> Iterator[dict[str, Any]]:
+    """Yield the entries of a dead-letter file.
+
+    Args:
+        path: Path of the dead-letter file
+
+    Yields:
+        Parsed entries (``Item`` is left in DynamoDB JSON)
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def summarize(path: str) -> Counter[str]:
+    """Count the items of a dead-letter file by error code.
+
+    Args:
+        path: Path of the dead-letter file
+
+    Returns:
+        Counter of error code to number of items
+    """
+    return Counter(entry.get("error_code", "Unknown") for entry in read_dead_letters(path))
@@ -0,0 +1,232 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Duplicate primary key detection and coalescing.
+
+BatchWriteItem rejects a whole request when two of its items have the same
+primary key, so a single duplicate row used to fail its batch, and the
+batch's retries failed the same way. Duplicates are removed before they
+reach the wire, in one of two modes:
+
+- ``batch``: batches are built from distinct keys. A record whose key is
+  already in the batch being built replaces the earlier record (the later
+  record in load order wins). This costs one dictionary per batch and is
+  done by the batch packer (see src.batch_packer).
+- ``file``: a first pass over the file finds the last occurrence of every
+  duplicated key, and the load pass drops the earlier ones. The table then
+  ends up as if the file had been written in order (last write wins),
+  whatever the shuffle does.
+
+The first pass of ``file`` mode remembers keys it has seen as 64-bit hashes:
+in a set for inputs up to ``DEFAULT_EXACT_LIMIT`` rows, and in a Bloom filter
+(about 14 bits per row) for larger ones. A key whose hash was seen before is
+recorded exactly, with its last row number, so a hash collision or Bloom
+false positive only costs a dictionary entry and never drops a row.
+"""
+
+import hashlib
+import math
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Mapping, MutableMapping, Sequence
+from typing import Any
+
+from src.logging_config import get_logger
+from src.skew import key_value
+
+logger = get_logger(__name__)
+
+BATCH = "batch"
+FILE = "file"
+DEDUPE_MODES = (BATCH, FILE)
+
+# Largest expected row count whose key hashes are kept in an exact set
+DEFAULT_EXACT_LIMIT = 1_000_000
+# Bloom filter false positive rate for larger inputs
+DEFAULT_FALSE_POSITIVE_RATE = 0.001
+
+Key = tuple[str, ...]
+
+
+def key_attributes_from(description: Mapping[str, Any]) -> tuple[str, ...]:
+    """Primary key attribute names from a DescribeTable response.
+
+    Args:
+        description: DescribeTable response
+
+    Returns:
+        Partition key name, followed by the sort key name if the table has one
+
+    Raises:
+        ValueError: If the response has no key schema
+    """
+    key_schema = description["Table"]["KeySchema"]
+    ordered = sorted(key_schema, key=lambda element: element["KeyType"] != "HASH")
+    names = tuple(str(element["AttributeName"]) for element in ordered)
+    if not names:
+        raise ValueError("DescribeTable response has no key schema")
+    return names
+
+
+def record_key(record: Mapping[str, Any], key_attributes: Sequence[str]) -> Key | None:
+    """Primary key of a record given as Python values or in wire format.
+
+    Args:
+        record: Record or item
+        key_attributes: Key attribute names
+
+    Returns:
+        Key values as strings, or None if the record lacks a key attribute
+    """
+    key = []
+    for name in key_attributes:
+        value = key_value(record, name)
+        if value is None:
+            return None
+        key.append(value)
+    return tuple(key)
+
+
+def _key_hash(key: Key) -> int:
+    """64-bit hash of a key."""
+    digest = hashlib.blake2b("\x1f".join(key).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class BloomFilter:
+    """Bloom filter over 64-bit hashes."""
+
+    def __init__(self, capacity: int, false_positive_rate: float = DEFAULT_FALSE_POSITIVE_RATE):
+        """Initialize filter.
+
+        Args:
+            capacity: Expected number of distinct entries
+            false_positive_rate: Target false positive rate at ``capacity``
+        """
+        if capacity <= 0:
+            raise ValueError(f"capacity must be greater than 0, got {capacity}")
+        if not 0 < false_positive_rate < 1:
+            raise ValueError(f"false_positive_rate must be in (0, 1), got {false_positive_rate}")
+        bits = math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+        self.size = max(64, bits + (-bits % 64))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._words = array("Q", bytes(self.size // 8))
+
+    def add(self, value: int) -> bool:
+        """Add a hash and report whether it may have been added before.
+
+        Args:
+            value: 64-bit hash
+
+        Returns:
+            False if the value was certainly new, True if it may have been seen
+        """
+        h1 = value & 0xFFFFFFFF
+        h2 = (value >> 32) | 1
+        words = self._words
+        present = True
+        for i in range(self.hashes):
+            bit = (h1 + i * h2) % self.size
+            word, mask = bit >> 6, 1 << (bit & 63)
+            if not words[word] & mask:
+                present = False
+                words[word] |= mask
+        return present
+
+
+class _HashSet:
+    """Exact set of 64-bit hashes with the BloomFilter interface."""
+
+    def __init__(self) -> None:
+        self._values: set[int] = set()
+
+    def add(self, value: int) -> bool:
+        if value in self._values:
+            return True
+        self._values.add(value)
+        return False
+
+
+class LastWriteIndex:
+    """Row number of the last occurrence of every duplicated key in a file."""
+
+    def __init__(
+        self,
+        key_attributes: Sequence[str],
+        expected_records: int | None = None,
+        exact_limit: int = DEFAULT_EXACT_LIMIT,
+        false_positive_rate: float = DEFAULT_FALSE_POSITIVE_RATE,
+    ):
+        """Initialize index.
+
+        Args:
+            key_attributes: Primary key attribute names
+            expected_records: Estimated rows in the file (None if unknown)
+            exact_limit: Largest expected_records kept in an exact hash set;
+                         larger inputs use a Bloom filter
+            false_positive_rate: Bloom filter false positive rate
+        """
+        self.key_attributes = tuple(key_attributes)
+        self.seen: BloomFilter | _HashSet
+        if expected_records is None or expected_records <= exact_limit:
+            self.seen = _HashSet()
+        else:
+            self.seen = BloomFilter(expected_records, false_positive_rate)
+        #: Last row number of every key whose hash was seen more than once
+        self.last_row: dict[Key, int] = {}
+        self.rows = 0
+
+    def build(self, records: Iterable[Mapping[str, Any]]) -> "LastWriteIndex":
+        """Index the rows of a file (the first pass).
+
+        Args:
+            records: Records in file order
+
+        Returns:
+            self
+        """
+        last_row = self.last_row
+        for row, record in enumerate(records):
+            key = record_key(record, self.key_attributes)
+            if key is not None and self.seen.add(_key_hash(key)):
+                last_row[key] = row
+            self.rows = row + 1
+        logger.info(
+            f"Indexed {self.rows:,} rows for duplicate keys "
+            f"({type(self.seen).__name__}, {len(last_row):,} candidate keys)"
+        )
+        return self
+
+    def last_only(
+        self,
+        records: Iterable[MutableMapping[str, Any]],
+        on_duplicate: Callable[[Mapping[str, Any]], None] | None = None,
+    ) -> Iterator[MutableMapping[str, Any]]:
+        """Drop every row that a later row with the same key overwrites.
+
+        Args:
+            records: The same records, in the same order, as passed to build
+            on_duplicate: Called with every dropped row
+
+        Yields:
+            Rows that hold the last value of their key
+        """
+        last_row = self.last_row
+        for row, record in enumerate(records):
+            if last_row:
+                key = record_key(record, self.key_attributes)
+                last = last_row.get(key) if key is not None else None
+                if last is not None and last != row:
+                    if on_duplicate is not None:
+                        on_duplicate(record)
+                    continue
+            yield record
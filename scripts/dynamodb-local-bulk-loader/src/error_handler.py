@@ -13,11 +13,13 @@
 #
 """Error handling and categorization for DynamoDB operations."""
 
+import asyncio
 import logging
 from enum import Enum
 from typing import Any
 
-from botocore.exceptions import ClientError
+from botocore.exceptions import ClientError, HTTPClientError
+from botocore.exceptions import ConnectionError as BotocoreConnectionError
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +32,22 @@ class ErrorAction(Enum):
     FAIL_AFTER_RETRIES = "fail_after_retries"
 
 
+def error_code(error: Exception) -> str:
+    """Return the AWS error code of an exception, or its class name.
+
+    Args:
+        error: Exception to describe
+
+    Returns:
+        Error code such as "ProvisionedThroughputExceededException"
+    """
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code")
+        if code:
+            return str(code)
+    return type(error).__name__
+
+
 def is_permanent_error(error: Exception) -> bool:
     """Check if an error is permanent and should not be retried.
 
@@ -105,7 +123,8 @@ def is_transient_error(error: Exception) -> bool:
     Transient errors include:
     - ServiceUnavailable: Temporary service issues
     - InternalServerError: AWS internal errors
-    - Network timeouts and connection errors
+    - Network timeouts and connection errors, including botocore's
+      (EndpointConnectionError, ConnectionClosedError, ReadTimeoutError)
 
     Args:
         error: Exception to check
@@ -132,7 +151,10 @@ def is_transient_error(error: Exception) -> bool:
         (
             ConnectionError,
             TimeoutError,
+            asyncio.TimeoutError,
             OSError,
+            BotocoreConnectionError,
+            HTTPClientError,
         ),
     ):
         return True
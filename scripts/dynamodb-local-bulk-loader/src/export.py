@@ -0,0 +1,586 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Parallel export of a table to CSV, JSON Lines, DynamoDB JSON or Parquet files.
+
+``TableExporter`` runs a parallel segmented Scan (see src.scan) in which every
+segment writes its own file, from its own thread, so there is no shared
+writer to contend on and export throughput grows with the number of
+segments. Text formats can be compressed (gzip, bzip2, zstd) on the way to
+disk; compression releases the GIL. A ``manifest.json`` written last lists
+every segment's file and item count.
+
+Formats, and what a round trip through the loaders preserves:
+
+- ``dynamodb-json``: ``{"Item": {...}}`` lines as in DynamoDB's S3 exports.
+  Lossless; load it back with the ``dynamodb-json`` reader.
+- ``jsonl``: one plain JSON object per line. Numbers are written exactly as
+  DynamoDB returns them, binary values as base64 text and sets as lists.
+- ``csv``: one column per attribute. Nested values are written as compact
+  JSON, binary values as base64.
+- ``parquet``: one row group per ``parquet_row_group`` items, with a column
+  type per attribute (see ParquetSegmentWriter). Needs pyarrow.
+
+The CSV header and Parquet schema of a segment come from its first page (or
+from ``columns``). Attributes that appear only later, and Parquet values
+that do not fit their column's type, are left out and listed per file in
+the manifest as ``unexported_attributes``.
+"""
+
+import base64
+import csv
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterable, Sequence
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+import boto3
+
+from src.compression import BZIP2, COMPRESSION_SUFFIXES, COMPRESSIONS, open_output
+from src.dead_letter import encode_binary
+from src.dedupe import key_attributes_from
+from src.logging_config import get_logger
+from src.rate_limiter import TokenBucket
+from src.retry_handler import RetryHandler
+from src.scan import DEFAULT_SEGMENTS, ParallelScan, ScanPage, scan_client
+
+logger = get_logger(__name__)
+
+CSV = "csv"
+JSONL = "jsonl"
+DYNAMODB_JSON = "dynamodb-json"
+PARQUET = "parquet"
+EXPORT_FORMATS = (CSV, JSONL, DYNAMODB_JSON, PARQUET)
+
+FORMAT_EXTENSIONS = {CSV: ".csv", JSONL: ".jsonl", DYNAMODB_JSON: ".ddbjson", PARQUET: ".parquet"}
+MANIFEST_NAME = "manifest.json"
+DEFAULT_PARQUET_ROW_GROUP = 65_536
+
+Item = dict[str, Any]
+
+
+def _b64(value: bytes) -> str:
+    return base64.b64encode(value).decode("ascii")
+
+
+def json_value(value: dict[str, Any]) -> str:
+    """Compact plain JSON for an AttributeValue.
+
+    Numbers are copied from the N string, so they keep every digit (the
+    jsonl reader parses them back as Decimal).
+    """
+    ((kind, inner),) = value.items()
+    if kind == "S":
+        return json.dumps(inner, ensure_ascii=False)
+    if kind == "N":
+        return str(inner)
+    if kind == "BOOL":
+        return "true" if inner else "false"
+    if kind == "NULL":
+        return "null"
+    if kind == "B":
+        return f'"{_b64(inner)}"'
+    if kind == "M":
+        members = (f"{json.dumps(k, ensure_ascii=False)}:{json_value(v)}" for k, v in inner.items())
+        return "{" + ",".join(members) + "}"
+    if kind == "L":
+        return "[" + ",".join(json_value(element) for element in inner) + "]"
+    if kind == "SS":
+        return json.dumps(list(inner), ensure_ascii=False, separators=(",", ":"))
+    if kind == "NS":
+        return "[" + ",".join(str(member) for member in inner) + "]"
+    if kind == "BS":
+        return "[" + ",".join(f'"{_b64(member)}"' for member in inner) + "]"
+    raise ValueError(f"Unknown AttributeValue type {kind!r}")
+
+
+def text_value(value: dict[str, Any]) -> str:
+    """CSV cell for an AttributeValue."""
+    ((kind, inner),) = value.items()
+    if kind in ("S", "N"):
+        return str(inner)
+    if kind == "NULL":
+        return ""
+    if kind == "B":
+        return _b64(inner)
+    if kind == "BOOL":
+        return "true" if inner else "false"
+    return json_value(value)
+
+
+def _columns(items: Iterable[Item], key_attributes: Sequence[str]) -> list[str]:
+    """Column names for a file: key attributes first, then the others sorted."""
+    names: set[str] = set()
+    for item in items:
+        names.update(item)
+    keys = [name for name in key_attributes if name in names]
+    return keys + sorted(names - set(keys))
+
+
+class SegmentWriter(ABC):
+    """Writes the items of one scan segment to one file."""
+
+    def __init__(self, path: str, compression: str | None = None):
+        """Initialize writer.
+
+        Args:
+            path: Output file
+            compression: "gzip", "bz2", "zstd", or None
+        """
+        self.path = path
+        self.compression = compression
+        self.items = 0
+        #: Attributes left out of the file
+        self.unexported: set[str] = set()
+
+    @abstractmethod
+    def write(self, items: list[Item]) -> None:
+        """Write a page of items in wire format."""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Finish the file."""
+
+
+class JsonLinesSegmentWriter(SegmentWriter):
+    """One plain JSON object per line."""
+
+    def __init__(self, path: str, compression: str | None = None):
+        super().__init__(path, compression)
+        self._file = open_output(path, compression)
+
+    def write(self, items: list[Item]) -> None:
+        lines = []
+        for item in items:
+            members = (
+                f"{json.dumps(k, ensure_ascii=False)}:{json_value(v)}" for k, v in item.items()
+            )
+            lines.append("{" + ",".join(members) + "}\n")
+        self._file.write("".join(lines))
+        self.items += len(items)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class DynamoDBJsonSegmentWriter(SegmentWriter):
+    """``{"Item": {...}}`` lines, as in DynamoDB's exports to S3."""
+
+    def __init__(self, path: str, compression: str | None = None):
+        super().__init__(path, compression)
+        self._file = open_output(path, compression)
+
+    def write(self, items: list[Item]) -> None:
+        lines = []
+        for item in items:
+            typed = {name: encode_binary(value) for name, value in item.items()}
+            lines.append(json.dumps({"Item": typed}, ensure_ascii=False, separators=(",", ":")))
+        self._file.write("\n".join(lines) + "\n")
+        self.items += len(items)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class CsvSegmentWriter(SegmentWriter):
+    """One column per attribute, with a header row."""
+
+    def __init__(
+        self,
+        path: str,
+        compression: str | None = None,
+        columns: Sequence[str] | None = None,
+        key_attributes: Sequence[str] = (),
+    ):
+        super().__init__(path, compression)
+        self.columns = list(columns) if columns else None
+        self.key_attributes = tuple(key_attributes)
+        self._file = open_output(path, compression, newline="")
+        self._writer = csv.writer(self._file)
+        self._header_written = False
+
+    def write(self, items: list[Item]) -> None:
+        if self.columns is None:
+            self.columns = _columns(items, self.key_attributes)
+        if not self._header_written:
+            self._writer.writerow(self.columns)
+            self._header_written = True
+        columns = self.columns
+        known = set(columns)
+        rows = []
+        for item in items:
+            if not known.issuperset(item):
+                self.unexported.update(name for name in item if name not in known)
+            rows.append([text_value(item[name]) if name in item else "" for name in columns])
+        self._writer.writerows(rows)
+        self.items += len(items)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetSegmentWriter(SegmentWriter):
+    """Parquet file with one column per attribute, written in row groups.
+
+    Column types come from the values of the first row group: ``int64`` for
+    integral numbers, ``double`` for other numbers, ``string``, ``binary`` and
+    ``bool``; attributes whose values mix types, and maps, lists and sets,
+    are stored as compact JSON strings. A later value that does not fit its
+    column (such as 2.5 in an int64 column) is written as null.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        compression: str | None = None,
+        columns: Sequence[str] | None = None,
+        key_attributes: Sequence[str] = (),
+        row_group: int = DEFAULT_PARQUET_ROW_GROUP,
+    ):
+        super().__init__(path, compression)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError(
+                "Writing Parquet requires pyarrow: pip install 'dynamodb-local-bulk-loader[parquet]'"
+            ) from e
+        if compression == BZIP2:
+            raise ValueError("Parquet files support gzip and zstd compression, not bz2")
+        self._pa = pa
+        self._pq = pq
+        self.columns = list(columns) if columns else None
+        self.key_attributes = tuple(key_attributes)
+        self.row_group = row_group
+        self._kinds: dict[str, str] = {}
+        self._buffer: list[Item] = []
+        self._writer: Any = None
+
+    def write(self, items: list[Item]) -> None:
+        self._buffer.extend(items)
+        self.items += len(items)
+        while len(self._buffer) >= self.row_group:
+            self._flush()
+
+    def close(self) -> None:
+        while self._buffer:
+            self._flush()
+        if self._writer is not None:
+            self._writer.close()
+
+    def _column_kind(self, values: list[dict[str, Any]]) -> str:
+        """Storage kind of a column from its first values."""
+        kinds = {next(iter(value)) for value in values} - {"NULL"}
+        if kinds == {"N"}:
+            integral = all(
+                not any(c in value["N"] for c in ".eE") for value in values if "N" in value
+            )
+            return "int" if integral else "float"
+        if len(kinds) == 1 and next(iter(kinds)) in ("S", "B", "BOOL"):
+            return next(iter(kinds))
+        return "json"
+
+    def _schema(self, items: list[Item]) -> Any:
+        pa = self._pa
+        if self.columns is None:
+            self.columns = _columns(items, self.key_attributes)
+        types = {
+            "int": pa.int64(),
+            "float": pa.float64(),
+            "S": pa.string(),
+            "B": pa.binary(),
+            "BOOL": pa.bool_(),
+            "json": pa.string(),
+        }
+        fields = []
+        for name in self.columns:
+            values = [item[name] for item in items if name in item]
+            self._kinds[name] = self._column_kind(values)
+            fields.append(pa.field(name, types[self._kinds[name]]))
+        return pa.schema(fields)
+
+    def _convert(self, name: str, value: dict[str, Any]) -> Any:
+        """Python value of an AttributeValue for its column, None if it does not fit."""
+        ((kind, inner),) = value.items()
+        if kind == "NULL":
+            return None
+        column_kind = self._kinds[name]
+        if column_kind == "json":
+            return inner if kind == "S" else json_value(value)
+        if column_kind in ("int", "float") and kind == "N":
+            if column_kind == "float":
+                return float(inner)
+            if not any(c in inner for c in ".eE"):
+                return int(inner)
+        elif column_kind == kind:
+            return inner
+        self.unexported.add(name)
+        return None
+
+    def _flush(self) -> None:
+        items = self._buffer[: self.row_group]
+        del self._buffer[: self.row_group]
+        if self._writer is None:
+            schema = self._schema(items)
+            self._writer = self._pq.ParquetWriter(
+                self.path, schema, compression=self.compression or "snappy"
+            )
+        columns = self.columns or []
+        known = set(columns)
+        data: dict[str, list[Any]] = {name: [] for name in columns}
+        for item in items:
+            if not known.issuperset(item):
+                self.unexported.update(name for name in item if name not in known)
+            for name in columns:
+                value = item.get(name)
+                data[name].append(None if value is None else self._convert(name, value))
+        self._writer.write_table(self._pa.table(data, schema=self._writer.schema))
+
+
+@dataclass
+class SegmentFile:
+    """Manifest entry of one segment."""
+
+    segment: int
+    #: File name relative to the output directory (None if the segment was empty)
+    path: str | None
+    items: int = 0
+    bytes: int = 0
+    columns: list[str] | None = None
+    unexported_attributes: list[str] = field(default_factory=list)
+
+
+@dataclass
+class ExportResult:
+    """Statistics of an export, also written as its manifest."""
+
+    table_name: str
+    format: str
+    compression: str | None
+    segments: int
+    total_items: int
+    duration_seconds: float
+    consumed_rcu: float
+    files: list[SegmentFile]
+    manifest_path: str = ""
+
+    def items_per_second(self) -> float:
+        """Average export throughput."""
+        return self.total_items / self.duration_seconds if self.duration_seconds > 0 else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        """Manifest content."""
+        manifest = asdict(self)
+        del manifest["manifest_path"]
+        return manifest
+
+
+class TableExporter:
+    """Exports a table with a parallel scan, one output file per segment."""
+
+    def __init__(
+        self,
+        table_name: str,
+        output_dir: str,
+        format: str = JSONL,
+        compression: str | None = None,
+        region: str = "us-east-1",
+        segments: int = DEFAULT_SEGMENTS,
+        columns: Sequence[str] | None = None,
+        page_size: int | None = None,
+        max_rcu: float | None = None,
+        max_retries: int = 5,
+        consistent_read: bool = False,
+        parquet_row_group: int = DEFAULT_PARQUET_ROW_GROUP,
+        session: Any = None,
+    ):
+        """Initialize exporter.
+
+        Args:
+            table_name: Table to export
+            output_dir: Directory receiving the files and manifest.json
+                        (created if needed)
+            format: "csv", "jsonl", "dynamodb-json" or "parquet"
+            compression: "gzip", "bz2" or "zstd" for text formats; "gzip" or
+                        "zstd" as the Parquet codec (default: snappy)
+            region: AWS region
+            segments: Parallel scan segments, and output files
+            columns: Columns of CSV and Parquet files (default: the
+                        attributes of each segment's first page)
+            page_size: Maximum items per Scan call
+            max_rcu: Optional read capacity (RCU/s) the export may consume
+            max_retries: Retry attempts per Scan call
+            consistent_read: Use strongly consistent reads
+            parquet_row_group: Items per Parquet row group
+            session: boto3 Session (or a stand-in such as
+                        src.local_dynamodb.LocalSession). A new Session is
+                        created if None.
+        """
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"format must be one of {EXPORT_FORMATS}, got {format!r}")
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(
+                f"compression must be one of {COMPRESSIONS} or None, got {compression!r}"
+            )
+        if format == PARQUET and compression == BZIP2:
+            raise ValueError("Parquet files support gzip and zstd compression, not bz2")
+        if max_rcu is not None and max_rcu <= 0:
+            raise ValueError(f"max_rcu must be greater than 0, got {max_rcu}")
+        if parquet_row_group <= 0:
+            raise ValueError(f"parquet_row_group must be greater than 0, got {parquet_row_group}")
+        self.table_name = table_name
+        self.output_dir = output_dir
+        self.format = format
+        self.compression = compression
+        self.region = region
+        self.segments = segments
+        self.columns = list(columns) if columns else None
+        self.page_size = page_size
+        self.max_rcu = max_rcu
+        self.max_retries = max_retries
+        self.consistent_read = consistent_read
+        self.parquet_row_group = parquet_row_group
+        self.session = session
+        self.key_attributes: tuple[str, ...] = ()
+        # Scan of the last run, for its progress counters
+        self.scan: ParallelScan | None = None
+
+    def file_name(self, segment: int) -> str:
+        """Name of a segment's output file."""
+        name = f"{self.table_name}-segment-{segment:04d}{FORMAT_EXTENSIONS[self.format]}"
+        if self.compression is not None and self.format != PARQUET:
+            name += COMPRESSION_SUFFIXES[self.compression]
+        return name
+
+    def export(self) -> ExportResult:
+        """Export every item of the table, then write the manifest.
+
+        Returns:
+            ExportResult with per-segment counts
+        """
+        start_time = time.time()
+        session = self.session or boto3.Session(region_name=self.region)
+        client = scan_client(session, self.segments)
+        try:
+            self.key_attributes = key_attributes_from(
+                client.describe_table(TableName=self.table_name)
+            )
+        except Exception as e:
+            logger.warning(f"Could not read the table key with DescribeTable: {e}")
+        os.makedirs(self.output_dir, exist_ok=True)
+        # A manifest marks a complete export: drop the one of an earlier run first,
+        # with its segment files, so segments that are empty now leave no stale file
+        output_dir = Path(self.output_dir)
+        (output_dir / MANIFEST_NAME).unlink(missing_ok=True)
+        for stale in output_dir.glob(f"{self.table_name}-segment-*"):
+            stale.unlink()
+        logger.info(
+            f"Exporting {self.table_name} to {self.output_dir} "
+            f"({self.format}, {self.segments} segments)"
+        )
+
+        writers: dict[int, SegmentWriter] = {}
+
+        def on_page(page: ScanPage) -> None:
+            """Write a page to its segment's file (segment thread)."""
+            writer = writers.get(page.segment)
+            if writer is None:
+                writer = writers[page.segment] = self._open_writer(page.segment)
+            writer.write(page.items)
+
+        self.scan = ParallelScan(
+            client,
+            self.table_name,
+            segments=self.segments,
+            page_size=self.page_size,
+            consistent_read=self.consistent_read,
+            rate_limiter=TokenBucket(rate=self.max_rcu) if self.max_rcu else None,
+            retry_handler=RetryHandler(max_retries=self.max_retries),
+        )
+        try:
+            self.scan.run(on_page)
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+        files = []
+        for segment in range(self.segments):
+            segment_writer = writers.get(segment)
+            if segment_writer is None:
+                files.append(SegmentFile(segment=segment, path=None))
+                continue
+            if segment_writer.unexported:
+                logger.warning(
+                    f"Segment {segment}: attributes not exported to {segment_writer.path}: "
+                    f"{', '.join(sorted(segment_writer.unexported))}"
+                )
+            files.append(
+                SegmentFile(
+                    segment=segment,
+                    path=os.path.basename(segment_writer.path),
+                    items=segment_writer.items,
+                    bytes=os.path.getsize(segment_writer.path),
+                    columns=getattr(segment_writer, "columns", None),
+                    unexported_attributes=sorted(segment_writer.unexported),
+                )
+            )
+        result = ExportResult(
+            table_name=self.table_name,
+            format=self.format,
+            compression=self.compression,
+            segments=self.segments,
+            total_items=sum(f.items for f in files),
+            duration_seconds=time.time() - start_time,
+            consumed_rcu=self.scan.consumed_rcu,
+            files=files,
+        )
+        result.manifest_path = self._write_manifest(result)
+        logger.info(
+            f"Export complete: {result.total_items:,} items in "
+            f"{result.duration_seconds:.2f}s ({result.items_per_second():,.0f} items/s)"
+        )
+        return result
+
+    def _open_writer(self, segment: int) -> SegmentWriter:
+        """Create the writer of a segment's file."""
+        path = str(Path(self.output_dir) / self.file_name(segment))
+        if self.format == JSONL:
+            return JsonLinesSegmentWriter(path, self.compression)
+        if self.format == DYNAMODB_JSON:
+            return DynamoDBJsonSegmentWriter(path, self.compression)
+        if self.format == CSV:
+            return CsvSegmentWriter(path, self.compression, self.columns, self.key_attributes)
+        return ParquetSegmentWriter(
+            path, self.compression, self.columns, self.key_attributes, self.parquet_row_group
+        )
+
+    def _write_manifest(self, result: ExportResult) -> str:
+        """Write manifest.json atomically; it exists only for complete exports."""
+        path = Path(self.output_dir) / MANIFEST_NAME
+        temporary = path.with_suffix(".json.tmp")
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(result.to_dict(), f, indent=2)
+            f.write("\n")
+        os.replace(temporary, path)
+        return str(path)
+
+
+def read_manifest(output_dir: str) -> dict[str, Any]:
+    """Read the manifest of an export directory."""
+    with open(Path(output_dir) / MANIFEST_NAME, encoding="utf-8") as f:
+        manifest: dict[str, Any] = json.load(f)
+    return manifest
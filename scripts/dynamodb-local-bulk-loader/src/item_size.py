@@ -0,0 +1,159 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""DynamoDB item size and write capacity estimation.
+
+DynamoDB charges one write capacity unit (WCU) per 1KB of item size, rounded
+up. Item size is the sum of the UTF-8 lengths of the attribute names plus the
+sizes of the values:
+
+- String: UTF-8 byte length
+- Number: about one byte per two significant digits, plus one
+- Binary: raw byte length
+- Boolean / Null: 1 byte
+- List / Map: 3 bytes of overhead plus 1 byte per element, plus the elements
+- Sets: the sum of their members
+
+See https://docs.aws.amazon.com/amazondynamodb/latest/developerguide/CapacityUnitCalculations.html
+"""
+
+import math
+from decimal import Decimal
+from typing import Any
+
+# Bytes per write capacity unit
+WCU_BYTES = 1024
+
+# Maximum size of a single DynamoDB item
+MAX_ITEM_BYTES = 400 * 1024
+
+# Maximum number of items and total size of one BatchWriteItem request
+MAX_BATCH_ITEMS = 25
+MAX_REQUEST_BYTES = 16 * 1024 * 1024
+
+
+def _number_size(value: int | float | Decimal) -> int:
+    """Approximate stored size of a number (significant digits / 2 + 1)."""
+    digits = Decimal(str(value)).normalize().as_tuple().digits
+    return (len(digits) + 1) // 2 + 1
+
+
+def attribute_value_size(value: Any) -> int:
+    """Estimate the stored size of one attribute value in bytes.
+
+    Args:
+        value: Python value as accepted by the boto3 resource API
+
+    Returns:
+        Estimated size in bytes
+    """
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (int, float, Decimal)):
+        return _number_size(value)
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, (set, frozenset)):
+        return sum(attribute_value_size(member) for member in value)
+    if isinstance(value, (list, tuple)):
+        return 3 + sum(1 + attribute_value_size(element) for element in value)
+    if isinstance(value, dict):
+        return 3 + sum(
+            1 + len(str(name).encode("utf-8")) + attribute_value_size(element)
+            for name, element in value.items()
+        )
+    # Unknown types are serialised as strings by the loaders' callers
+    return len(str(value).encode("utf-8"))
+
+
+def estimate_item_size(item: dict[str, Any]) -> int:
+    """Estimate the stored size of an item in bytes.
+
+    Args:
+        item: Item as a dictionary of attribute name to Python value
+
+    Returns:
+        Estimated size in bytes
+    """
+    return sum(
+        len(name.encode("utf-8")) + attribute_value_size(value) for name, value in item.items()
+    )
+
+
+def wire_value_size(value: dict[str, Any]) -> int:
+    """Estimate the stored size of one AttributeValue in wire format.
+
+    Args:
+        value: AttributeValue such as ``{"S": "abc"}`` or ``{"N": "12.5"}``
+
+    Returns:
+        Estimated size in bytes
+    """
+    ((kind, data),) = value.items()
+    if kind == "S":
+        return len(data.encode("utf-8"))
+    if kind == "N":
+        return _number_size(Decimal(data))
+    if kind == "B":
+        return len(data)
+    if kind in ("BOOL", "NULL"):
+        return 1
+    if kind == "L":
+        return 3 + sum(1 + wire_value_size(element) for element in data)
+    if kind == "M":
+        return 3 + sum(
+            1 + len(name.encode("utf-8")) + wire_value_size(element)
+            for name, element in data.items()
+        )
+    if kind == "NS":
+        return sum(_number_size(Decimal(member)) for member in data)
+    # SS / BS
+    return sum(attribute_value_size(member) for member in data)
+
+
+def wire_item_size(item: dict[str, Any]) -> int:
+    """Estimate the stored size of an item given in wire format.
+
+    Args:
+        item: Item as a dictionary of attribute name to AttributeValue
+
+    Returns:
+        Estimated size in bytes
+    """
+    return sum(len(name.encode("utf-8")) + wire_value_size(value) for name, value in item.items())
+
+
+def wire_write_units(item: dict[str, Any]) -> int:
+    """Write capacity units consumed by writing an item given in wire format.
+
+    Args:
+        item: Item as a dictionary of attribute name to AttributeValue
+
+    Returns:
+        Number of WCUs
+    """
+    return max(1, math.ceil(wire_item_size(item) / WCU_BYTES))
+
+
+def write_units(item: dict[str, Any]) -> int:
+    """Write capacity units consumed by writing an item (1KB rounded up, min 1).
+
+    Args:
+        item: Item as a dictionary of attribute name to Python value
+
+    Returns:
+        Number of WCUs
+    """
+    return max(1, math.ceil(estimate_item_size(item) / WCU_BYTES))
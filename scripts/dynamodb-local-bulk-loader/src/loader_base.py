@@ -0,0 +1,332 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Loader pipeline shared by the threaded and async DynamoDB loaders.
+
+Everything between the input file and a batch ready to send lives here:
+readers and schemas, shuffling, deduplication, batching, checkpoints,
+dead letters and concurrency control. The loaders only add the write loop
+(threads with boto3, or coroutines with aioboto3).
+"""
+
+import contextlib
+from collections.abc import Iterable, Iterator, Mapping, MutableMapping, Sequence
+from typing import Any
+
+from botocore.exceptions import ClientError
+
+from src.autotune import AutoTuner, TuningProfiles, create_tuner, profile_key
+from src.batch_packer import BatchPacker
+from src.batch_write import BatchWriteOutcome
+from src.checkpoint import BYTE_OFFSET, ROW_ID_KEY, ROW_NUMBER, CheckpointJournal, tag_rows
+from src.concurrency import DEFAULT_MAX_CONCURRENCY, AIMDController
+from src.dead_letter import (
+    ITEM_TOO_LARGE,
+    DeadLetterFile,
+    batch_dead_letters,
+    record_dead_letters,
+)
+from src.dedupe import FILE, LastWriteIndex
+from src.item_size import MAX_ITEM_BYTES
+from src.logging_config import get_logger
+from src.models import BatchResult, LoaderConfig, LoadResult
+from src.readers import CsvReader, RecordReader, reader_for
+from src.schema import INFER_SCHEMA, ItemSchema, PassthroughSchema
+from src.shuffle import ShuffleStrategy
+
+logger = get_logger(__name__)
+
+
+class BaseLoader:
+    """I/O-free part of a DynamoDB loader, set up by the subclass's __init__."""
+
+    # Loader name in tuning profile keys
+    tuning_name: str
+
+    config: LoaderConfig
+    shuffle_strategy: ShuffleStrategy
+    reader: RecordReader | None
+    schema: ItemSchema | str | None
+    item_schema: ItemSchema | None
+    dedupe: str | None
+    key_attributes: tuple[str, ...] | None
+    checkpoint_file: str | None
+    resume: bool
+    dead_letter_file: str | None
+    auto_tune: bool
+    tuning_profiles: TuningProfiles | None
+
+    # State of the current load
+    concurrency_controller: AIMDController | None
+    journal: CheckpointJournal | None
+    dead_letters: DeadLetterFile | None
+    duplicates: int
+    oversized: int
+
+    def _concurrency_slots(self) -> int:
+        """Maximum number of batches that may ever be in flight."""
+        if not self.config.adaptive_concurrency:
+            return self.config.max_workers
+        return self.config.max_concurrency or max(DEFAULT_MAX_CONCURRENCY, self.config.max_workers)
+
+    def _create_controller(self) -> AIMDController:
+        """Create the controller behind the adaptive limiter of one load."""
+        if not self.auto_tune:
+            return AIMDController(
+                initial_limit=self.config.max_workers,
+                max_limit=self._concurrency_slots(),
+            )
+        profile = None
+        if self.tuning_profiles is not None:
+            profile = self.tuning_profiles.get(self._tuning_key())
+        return create_tuner(
+            initial_limit=self.config.max_workers,
+            max_limit=self._concurrency_slots(),
+            batch_size=self.config.batch_size,
+            profile=profile,
+        )
+
+    def _tuning_key(self) -> str:
+        """Key of this loader's tuning profile."""
+        return profile_key(self.tuning_name, self.config.table_name, self.config.region)
+
+    def _save_tuning(self) -> None:
+        """Save the concurrency level the load's tuner locked in."""
+        if self.tuning_profiles is None or not isinstance(self.concurrency_controller, AutoTuner):
+            return
+        self.tuning_profiles.record(
+            self._tuning_key(), self.config.batch_size, self.concurrency_controller
+        )
+
+    def _on_duplicate(self, record: Mapping[str, Any]) -> None:
+        """Count a row replaced by a later row with the same key.
+
+        Its checkpoint row id is journaled right away: the later row carries
+        the value the table ends up with, so a resumed load must not write it.
+        """
+        self.duplicates += 1
+        if self.journal is not None:
+            row_id = record.get(ROW_ID_KEY)
+            if row_id is not None:
+                self.journal.record([row_id])
+
+    def _on_oversized(self, record: dict[str, Any], size: int) -> None:
+        """Dead-letter a row over the item size limit instead of sending it."""
+        self.oversized += 1
+        message = f"item size {size:,} bytes exceeds the {MAX_ITEM_BYTES:,} byte limit"
+        logger.error(f"Not writing a row: {message}")
+        if self.dead_letters is not None:
+            self.dead_letters.write(
+                record_dead_letters([record], ITEM_TOO_LARGE, message, self.item_schema)
+            )
+
+    def _count_dropped(self, result: LoadResult) -> None:
+        """Add the rows dropped before batching to a load's result."""
+        result.duplicate_records = self.duplicates
+        if self.oversized:
+            result.total_records += self.oversized
+            result.failed_writes += self.oversized
+            result.errors.append(
+                f"{self.oversized} items exceed the {MAX_ITEM_BYTES // 1024}KB item size limit"
+            )
+
+    def _reader_for(self, path: str) -> RecordReader:
+        """Reader for an input file: the configured one, or one picked by extension."""
+        return self.reader if self.reader is not None else reader_for(path)
+
+    def _resolve_schema(self, path: str) -> ItemSchema | None:
+        """Schema for loading ``path``: declared, inferred, or passthrough for typed input."""
+        reader = self._reader_for(path)
+        if reader.wire_format:
+            if self.schema is not None:
+                logger.warning(f"{reader.name} items are already typed; ignoring the schema")
+            return PassthroughSchema()
+        if self.schema == INFER_SCHEMA:
+            with contextlib.closing(reader.iter_records(path)) as records:
+                return ItemSchema.infer(records)
+        return self.schema if isinstance(self.schema, ItemSchema) else None
+
+    def _open_journal(self, csv_file: str) -> CheckpointJournal | None:
+        """Open the checkpoint journal for a load, if checkpointing is enabled."""
+        if self.checkpoint_file is None:
+            return None
+        # Rows read through an offset index are identified by their byte offset
+        id_kind = BYTE_OFFSET if self.shuffle_strategy.reads_files else ROW_NUMBER
+        journal = CheckpointJournal(self.checkpoint_file, csv_file, id_kind=id_kind)
+        journal.start(resume=self.resume)
+        return journal
+
+    def _open_dead_letters(self) -> DeadLetterFile | None:
+        """Prepare the dead-letter file for a load, if one is configured."""
+        if self.dead_letter_file is None:
+            return None
+        dead_letters = DeadLetterFile(self.dead_letter_file)
+        dead_letters.start()
+        return dead_letters
+
+    def _dead_letter_batch(self, batch_id: int, batch: list[Any], error: Exception) -> None:
+        """Save the items of a batch that raised instead of being written."""
+        if self.dead_letters is not None:
+            self.dead_letters.write(batch_dead_letters(batch_id, batch, error, self.item_schema))
+
+    def _on_throttle(self) -> None:
+        """Feed a throttling signal into the adaptive concurrency controller."""
+        if self.concurrency_controller is not None:
+            self.concurrency_controller.on_throttle()
+
+    def _read_csv(self, csv_file: str) -> list[MutableMapping[str, Any]]:
+        """Read CSV file and return list of records.
+
+        Args:
+            csv_file: Path to CSV file
+
+        Returns:
+            List of dictionaries representing CSV records
+        """
+        return list(self._iter_csv(csv_file))
+
+    def _iter_csv(self, csv_file: str) -> Iterator[MutableMapping[str, Any]]:
+        """Yield records one at a time with the loader's reader.
+
+        Args:
+            csv_file: Path to the CSV (or other supported) input file
+
+        Yields:
+            Dictionaries representing CSV records
+        """
+        reader = self._reader_for(csv_file)
+        shuffled = self._iter_file_shuffled(reader, csv_file)
+        if shuffled is not None:
+            yield from shuffled
+            return
+        records: Iterator[MutableMapping[str, Any]] = reader.iter_records(csv_file)
+        if self.dedupe == FILE and self.key_attributes is not None:
+            index = LastWriteIndex(self.key_attributes, reader.estimate_records(csv_file))
+            with contextlib.closing(reader.iter_records(csv_file)) as first_pass:
+                index.build(first_pass)
+            records = index.last_only(records, on_duplicate=self._on_duplicate)
+        if self.journal is None:
+            yield from records
+        else:
+            yield from self.journal.skip_completed(tag_rows(records))
+
+    def _iter_file_shuffled(
+        self, reader: RecordReader, csv_file: str
+    ) -> Iterator[dict[str, Any]] | None:
+        """Rows of the input file read by the shuffle strategy, if it reads files itself.
+
+        Rows a resumed load already wrote are left out by the strategy.
+
+        Args:
+            reader: The loader's reader for the file
+            csv_file: Path to the CSV file
+
+        Returns:
+            The rows, already shuffled, or None if they are read with ``reader``
+            and shuffled afterwards
+        """
+        if not self.shuffle_strategy.reads_files:
+            return None
+        if not isinstance(reader, CsvReader):
+            raise ValueError(
+                f"{type(self.shuffle_strategy).__name__} reads CSV files only, "
+                f"not {reader.name} input"
+            )
+        if self.journal is None:
+            return self.shuffle_strategy.iter_file(csv_file)
+        # The journal only holds offsets of rows of this file (it is fingerprinted)
+        self.journal.skipped = len(self.journal.completed)
+        return self.shuffle_strategy.iter_file(
+            csv_file, skip=self.journal.completed, row_id_key=ROW_ID_KEY
+        )
+
+    def _create_batches(self, records: Sequence[Mapping[str, Any]]) -> list[list[dict[str, Any]]]:
+        """Split records into batches.
+
+        Args:
+            records: List of records
+
+        Returns:
+            List of batches, where each batch is a list of records
+        """
+        return list(self._iter_batches(records))
+
+    def _iter_batches(self, records: Iterable[Mapping[str, Any]]) -> Iterator[list[dict[str, Any]]]:
+        """Group a stream of records into batches.
+
+        Batches are filled up to batch_size records, max_request_bytes of
+        payload and max_request_wcu, whichever comes first. Records over the
+        item size limit are dead-lettered instead, and with dedupe enabled a
+        batch never holds the same key twice.
+
+        Args:
+            records: Iterable of records
+
+        Yields:
+            Lists of at most batch_size records
+        """
+        packer = BatchPacker(
+            max_items=self.config.batch_size,
+            max_bytes=self.config.max_request_bytes,
+            max_wcu=self.config.max_request_wcu,
+            wire_format=isinstance(self.item_schema, PassthroughSchema),
+            key_attributes=self.key_attributes if self.dedupe is not None else None,
+            on_duplicate=self._on_duplicate,
+            on_oversized=self._on_oversized,
+        )
+        return packer.pack(records)
+
+    def _batch_result(
+        self, batch_id: int, items: list[dict[str, Any]], outcome: BatchWriteOutcome
+    ) -> BatchResult:
+        """Convert a BatchWriteOutcome into a BatchResult and update feedback.
+
+        Args:
+            batch_id: Identifier for this batch
+            items: Items in the batch
+            outcome: Outcome reported by the BatchWriteItem writer
+
+        Returns:
+            BatchResult with operation status
+        """
+        retry_count = max(outcome.rounds - 1, 0)
+        if outcome.successful:
+            if self.concurrency_controller is not None:
+                self.concurrency_controller.on_success()
+            logger.debug(f"Batch {batch_id} written successfully ({len(items)} items)")
+            return BatchResult(
+                batch_id=batch_id,
+                items_count=len(items),
+                successful=True,
+                retry_count=retry_count,
+            )
+
+        e = outcome.error
+        if isinstance(e, ClientError):
+            # DynamoDB-specific errors (throttling, validation, etc.)
+            error_code = e.response.get("Error", {}).get("Code", "Unknown")
+            error_msg = f"Batch {batch_id} failed after retries: {error_code} - {e}"
+        elif e is not None:
+            # Unexpected errors (network, programming errors, etc.)
+            error_msg = f"Batch {batch_id} failed with unexpected error: {e}"
+        else:
+            error_msg = f"Batch {batch_id}: {len(outcome.failed)} items {outcome.reason}"
+        logger.error(error_msg)
+        return BatchResult(
+            batch_id=batch_id,
+            items_count=len(items),
+            successful=False,
+            retry_count=retry_count,
+            error=error_msg,
+            failed_items=[items[p.index] for p in outcome.failed],
+        )
@@ -0,0 +1,523 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""In-process DynamoDB stand-in for benchmarks and tests.
+
+``LocalDynamoDB`` implements just enough of BatchWriteItem, Scan and
+DescribeTable for the loaders and table tools, with injectable faults:
+
+- ``latency`` (+ up to ``latency_jitter``) seconds per request
+- ``throttle_rate``: probability that a whole request fails with
+  ProvisionedThroughputExceededException
+- ``unprocessed_rate``: probability that each item of an accepted request is
+  returned in UnprocessedItems
+
+With ``ReturnConsumedCapacity`` the response reports the WCUs of the items
+that were written (or the RCUs of the items scanned), estimated as DynamoDB
+would charge them. Scan pages hold items in wire format, and parallel scan
+segments partition the table by a hash of the primary key.
+
+``LocalSession`` and ``AsyncLocalSession`` mimic the parts of ``boto3.Session``
+and ``aioboto3.Session`` the loaders use, so a loader is pointed at the
+stand-in with its ``session`` argument. Faults are drawn from one seeded
+random generator, so a run is reproducible apart from thread scheduling.
+"""
+
+import asyncio
+import bisect
+import hashlib
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any
+
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+
+from src.item_size import MAX_ITEM_BYTES, WCU_BYTES, estimate_item_size, wire_item_size
+
+_WIRE_TYPES = {"S", "N", "B", "BOOL", "NULL", "L", "M", "SS", "NS", "BS"}
+
+# Scan stops a page once it has read this many bytes of items
+SCAN_PAGE_BYTES = 1024 * 1024
+RCU_BYTES = 4096
+
+
+@dataclass
+class LocalDynamoDBStats:
+    """Counters kept by LocalDynamoDB."""
+
+    requests: int = 0
+    throttled_requests: int = 0
+    items_written: int = 0
+    unprocessed_items: int = 0
+    scan_requests: int = 0
+
+    def to_dict(self) -> dict[str, int]:
+        """Return the counters as a dictionary."""
+        return {
+            "requests": self.requests,
+            "throttled_requests": self.throttled_requests,
+            "items_written": self.items_written,
+            "unprocessed_items": self.unprocessed_items,
+            "scan_requests": self.scan_requests,
+        }
+
+
+class LocalDynamoDB:
+    """Thread-safe in-memory table store with fault injection."""
+
+    def __init__(
+        self,
+        key_attributes: tuple[str, ...] = ("id",),
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        throttle_rate: float = 0.0,
+        unprocessed_rate: float = 0.0,
+        seed: int | None = None,
+        store_items: bool = True,
+    ):
+        """Initialize stand-in.
+
+        Args:
+            key_attributes: Primary key attribute names (declared as S)
+            latency: Minimum seconds each request takes
+            latency_jitter: Extra uniformly distributed seconds per request
+            throttle_rate: Probability that a request is rejected as throttled
+            unprocessed_rate: Probability that an item comes back unprocessed
+            seed: Optional random seed for latency and fault injection
+            store_items: If False, only count writes (keeps memory flat for
+                        large benchmark datasets)
+        """
+        for name, rate in (
+            ("throttle_rate", throttle_rate),
+            ("unprocessed_rate", unprocessed_rate),
+        ):
+            if not 0 <= rate < 1:
+                raise ValueError(f"{name} must be in [0, 1), got {rate}")
+        if latency < 0 or latency_jitter < 0:
+            raise ValueError("latency and latency_jitter must be >= 0")
+        self.key_attributes = key_attributes
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.throttle_rate = throttle_rate
+        self.unprocessed_rate = unprocessed_rate
+        self.store_items = store_items
+        self.stats = LocalDynamoDBStats()
+        # table name -> primary key -> item
+        self.tables: dict[str, dict[tuple[str, ...], dict[str, Any]]] = {}
+        # table name -> (segment, total segments) -> sorted keys, dropped on writes
+        self._sorted_keys: dict[str, dict[tuple[int, int], list[tuple[str, ...]]]] = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def request_latency(self) -> float:
+        """Draw the latency of the next request in seconds."""
+        if not self.latency_jitter:
+            return self.latency
+        with self._lock:
+            return self.latency + self._random.uniform(0, self.latency_jitter)
+
+    def batch_write_item(
+        self, RequestItems: dict[str, list[dict[str, Any]]], **kwargs: Any
+    ) -> dict[str, Any]:
+        """Apply a BatchWriteItem request (without latency).
+
+        Args:
+            RequestItems: Mapping of table name to PutRequest/DeleteRequest entries
+            **kwargs: Other BatchWriteItem parameters; only
+                      ``ReturnConsumedCapacity`` is honoured
+
+        Returns:
+            BatchWriteItem response with any UnprocessedItems
+
+        Raises:
+            ClientError: ProvisionedThroughputExceededException when the
+                         request is throttled, ValidationException for
+                         malformed requests, duplicate keys and
+                         items over 400KB
+        """
+        with self._lock:
+            self.stats.requests += 1
+            if sum(len(requests) for requests in RequestItems.values()) > 25:
+                raise _client_error(
+                    "ValidationException", "Too many items requested for the BatchWriteItem call"
+                )
+            for requests in RequestItems.values():
+                keys = [
+                    self._key(
+                        request["PutRequest"]["Item"]
+                        if "PutRequest" in request
+                        else request["DeleteRequest"]["Key"]
+                    )
+                    for request in requests
+                ]
+                if len(set(keys)) != len(keys):
+                    raise _client_error(
+                        "ValidationException", "Provided list of item keys contains duplicates"
+                    )
+                if any(
+                    _item_size(request["PutRequest"]["Item"]) > MAX_ITEM_BYTES
+                    for request in requests
+                    if "PutRequest" in request
+                ):
+                    raise _client_error(
+                        "ValidationException", "Item size has exceeded the maximum allowed size"
+                    )
+            if self.throttle_rate and self._random.random() < self.throttle_rate:
+                self.stats.throttled_requests += 1
+                raise _client_error(
+                    "ProvisionedThroughputExceededException",
+                    "The level of configured provisioned throughput for the table was exceeded",
+                )
+
+            unprocessed: dict[str, list[dict[str, Any]]] = {}
+            consumed = []
+            for table_name, requests in RequestItems.items():
+                table = self.tables.setdefault(table_name, {})
+                self._sorted_keys.pop(table_name, None)
+                units = 0
+                for request in requests:
+                    if self.unprocessed_rate and self._random.random() < self.unprocessed_rate:
+                        unprocessed.setdefault(table_name, []).append(request)
+                        self.stats.unprocessed_items += 1
+                        continue
+                    units += self._apply(table, request)
+                consumed.append({"TableName": table_name, "CapacityUnits": float(units)})
+
+            response: dict[str, Any] = {"UnprocessedItems": unprocessed}
+            if kwargs.get("ReturnConsumedCapacity", "NONE") != "NONE":
+                response["ConsumedCapacity"] = consumed
+            return response
+
+    def scan(
+        self,
+        TableName: str,
+        Segment: int = 0,
+        TotalSegments: int = 1,
+        Limit: int | None = None,
+        ExclusiveStartKey: dict[str, Any] | None = None,
+        ProjectionExpression: str | None = None,
+        ExpressionAttributeNames: dict[str, str] | None = None,
+        ConsistentRead: bool = False,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        """Return one page of a (parallel) Scan (without latency).
+
+        Items of a segment are returned in primary key order, at most
+        ``Limit`` items or 1MB per page.
+
+        Args:
+            TableName: Table to scan
+            Segment: Segment to read, in [0, TotalSegments)
+            TotalSegments: Number of segments the table is split into
+            Limit: Maximum items per page
+            ExclusiveStartKey: LastEvaluatedKey of the previous page
+            ProjectionExpression: Comma-separated attribute names (or
+                                  ``#name`` placeholders) to return
+            ExpressionAttributeNames: Placeholder substitutions
+            ConsistentRead: Charge strongly consistent reads
+            **kwargs: Other Scan parameters; only ``ReturnConsumedCapacity``
+                      is honoured
+
+        Returns:
+            Scan response with Items in wire format and, unless the segment
+            is exhausted, LastEvaluatedKey
+
+        Raises:
+            ClientError: ProvisionedThroughputExceededException when the
+                         request is throttled, ValidationException for a
+                         segment outside TotalSegments
+        """
+        if not 0 <= Segment < TotalSegments:
+            raise _client_error(
+                "ValidationException", f"Segment {Segment} is outside TotalSegments", "Scan"
+            )
+        if Limit is not None and Limit <= 0:
+            raise _client_error("ValidationException", "Limit must be greater than 0", "Scan")
+        projection = None
+        if ProjectionExpression is not None:
+            names = ExpressionAttributeNames or {}
+            projection = [
+                names.get(name.strip(), name.strip()) for name in ProjectionExpression.split(",")
+            ]
+
+        with self._lock:
+            self.stats.scan_requests += 1
+            if self.throttle_rate and self._random.random() < self.throttle_rate:
+                self.stats.throttled_requests += 1
+                raise _client_error(
+                    "ProvisionedThroughputExceededException",
+                    "The level of configured provisioned throughput for the table was exceeded",
+                    "Scan",
+                )
+            table = self.tables.get(TableName, {})
+            keys = self._segment_keys(TableName, table, Segment, TotalSegments)
+            start = 0
+            if ExclusiveStartKey is not None:
+                start = bisect.bisect_right(keys, self._key(ExclusiveStartKey))
+
+            items: list[dict[str, Any]] = []
+            read_bytes = 0
+            position = start
+            while position < len(keys) and (Limit is None or len(items) < Limit):
+                item = table[keys[position]]
+                position += 1
+                # Reads are charged for whole items, whatever the projection
+                read_bytes += _item_size(item)
+                wire = _to_wire(item)
+                if projection is not None:
+                    wire = {name: wire[name] for name in projection if name in wire}
+                items.append(wire)
+                if read_bytes >= SCAN_PAGE_BYTES:
+                    break
+
+        response: dict[str, Any] = {"Items": items, "Count": len(items), "ScannedCount": len(items)}
+        if position < len(keys):
+            last_key = keys[position - 1]
+            response["LastEvaluatedKey"] = {
+                name: {"S": last_key[i]} for i, name in enumerate(self.key_attributes)
+            }
+        if kwargs.get("ReturnConsumedCapacity", "NONE") != "NONE":
+            units = math.ceil(read_bytes / RCU_BYTES) * (1.0 if ConsistentRead else 0.5)
+            response["ConsumedCapacity"] = {"TableName": TableName, "CapacityUnits": units}
+        return response
+
+    def describe_table(self, TableName: str, **kwargs: Any) -> dict[str, Any]:
+        """Return a minimal DescribeTable response."""
+        return {
+            "Table": {
+                "TableName": TableName,
+                "KeySchema": [
+                    {"AttributeName": name, "KeyType": "HASH" if i == 0 else "RANGE"}
+                    for i, name in enumerate(self.key_attributes)
+                ],
+                "AttributeDefinitions": [
+                    {"AttributeName": name, "AttributeType": "S"} for name in self.key_attributes
+                ],
+            }
+        }
+
+    def item_count(self, table_name: str) -> int:
+        """Number of distinct items stored in a table."""
+        return len(self.tables.get(table_name, {}))
+
+    def _segment_keys(
+        self,
+        table_name: str,
+        table: dict[tuple[str, ...], dict[str, Any]],
+        segment: int,
+        total_segments: int,
+    ) -> list[tuple[str, ...]]:
+        """Sorted keys of one scan segment, cached until the table is next written.
+
+        Pages of a scan resume from their ExclusiveStartKey by bisecting this
+        list instead of sorting the table again (caller holds the lock).
+        """
+        segments = self._sorted_keys.setdefault(table_name, {})
+        keys = segments.get((segment, total_segments))
+        if keys is None:
+            keys = sorted(key for key in table if _segment_of(key, total_segments) == segment)
+            segments[segment, total_segments] = keys
+        return keys
+
+    def _apply(self, table: dict[tuple[str, ...], dict[str, Any]], request: dict[str, Any]) -> int:
+        """Apply one PutRequest or DeleteRequest (caller holds the lock).
+
+        Returns:
+            WCUs consumed by the request
+        """
+        if "PutRequest" in request:
+            item = request["PutRequest"]["Item"]
+            key = self._key(item)
+            self.stats.items_written += 1
+            if self.store_items:
+                table[key] = item
+            return _item_units(item)
+        table.pop(self._key(request["DeleteRequest"]["Key"]), None)
+        return 1
+
+    def _key(self, item: dict[str, Any]) -> tuple[str, ...]:
+        """Primary key of an item given as Python values or in wire format."""
+        key = []
+        try:
+            for name in self.key_attributes:
+                value = item[name]
+                if isinstance(value, dict):
+                    # Wire format, e.g. {"S": "abc"}
+                    ((_, value),) = value.items()
+                key.append(str(value))
+        except KeyError as e:
+            raise _client_error(
+                "ValidationException", f"Missing the key {e.args[0]} in the item"
+            ) from None
+        return tuple(key)
+
+
+def _item_size(item: dict[str, Any]) -> int:
+    """Size of an item given as Python values or in wire format."""
+    wire = all(
+        isinstance(value, dict) and len(value) == 1 and next(iter(value)) in _WIRE_TYPES
+        for value in item.values()
+    )
+    return wire_item_size(item) if wire else estimate_item_size(item)
+
+
+def _item_units(item: dict[str, Any]) -> int:
+    """WCUs of an item given as Python values or in wire format."""
+    return max(1, math.ceil(_item_size(item) / WCU_BYTES))
+
+
+def _segment_of(key: tuple[str, ...], total_segments: int) -> int:
+    """Parallel scan segment holding a primary key."""
+    digest = hashlib.blake2b("\x1f".join(key).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % total_segments
+
+
+def _to_wire(item: dict[str, Any]) -> dict[str, Any]:
+    """An item in wire format, converting Python values written through the resource API."""
+    if all(
+        isinstance(value, dict) and len(value) == 1 and next(iter(value)) in _WIRE_TYPES
+        for value in item.values()
+    ):
+        return item
+    serializer = TypeSerializer()
+    return {
+        name: serializer.serialize(Decimal(str(value)) if isinstance(value, float) else value)
+        for name, value in item.items()
+    }
+
+
+def _client_error(code: str, message: str, operation: str = "BatchWriteItem") -> ClientError:
+    """Build a ClientError as botocore raises it for a DynamoDB error."""
+    return ClientError({"Error": {"Code": code, "Message": message}}, operation)
+
+
+class _Meta:
+    """Stand-in for the ``meta`` attribute of boto3 resources."""
+
+    def __init__(self, client: Any):
+        self.client = client
+
+
+class LocalClient:
+    """Synchronous low-level client backed by a LocalDynamoDB."""
+
+    def __init__(self, db: LocalDynamoDB):
+        self.db = db
+
+    def batch_write_item(self, **kwargs: Any) -> dict[str, Any]:
+        latency = self.db.request_latency()
+        if latency:
+            time.sleep(latency)
+        return self.db.batch_write_item(**kwargs)
+
+    def scan(self, **kwargs: Any) -> dict[str, Any]:
+        latency = self.db.request_latency()
+        if latency:
+            time.sleep(latency)
+        return self.db.scan(**kwargs)
+
+    def describe_table(self, **kwargs: Any) -> dict[str, Any]:
+        return self.db.describe_table(**kwargs)
+
+
+class LocalTable:
+    """Stand-in for a boto3 Table resource."""
+
+    def __init__(self, name: str, client: Any):
+        self.name = name
+        self.meta = _Meta(client)
+
+
+class LocalResource:
+    """Stand-in for the boto3 DynamoDB service resource."""
+
+    def __init__(self, client: LocalClient):
+        self.meta = _Meta(client)
+
+    def Table(self, name: str) -> LocalTable:
+        return LocalTable(name, self.meta.client)
+
+
+class LocalSession:
+    """Stand-in for ``boto3.Session`` backed by a LocalDynamoDB."""
+
+    def __init__(self, db: LocalDynamoDB):
+        self.db = db
+
+    def resource(self, service_name: str, **kwargs: Any) -> LocalResource:
+        return LocalResource(LocalClient(self.db))
+
+    def client(self, service_name: str, **kwargs: Any) -> LocalClient:
+        return LocalClient(self.db)
+
+
+class AsyncLocalClient:
+    """Asynchronous low-level client backed by a LocalDynamoDB."""
+
+    def __init__(self, db: LocalDynamoDB):
+        self.db = db
+
+    async def __aenter__(self) -> "AsyncLocalClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        return None
+
+    async def batch_write_item(self, **kwargs: Any) -> dict[str, Any]:
+        latency = self.db.request_latency()
+        if latency:
+            await asyncio.sleep(latency)
+        return self.db.batch_write_item(**kwargs)
+
+    async def scan(self, **kwargs: Any) -> dict[str, Any]:
+        latency = self.db.request_latency()
+        if latency:
+            await asyncio.sleep(latency)
+        return self.db.scan(**kwargs)
+
+    async def describe_table(self, **kwargs: Any) -> dict[str, Any]:
+        return self.db.describe_table(**kwargs)
+
+
+class AsyncLocalResource:
+    """Stand-in for the aioboto3 DynamoDB service resource."""
+
+    def __init__(self, client: AsyncLocalClient):
+        self.meta = _Meta(client)
+
+    async def __aenter__(self) -> "AsyncLocalResource":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        return None
+
+    async def Table(self, name: str) -> LocalTable:
+        return LocalTable(name, self.meta.client)
+
+
+class AsyncLocalSession:
+    """Stand-in for ``aioboto3.Session`` backed by a LocalDynamoDB."""
+
+    def __init__(self, db: LocalDynamoDB):
+        self.db = db
+
+    def resource(self, service_name: str, **kwargs: Any) -> AsyncLocalResource:
+        return AsyncLocalResource(AsyncLocalClient(self.db))
+
+    def client(self, service_name: str, **kwargs: Any) -> AsyncLocalClient:
+        return AsyncLocalClient(self.db)
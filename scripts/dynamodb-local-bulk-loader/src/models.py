@@ -15,7 +15,16 @@
 
 from dataclasses import dataclass, field
 from decimal import Decimal
-from typing import Any, Optional
+from typing import Any
+
+from src.item_size import MAX_ITEM_BYTES, MAX_REQUEST_BYTES
+from src.retry_handler import (
+    DEFAULT_BREAKER_THRESHOLD,
+    JITTER_STRATEGIES,
+    CircuitBreaker,
+    RetryBudget,
+    RetryHandler,
+)
 
 
 @dataclass
@@ -58,6 +67,12 @@ class LoadResult:
     failed_writes: int
     duration_seconds: float
     errors: list[str] = field(default_factory=list)
+    # Rows skipped because a checkpoint showed they were already written
+    skipped_records: int = 0
+    # Failed items written to the dead-letter file
+    dead_lettered: int = 0
+    # Rows dropped because a later row had the same primary key
+    duplicate_records: int = 0
 
     def success_rate(self) -> float:
         """Calculate success rate percentage.
@@ -69,6 +84,37 @@ class LoadResult:
             return 0.0
         return (self.successful_writes / self.total_records) * 100.0
 
+    def add_batch_result(self, result: "BatchResult") -> None:
+        """Fold a single batch result into the running totals.
+
+        Args:
+            result: Result of one batch write operation
+        """
+        if result.successful:
+            self.successful_writes += result.items_count
+            return
+
+        # A partially written batch only reports the items that did not land
+        failed = len(result.failed_items) if result.failed_items else result.items_count
+        self.successful_writes += result.items_count - failed
+        self.failed_writes += failed
+        if result.error:
+            self.errors.append(result.error)
+
+    def merge(self, other: "LoadResult") -> None:
+        """Fold another load's totals into this one (duration is left unchanged).
+
+        Args:
+            other: Result of a load that ran alongside this one
+        """
+        self.total_records += other.total_records
+        self.successful_writes += other.successful_writes
+        self.failed_writes += other.failed_writes
+        self.errors.extend(other.errors)
+        self.skipped_records += other.skipped_records
+        self.dead_lettered += other.dead_lettered
+        self.duplicate_records += other.duplicate_records
+
 
 @dataclass
 class BatchResult:
@@ -78,7 +124,8 @@ class BatchResult:
     items_count: int
     successful: bool
     retry_count: int
-    error: Optional[str] = None
+    error: str | None = None
+    failed_items: list[dict[str, Any]] = field(default_factory=list)
 
 
 @dataclass
@@ -92,6 +139,46 @@ class LoaderConfig:
     max_retries: int = 3
     base_delay: float = 0.1
     max_delay: float = 10.0
+    queue_size: int | None = None
+    adaptive_concurrency: bool = False
+    max_concurrency: int | None = None
+    max_wcu: float | None = None
+    target_utilization: float = 1.0
+    max_request_bytes: int = MAX_REQUEST_BYTES
+    max_request_wcu: int | None = None
+    retry_jitter: str = "additive"
+    retry_budget: float | None = None
+    breaker_threshold: int | None = DEFAULT_BREAKER_THRESHOLD
+
+    def create_retry_handler(self) -> RetryHandler:
+        """Retry handler shared by every worker of a loader.
+
+        Returns:
+            RetryHandler with this configuration's backoff, jitter, retry
+            budget and circuit breaker
+        """
+        return RetryHandler(
+            max_retries=self.max_retries,
+            base_delay=self.base_delay,
+            max_delay=self.max_delay,
+            jitter=self.retry_jitter,
+            budget=RetryBudget(ratio=self.retry_budget) if self.retry_budget else None,
+            breaker=(
+                CircuitBreaker(failure_threshold=self.breaker_threshold)
+                if self.breaker_threshold
+                else None
+            ),
+        )
+
+    def write_budget(self) -> float | None:
+        """Write capacity units per second the loader may consume.
+
+        Returns:
+            max_wcu scaled by target_utilization, or None if unlimited
+        """
+        if self.max_wcu is None:
+            return None
+        return self.max_wcu * self.target_utilization
 
     def validate(self) -> None:
         """Validate configuration parameters.
@@ -108,9 +195,46 @@ class LoaderConfig:
         if self.max_workers <= 0:
             raise ValueError(f"max_workers must be greater than 0, got {self.max_workers}")
 
+        if self.queue_size is not None and self.queue_size <= 0:
+            raise ValueError(f"queue_size must be greater than 0, got {self.queue_size}")
+
+        if self.max_concurrency is not None and self.max_concurrency < self.max_workers:
+            raise ValueError(
+                f"max_concurrency must be >= max_workers, got max_concurrency="
+                f"{self.max_concurrency}, max_workers={self.max_workers}"
+            )
+
+        if self.max_wcu is not None and self.max_wcu <= 0:
+            raise ValueError(f"max_wcu must be greater than 0, got {self.max_wcu}")
+
+        if not 0 < self.target_utilization <= 1:
+            raise ValueError(
+                f"target_utilization must be between 0 and 1, got {self.target_utilization}"
+            )
+
+        if not MAX_ITEM_BYTES <= self.max_request_bytes <= MAX_REQUEST_BYTES:
+            raise ValueError(
+                f"max_request_bytes must be between {MAX_ITEM_BYTES} and {MAX_REQUEST_BYTES}, "
+                f"got {self.max_request_bytes}"
+            )
+
+        if self.max_request_wcu is not None and self.max_request_wcu <= 0:
+            raise ValueError(f"max_request_wcu must be greater than 0, got {self.max_request_wcu}")
+
         if self.max_retries < 0:
             raise ValueError(f"max_retries must be >= 0, got {self.max_retries}")
 
+        if self.retry_jitter not in JITTER_STRATEGIES:
+            raise ValueError(
+                f"retry_jitter must be one of {list(JITTER_STRATEGIES)}, got {self.retry_jitter!r}"
+            )
+
+        if self.retry_budget is not None and self.retry_budget < 0:
+            raise ValueError(f"retry_budget must be >= 0, got {self.retry_budget}")
+
+        if self.breaker_threshold is not None and self.breaker_threshold < 0:
+            raise ValueError(f"breaker_threshold must be >= 0, got {self.breaker_threshold}")
+
         # Validate AWS region format (basic check)
         valid_regions = [
             "us-east-1",
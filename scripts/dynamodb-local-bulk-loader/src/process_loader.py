@@ -0,0 +1,543 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Multi-process loader that shards a CSV file by byte range.
+
+The threaded loader is bound by the GIL while boto3 serialises requests, and
+the async loader runs on a single event loop, so both stop scaling at one
+core. This loader splits the CSV into newline-aligned byte ranges, one per
+process. Each process streams its range through an ``AsyncDynamoDBLoader``
+and the parent merges the LoadResults. An optional ``SharedTokenBucket``
+gives all processes one global write budget.
+
+Quoted CSV fields may contain newlines, but a range boundary must not fall
+inside one. Boundaries are checked with the parity of the quote characters
+before them; if any is inside a quoted field, the file is loaded as a single
+range.
+"""
+
+import asyncio
+import csv
+import multiprocessing
+import os
+import time
+from collections import deque
+from collections.abc import Iterator, MutableMapping, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any
+
+from src.async_loader import DEFAULT_ASYNC_WORKERS, AsyncDynamoDBLoader
+from src.checkpoint import BYTE_OFFSET, ROW_ID_KEY, CheckpointJournal
+from src.compression import detect_compression
+from src.dead_letter import DeadLetterFile
+from src.dedupe import BATCH
+from src.item_size import MAX_REQUEST_BYTES
+from src.logging_config import get_logger
+from src.models import LoaderConfig, LoadResult
+from src.rate_limiter import SharedTokenBucket
+from src.readers import allow_large_csv_fields
+from src.schema import INFER_SCHEMA, ItemSchema
+from src.shuffle import DEFAULT_WINDOW_SIZE, WindowShuffle
+from src.skew import DEFAULT_KEY_WCU, HotKeyPacer, analyze_csv
+
+logger = get_logger(__name__)
+
+# Bytes read at a time when counting quote characters
+_SCAN_CHUNK_BYTES = 1 << 20
+
+# Rate limiter installed in each worker process by the pool initializer
+_worker_rate_limiter: SharedTokenBucket | None = None
+_worker_hot_key_pacer: HotKeyPacer | None = None
+
+
+def split_byte_ranges(csv_file: str, num_ranges: int) -> tuple[list[str], list[tuple[int, int]]]:
+    """Split a CSV file into newline-aligned byte ranges.
+
+    Each range starts at the beginning of a line and ends at the beginning of
+    another one (or at end of file), so every data row falls in exactly one
+    range. Small files may produce fewer ranges than requested, and a file
+    whose boundaries would split a quoted field is returned as one range.
+
+    Args:
+        csv_file: Path to the CSV file
+        num_ranges: Desired number of ranges
+
+    Returns:
+        Tuple of (header field names, list of (start, end) byte offsets)
+    """
+    if num_ranges <= 0:
+        raise ValueError(f"num_ranges must be greater than 0, got {num_ranges}")
+
+    with open(csv_file, "rb") as f:
+        header = f.readline()
+        data_start = f.tell()
+        file_size = os.fstat(f.fileno()).st_size
+
+        boundaries = [data_start]
+        span = file_size - data_start
+        for i in range(1, num_ranges):
+            target = data_start + span * i // num_ranges
+            # Step back one byte so a target that already sits on a line start
+            # is kept, then skip to the start of the next line
+            f.seek(max(target - 1, data_start))
+            f.readline()
+            boundaries.append(f.tell())
+        boundaries.append(file_size)
+        if len(boundaries) > 2 and not _outside_quotes(f, boundaries):
+            logger.warning(
+                f"A quoted field with a line break in {csv_file} spans a byte range "
+                "boundary; loading the file as a single range"
+            )
+            boundaries = [data_start, file_size]
+
+    fieldnames = next(csv.reader([header.decode("utf-8-sig")]), [])
+    ranges = [
+        (boundaries[i], boundaries[i + 1])
+        for i in range(len(boundaries) - 1)
+        if boundaries[i + 1] > boundaries[i]
+    ]
+    return fieldnames, ranges
+
+
+def _outside_quotes(f: Any, boundaries: list[int]) -> bool:
+    """Check that no inner boundary falls inside a quoted field.
+
+    A boundary is inside a quoted field when an odd number of quote
+    characters precede it (an escaped quote is written as two).
+
+    Args:
+        f: The CSV file, opened in binary mode
+        boundaries: Range boundaries, the first and last being the data start
+                    and end of file
+
+    Returns:
+        True if every inner boundary is outside quoted fields
+    """
+    position = boundaries[0]
+    quotes = 0
+    f.seek(position)
+    for boundary in boundaries[1:-1]:
+        while position < boundary:
+            chunk = f.read(min(_SCAN_CHUNK_BYTES, boundary - position))
+            if not chunk:
+                break
+            quotes += chunk.count(b'"')
+            position += len(chunk)
+        if quotes % 2:
+            return False
+    return True
+
+
+def iter_csv_range(
+    csv_file: str,
+    start: int,
+    end: int,
+    fieldnames: list[str],
+    row_id_key: str | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Yield the CSV records whose lines start inside ``[start, end)``.
+
+    Args:
+        csv_file: Path to the CSV file
+        start: Byte offset of the first line (must be a line start)
+        end: Byte offset where the range stops
+        fieldnames: Column names from the file header
+        row_id_key: If set, each record also gets the byte offset of its line
+                    under this key (a stable row id for checkpointing)
+
+    Yields:
+        Dictionaries representing CSV records
+    """
+    # Offset of every line read, and whether it is blank
+    lines_read: deque[tuple[int, bool]] = deque()
+
+    def lines() -> Iterator[str]:
+        with open(csv_file, "rb") as f:
+            f.seek(start)
+            position = start
+            # Boundaries are outside quoted fields, so the last row ends before end
+            while position < end:
+                line = f.readline()
+                if not line:
+                    return
+                lines_read.append((position, not line.rstrip(b"\r\n")))
+                position += len(line)
+                yield line.decode("utf-8")
+
+    allow_large_csv_fields()
+    reader = csv.DictReader(lines(), fieldnames=fieldnames)
+    consumed = 0
+    for record in reader:
+        # The record's lines end at line_num; blank lines DictReader skipped come first
+        offset, blank = lines_read.popleft()
+        consumed += 1
+        while blank:
+            offset, blank = lines_read.popleft()
+            consumed += 1
+        while consumed < reader.line_num:
+            lines_read.popleft()
+            consumed += 1
+        if row_id_key is not None:
+            record[row_id_key] = offset
+        yield record
+
+
+@dataclass
+class _RangeTask:
+    """Work unit sent to a worker process (must stay picklable)."""
+
+    csv_file: str
+    start: int
+    end: int
+    fieldnames: list[str]
+    table_name: str
+    region: str
+    workers: int
+    batch_size: int
+    max_retries: int
+    shuffle_window: int
+    seed: int | None
+    checkpoint_file: str | None = None
+    resume: bool = False
+    schema: ItemSchema | None = None
+    dead_letter_file: str | None = None
+    dedupe: str | None = BATCH
+    key_attributes: tuple[str, ...] | None = None
+    max_request_bytes: int = MAX_REQUEST_BYTES
+    max_request_wcu: int | None = None
+
+
+def _init_worker(
+    rate_limiter: SharedTokenBucket | None, hot_key_pacer: HotKeyPacer | None = None
+) -> None:
+    """Process pool initializer: install the shared rate limiter and hot-key pacer."""
+    global _worker_rate_limiter, _worker_hot_key_pacer
+    _worker_rate_limiter = rate_limiter
+    _worker_hot_key_pacer = hot_key_pacer
+
+
+def _load_range(task: _RangeTask) -> LoadResult:
+    """Load one byte range of the CSV file (runs in a worker process).
+
+    Args:
+        task: Range and loader settings
+
+    Returns:
+        LoadResult for the range
+    """
+    loader = AsyncDynamoDBLoader(
+        table_name=task.table_name,
+        region=task.region,
+        max_workers=task.workers,
+        batch_size=task.batch_size,
+        max_retries=task.max_retries,
+        streaming=True,
+        shuffle=WindowShuffle(window_size=task.shuffle_window, seed=task.seed),
+        rate_limiter=_worker_rate_limiter,
+        schema=task.schema,
+        hot_key_pacer=_worker_hot_key_pacer,
+        dedupe=task.dedupe,
+        key_attributes=task.key_attributes,
+        max_request_bytes=task.max_request_bytes,
+        max_request_wcu=task.max_request_wcu,
+    )
+    if task.dead_letter_file is not None:
+        # The parent removed the previous file; every process appends to it
+        loader.dead_letters = DeadLetterFile(task.dead_letter_file)
+
+    journal = None
+    records: Iterator[MutableMapping[str, Any]]
+    if task.checkpoint_file is None:
+        records = iter_csv_range(task.csv_file, task.start, task.end, task.fieldnames)
+    else:
+        # The parent created (or validated) the journal; every process appends to it
+        journal = CheckpointJournal(task.checkpoint_file, task.csv_file, id_kind=BYTE_OFFSET)
+        if task.resume:
+            journal.completed = journal.load_completed()
+        journal.attach()
+        loader.journal = journal
+        records = journal.skip_completed(
+            iter_csv_range(task.csv_file, task.start, task.end, task.fieldnames, ROW_ID_KEY)
+        )
+    try:
+        result = asyncio.run(loader.load_records(records))
+    finally:
+        if journal is not None:
+            journal.close()
+        if loader.dead_letters is not None:
+            loader.dead_letters.close()
+    if journal is not None:
+        result.skipped_records = journal.skipped
+    if loader.dead_letters is not None:
+        result.dead_lettered = loader.dead_letters.count
+    return result
+
+
+def _count_range_rows(task: _RangeTask) -> int:
+    """Count the rows of a range (for a range whose worker failed).
+
+    Args:
+        task: The failed range
+
+    Returns:
+        Number of CSV rows, or of non-blank lines if the range cannot be parsed
+    """
+    try:
+        return sum(1 for _ in iter_csv_range(task.csv_file, task.start, task.end, task.fieldnames))
+    except (ValueError, csv.Error):
+        with open(task.csv_file, "rb") as f:
+            f.seek(task.start)
+            data = f.read(task.end - task.start)
+        return sum(1 for line in data.splitlines() if line)
+
+
+class ProcessPoolDynamoDBLoader:
+    """Loader that runs one streaming async writer per process."""
+
+    def __init__(
+        self,
+        table_name: str,
+        region: str = "us-east-1",
+        num_processes: int | None = None,
+        workers_per_process: int = DEFAULT_ASYNC_WORKERS,
+        batch_size: int = 25,
+        max_retries: int = 3,
+        max_wcu: float | None = None,
+        target_utilization: float = 1.0,
+        shuffle_window: int = DEFAULT_WINDOW_SIZE,
+        seed: int | None = None,
+        checkpoint_file: str | None = None,
+        resume: bool = False,
+        schema: ItemSchema | str | None = None,
+        pace_hot_keys: bool = False,
+        partition_key: str = "id",
+        max_key_wcu: float = DEFAULT_KEY_WCU,
+        dead_letter_file: str | None = None,
+        dedupe: str | None = BATCH,
+        key_attributes: Sequence[str] | None = None,
+        max_request_bytes: int = MAX_REQUEST_BYTES,
+        max_request_wcu: int | None = None,
+    ):
+        """Initialize process pool loader with configuration.
+
+        Args:
+            table_name: Name of the DynamoDB table
+            region: AWS region
+            num_processes: Number of worker processes (one byte range each).
+                        If None, uses the CPU count.
+            workers_per_process: Concurrent writer coroutines in each process
+            batch_size: Number of records per batch
+            max_retries: Maximum retry attempts for failed operations
+            max_wcu: Optional write capacity (WCU/s) shared by all processes.
+                        Requests are charged their estimated WCUs.
+            target_utilization: Fraction of max_wcu to consume (0-1]
+            shuffle_window: Window size of the per-process WindowShuffle
+            seed: Optional random seed for the shuffle (offset per range)
+            checkpoint_file: Optional journal of written rows (by byte offset),
+                        appended to by every process
+            resume: If True, skip the rows already recorded in checkpoint_file.
+                        The number of processes may differ from the first run.
+            schema: ItemSchema for the wire-format fast path, or "infer" to
+                        infer one from the first rows of the CSV (once, in the
+                        parent, so every process uses the same types)
+            pace_hot_keys: If True, analyze the partition keys of the CSV
+                        first and hold writes to each heavy key below
+                        max_key_wcu, with buckets shared by all processes
+            partition_key: Partition key column used by pace_hot_keys
+            max_key_wcu: WCU/s allowed per hot key across all processes
+            dead_letter_file: Optional file that receives the items the load
+                        gave up on, appended to by every process
+                        (see src.dead_letter)
+            dedupe: "batch" to coalesce duplicate primary keys within each
+                        batch (see src.dedupe), or None. Whole-file dedupe is
+                        not available because each process reads only its
+                        byte range.
+            key_attributes: Primary key attribute names. If None, every
+                        process reads them with DescribeTable.
+            max_request_bytes: Item payload per BatchWriteItem request
+                        (see src.batch_packer)
+            max_request_wcu: Optional write capacity units per request
+        """
+        if num_processes is None:
+            num_processes = os.cpu_count() or 4
+            logger.info(f"Auto-detected {num_processes} CPU cores, using {num_processes} processes")
+        if num_processes <= 0:
+            raise ValueError(f"num_processes must be greater than 0, got {num_processes}")
+        if shuffle_window <= 0:
+            raise ValueError(f"shuffle_window must be greater than 0, got {shuffle_window}")
+        if resume and not checkpoint_file:
+            raise ValueError("resume requires a checkpoint_file")
+        if isinstance(schema, str) and schema != INFER_SCHEMA:
+            raise ValueError(f"schema must be an ItemSchema or {INFER_SCHEMA!r}, got {schema!r}")
+        if dedupe not in (None, BATCH):
+            raise ValueError(
+                f"dedupe must be {BATCH!r} or None for the process pool loader, got {dedupe!r}; "
+                "use the async or threaded loader to deduplicate across the file"
+            )
+
+        self.config = LoaderConfig(
+            table_name=table_name,
+            region=region,
+            max_workers=workers_per_process,
+            batch_size=batch_size,
+            max_retries=max_retries,
+            max_wcu=max_wcu,
+            target_utilization=target_utilization,
+            max_request_bytes=max_request_bytes,
+            max_request_wcu=max_request_wcu,
+        )
+        # Validate configuration on initialization
+        self.config.validate()
+
+        self.num_processes = num_processes
+        self.shuffle_window = shuffle_window
+        self.seed = seed
+        self.checkpoint_file = checkpoint_file
+        self.resume = resume
+        self.schema = schema
+        self.pace_hot_keys = pace_hot_keys
+        self.partition_key = partition_key
+        self.max_key_wcu = max_key_wcu
+        self.dead_letter_file = dead_letter_file
+        self.dedupe = dedupe
+        self.key_attributes = tuple(key_attributes) if key_attributes else None
+
+    def load_csv(self, csv_file: str) -> LoadResult:
+        """Load CSV file into DynamoDB using a pool of processes.
+
+        This method:
+        1. Splits the file into newline-aligned byte ranges
+        2. Starts one process per range, each streaming its range through a
+           WindowShuffle and an async writer pool
+        3. Charges every write to one shared WCU token bucket (if max_wcu is set)
+        4. Merges the per-process LoadResults
+
+        With a checkpoint_file, every process appends the byte offsets of the
+        rows it wrote to one journal, and ``resume=True`` skips them.
+
+        Args:
+            csv_file: Path to the CSV file
+
+        Returns:
+            LoadResult with operation statistics
+
+        Raises:
+            ValueError: If the file is compressed (it cannot be split into
+                        byte ranges; use the async or threaded loader)
+        """
+        compression = detect_compression(csv_file)
+        if compression is not None:
+            raise ValueError(
+                f"{csv_file} is {compression}-compressed and cannot be split into byte "
+                "ranges; decompress it first or use the async or threaded loader"
+            )
+
+        start_time = time.time()
+        logger.info(f"Starting multi-process CSV load from {csv_file}")
+
+        fieldnames, ranges = split_byte_ranges(csv_file, self.num_processes)
+        totals = LoadResult(
+            total_records=0,
+            successful_writes=0,
+            failed_writes=0,
+            duration_seconds=0.0,
+        )
+        if not ranges:
+            logger.warning("No records to load")
+            totals.duration_seconds = time.time() - start_time
+            return totals
+
+        logger.info(f"Split {csv_file} into {len(ranges)} byte ranges")
+
+        if self.checkpoint_file is not None:
+            # Validate (resume) or create the journal before the workers append to it
+            journal = CheckpointJournal(self.checkpoint_file, csv_file, id_kind=BYTE_OFFSET)
+            journal.start(resume=self.resume)
+            journal.close()
+        if self.dead_letter_file is not None:
+            DeadLetterFile(self.dead_letter_file).start()
+
+        # "infer" is resolved once here, so the workers receive an ItemSchema
+        schema: ItemSchema | None = None
+        if isinstance(self.schema, ItemSchema):
+            schema = self.schema
+        elif self.schema == INFER_SCHEMA:
+            schema = ItemSchema.from_csv(csv_file)
+
+        # spawn: boto3 sessions and event loops must not be inherited by fork
+        context = multiprocessing.get_context("spawn")
+        budget = self.config.write_budget()
+        rate_limiter = None
+        if budget is not None:
+            rate_limiter = SharedTokenBucket(rate=budget, context=context)
+            logger.info(f"Limiting writes to {budget:,.0f} WCU/s across all processes")
+        hot_key_pacer = None
+        if self.pace_hot_keys:
+            report = analyze_csv(csv_file, partition_key=self.partition_key)
+            hot_key_pacer = HotKeyPacer.from_report(report, self.max_key_wcu, context=context)
+            logger.info(
+                f"Pacing {len(hot_key_pacer.buckets)} heavy keys to "
+                f"{self.max_key_wcu:,.0f} WCU/s each"
+            )
+        tasks = [
+            _RangeTask(
+                csv_file=csv_file,
+                start=start,
+                end=end,
+                fieldnames=fieldnames,
+                table_name=self.config.table_name,
+                region=self.config.region,
+                workers=self.config.max_workers,
+                batch_size=self.config.batch_size,
+                max_retries=self.config.max_retries,
+                shuffle_window=self.shuffle_window,
+                seed=None if self.seed is None else self.seed + index,
+                checkpoint_file=self.checkpoint_file,
+                resume=self.resume,
+                schema=schema,
+                dead_letter_file=self.dead_letter_file,
+                dedupe=self.dedupe,
+                key_attributes=self.key_attributes,
+                max_request_bytes=self.config.max_request_bytes,
+                max_request_wcu=self.config.max_request_wcu,
+            )
+            for index, (start, end) in enumerate(ranges)
+        ]
+
+        with ProcessPoolExecutor(
+            max_workers=len(tasks),
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(rate_limiter, hot_key_pacer),
+        ) as executor:
+            futures = {executor.submit(_load_range, task): task for task in tasks}
+            for future in as_completed(futures):
+                task = futures[future]
+                try:
+                    totals.merge(future.result())
+                except Exception as e:
+                    # The worker's result is lost, so every row of the range counts as failed
+                    rows = _count_range_rows(task)
+                    error_msg = f"Range {task.start}-{task.end} ({rows} rows) failed: {e}"
+                    logger.error(error_msg)
+                    totals.errors.append(error_msg)
+                    totals.total_records += rows
+                    totals.failed_writes += rows
+
+        totals.duration_seconds = time.time() - start_time
+        logger.info(
+            f"Load complete: {totals.successful_writes} successful, "
+            f"{totals.failed_writes} failed, duration: {totals.duration_seconds:.2f}s"
+        )
+        return totals
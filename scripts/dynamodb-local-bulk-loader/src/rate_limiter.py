@@ -0,0 +1,160 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Token-bucket rate limiting for BatchWriteItem requests.
+
+The bucket refills at ``rate`` tokens per second up to ``capacity``. Callers
+reserve tokens before each request and sleep for the time the reservation
+puts them in debt. Concurrent callers therefore queue up behind each other
+instead of all waking at once, and the long-run rate never exceeds ``rate``.
+
+``TokenBucket`` is shared by the threads or coroutines of one process.
+``SharedTokenBucket`` keeps its state in shared memory so that every worker
+process of ``ProcessPoolDynamoDBLoader`` draws from one global budget.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from typing import Any
+
+
+class TokenBucket:
+    """Thread-safe token bucket with reservation semantics."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        """Initialize token bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum tokens that can accumulate (burst size).
+                      Defaults to one second's worth of tokens.
+        """
+        if rate <= 0:
+            raise ValueError(f"rate must be greater than 0, got {rate}")
+        if capacity is not None and capacity <= 0:
+            raise ValueError(f"capacity must be greater than 0, got {capacity}")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else self.rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float) -> float:
+        """Take ``tokens`` from the bucket, allowing it to go into debt.
+
+        Args:
+            tokens: Number of tokens to take
+
+        Returns:
+            Seconds the caller must wait before using the reservation
+        """
+        with self._lock:
+            now = time.monotonic()
+            available = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._tokens = available - tokens
+            self._updated = now
+            return self._wait_for(self._tokens)
+
+    def _wait_for(self, tokens: float) -> float:
+        """Seconds until a balance of ``tokens`` has been paid back to zero."""
+        return max(0.0, -tokens / self.rate)
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take ``tokens`` now and return how long to wait before using them.
+
+        Unlike ``acquire_sync``/``acquire_async`` this never waits, so callers
+        charging several buckets can wait once for the longest reservation.
+
+        Args:
+            tokens: Number of tokens to take
+
+        Returns:
+            Seconds the caller must wait before using the reservation
+        """
+        return self._reserve(tokens)
+
+    def acquire_sync(self, tokens: float = 1.0) -> float:
+        """Block until ``tokens`` are available.
+
+        Args:
+            tokens: Number of tokens to take
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        """Wait until ``tokens`` are available without blocking the event loop.
+
+        Args:
+            tokens: Number of tokens to take
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class SharedTokenBucket(TokenBucket):
+    """Token bucket whose balance lives in shared memory.
+
+    Create it in the parent process and hand it to worker processes through a
+    pool ``initializer`` (multiprocessing synchronised values can only be
+    shared by inheritance, not passed as task arguments). All processes then
+    draw from the same budget, so the combined rate is bounded by ``rate``
+    however many processes there are.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None, context: Any = None):
+        """Initialize shared token bucket.
+
+        Args:
+            rate: Tokens added per second across all processes
+            capacity: Maximum tokens that can accumulate (burst size).
+                      Defaults to one second's worth of tokens.
+            context: multiprocessing context used to allocate shared memory.
+                     Must match the context of the process pool.
+        """
+        super().__init__(rate, capacity)
+        context = context or multiprocessing.get_context()
+        # [tokens, last update (time.monotonic, system-wide on Linux/macOS)]
+        self._state = context.Array("d", [self.capacity, time.monotonic()])
+
+    def _reserve(self, tokens: float) -> float:
+        """Take ``tokens`` from the shared balance, allowing it to go into debt."""
+        with self._state.get_lock():
+            now = time.monotonic()
+            balance, updated = self._state[0], self._state[1]
+            available = min(self.capacity, balance + (now - updated) * self.rate)
+            self._state[0] = available - tokens
+            self._state[1] = now
+            return self._wait_for(self._state[0])
+
+    def __getstate__(self) -> dict[str, Any]:
+        # threading.Lock cannot be pickled; the shared Array carries its own lock
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
@@ -0,0 +1,417 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Input readers for the bulk loaders.
+
+A reader turns an input file into a stream of records (mappings of attribute
+name to value) that the loaders shuffle, batch and write. Readers are picked
+by name or by file extension:
+
+- ``csv``: ``csv.DictReader`` rows; every value is a string
+- ``jsonl``: one JSON object per line; numbers are read as ``Decimal`` so the
+  resource API can store them as ``N``
+- ``dynamodb-json``: the DYNAMODB_JSON format of DynamoDB's export to S3, one
+  ``{"Item": {...}}`` per line. Items are already typed, so they are sent
+  through the low-level client unchanged.
+- ``parquet``: Parquet via pyarrow (optional dependency). Record batches are
+  converted column by column, and rows are yielded as lightweight views over
+  the converted columns; a row only becomes a dictionary when its batch is
+  written.
+
+Text formats may be compressed (``data.csv.gz``, ``export.json.zst``, ...);
+they are decompressed on a background thread while they are read (see
+``src.compression``). Parquet compresses its pages internally and is read as
+it is.
+"""
+
+import base64
+import csv
+import itertools
+import json
+import math
+from abc import ABC, abstractmethod
+from collections.abc import Generator, Iterator, Mapping, MutableMapping, Sequence
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+from src.compression import detect_compression, open_input, strip_compression_suffix
+from src.logging_config import get_logger
+from src.telemetry import estimate_csv_rows
+
+logger = get_logger(__name__)
+
+# Rows per Parquet record batch
+DEFAULT_PARQUET_BATCH_ROWS = 65536
+
+# Stream of records from a reader; a generator, so it can be closed before the end
+Records = Generator[MutableMapping[str, Any], None, None]
+
+# Items may be up to 400KB, above the csv module's default field limit of 128KB,
+# and larger rows must still be read so that they can be dead-lettered
+CSV_FIELD_LIMIT = 2**31 - 1
+
+
+def allow_large_csv_fields() -> None:
+    """Raise the csv module's field size limit to CSV_FIELD_LIMIT.
+
+    The limit is process-wide, so it is raised when a CSV file is about to be
+    read rather than on import, and never lowered.
+    """
+    if csv.field_size_limit() < CSV_FIELD_LIMIT:
+        csv.field_size_limit(CSV_FIELD_LIMIT)
+
+
+class RecordReader(ABC):
+    """Reads an input file as a stream of records."""
+
+    #: Name used on the command line
+    name = ""
+    #: File extensions detected as this format (lower case, with the dot)
+    extensions: tuple[str, ...] = ()
+    #: True if records are already DynamoDB wire format (AttributeValue maps)
+    wire_format = False
+
+    @abstractmethod
+    def iter_records(self, path: str) -> Records:
+        """Yield the records of a file in file order.
+
+        Args:
+            path: Path to the input file
+
+        Yields:
+            One mutable mapping per record
+        """
+
+    def estimate_records(self, path: str) -> int | None:
+        """Estimate the number of records in a file (for progress and ETA).
+
+        Args:
+            path: Path to the input file
+
+        Returns:
+            Estimated record count, or None if it cannot be estimated cheaply
+        """
+        return None
+
+
+class CsvReader(RecordReader):
+    """CSV file with a header row."""
+
+    name = "csv"
+    extensions = (".csv",)
+
+    def iter_records(self, path: str) -> Records:
+        allow_large_csv_fields()
+        with open_input(path, encoding="utf-8", newline="") as f:
+            yield from csv.DictReader(f)
+
+    def estimate_records(self, path: str) -> int | None:
+        return estimate_csv_rows(path)
+
+
+class JsonLinesReader(RecordReader):
+    """JSON Lines: one JSON object per line."""
+
+    name = "jsonl"
+    extensions = (".jsonl", ".ndjson")
+
+    def iter_records(self, path: str) -> Records:
+        with open_input(path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                record = json.loads(line, parse_float=Decimal)
+                if not isinstance(record, dict):
+                    raise ValueError(f"{path}:{line_number}: expected a JSON object per line")
+                yield record
+
+    def estimate_records(self, path: str) -> int | None:
+        return estimate_csv_rows(path, header=False)
+
+
+def _decode_binary(value: dict[str, Any]) -> dict[str, Any]:
+    """Decode base64 binary values of an AttributeValue, recursively.
+
+    Exports encode ``B`` and ``BS`` as base64 text, while botocore expects raw
+    bytes (and would base64-encode the text a second time).
+    """
+    ((kind, inner),) = value.items()
+    if kind == "B":
+        return {"B": base64.b64decode(inner)}
+    if kind == "BS":
+        return {"BS": [base64.b64decode(member) for member in inner]}
+    if kind == "L":
+        return {"L": [_decode_binary(element) for element in inner]}
+    if kind == "M":
+        return {"M": {name: _decode_binary(element) for name, element in inner.items()}}
+    return value
+
+
+class DynamoDBJsonReader(RecordReader):
+    """DynamoDB export (DYNAMODB_JSON): one ``{"Item": {...}}`` per line."""
+
+    name = "dynamodb-json"
+    extensions = (".ddbjson",)
+    wire_format = True
+
+    def iter_records(self, path: str) -> Records:
+        with open_input(path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                item = record.get("Item", record) if isinstance(record, dict) else None
+                if not isinstance(item, dict):
+                    raise ValueError(f"{path}:{line_number}: expected a DynamoDB JSON item")
+                yield {name: _decode_binary(value) for name, value in item.items()}
+
+    def estimate_records(self, path: str) -> int | None:
+        return estimate_csv_rows(path, header=False)
+
+
+class _ColumnBatch:
+    """Converted columns of one Parquet record batch."""
+
+    __slots__ = ("columns", "rows")
+
+    def __init__(self, columns: dict[str, list[Any]], rows: int):
+        self.columns = columns
+        self.rows = rows
+
+
+class ColumnarRow(MutableMapping[str, Any]):
+    """One row of a columnar batch, read without building a dictionary.
+
+    Null values are treated as missing attributes. Attributes set on the row
+    (such as checkpoint row ids) are kept in a small overlay dictionary; the
+    columns themselves are shared by every row of the batch and read-only.
+    """
+
+    __slots__ = ("_batch", "_index", "_extra")
+
+    def __init__(self, batch: _ColumnBatch, index: int):
+        self._batch = batch
+        self._index = index
+        self._extra: dict[str, Any] | None = None
+
+    def __getitem__(self, name: str) -> Any:
+        if self._extra is not None and name in self._extra:
+            return self._extra[name]
+        column = self._batch.columns.get(name)
+        value = None if column is None else column[self._index]
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        extra = self._extra or {}
+        for name, column in self._batch.columns.items():
+            if column[self._index] is not None and name not in extra:
+                yield name
+        yield from extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        if self._extra is None:
+            self._extra = {}
+        self._extra[name] = value
+
+    def __delitem__(self, name: str) -> None:
+        if self._extra is None or name not in self._extra:
+            raise KeyError(name)
+        del self._extra[name]
+
+    def to_dict(self) -> dict[str, Any]:
+        """Build the row as a dictionary (done once, when it is written)."""
+        i = self._index
+        item = {
+            name: column[i] for name, column in self._batch.columns.items() if column[i] is not None
+        }
+        if self._extra:
+            item.update(self._extra)
+        return item
+
+
+def _to_dynamodb(value: Any) -> Any:
+    """Make a nested Python value storable by the boto3 resource API."""
+    if isinstance(value, float):
+        return Decimal(repr(value)) if math.isfinite(value) else None
+    if isinstance(value, list):
+        return [_to_dynamodb(element) for element in value]
+    if isinstance(value, dict):
+        return {name: _to_dynamodb(element) for name, element in value.items()}
+    if isinstance(value, tuple):
+        # Map columns come back as (key, value) pairs
+        return list(value)
+    return value
+
+
+def _column_values(column: Any) -> list[Any]:
+    """Convert a pyarrow array to Python values DynamoDB can store.
+
+    Floats become Decimal (NaN and infinities are dropped), temporal values
+    become ISO 8601 strings, and nested lists and structs are converted
+    recursively. Other types use pyarrow's own conversion.
+    """
+    import pyarrow as pa
+
+    kind = column.type
+    values: list[Any] = column.to_pylist()
+    if pa.types.is_floating(kind):
+        return [None if v is None or not math.isfinite(v) else Decimal(repr(v)) for v in values]
+    if pa.types.is_temporal(kind):
+        return [
+            None if v is None else (v.isoformat() if hasattr(v, "isoformat") else str(v))
+            for v in values
+        ]
+    if pa.types.is_nested(kind):
+        return [None if v is None else _to_dynamodb(v) for v in values]
+    return values
+
+
+class ParquetReader(RecordReader):
+    """Parquet file read one record batch at a time with pyarrow."""
+
+    name = "parquet"
+    extensions = (".parquet", ".pq")
+
+    def __init__(self, batch_rows: int = DEFAULT_PARQUET_BATCH_ROWS):
+        """Initialize reader.
+
+        Args:
+            batch_rows: Rows per record batch (memory is about one batch of
+                        converted columns)
+        """
+        if batch_rows <= 0:
+            raise ValueError(f"batch_rows must be greater than 0, got {batch_rows}")
+        self.batch_rows = batch_rows
+
+    @staticmethod
+    def _parquet_file(path: str) -> Any:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError(
+                "Reading Parquet requires pyarrow: pip install 'dynamodb-local-bulk-loader[parquet]'"
+            ) from e
+        return pq.ParquetFile(path)
+
+    def iter_records(self, path: str) -> Records:
+        if detect_compression(path) is not None:
+            raise ValueError(
+                f"{path}: Parquet files cannot be compressed as a whole; "
+                "use Parquet's own column compression instead"
+            )
+        parquet = self._parquet_file(path)
+        for record_batch in parquet.iter_batches(batch_size=self.batch_rows):
+            columns = {
+                name: _column_values(column)
+                for name, column in zip(
+                    record_batch.schema.names, record_batch.columns, strict=True
+                )
+            }
+            batch = _ColumnBatch(columns, record_batch.num_rows)
+            yield from map(ColumnarRow, itertools.repeat(batch), range(batch.rows))
+
+    def estimate_records(self, path: str) -> int | None:
+        return int(self._parquet_file(path).metadata.num_rows)
+
+
+READERS: dict[str, type[RecordReader]] = {
+    "csv": CsvReader,
+    "jsonl": JsonLinesReader,
+    "dynamodb-json": DynamoDBJsonReader,
+    "parquet": ParquetReader,
+}
+
+
+def get_reader(name: str) -> RecordReader:
+    """Create a reader by name.
+
+    Args:
+        name: One of ``READERS``
+
+    Returns:
+        Reader instance
+
+    Raises:
+        ValueError: If the name is unknown
+    """
+    try:
+        return READERS[name]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown input format {name!r}, expected one of {sorted(READERS)}"
+        ) from None
+
+
+def _sniff_json(path: str) -> RecordReader:
+    """Tell DynamoDB JSON from plain JSON Lines by the first record."""
+    with open_input(path, encoding="utf-8", threaded=False) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                item = record.get("Item") if isinstance(record, dict) else None
+                if isinstance(item, dict) and all(
+                    isinstance(value, dict) and len(value) == 1 for value in item.values()
+                ):
+                    return DynamoDBJsonReader()
+                break
+    return JsonLinesReader()
+
+
+def reader_for(path: str) -> RecordReader:
+    """Pick a reader from a file's extension.
+
+    ``.json`` files are sniffed: lines of ``{"Item": {...}}`` with typed
+    values are read as DynamoDB JSON, anything else as JSON Lines. Unknown
+    extensions are read as CSV. A compression extension is ignored, so
+    ``data.jsonl.gz`` is read as JSON Lines.
+
+    Args:
+        path: Path to the input file
+
+    Returns:
+        Reader for the file
+    """
+    suffix = Path(strip_compression_suffix(path)).suffix.lower()
+    if suffix == ".json":
+        return _sniff_json(path)
+    for reader_class in READERS.values():
+        if suffix in reader_class.extensions:
+            return reader_class()
+    return CsvReader()
+
+
+def materialize(items: Sequence[Mapping[str, Any]]) -> list[dict[str, Any]]:
+    """Turn row views into dictionaries just before a batch is written.
+
+    Args:
+        items: Records of one batch
+
+    Returns:
+        The records as dictionaries (dictionaries are returned as they are)
+    """
+    return [_as_dict(item) for item in items]
+
+
+def _as_dict(item: Mapping[str, Any]) -> dict[str, Any]:
+    """One record as a dictionary, copying only records that are not one already."""
+    if isinstance(item, dict):
+        return item
+    if isinstance(item, ColumnarRow):
+        return item.to_dict()
+    return dict(item)
@@ -11,17 +11,164 @@
 #  CONDITIONS OF ANY KIND, either express or implied. See the License for the
 #  specific language governing permissions and limitations under the License.
 #
-"""Retry handler with exponential backoff and jitter."""
+"""Retry handler with exponential backoff and jitter.
+
+Each failure is classified by ``error_handler.handle_error``:
+
+- Permanent errors (ValidationException, ResourceNotFoundException, bad
+  parameters, ...) are raised at once; retrying them only adds sleeps.
+- Throttling and transient errors are retried with backoff, up to
+  ``max_retries`` times.
+- Unknown errors are raised at once.
+
+Two optional guards are shared by every call of a handler (and so by every
+worker of a loader):
+
+- A ``RetryBudget`` allows retries up to a fraction of first attempts. When
+  the table throttles most requests, retries stop instead of multiplying
+  the load on it.
+- A ``CircuitBreaker`` opens after a run of permanent errors (a missing
+  table, revoked credentials, a file of invalid items). While it is open,
+  calls fail with ``CircuitOpenError`` without reaching DynamoDB.
+"""
 
 import asyncio
 import logging
 import random
+import threading
+import time
 from typing import Any, Callable, TypeVar
 
+from botocore.exceptions import ClientError
+
+from src.error_handler import ErrorAction, handle_error, is_permanent_error
+
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
 
+# Backoff jitter strategies accepted by RetryHandler
+JITTER_STRATEGIES = ("additive", "full", "decorrelated")
+# Retries a RetryBudget earns per first attempt
+DEFAULT_RETRY_BUDGET = 0.2
+# Consecutive permanent errors after which a loader stops calling DynamoDB
+DEFAULT_BREAKER_THRESHOLD = 10
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of making a call while the circuit breaker is open."""
+
+
+class RetryBudget:
+    """Retries allowed as a fraction of first attempts, shared across calls.
+
+    A token bucket: every first attempt adds ``ratio`` tokens (up to
+    ``capacity``) and every retry takes one. With the default ratio, retries
+    add at most 20% to the request rate once the initial tokens are spent.
+    """
+
+    def __init__(self, ratio: float = DEFAULT_RETRY_BUDGET, capacity: float = 100.0):
+        """Initialize budget.
+
+        Args:
+            ratio: Retries earned per first attempt
+            capacity: Most retries that can be saved up (the budget starts full)
+        """
+        if ratio < 0:
+            raise ValueError(f"ratio must be >= 0, got {ratio}")
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1, got {capacity}")
+        self.ratio = ratio
+        self.capacity = capacity
+        self.denied = 0
+        self._tokens = capacity
+        self._lock = threading.Lock()
+
+    def record_attempt(self) -> None:
+        """Earn retries for a first attempt."""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        """Take one retry from the budget.
+
+        Returns:
+            True if the retry is allowed
+        """
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.denied += 1
+            return False
+
+
+class CircuitBreaker:
+    """Stops calls after a run of permanent errors.
+
+    The breaker opens after ``failure_threshold`` consecutive calls that
+    DynamoDB rejected with a permanent error. While open, one trial call is let through
+    every ``reset_seconds``; a success closes the breaker again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 10,
+        reset_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize breaker.
+
+        Args:
+            failure_threshold: Consecutive permanent failures that open it
+            reset_seconds: Seconds between trial calls while open
+            clock: Monotonic clock, replaceable in tests
+        """
+        if failure_threshold < 1:
+            raise ValueError(f"failure_threshold must be at least 1, got {failure_threshold}")
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.consecutive_failures = 0
+        self._opened_at: float | None = None
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being refused."""
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        """Check whether a call may be made now."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = self._clock()
+            if now - self._opened_at >= self.reset_seconds:
+                # Let one trial call through, then wait another period
+                self._opened_at = now
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful call."""
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Circuit breaker closed after a successful call")
+            self.consecutive_failures = 0
+            self._opened_at = None
+
+    def record_permanent_failure(self, error: Exception) -> None:
+        """Count a call that failed with a permanent error."""
+        with self._lock:
+            self.consecutive_failures += 1
+            if self._opened_at is None and self.consecutive_failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+                logger.error(
+                    f"Circuit breaker opened after {self.consecutive_failures} consecutive "
+                    f"permanent errors (last: {error}); failing calls for {self.reset_seconds}s"
+                )
+
 
 class RetryHandler:
     """Handles retry logic with exponential backoff and jitter."""
@@ -30,7 +177,10 @@ class RetryHandler:
         self,
         max_retries: int = 3,
         base_delay: float = 0.1,
-        max_delay: float = 10.0
+        max_delay: float = 10.0,
+        jitter: str = "additive",
+        budget: RetryBudget | None = None,
+        breaker: CircuitBreaker | None = None,
     ):
         """Initialize retry handler with backoff parameters.
 
@@ -38,24 +188,40 @@ class RetryHandler:
             max_retries: Maximum number of retry attempts
             base_delay: Base delay in seconds for exponential backoff
             max_delay: Maximum delay in seconds
+            jitter: Backoff jitter strategy (see ``calculate_delay``)
+            budget: Optional retry budget shared by every call
+            breaker: Optional circuit breaker shared by every call
         """
+        if jitter not in JITTER_STRATEGIES:
+            raise ValueError(
+                f"Unknown jitter strategy {jitter!r}, expected one of {list(JITTER_STRATEGIES)}"
+            )
         self.max_retries = max_retries
         self.base_delay = base_delay
         self.max_delay = max_delay
+        self.jitter = jitter
+        self.budget = budget
+        self.breaker = breaker
 
-    def calculate_delay(self, attempt: int) -> float:
+    def calculate_delay(self, attempt: int, previous: float | None = None) -> float:
         """Calculate delay with exponential backoff and jitter.
 
         Exponential backoff increases delay exponentially with each retry attempt,
         reducing load on the system during high error rates.
-        
+
         Jitter adds randomness to prevent thundering herd problem where many
         clients retry simultaneously after the same delay.
 
-        Formula: min(base_delay * (2 ** attempt) + jitter, max_delay)
-        where jitter is a random value between 0 and 1.
+        Strategies:
+        - ``additive``: min(base_delay * (2 ** attempt) + jitter, max_delay)
+          where jitter is a random value between 0 and 1
+        - ``full``: random value between 0 and
+          min(base_delay * (2 ** attempt), max_delay); spreads retries the most
+        - ``decorrelated``: random value between base_delay and three times
+          the previous delay, capped at max_delay; grows like exponential
+          backoff without synchronising clients
 
-        Example delays with base_delay=0.1, max_delay=10.0:
+        Example additive delays with base_delay=0.1, max_delay=10.0:
         - Attempt 0: 0.1 * 2^0 + jitter = 0.1-1.1s
         - Attempt 1: 0.1 * 2^1 + jitter = 0.2-1.2s
         - Attempt 2: 0.1 * 2^2 + jitter = 0.4-1.4s
@@ -65,15 +231,85 @@ class RetryHandler:
 
         Args:
             attempt: Current attempt number (0-indexed)
+            previous: Previous delay of the same call (``decorrelated`` only)
 
         Returns:
             Delay in seconds
         """
+        if self.jitter == "decorrelated":
+            upper = max(previous if previous is not None else self.base_delay, self.base_delay)
+            return min(random.uniform(self.base_delay, upper * 3), self.max_delay)
         exponential_delay = self.base_delay * (2 ** attempt)
+        if self.jitter == "full":
+            return random.uniform(0, min(exponential_delay, self.max_delay))
         jitter = random.uniform(0, 1)
         delay = min(exponential_delay + jitter, self.max_delay)
         return delay
 
+    def _before_call(self, first_attempt: bool) -> None:
+        """Refuse the call while the breaker is open, and earn retry budget.
+
+        Args:
+            first_attempt: False if the call is itself a retry (a resubmitted
+                round of unprocessed requests), which earns no budget
+        """
+        if self.breaker is not None and not self.breaker.allow():
+            raise CircuitOpenError(
+                f"Circuit breaker open after {self.breaker.consecutive_failures} "
+                "consecutive permanent errors"
+            )
+        if self.budget is not None and first_attempt:
+            self.budget.record_attempt()
+
+    def _next_delay(self, error: Exception, attempt: int, previous: float | None) -> float | None:
+        """Delay before retrying a failed attempt, or None to give up.
+
+        Args:
+            error: Exception raised by the attempt
+            attempt: Attempt number (0-indexed)
+            previous: Delay before this attempt, if it was a retry
+
+        Returns:
+            Seconds to wait, or None to raise the error
+        """
+        action = handle_error(error, attempt, self.max_retries)
+        if action != ErrorAction.RETRY_WITH_BACKOFF:
+            # Only DynamoDB's verdict counts: a bug on our side (TypeError,
+            # ValueError, ...) says nothing about whether the table accepts writes
+            if (
+                self.breaker is not None
+                and isinstance(error, ClientError)
+                and is_permanent_error(error)
+            ):
+                self.breaker.record_permanent_failure(error)
+            return None
+        if self.budget is not None and not self.budget.try_spend():
+            logger.warning(f"Retry budget exhausted, not retrying: {error}")
+            return None
+        delay = self.calculate_delay(attempt, previous)
+        logger.debug(f"Retrying in {delay:.2f}s (attempt {attempt + 2}/{self.max_retries + 1})")
+        return delay
+
+    def try_resubmit(self) -> bool:
+        """Take one retry from the budget for a round of unprocessed requests.
+
+        Resubmitting the requests a call returned unprocessed is a retry of
+        them, so it is charged to the same budget as retried calls. The round
+        is then sent with ``resubmit_sync`` or ``resubmit_async``.
+
+        Returns:
+            True if the round may be sent
+        """
+        if self.budget is not None and not self.budget.try_spend():
+            logger.warning("Retry budget exhausted, not resubmitting unprocessed items")
+            return False
+        return True
+
+    def _on_success(self) -> None:
+        """Record a successful call with the breaker."""
+        if self.breaker is not None:
+            self.breaker.record_success()
+
     async def retry_async(
         self,
         func: Callable[..., Any],
@@ -91,32 +327,51 @@ class RetryHandler:
             Result from successful function call
 
         Raises:
-            Exception: The last exception if all retries are exhausted
+            CircuitOpenError: If the circuit breaker is open
+            Exception: The error of the last attempt when it is not retried
+                (permanent or unknown error, retries or budget exhausted)
+        """
+        self._before_call(first_attempt=True)
+        return await self._call_async(func, *args, **kwargs)
+
+    async def resubmit_async(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        **kwargs: Any
+    ) -> Any:
+        """Retry an async call that resubmits requests of an earlier call.
+
+        Same as ``retry_async``, except that the call earns no retry budget:
+        only the first call of a batch counts as a first attempt.
+
+        Args:
+            func: Async function to retry
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Result from successful function call
         """
-        last_exception = None
+        self._before_call(first_attempt=False)
+        return await self._call_async(func, *args, **kwargs)
 
-        for attempt in range(self.max_retries + 1):
+    async def _call_async(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Call an async function, retrying it with backoff (see ``retry_async``)."""
+        delay: float | None = None
+        attempt = 0
+        while True:
             try:
-                return await func(*args, **kwargs)
+                result = await func(*args, **kwargs)
             except Exception as e:
-                last_exception = e
-
-                if attempt < self.max_retries:
-                    delay = self.calculate_delay(attempt)
-                    logger.warning(
-                        f"Attempt {attempt + 1}/{self.max_retries + 1} failed: {e}. "
-                        f"Retrying in {delay:.2f}s..."
-                    )
-                    await asyncio.sleep(delay)
-                else:
-                    logger.error(
-                        f"All {self.max_retries + 1} attempts failed. Last error: {e}"
-                    )
-
-        # This should never be None due to the loop logic, but for type safety
-        if last_exception:
-            raise last_exception
-        raise RuntimeError("Retry logic failed unexpectedly")
+                delay = self._next_delay(e, attempt, delay)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+            else:
+                self._on_success()
+                return result
 
     def retry_sync(
         self,
@@ -135,31 +390,48 @@ class RetryHandler:
             Result from successful function call
 
         Raises:
-            Exception: The last exception if all retries are exhausted
+            CircuitOpenError: If the circuit breaker is open
+            Exception: The error of the last attempt when it is not retried
+                (permanent or unknown error, retries or budget exhausted)
         """
-        import time
+        self._before_call(first_attempt=True)
+        return self._call_sync(func, *args, **kwargs)
 
-        last_exception = None
+    def resubmit_sync(
+        self,
+        func: Callable[..., T],
+        *args: Any,
+        **kwargs: Any
+    ) -> T:
+        """Retry a sync call that resubmits requests of an earlier call.
+
+        Same as ``retry_sync``, except that the call earns no retry budget:
+        only the first call of a batch counts as a first attempt.
+
+        Args:
+            func: Synchronous function to retry
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Result from successful function call
+        """
+        self._before_call(first_attempt=False)
+        return self._call_sync(func, *args, **kwargs)
 
-        for attempt in range(self.max_retries + 1):
+    def _call_sync(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Call a sync function, retrying it with backoff (see ``retry_sync``)."""
+        delay: float | None = None
+        attempt = 0
+        while True:
             try:
-                return func(*args, **kwargs)
+                result = func(*args, **kwargs)
             except Exception as e:
-                last_exception = e
-
-                if attempt < self.max_retries:
-                    delay = self.calculate_delay(attempt)
-                    logger.warning(
-                        f"Attempt {attempt + 1}/{self.max_retries + 1} failed: {e}. "
-                        f"Retrying in {delay:.2f}s..."
-                    )
-                    time.sleep(delay)
-                else:
-                    logger.error(
-                        f"All {self.max_retries + 1} attempts failed. Last error: {e}"
-                    )
-
-        # This should never be None due to the loop logic, but for type safety
-        if last_exception:
-            raise last_exception
-        raise RuntimeError("Retry logic failed unexpectedly")
+                delay = self._next_delay(e, attempt, delay)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+            else:
+                self._on_success()
+                return result
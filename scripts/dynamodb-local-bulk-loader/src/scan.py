@@ -0,0 +1,303 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Parallel segmented Scan feeding a bounded queue.
+
+A single Scan reads a table one 1MB page at a time. With ``TotalSegments``
+the table is split into segments that can be read independently, so
+``ParallelScan`` runs one thread per segment. Each thread follows
+LastEvaluatedKey to the end of its segment and puts the pages on a bounded
+queue; a consumer that falls behind (such as the delete pipeline) stops the
+readers instead of having the table buffered in memory. Consumers that keep
+state per segment (such as one export file per segment) use ``run`` instead,
+which hands every page to a callback in its own segment's thread.
+
+Every Scan call is retried with the RetryHandler, and with a ``rate_limiter``
+the read capacity reported by each page is charged against a token bucket
+before the segment's next page is requested. Errors that outlast the retries
+stop the segment and are re-raised by the consumer.
+"""
+
+import queue
+import threading
+from collections.abc import Callable, Iterator, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from botocore.config import Config
+
+from src.logging_config import get_logger
+from src.rate_limiter import TokenBucket
+from src.retry_handler import RetryHandler
+
+logger = get_logger(__name__)
+
+DEFAULT_SEGMENTS = 8
+# Pages buffered ahead of the consumer, per segment
+DEFAULT_PAGES_PER_SEGMENT = 2
+
+
+@dataclass
+class ScanPage:
+    """One page of a segment."""
+
+    segment: int
+    items: list[dict[str, Any]]
+    consumed_rcu: float = 0.0
+
+
+def projection_params(attributes: Sequence[str]) -> dict[str, Any]:
+    """Scan parameters projecting items to the given attributes.
+
+    Names go through ExpressionAttributeNames, so reserved words and names
+    with special characters are projected like any other.
+    """
+    names = {f"#a{i}": name for i, name in enumerate(attributes)}
+    return {
+        "ProjectionExpression": ", ".join(names),
+        "ExpressionAttributeNames": names,
+    }
+
+
+def scan_client(session: Any, segments: int) -> Any:
+    """Low-level client with a connection per segment and boto3 retries disabled.
+
+    Args:
+        session: boto3 Session (or a compatible stand-in)
+        segments: Parallel scan segments that will share the client
+
+    Returns:
+        DynamoDB client
+    """
+    config = Config(max_pool_connections=segments + 5, retries={"max_attempts": 0})
+    return session.client("dynamodb", config=config)
+
+
+class ParallelScan:
+    """Reads every segment of a table concurrently, one thread per segment."""
+
+    def __init__(
+        self,
+        client: Any,
+        table_name: str,
+        segments: int = DEFAULT_SEGMENTS,
+        attributes: Sequence[str] | None = None,
+        page_size: int | None = None,
+        consistent_read: bool = False,
+        rate_limiter: TokenBucket | None = None,
+        retry_handler: RetryHandler | None = None,
+        max_pages: int | None = None,
+    ):
+        """Initialize scan.
+
+        Args:
+            client: Low-level DynamoDB client (boto3 clients are thread-safe)
+            table_name: Table to scan
+            segments: Number of segments read in parallel
+            attributes: Attribute names to return (e.g. the key attributes);
+                        whole items if None
+            page_size: Maximum items per Scan call (DynamoDB still stops a
+                       page at 1MB)
+            consistent_read: Use strongly consistent reads (twice the RCUs)
+            rate_limiter: Optional token bucket charged the RCUs of every page
+            retry_handler: Retries failed Scan calls (default: 5 retries)
+            max_pages: Pages buffered ahead of the consumer (default: two
+                       per segment)
+        """
+        if segments <= 0:
+            raise ValueError(f"segments must be greater than 0, got {segments}")
+        if page_size is not None and page_size <= 0:
+            raise ValueError(f"page_size must be greater than 0, got {page_size}")
+        self.client = client
+        self.table_name = table_name
+        self.segments = segments
+        self.attributes = tuple(attributes) if attributes else None
+        self.page_size = page_size
+        self.consistent_read = consistent_read
+        self.rate_limiter = rate_limiter
+        self.retry_handler = retry_handler or RetryHandler(max_retries=5)
+        #: Items read per segment, and totals over all segments
+        self.segment_counts = [0] * segments
+        self.pages = 0
+        self.consumed_rcu = 0.0
+        self._pages: queue.Queue[ScanPage | None] = queue.Queue(
+            maxsize=max_pages or DEFAULT_PAGES_PER_SEGMENT * segments
+        )
+        self._error: BaseException | None = None
+        # Page callback of run(); pages are queued for iter_pages() when None
+        self._on_page: Callable[[ScanPage], None] | None = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+
+    @property
+    def items(self) -> int:
+        """Items read so far."""
+        return sum(self.segment_counts)
+
+    def __enter__(self) -> "ParallelScan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        """Yield the items of all segments as they arrive."""
+        for page in self.iter_pages():
+            yield from page.items
+
+    def iter_pages(self) -> Iterator[ScanPage]:
+        """Start the segment threads and yield their pages as they arrive.
+
+        Pages of different segments are interleaved; pages of one segment
+        come in scan order.
+
+        Raises:
+            Exception: Whatever a segment raised once its retries ran out
+        """
+        self._start()
+        try:
+            finished = 0
+            while finished < self.segments:
+                page = self._pages.get()
+                if page is None:
+                    finished += 1
+                    if self._error is not None:
+                        raise self._error
+                    continue
+                yield page
+        finally:
+            self.close()
+        self._log_complete()
+
+    def run(self, on_page: Callable[[ScanPage], None]) -> None:
+        """Read every segment, handing each page to ``on_page`` in its segment's thread.
+
+        Pages of one segment are handled one after the other, in scan order,
+        so ``on_page`` may keep per-segment state without locking. Each
+        segment runs at its own pace; a slow callback only holds back its
+        own segment.
+
+        Args:
+            on_page: Called with every non-empty page
+
+        Raises:
+            Exception: Whatever a segment or ``on_page`` raised; the other
+                       segments are stopped
+        """
+        self._on_page = on_page
+        self._start()
+        try:
+            for thread in self._threads:
+                thread.join()
+        finally:
+            self.close()
+        if self._error is not None:
+            raise self._error
+        self._log_complete()
+
+    def close(self) -> None:
+        """Stop the segment threads."""
+        self._stop.set()
+        # Unblock threads waiting for queue space
+        while True:
+            try:
+                self._pages.get_nowait()
+            except queue.Empty:
+                break
+        for thread in self._threads:
+            thread.join(timeout=5)
+
+    def _start(self) -> None:
+        """Start one thread per segment."""
+        if self._threads:
+            raise RuntimeError("A ParallelScan can only be run once")
+        for segment in range(self.segments):
+            thread = threading.Thread(
+                target=self._run,
+                args=(segment,),
+                name=f"scan-{self.table_name}-{segment}",
+                daemon=True,
+            )
+            self._threads.append(thread)
+            thread.start()
+        logger.info(f"Scanning {self.table_name} in {self.segments} segments")
+
+    def _log_complete(self) -> None:
+        """Log the totals of a finished scan."""
+        logger.info(
+            f"Scan complete: {self.items:,} items in {self.pages:,} pages, "
+            f"{self.consumed_rcu:,.1f} RCU"
+        )
+
+    def _params(self, segment: int) -> dict[str, Any]:
+        """Scan parameters of a segment's first page."""
+        params: dict[str, Any] = {
+            "TableName": self.table_name,
+            "Segment": segment,
+            "TotalSegments": self.segments,
+            "ReturnConsumedCapacity": "TOTAL",
+        }
+        if self.attributes is not None:
+            params.update(projection_params(self.attributes))
+        if self.page_size is not None:
+            params["Limit"] = self.page_size
+        if self.consistent_read:
+            params["ConsistentRead"] = True
+        return params
+
+    def _run(self, segment: int) -> None:
+        """Read one segment into the queue or the page callback (segment thread)."""
+        try:
+            params = self._params(segment)
+            while not self._stop.is_set():
+                response = self.retry_handler.retry_sync(self.client.scan, **params)
+                items = response.get("Items", [])
+                consumed = float(response.get("ConsumedCapacity", {}).get("CapacityUnits", 0.0))
+                with self._lock:
+                    self.segment_counts[segment] += len(items)
+                    self.pages += 1
+                    self.consumed_rcu += consumed
+                if items:
+                    page = ScanPage(segment, items, consumed)
+                    if self._on_page is not None:
+                        self._on_page(page)
+                    else:
+                        self._put(page)
+                last_key = response.get("LastEvaluatedKey")
+                if not last_key:
+                    break
+                if self.rate_limiter is not None and consumed:
+                    # Pay for this page before asking for the next one
+                    self.rate_limiter.acquire_sync(consumed)
+                params["ExclusiveStartKey"] = last_key
+        except BaseException as e:
+            logger.error(f"Scan of segment {segment} failed: {e}")
+            with self._lock:
+                if self._error is None:
+                    self._error = e
+            if self._on_page is not None:
+                # Nobody reads the queue in run(): stop the other segments here
+                self._stop.set()
+        finally:
+            if self._on_page is None:
+                self._put(None)
+
+    def _put(self, page: ScanPage | None) -> None:
+        """Queue a page, giving up if the consumer has closed the scan."""
+        while not self._stop.is_set():
+            try:
+                self._pages.put(page, timeout=0.1)
+                return
+            except queue.Full:
+                continue
@@ -0,0 +1,285 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Column schemas and direct serialization to DynamoDB wire format.
+
+Through the resource API every CSV value is stored as a string, and every
+item is walked by boto3's ``TypeSerializer`` on each request. With an
+``ItemSchema`` the loaders resolve one converter per column up front, turn
+each row into wire JSON (``{"amount": {"N": "12.5"}}``) once, and send it
+with a low-level client that does no further transformation. Numeric columns
+are stored as ``N``, so they can be used in numeric conditions and sort keys.
+
+A schema is declared (``"amount:N,active:BOOL"``) or inferred from a sample
+of rows. Key attribute types are always taken from the table definition so
+that inference can never change a key's type.
+"""
+
+import csv
+import math
+import re
+from collections.abc import Callable, Iterable, Mapping
+from decimal import Decimal
+from itertools import islice
+from typing import Any
+
+from boto3.dynamodb.types import TypeSerializer
+
+from src.compression import open_input
+from src.logging_config import get_logger
+from src.readers import allow_large_csv_fields
+
+logger = get_logger(__name__)
+
+# Pass as a loader's ``schema`` to infer column types from the first rows
+INFER_SCHEMA = "infer"
+
+# Rows sampled when inferring a schema
+DEFAULT_SAMPLE_SIZE = 1000
+
+COLUMN_TYPES = ("S", "N", "BOOL")
+
+# Any number DynamoDB accepts
+_NUMBER = re.compile(r"[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?")
+# Numbers inferred as N: no leading zeros, so codes like "00123" stay strings
+_CANONICAL_NUMBER = re.compile(r"-?(0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?")
+_BOOLEANS = {"true": True, "false": False}
+
+AttributeValue = dict[str, Any]
+Converter = Callable[[Any], AttributeValue | None]
+
+_type_serializer = TypeSerializer()
+
+
+def _fallback(value: Any) -> AttributeValue | None:
+    """Serialize a non-string value with boto3's TypeSerializer."""
+    if value is None:
+        return None
+    if isinstance(value, float):
+        value = Decimal(repr(value))
+    av: AttributeValue = _type_serializer.serialize(value)
+    return av
+
+
+def _to_string(value: Any) -> AttributeValue | None:
+    """Convert a value for an S column."""
+    if isinstance(value, str):
+        return {"S": value}
+    return _fallback(value)
+
+
+def _to_number(value: Any) -> AttributeValue | None:
+    """Convert a value for an N column (empty values are omitted)."""
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return None
+        if _NUMBER.fullmatch(text):
+            return {"N": text}
+        # A row that does not match the column type is kept as a string
+        return {"S": value}
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if isinstance(value, (int, Decimal)) or (isinstance(value, float) and math.isfinite(value)):
+        return {"N": str(value)}
+    return _fallback(value)
+
+
+def _to_bool(value: Any) -> AttributeValue | None:
+    """Convert a value for a BOOL column (empty values are omitted)."""
+    if isinstance(value, str):
+        if not value:
+            return None
+        flag = _BOOLEANS.get(value.strip().lower())
+        return {"S": value} if flag is None else {"BOOL": flag}
+    return _fallback(value)
+
+
+_CONVERTERS: dict[str, Converter] = {"S": _to_string, "N": _to_number, "BOOL": _to_bool}
+
+
+class ItemSchema:
+    """Column types used to serialize records straight to wire format."""
+
+    def __init__(self, columns: dict[str, str] | None = None, default_type: str = "S"):
+        """Initialize schema.
+
+        Args:
+            columns: Mapping of column name to "S", "N" or "BOOL"
+            default_type: Type of columns not listed in ``columns``
+        """
+        columns = dict(columns or {})
+        for name, kind in [*columns.items(), ("<default>", default_type)]:
+            if kind not in COLUMN_TYPES:
+                raise ValueError(
+                    f"Unsupported type {kind!r} for column {name!r}, expected one of {COLUMN_TYPES}"
+                )
+        self.columns = columns
+        self.default_type = default_type
+        # Converter per column name, filled on first use
+        self._converter_cache: dict[str, Converter] = {}
+
+    def __repr__(self) -> str:
+        return f"ItemSchema({self.columns!r}, default_type={self.default_type!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ItemSchema):
+            return NotImplemented
+        return self.columns == other.columns and self.default_type == other.default_type
+
+    @classmethod
+    def parse(cls, spec: str) -> "ItemSchema":
+        """Parse a declared schema such as ``"amount:N,active:BOOL"``.
+
+        Args:
+            spec: Comma-separated ``column:TYPE`` pairs
+
+        Returns:
+            ItemSchema with the declared columns (others default to S)
+
+        Raises:
+            ValueError: If an entry is malformed or uses an unknown type
+        """
+        columns = {}
+        for entry in filter(None, (part.strip() for part in spec.split(","))):
+            name, sep, kind = entry.rpartition(":")
+            if not sep or not name:
+                raise ValueError(f"Invalid schema entry {entry!r}, expected column:TYPE")
+            columns[name.strip()] = kind.strip().upper()
+        return cls(columns)
+
+    @classmethod
+    def infer(
+        cls, records: Iterable[Mapping[str, Any]], sample_size: int = DEFAULT_SAMPLE_SIZE
+    ) -> "ItemSchema":
+        """Infer column types from the first ``sample_size`` records.
+
+        A column is N if every non-empty sampled value is a canonical number,
+        BOOL if every one is "true" or "false", and S otherwise.
+
+        Args:
+            records: Records to sample (only the first ``sample_size`` are read)
+            sample_size: Number of records to inspect
+
+        Returns:
+            Inferred ItemSchema
+        """
+        candidates: dict[str, set[str]] = {}
+        seen: set[str] = set()
+        for record in islice(records, sample_size):
+            for name, value in record.items():
+                kinds = candidates.setdefault(name, {"N", "BOOL"})
+                if not kinds or value is None or value == "":
+                    continue
+                seen.add(name)
+                text = str(value).strip()
+                if "N" in kinds and not _CANONICAL_NUMBER.fullmatch(text):
+                    kinds.discard("N")
+                if "BOOL" in kinds and text.lower() not in _BOOLEANS:
+                    kinds.discard("BOOL")
+
+        columns = {}
+        for name, kinds in candidates.items():
+            # Columns with no values in the sample stay strings
+            if name in seen and "N" in kinds:
+                columns[name] = "N"
+            elif name in seen and "BOOL" in kinds:
+                columns[name] = "BOOL"
+            else:
+                columns[name] = "S"
+        logger.info(f"Inferred schema: {columns}")
+        return cls(columns)
+
+    @classmethod
+    def from_csv(cls, csv_file: str, sample_size: int = DEFAULT_SAMPLE_SIZE) -> "ItemSchema":
+        """Infer column types from the first rows of a CSV file.
+
+        Args:
+            csv_file: Path to the CSV file
+            sample_size: Number of rows to inspect
+
+        Returns:
+            Inferred ItemSchema
+        """
+        allow_large_csv_fields()
+        with open_input(csv_file, encoding="utf-8", newline="", threaded=False) as f:
+            return cls.infer(csv.DictReader(f), sample_size)
+
+    def with_key_types(self, attribute_definitions: Iterable[dict[str, str]]) -> "ItemSchema":
+        """Return a copy whose key columns use the table's declared types.
+
+        Args:
+            attribute_definitions: ``AttributeDefinitions`` from DescribeTable
+
+        Returns:
+            ItemSchema with key columns overridden (B keys are left as S)
+        """
+        columns = dict(self.columns)
+        for definition in attribute_definitions:
+            kind = definition.get("AttributeType")
+            if kind in ("S", "N"):
+                columns[definition["AttributeName"]] = kind
+        return ItemSchema(columns, self.default_type)
+
+    def serialize(self, record: dict[str, Any]) -> dict[str, AttributeValue]:
+        """Convert one record to wire format.
+
+        Args:
+            record: Record as read from the source
+
+        Returns:
+            Item as a mapping of attribute name to AttributeValue. Empty N and
+            BOOL values are omitted.
+        """
+        cache = self._converter_cache
+        item = {}
+        for name, value in record.items():
+            try:
+                convert = cache[name]
+            except KeyError:
+                convert = cache[name] = _CONVERTERS[self.columns.get(name, self.default_type)]
+            av = convert(value)
+            if av is not None:
+                item[name] = av
+        return item
+
+    def serialize_batch(self, records: list[dict[str, Any]]) -> list[dict[str, AttributeValue]]:
+        """Convert a batch of records to wire format.
+
+        Args:
+            records: Records in one batch
+
+        Returns:
+            Items in wire format, in the same order
+        """
+        return [self.serialize(record) for record in records]
+
+
+class PassthroughSchema(ItemSchema):
+    """Schema for records that are already in wire format.
+
+    Used for typed inputs such as DynamoDB JSON exports: records are sent
+    through the low-level client as they are, and key types are not touched.
+    """
+
+    def __repr__(self) -> str:
+        return "PassthroughSchema()"
+
+    def with_key_types(self, attribute_definitions: Iterable[dict[str, str]]) -> "ItemSchema":
+        return self
+
+    def serialize(self, record: dict[str, Any]) -> dict[str, AttributeValue]:
+        return record
+
+    def serialize_batch(self, records: list[dict[str, Any]]) -> list[dict[str, AttributeValue]]:
+        return records
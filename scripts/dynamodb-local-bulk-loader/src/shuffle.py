@@ -0,0 +1,439 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Shuffle strategies that reorder records to avoid hot partitions.
+
+Writing sorted input (e.g., by timestamp) sequentially concentrates writes on
+a small key range. The loaders pass every record stream through a shuffle
+strategy before batching. ``FullShuffle`` reproduces the original behaviour
+(materialise and ``random.shuffle``); the window strategies work on a stream
+and hold at most ``window_size`` records in memory. ``IndexShuffle`` spreads
+the whole file like ``FullShuffle`` but reads it itself, holding an 8-byte
+offset per row instead of the rows.
+"""
+
+import csv
+import mmap
+import random
+import zlib
+from abc import ABC, abstractmethod
+from array import array
+from collections import deque
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from typing import Any, TypeVar
+
+from src.compression import detect_compression
+from src.readers import allow_large_csv_fields
+
+DEFAULT_WINDOW_SIZE = 10000
+
+# Records are shuffled as they come, whether dictionaries or row views
+Row = TypeVar("Row", bound=Mapping[str, Any])
+
+
+class ShuffleStrategy(ABC):
+    """Base class for record shuffle strategies."""
+
+    #: True if the strategy holds a bounded number of records in memory
+    bounded_memory: bool = True
+    #: True if the strategy reads input files itself (see ``iter_file``); rows
+    #: are then identified by their byte offset rather than their row number
+    reads_files: bool = False
+
+    def __init__(self, seed: int | None = None):
+        """Initialize strategy.
+
+        Args:
+            seed: Optional random seed. The same seed and input always produce
+                  the same output order.
+        """
+        self.seed = seed
+
+    def _rng(self) -> random.Random:
+        """Create a fresh random generator for one shuffle pass."""
+        return random.Random(self.seed)
+
+    @abstractmethod
+    def shuffle(self, records: Iterable[Row]) -> Iterator[Row]:
+        """Yield records in shuffled order.
+
+        Args:
+            records: Record stream in file order
+
+        Yields:
+            The same records in a new order
+        """
+
+    def iter_file(
+        self,
+        path: str,
+        skip: Sequence[int] = (),
+        row_id_key: str | None = None,
+    ) -> Iterator[dict[str, Any]] | None:
+        """Read an input file in shuffled order, for strategies with ``reads_files``.
+
+        Args:
+            path: Path to the input file
+            skip: Sorted byte offsets of rows to leave out
+            row_id_key: If set, each record gets its row's byte offset under
+                        this attribute
+
+        Returns:
+            The shuffled records, or None (the default) if the loader reads the
+            file and passes its records to ``shuffle``
+        """
+        return None
+
+
+class FullShuffle(ShuffleStrategy):
+    """Shuffle the whole dataset in memory (perfect spread, O(N) memory)."""
+
+    bounded_memory = False
+
+    def shuffle(self, records: Iterable[Row]) -> Iterator[Row]:
+        """Materialise all records and shuffle them."""
+        buffer = list(records)
+        self._rng().shuffle(buffer)
+        yield from buffer
+
+
+class WindowShuffle(ShuffleStrategy):
+    """Sliding-window reservoir shuffle.
+
+    Keeps a reservoir of ``window_size`` records. Each incoming record replaces
+    a randomly chosen reservoir slot, and the evicted record is emitted. Every
+    output is therefore a uniform pick from the most recent window of input.
+    """
+
+    def __init__(self, window_size: int = DEFAULT_WINDOW_SIZE, seed: int | None = None):
+        """Initialize window shuffle.
+
+        Args:
+            window_size: Number of records held in the reservoir
+            seed: Optional random seed
+        """
+        super().__init__(seed)
+        if window_size <= 0:
+            raise ValueError(f"window_size must be greater than 0, got {window_size}")
+        self.window_size = window_size
+
+    def shuffle(self, records: Iterable[Row]) -> Iterator[Row]:
+        """Yield records through a sliding random reservoir."""
+        rng = self._rng()
+        reservoir: list[Row] = []
+        for record in records:
+            if len(reservoir) < self.window_size:
+                reservoir.append(record)
+                continue
+            slot = rng.randrange(self.window_size)
+            yield reservoir[slot]
+            reservoir[slot] = record
+        rng.shuffle(reservoir)
+        yield from reservoir
+
+
+class BucketInterleaveShuffle(ShuffleStrategy):
+    """Multi-bucket interleave.
+
+    Reads a window of records, splits it into ``num_buckets`` contiguous
+    buckets, shuffles each bucket and emits them round-robin. Consecutive
+    writes therefore come from regions of the input that are roughly
+    ``window_size / num_buckets`` rows apart.
+    """
+
+    def __init__(
+        self,
+        window_size: int = DEFAULT_WINDOW_SIZE,
+        num_buckets: int = 16,
+        seed: int | None = None,
+    ):
+        """Initialize bucket interleave shuffle.
+
+        Args:
+            window_size: Number of records read before interleaving
+            num_buckets: Number of contiguous buckets per window
+            seed: Optional random seed
+        """
+        super().__init__(seed)
+        if window_size <= 0:
+            raise ValueError(f"window_size must be greater than 0, got {window_size}")
+        if num_buckets <= 0:
+            raise ValueError(f"num_buckets must be greater than 0, got {num_buckets}")
+        self.window_size = window_size
+        self.num_buckets = num_buckets
+
+    def shuffle(self, records: Iterable[Row]) -> Iterator[Row]:
+        """Yield records window by window, interleaving shuffled buckets."""
+        rng = self._rng()
+        window: list[Row] = []
+        for record in records:
+            window.append(record)
+            if len(window) >= self.window_size:
+                yield from self._interleave(window, rng)
+                window = []
+        if window:
+            yield from self._interleave(window, rng)
+
+    def _interleave(self, window: list[Row], rng: random.Random) -> Iterator[Row]:
+        """Split a window into buckets and emit them round-robin."""
+        bucket_size = -(-len(window) // self.num_buckets)  # ceiling division
+        buckets = [window[i : i + bucket_size] for i in range(0, len(window), bucket_size)]
+        for bucket in buckets:
+            rng.shuffle(bucket)
+        rng.shuffle(buckets)
+        for i in range(bucket_size):
+            for bucket in buckets:
+                if i < len(bucket):
+                    yield bucket[i]
+
+
+class PartitionHashShuffle(ShuffleStrategy):
+    """Round-robin across partition-key hash lanes.
+
+    Records are hashed by partition key into ``num_lanes`` lanes. Once
+    ``window_size`` records are buffered, one record is emitted from each
+    lane in turn, so consecutive writes land on different key hashes even
+    when many input rows share a key range.
+    """
+
+    def __init__(
+        self,
+        partition_key: str = "id",
+        window_size: int = DEFAULT_WINDOW_SIZE,
+        num_lanes: int = 64,
+        seed: int | None = None,
+    ):
+        """Initialize partition hash shuffle.
+
+        Args:
+            partition_key: Attribute used to assign records to lanes
+            window_size: Maximum number of buffered records
+            num_lanes: Number of hash lanes
+            seed: Optional random seed (used to pick the starting lane)
+        """
+        super().__init__(seed)
+        if window_size <= 0:
+            raise ValueError(f"window_size must be greater than 0, got {window_size}")
+        if num_lanes <= 0:
+            raise ValueError(f"num_lanes must be greater than 0, got {num_lanes}")
+        self.partition_key = partition_key
+        self.window_size = window_size
+        self.num_lanes = num_lanes
+
+    def _lane(self, record: Mapping[str, Any]) -> int:
+        """Map a record to a lane using a stable hash of its partition key."""
+        key = str(record.get(self.partition_key, "")).encode("utf-8")
+        return zlib.crc32(key) % self.num_lanes
+
+    def shuffle(self, records: Iterable[Row]) -> Iterator[Row]:
+        """Yield records round-robin across hash lanes."""
+        lanes: list[deque[Row]] = [deque() for _ in range(self.num_lanes)]
+        cursor = self._rng().randrange(self.num_lanes)
+        buffered = 0
+
+        def next_record() -> Row:
+            nonlocal cursor, buffered
+            while not lanes[cursor]:
+                cursor = (cursor + 1) % self.num_lanes
+            record = lanes[cursor].popleft()
+            cursor = (cursor + 1) % self.num_lanes
+            buffered -= 1
+            return record
+
+        for record in records:
+            lanes[self._lane(record)].append(record)
+            buffered += 1
+            if buffered >= self.window_size:
+                yield next_record()
+        while buffered:
+            yield next_record()
+
+
+class IndexShuffle(ShuffleStrategy):
+    """Whole-file shuffle of a CSV file through an index of row offsets.
+
+    The file is memory-mapped and scanned once for the byte offset at which
+    every row starts, kept in an ``array('Q')``. The offsets are shuffled and
+    rows are parsed as they are read back in that order, so writes are spread
+    across the whole file like ``FullShuffle`` while only 8 bytes per row are
+    held in memory (the mapped pages belong to the page cache).
+
+    The loaders read CSV files through ``iter_csv``; the file must be an
+    uncompressed CSV. Records passed to ``shuffle`` directly, which have no
+    file to index, are shuffled in memory like ``FullShuffle``.
+    """
+
+    # The index grows with the file, 8 bytes per row
+    bounded_memory = False
+    reads_files = True
+
+    def shuffle(self, records: Iterable[Row]) -> Iterator[Row]:
+        """Materialise all records and shuffle them (records without a file)."""
+        buffer = list(records)
+        self._rng().shuffle(buffer)
+        yield from buffer
+
+    def iter_file(
+        self,
+        path: str,
+        skip: Sequence[int] = (),
+        row_id_key: str | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """Read a CSV file in shuffled order (see ``iter_csv``)."""
+        return self.iter_csv(path, skip=skip, row_id_key=row_id_key)
+
+    def iter_csv(
+        self,
+        path: str,
+        skip: Sequence[int] = (),
+        row_id_key: str | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """Yield the rows of a CSV file in shuffled order.
+
+        Rows are returned as ``csv.DictReader`` would return them: empty
+        lines are skipped and every value is a string.
+
+        Args:
+            path: Path to an uncompressed CSV file with a header row
+            skip: Sorted byte offsets of rows to leave out (rows a checkpoint
+                  journal recorded as written)
+            row_id_key: If set, each record gets its row's byte offset under
+                        this attribute (see src.checkpoint)
+
+        Yields:
+            One dictionary per row
+
+        Raises:
+            ValueError: If the file is compressed
+        """
+        compression = detect_compression(path)
+        if compression is not None:
+            raise ValueError(
+                f"IndexShuffle needs an uncompressed CSV file, {path} is {compression}; "
+                "decompress it first or use a window strategy"
+            )
+        allow_large_csv_fields()
+        with open(path, "rb") as f:
+            if f.seek(0, 2) == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                fieldnames = _read_row(mm, 0)
+                offsets = _row_offsets(mm, mm.tell(), skip)
+                self._rng().shuffle(offsets)
+                width = len(fieldnames)
+                for offset in offsets:
+                    row = _read_row(mm, offset)
+                    # Same handling of short and long rows as csv.DictReader
+                    record: dict[Any, Any] = dict(zip(fieldnames, row, strict=False))
+                    if len(row) > width:
+                        record[None] = row[width:]
+                    elif len(row) < width:
+                        for name in fieldnames[len(row) :]:
+                            record[name] = None
+                    if row_id_key is not None:
+                        record[row_id_key] = offset
+                    yield record
+
+
+def _csv_lines(mm: mmap.mmap, offset: int) -> Iterator[str]:
+    """Decoded lines of a mapped file from ``offset``, read only as they are needed.
+
+    ``csv.reader`` takes another line only while a row is incomplete, so
+    after it returns a row ``mm.tell()`` is the offset of the next one.
+    """
+    mm.seek(offset)
+    for line in iter(mm.readline, b""):
+        yield line.decode("utf-8")
+
+
+def _read_row(mm: mmap.mmap, offset: int) -> list[str]:
+    """Parse the CSV row starting at ``offset``, leaving ``mm`` after its last line."""
+    return next(csv.reader(_csv_lines(mm, offset)), [])
+
+
+def _row_offsets(mm: mmap.mmap, start: int, skip: Sequence[int] = ()) -> array:
+    """Index the byte offsets of the rows of a mapped CSV file.
+
+    A line without a quote character is a whole row, or no row if it is
+    empty (as in ``csv.DictReader``). A row with a quote is parsed with
+    ``csv.reader``, so it ends where the reader's quoting rules end it: a
+    quoted field may hold line breaks, and a quote inside an unquoted field
+    is an ordinary character.
+
+    Args:
+        mm: The mapped file
+        start: Offset of the first row after the header
+        skip: Sorted offsets to leave out of the index
+
+    Returns:
+        Offsets of the rows in file order
+    """
+    offsets = array("Q")
+    skip_index = 0
+    position = start
+    mm.seek(start)
+    for line in iter(mm.readline, b""):
+        if b'"' in line:
+            # Parse the row from its start, which leaves mm after its last line
+            is_row = bool(_read_row(mm, position))
+        else:
+            is_row = bool(line.rstrip(b"\r\n"))
+        if is_row:
+            while skip_index < len(skip) and skip[skip_index] < position:
+                skip_index += 1
+            if skip_index == len(skip) or skip[skip_index] != position:
+                offsets.append(position)
+        position = mm.tell()
+    return offsets
+
+
+SHUFFLE_STRATEGIES: dict[str, type[ShuffleStrategy]] = {
+    "full": FullShuffle,
+    "window": WindowShuffle,
+    "bucket": BucketInterleaveShuffle,
+    "hash": PartitionHashShuffle,
+    "index": IndexShuffle,
+}
+
+
+def get_shuffle_strategy(
+    name: str,
+    window_size: int = DEFAULT_WINDOW_SIZE,
+    seed: int | None = None,
+    partition_key: str = "id",
+) -> ShuffleStrategy:
+    """Create a shuffle strategy by name.
+
+    Args:
+        name: One of "full", "window", "bucket", "hash" or "index"
+        window_size: Window size for the streaming strategies
+        seed: Optional random seed
+        partition_key: Partition key attribute (used by "hash")
+
+    Returns:
+        Configured ShuffleStrategy
+
+    Raises:
+        ValueError: If the strategy name is unknown
+    """
+    if name not in SHUFFLE_STRATEGIES:
+        raise ValueError(
+            f"Unknown shuffle strategy {name!r}, expected one of {sorted(SHUFFLE_STRATEGIES)}"
+        )
+    if name == "window":
+        return WindowShuffle(window_size=window_size, seed=seed)
+    if name == "bucket":
+        return BucketInterleaveShuffle(window_size=window_size, seed=seed)
+    if name == "hash":
+        return PartitionHashShuffle(partition_key=partition_key, window_size=window_size, seed=seed)
+    return SHUFFLE_STRATEGIES[name](seed=seed)
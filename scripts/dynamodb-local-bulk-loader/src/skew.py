@@ -0,0 +1,501 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Partition key skew analysis and hot-key pacing.
+
+Shuffling spreads consecutive writes across keys, but it cannot help when a
+large share of the rows have the same partition key: every one of them lands
+on the same partition, which accepts about 1,000 WCU/s however the load is
+ordered. Once that key's share of the load rate exceeds the limit, its writes
+are throttled and the retries slow down the whole load.
+
+``analyze_csv`` makes one pass over the input with bounded memory:
+
+- a count-min sketch estimates the frequency of every key (never
+  underestimating, overestimating by at most ``e / width`` of the rows with
+  probability ``1 - exp(-depth)``)
+- the ``top_k`` keys with the highest estimates are tracked as heavy hitters
+
+The resulting ``SkewReport`` gives each heavy hitter's share of the rows, the
+WCU/s it receives at a given load rate, and the highest load rate at which no
+key exceeds the per-partition limit.
+
+``HotKeyPacer`` is the opt-in remedy: one token bucket per heavy hitter, charged
+by the BatchWriteItemWriter before each request, so writes to a hot key are
+held to ``max_key_wcu`` while the rest of the load runs at full speed.
+"""
+
+import array
+import asyncio
+import csv
+import hashlib
+import math
+import time
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from src.compression import open_input
+from src.item_size import write_units
+from src.logging_config import get_logger
+from src.rate_limiter import SharedTokenBucket, TokenBucket
+from src.readers import allow_large_csv_fields
+
+logger = get_logger(__name__)
+
+# Write throughput a single DynamoDB partition accepts (WCU/s)
+PARTITION_WCU_LIMIT = 1000.0
+
+# Default pace for a hot key: 10% below the partition limit
+DEFAULT_KEY_WCU = 0.9 * PARTITION_WCU_LIMIT
+
+DEFAULT_TOP_K = 20
+DEFAULT_SKETCH_WIDTH = 2**16
+DEFAULT_SKETCH_DEPTH = 4
+
+# Rows whose item size is measured to estimate the average WCUs per row
+_SIZE_SAMPLE_ROWS = 1000
+
+
+def key_value(item: Mapping[str, Any], partition_key: str) -> str | None:
+    """Partition key of an item given as Python values or in wire format.
+
+    Args:
+        item: Item as a dictionary
+        partition_key: Name of the partition key attribute
+
+    Returns:
+        The key as a string, or None if the item does not have it
+    """
+    value = item.get(partition_key)
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        # Wire format, e.g. {"S": "abc"}
+        ((_, value),) = value.items()
+    return str(value)
+
+
+class CountMinSketch:
+    """Count-min sketch of string frequencies.
+
+    ``depth`` rows of ``width`` counters; a key increments one counter per
+    row, and its estimate is the smallest of those counters.
+    """
+
+    def __init__(self, width: int = DEFAULT_SKETCH_WIDTH, depth: int = DEFAULT_SKETCH_DEPTH):
+        """Initialize sketch.
+
+        Args:
+            width: Counters per row (error is about ``e / width`` of the total)
+            depth: Number of rows (failure probability is ``exp(-depth)``)
+        """
+        if width <= 0:
+            raise ValueError(f"width must be greater than 0, got {width}")
+        if depth <= 0:
+            raise ValueError(f"depth must be greater than 0, got {depth}")
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self._rows = [array.array("Q", bytes(8 * width)) for _ in range(depth)]
+
+    def _indexes(self, key: str) -> list[int]:
+        """Counter index of ``key`` in every row (double hashing)."""
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+        h1 = int.from_bytes(digest[:4], "little")
+        h2 = int.from_bytes(digest[4:], "little") | 1
+        return [(h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Count ``key`` and return its updated estimate.
+
+        Args:
+            key: Key to count
+            count: Number of occurrences
+
+        Returns:
+            Estimated frequency of ``key`` including this update
+        """
+        self.total += count
+        estimate = None
+        for row, index in zip(self._rows, self._indexes(key), strict=True):
+            row[index] += count
+            if estimate is None or row[index] < estimate:
+                estimate = row[index]
+        return estimate or 0
+
+    def estimate(self, key: str) -> int:
+        """Estimated frequency of ``key`` (never below the true count)."""
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key), strict=True))
+
+
+class HeavyHitters:
+    """The ``k`` keys with the highest estimated frequencies.
+
+    Keys are counted in a count-min sketch; the candidates are kept in a
+    dictionary of at most ``k`` entries, replacing the smallest candidate
+    whenever another key's estimate overtakes it.
+    """
+
+    def __init__(self, k: int = DEFAULT_TOP_K, sketch: CountMinSketch | None = None):
+        """Initialize tracker.
+
+        Args:
+            k: Number of keys to track
+            sketch: Sketch to count in (a default-sized one if None)
+        """
+        if k <= 0:
+            raise ValueError(f"k must be greater than 0, got {k}")
+        self.k = k
+        self.sketch = sketch or CountMinSketch()
+        self.candidates: dict[str, int] = {}
+        self._smallest: str | None = None
+
+    @property
+    def total(self) -> int:
+        """Number of keys counted."""
+        return self.sketch.total
+
+    def add(self, key: str, count: int = 1) -> None:
+        """Count one occurrence (or ``count``) of ``key``."""
+        estimate = self.sketch.add(key, count)
+        candidates = self.candidates
+        if key in candidates:
+            candidates[key] = estimate
+            if key == self._smallest:
+                self._smallest = min(candidates, key=candidates.__getitem__)
+        elif len(candidates) < self.k:
+            candidates[key] = estimate
+            if self._smallest is None or estimate < candidates[self._smallest]:
+                self._smallest = key
+        elif self._smallest is not None and estimate > candidates[self._smallest]:
+            del candidates[self._smallest]
+            candidates[key] = estimate
+            self._smallest = min(candidates, key=candidates.__getitem__)
+
+    def top(self) -> list[tuple[str, int]]:
+        """Tracked keys and their estimates, most frequent first."""
+        return sorted(self.candidates.items(), key=lambda entry: (-entry[1], entry[0]))
+
+
+@dataclass(frozen=True)
+class KeyFrequency:
+    """Estimated frequency of one partition key."""
+
+    key: str
+    count: int
+    share: float
+
+
+@dataclass
+class SkewReport:
+    """Partition key distribution of an input file."""
+
+    partition_key: str
+    total_records: int
+    heavy_hitters: list[KeyFrequency]
+    #: Average estimated WCUs per row (from the first rows of the file)
+    average_item_wcu: float
+    #: Upper bound on any key's overestimate (count-min sketch error)
+    error_bound: int = 0
+
+    @property
+    def top_share(self) -> float:
+        """Share of the rows taken by the most frequent key."""
+        return self.heavy_hitters[0].share if self.heavy_hitters else 0.0
+
+    def key_wcu(self, key: KeyFrequency, load_rate: float) -> float:
+        """WCU/s a key receives when the whole load writes ``load_rate`` rows/s."""
+        return key.share * load_rate * self.average_item_wcu
+
+    def max_load_rate(self, partition_wcu: float = PARTITION_WCU_LIMIT) -> float:
+        """Highest load rate (rows/s) at which no key exceeds ``partition_wcu``."""
+        per_row = self.top_share * self.average_item_wcu
+        return partition_wcu / per_row if per_row else math.inf
+
+    def hot_keys(
+        self, load_rate: float, partition_wcu: float = PARTITION_WCU_LIMIT
+    ) -> list[KeyFrequency]:
+        """Heavy hitters that would exceed ``partition_wcu`` at ``load_rate`` rows/s."""
+        return [k for k in self.heavy_hitters if self.key_wcu(k, load_rate) > partition_wcu]
+
+    def to_dict(
+        self, load_rate: float | None = None, partition_wcu: float = PARTITION_WCU_LIMIT
+    ) -> dict[str, Any]:
+        """Return the report as a JSON-serialisable dictionary.
+
+        Args:
+            load_rate: Optional load rate (rows/s) to estimate per-key WCU/s at
+            partition_wcu: Per-partition write limit
+
+        Returns:
+            Dictionary with the totals, the heavy hitters and, with a
+            ``load_rate``, the WCU/s each of them receives
+        """
+        keys = []
+        for k in self.heavy_hitters:
+            entry: dict[str, Any] = {"key": k.key, "count": k.count, "share": round(k.share, 6)}
+            if load_rate is not None:
+                wcu = self.key_wcu(k, load_rate)
+                entry["wcu_per_second"] = round(wcu, 1)
+                entry["hot"] = wcu > partition_wcu
+            keys.append(entry)
+        max_rate = self.max_load_rate(partition_wcu)
+        return {
+            "partition_key": self.partition_key,
+            "total_records": self.total_records,
+            "average_item_wcu": round(self.average_item_wcu, 3),
+            "error_bound": self.error_bound,
+            "partition_wcu": partition_wcu,
+            "max_load_rate": None if math.isinf(max_rate) else round(max_rate, 1),
+            "load_rate": load_rate,
+            "heavy_hitters": keys,
+        }
+
+
+def analyze_keys(
+    keys: Iterable[str | None],
+    partition_key: str = "id",
+    top_k: int = DEFAULT_TOP_K,
+    width: int = DEFAULT_SKETCH_WIDTH,
+    depth: int = DEFAULT_SKETCH_DEPTH,
+    average_item_wcu: float = 1.0,
+) -> SkewReport:
+    """Build a skew report from a stream of partition key values.
+
+    Args:
+        keys: Partition key of every record (None for records without one,
+              which are counted but not tracked)
+        partition_key: Name of the partition key attribute
+        top_k: Number of heavy hitters to report
+        width: Count-min sketch width
+        depth: Count-min sketch depth
+        average_item_wcu: Average WCUs per record
+
+    Returns:
+        SkewReport for the keys
+    """
+    tracker = HeavyHitters(k=top_k, sketch=CountMinSketch(width=width, depth=depth))
+    total = 0
+    for key in keys:
+        total += 1
+        if key is not None:
+            tracker.add(key)
+    heavy_hitters = [
+        KeyFrequency(key=key, count=count, share=count / total if total else 0.0)
+        for key, count in tracker.top()
+    ]
+    return SkewReport(
+        partition_key=partition_key,
+        total_records=total,
+        heavy_hitters=heavy_hitters,
+        average_item_wcu=average_item_wcu,
+        error_bound=math.ceil(math.e / width * tracker.total),
+    )
+
+
+def analyze_csv(
+    csv_file: str,
+    partition_key: str = "id",
+    top_k: int = DEFAULT_TOP_K,
+    width: int = DEFAULT_SKETCH_WIDTH,
+    depth: int = DEFAULT_SKETCH_DEPTH,
+) -> SkewReport:
+    """Analyze the partition key distribution of a CSV file in one pass.
+
+    Memory use is bounded by the sketch (``width * depth`` counters) and the
+    ``top_k`` candidates, whatever the size of the file.
+
+    Args:
+        csv_file: Path to the CSV file (may be compressed)
+        partition_key: Column holding the partition key
+        top_k: Number of heavy hitters to report
+        width: Count-min sketch width
+        depth: Count-min sketch depth
+
+    Returns:
+        SkewReport for the file
+
+    Raises:
+        ValueError: If the CSV has no ``partition_key`` column
+    """
+    start = time.perf_counter()
+    allow_large_csv_fields()
+    with open_input(csv_file, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        if partition_key not in header:
+            raise ValueError(f"CSV file has no {partition_key!r} column")
+        column = header.index(partition_key)
+        units: list[int] = []
+
+        def keys() -> Iterable[str | None]:
+            for row in reader:
+                if len(units) < _SIZE_SAMPLE_ROWS:
+                    units.append(write_units(dict(zip(header, row, strict=False))))
+                yield row[column] if column < len(row) else None
+
+        report = analyze_keys(keys(), partition_key, top_k, width, depth)
+    report.average_item_wcu = sum(units) / len(units) if units else 1.0
+    logger.info(
+        f"Analyzed {report.total_records:,} rows of {csv_file} in "
+        f"{time.perf_counter() - start:.2f}s; top key share {report.top_share:.2%}"
+    )
+    return report
+
+
+def analyze_records(
+    records: Iterable[Mapping[str, Any]],
+    partition_key: str = "id",
+    top_k: int = DEFAULT_TOP_K,
+    width: int = DEFAULT_SKETCH_WIDTH,
+    depth: int = DEFAULT_SKETCH_DEPTH,
+    item_units: Callable[[dict[str, Any]], int] = write_units,
+) -> SkewReport:
+    """Analyze the partition key distribution of any record stream.
+
+    Args:
+        records: Records from one of the readers in src.readers
+        partition_key: Name of the partition key attribute
+        top_k: Number of heavy hitters to report
+        width: Count-min sketch width
+        depth: Count-min sketch depth
+        item_units: Function estimating an item's WCUs (``wire_write_units``
+                    for typed records)
+
+    Returns:
+        SkewReport for the records
+    """
+    units: list[int] = []
+
+    def keys() -> Iterable[str | None]:
+        for record in records:
+            if len(units) < _SIZE_SAMPLE_ROWS:
+                units.append(item_units(dict(record)))
+            yield key_value(record, partition_key)
+
+    report = analyze_keys(keys(), partition_key, top_k, width, depth)
+    report.average_item_wcu = sum(units) / len(units) if units else 1.0
+    return report
+
+
+class HotKeyPacer:
+    """Per-key write pacing for heavy partition keys.
+
+    Each hot key gets its own token bucket refilling at ``max_key_wcu``. The
+    writer charges the WCUs of a request's hot-key items to their buckets and
+    waits for the longest reservation, so a hot key is written at a steady
+    rate below the partition limit instead of being throttled. Requests
+    without hot keys pass straight through.
+    """
+
+    def __init__(
+        self,
+        hot_keys: Iterable[str],
+        partition_key: str = "id",
+        max_key_wcu: float = DEFAULT_KEY_WCU,
+        context: Any = None,
+    ):
+        """Initialize pacer.
+
+        Args:
+            hot_keys: Partition key values to pace
+            partition_key: Name of the partition key attribute
+            max_key_wcu: WCU/s allowed per hot key
+            context: multiprocessing context; if given, buckets are
+                     SharedTokenBucket so that worker processes share them
+        """
+        if max_key_wcu <= 0:
+            raise ValueError(f"max_key_wcu must be greater than 0, got {max_key_wcu}")
+        self.partition_key = partition_key
+        self.max_key_wcu = max_key_wcu
+        self.buckets: dict[str, TokenBucket] = {}
+        for key in hot_keys:
+            if context is not None:
+                self.buckets[key] = SharedTokenBucket(rate=max_key_wcu, context=context)
+            else:
+                self.buckets[key] = TokenBucket(rate=max_key_wcu)
+
+    @classmethod
+    def from_report(
+        cls,
+        report: SkewReport,
+        max_key_wcu: float = DEFAULT_KEY_WCU,
+        min_share: float = 0.0,
+        context: Any = None,
+    ) -> "HotKeyPacer":
+        """Create a pacer for the heavy hitters of a skew report.
+
+        Pacing a key that never reaches ``max_key_wcu`` costs nothing (its
+        bucket never runs dry), so every heavy hitter is paced by default.
+
+        Args:
+            report: Report from ``analyze_csv``
+            max_key_wcu: WCU/s allowed per hot key
+            min_share: Only pace keys with at least this share of the rows
+            context: multiprocessing context for shared buckets
+
+        Returns:
+            HotKeyPacer for the report's heavy hitters
+        """
+        keys = [k.key for k in report.heavy_hitters if k.share >= min_share]
+        return cls(keys, report.partition_key, max_key_wcu, context)
+
+    def _reserve(self, items: Iterable[tuple[dict[str, Any], float]]) -> float:
+        """Charge hot-key items to their buckets.
+
+        Args:
+            items: (item, WCUs) pairs about to be sent
+
+        Returns:
+            Seconds to wait before sending them
+        """
+        if not self.buckets:
+            return 0.0
+        charges: dict[str, float] = {}
+        for item, units in items:
+            key = key_value(item, self.partition_key)
+            if key in self.buckets:
+                charges[key] = charges.get(key, 0.0) + units
+        wait = 0.0
+        for key, units in charges.items():
+            wait = max(wait, self.buckets[key].reserve(units))
+        return wait
+
+    def acquire_sync(self, items: Iterable[tuple[dict[str, Any], float]]) -> float:
+        """Block until the hot-key items may be sent.
+
+        Args:
+            items: (item, WCUs) pairs about to be sent
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = self._reserve(items)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, items: Iterable[tuple[dict[str, Any], float]]) -> float:
+        """Wait until the hot-key items may be sent without blocking the event loop.
+
+        Args:
+            items: (item, WCUs) pairs about to be sent
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = self._reserve(items)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
@@ -0,0 +1,175 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Table-to-table copy with a parallel scan and the loader's write path.
+
+For small and medium tables starting a Glue job costs more time than the
+copy itself. ``TableCopier`` copies from one process:
+
+1. A parallel segmented Scan (see src.scan) reads the source table.
+2. Items are shuffled within a window, so the segments' partition-by-
+   partition read order does not turn into hot partitions on the
+   destination.
+3. The threaded loader writes them as they are (in wire format, types
+   unchanged), with its concurrency, per-item retries, WCU budget and
+   dead-letter file.
+
+Every stage is bounded: the scan's page queue, the shuffle window and the
+writers' 2 x workers batches in flight. When the writers fall behind, the
+scan threads block instead of reading ahead, so memory stays flat and the
+copy runs at the pace of the slower side.
+
+The source and the destination may be in different regions or accounts
+(``source_session``). The copy is not a snapshot: items changed while it
+runs may be copied before or after the change.
+"""
+
+from typing import Any
+
+import boto3
+
+from src.dedupe import BATCH
+from src.logging_config import get_logger
+from src.models import LoadResult
+from src.rate_limiter import TokenBucket
+from src.retry_handler import RetryHandler
+from src.scan import DEFAULT_SEGMENTS, ParallelScan, scan_client
+from src.schema import PassthroughSchema
+from src.shuffle import DEFAULT_WINDOW_SIZE, WindowShuffle
+from src.telemetry import LoadTelemetry
+from src.threaded_loader import ThreadedDynamoDBLoader
+
+logger = get_logger(__name__)
+
+
+class TableCopier:
+    """Copies every item of one table into another."""
+
+    def __init__(
+        self,
+        source_table: str,
+        destination_table: str,
+        region: str = "us-east-1",
+        source_region: str | None = None,
+        segments: int = DEFAULT_SEGMENTS,
+        window_size: int = DEFAULT_WINDOW_SIZE,
+        max_workers: int | None = None,
+        max_retries: int = 3,
+        adaptive_concurrency: bool = False,
+        max_concurrency: int | None = None,
+        max_wcu: float | None = None,
+        target_utilization: float = 1.0,
+        max_rcu: float | None = None,
+        page_size: int | None = None,
+        dead_letter_file: str | None = None,
+        session: Any = None,
+        source_session: Any = None,
+        telemetry: LoadTelemetry | None = None,
+    ):
+        """Initialize table copier.
+
+        Args:
+            source_table: Table to read
+            destination_table: Table to write (must exist, with the same key schema)
+            region: AWS region of the destination
+            source_region: AWS region of the source (default: region)
+            segments: Parallel scan segments (reader threads)
+            window_size: Items held by the shuffle window
+            max_workers: Concurrent write batches (default: CPU count)
+            max_retries: Maximum retry attempts per request and per item
+            adaptive_concurrency: Grow and shrink the number of in-flight
+                        batches with throttling (AIMD)
+            max_concurrency: Ceiling for adaptive concurrency
+            max_wcu: Optional write capacity (WCU/s) the copy may consume
+            target_utilization: Fraction of max_wcu to consume (0-1]
+            max_rcu: Optional read capacity (RCU/s) the scan may consume
+            page_size: Maximum items per Scan call
+            dead_letter_file: Optional file receiving the items that could
+                        not be written (see src.dead_letter); replay it into
+                        the destination with dead_letters.py
+            session: boto3 Session (or a stand-in such as
+                        src.local_dynamodb.LocalSession) for the destination.
+                        A new Session is created if None.
+            source_session: Session for the source (default: session, or a
+                        new Session in source_region)
+            telemetry: Optional LoadTelemetry fed with every write request
+        """
+        if max_rcu is not None and max_rcu <= 0:
+            raise ValueError(f"max_rcu must be greater than 0, got {max_rcu}")
+        same_table = source_table == destination_table and (source_region or region) == region
+        if same_table and source_session is None:
+            raise ValueError("source and destination are the same table")
+        self.source_table = source_table
+        self.destination_table = destination_table
+        self.region = region
+        self.source_region = source_region or region
+        self.segments = segments
+        self.max_retries = max_retries
+        self.max_rcu = max_rcu
+        self.page_size = page_size
+        self.session = session
+        self.source_session = source_session
+        self.telemetry = telemetry
+        # Scanned items are in wire format and are written as they are
+        self.loader = ThreadedDynamoDBLoader(
+            table_name=destination_table,
+            region=region,
+            max_workers=max_workers,
+            max_retries=max_retries,
+            shuffle=WindowShuffle(window_size=window_size),
+            adaptive_concurrency=adaptive_concurrency,
+            max_concurrency=max_concurrency,
+            max_wcu=max_wcu,
+            target_utilization=target_utilization,
+            schema=PassthroughSchema(),
+            session=session,
+            telemetry=telemetry,
+            dead_letter_file=dead_letter_file,
+            dedupe=BATCH,
+        )
+        # Scan of the last run, for its page and RCU counters
+        self.scan: ParallelScan | None = None
+
+    def copy(self) -> LoadResult:
+        """Copy every item of the source table into the destination.
+
+        Returns:
+            LoadResult in which total_records counts the items read and
+            successful_writes the items written
+        """
+        session = self.session or boto3.Session(region_name=self.region)
+        source_session = self.source_session
+        if source_session is None:
+            if self.source_region == self.region:
+                source_session = session
+            else:
+                source_session = boto3.Session(region_name=self.source_region)
+        self.loader.session = session
+
+        client = scan_client(source_session, self.segments)
+        if self.telemetry is not None and self.telemetry.total_records is None:
+            description = client.describe_table(TableName=self.source_table)
+            # Refreshed by DynamoDB about every six hours: good enough for an ETA
+            self.telemetry.total_records = description["Table"].get("ItemCount")
+        logger.info(f"Copying {self.source_table} into {self.destination_table}")
+
+        self.scan = ParallelScan(
+            client,
+            self.source_table,
+            segments=self.segments,
+            page_size=self.page_size,
+            rate_limiter=TokenBucket(rate=self.max_rcu) if self.max_rcu else None,
+            retry_handler=RetryHandler(max_retries=max(self.max_retries, 5)),
+        )
+        with self.scan:
+            return self.loader.write_stream(self.scan)
@@ -0,0 +1,401 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Live load telemetry: latency percentiles, errors, throttling and capacity.
+
+A ``LoadTelemetry`` is handed to a loader (and from there to its
+``BatchWriteItemWriter``), which reports every BatchWriteItem call:
+
+- request latency, kept in a log-bucketed histogram for p50/p95/p99
+- errors and unprocessed items by code (whether or not they were retried),
+  and throttle events
+- WCU consumed, from ``ReturnConsumedCapacity=TOTAL``
+- items written and given up on, for rolling throughput and an ETA
+
+Reading a snapshot while the load runs tells whether it is capacity-bound
+(throttles, consumed WCU at the table's limit), client-bound (low latency
+but low throughput) or limited by request latency. ``ProgressReporter``
+prints a status line from a background thread, and snapshots can be
+exported as JSON or Prometheus text.
+"""
+
+import json
+import math
+import sys
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Callable
+from typing import Any, TextIO
+
+from src.compression import estimate_uncompressed_size, open_decompressed
+from src.error_handler import error_code, is_throttling_error
+
+# Relative width of histogram buckets (percentiles are accurate to about 5%)
+_BUCKET_GROWTH = 1.05
+# Latencies below this are counted in the first bucket
+_MIN_LATENCY = 1e-4
+
+# Rows sampled by estimate_csv_rows
+_SAMPLE_ROWS = 1000
+
+
+class LatencyHistogram:
+    """Histogram of request latencies with logarithmic buckets."""
+
+    def __init__(self) -> None:
+        self.buckets: dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Add one latency observation."""
+        index = 0
+        if seconds > _MIN_LATENCY:
+            index = math.ceil(math.log(seconds / _MIN_LATENCY, _BUCKET_GROWTH))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Latency below which a fraction ``q`` of observations fall.
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            Upper bound of the bucket holding the quantile (0.0 if empty)
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(_MIN_LATENCY * _BUCKET_GROWTH**index, self.max)
+        return self.max
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add the observations of another histogram."""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+
+class LoadTelemetry:
+    """Thread-safe counters for one load."""
+
+    def __init__(
+        self,
+        total_records: int | None = None,
+        window: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize telemetry.
+
+        Args:
+            total_records: Expected number of records, used for the ETA
+                        (may be an estimate, see ``estimate_csv_rows``)
+            window: Seconds of history used for the rolling throughput
+            clock: Monotonic clock (injectable for tests)
+        """
+        self.total_records = total_records
+        self.window = window
+        self.clock = clock
+        self.started = clock()
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.items_written = 0
+        self.items_failed = 0
+        self.throttle_events = 0
+        self.consumed_wcu = 0.0
+        self.errors_by_code: Counter[str] = Counter()
+        # (time, items written) per request inside the rolling window
+        self._recent: deque[tuple[float, int]] = deque()
+        self._lock = threading.Lock()
+
+    def record_response(self, seconds: float, sent: int, response: dict[str, Any]) -> None:
+        """Record a BatchWriteItem call that returned a response.
+
+        Args:
+            seconds: Request latency
+            sent: Number of requests in the call
+            response: BatchWriteItem response
+        """
+        unprocessed = sum(len(v) for v in response.get("UnprocessedItems", {}).values())
+        consumed = sum(c.get("CapacityUnits", 0.0) for c in response.get("ConsumedCapacity", []))
+        written = sent - unprocessed
+        with self._lock:
+            now = self.clock()
+            self.requests += 1
+            self.latency.record(seconds)
+            self.items_written += written
+            self.consumed_wcu += consumed
+            if unprocessed:
+                self.throttle_events += 1
+                self.errors_by_code["UnprocessedItems"] += unprocessed
+            self._recent.append((now, written))
+            self._trim(now)
+
+    def record_error(self, seconds: float, error: Exception) -> None:
+        """Record a BatchWriteItem call that raised.
+
+        Args:
+            seconds: Time until the call failed
+            error: Exception raised by the client
+        """
+        with self._lock:
+            self.requests += 1
+            self.latency.record(seconds)
+            self.errors_by_code[error_code(error)] += 1
+            if is_throttling_error(error):
+                self.throttle_events += 1
+
+    def record_failed(self, count: int) -> None:
+        """Record items that were given up on."""
+        with self._lock:
+            self.items_failed += count
+
+    def throughput(self) -> float:
+        """Items written per second over the rolling window."""
+        with self._lock:
+            now = self.clock()
+            self._trim(now)
+            if not self._recent:
+                return 0.0
+            span = min(self.window, now - self.started)
+            return sum(items for _, items in self._recent) / span if span > 0 else 0.0
+
+    def eta(self) -> float | None:
+        """Estimated seconds until ``total_records`` are done, if known."""
+        if self.total_records is None:
+            return None
+        remaining = self.total_records - self.items_written - self.items_failed
+        if remaining <= 0:
+            return 0.0
+        rate = self.throughput()
+        return remaining / rate if rate > 0 else None
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return the current counters as a JSON-serialisable dictionary."""
+        throughput = self.throughput()
+        eta = self.eta()
+        with self._lock:
+            elapsed = self.clock() - self.started
+            return {
+                "elapsed_seconds": round(elapsed, 3),
+                "total_records": self.total_records,
+                "items_written": self.items_written,
+                "items_failed": self.items_failed,
+                "requests": self.requests,
+                "throttle_events": self.throttle_events,
+                "errors_by_code": dict(self.errors_by_code),
+                "consumed_wcu": round(self.consumed_wcu, 3),
+                "latency_seconds": {
+                    "p50": round(self.latency.percentile(0.50), 6),
+                    "p95": round(self.latency.percentile(0.95), 6),
+                    "p99": round(self.latency.percentile(0.99), 6),
+                    "max": round(self.latency.max, 6),
+                    "mean": (
+                        round(self.latency.total / self.latency.count, 6)
+                        if self.latency.count
+                        else 0.0
+                    ),
+                },
+                "throughput_items_per_second": round(throughput, 1),
+                "average_items_per_second": (
+                    round(self.items_written / elapsed, 1) if elapsed > 0 else 0.0
+                ),
+                "eta_seconds": None if eta is None else round(eta, 1),
+            }
+
+    def to_json(self) -> str:
+        """Snapshot as a JSON document."""
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix: str = "dynamodb_loader") -> str:
+        """Snapshot in the Prometheus text exposition format.
+
+        Args:
+            prefix: Metric name prefix
+
+        Returns:
+            Metrics text, e.g. for the node_exporter textfile collector
+        """
+        s = self.snapshot()
+        lines: list[str] = []
+
+        def metric(name: str, kind: str, help_text: str, samples: list[tuple[str, Any]]) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{prefix}_{name}{labels} {value}")
+
+        metric("requests_total", "counter", "BatchWriteItem calls", [("", s["requests"])])
+        metric("items_written_total", "counter", "Items written", [("", s["items_written"])])
+        metric("items_failed_total", "counter", "Items given up on", [("", s["items_failed"])])
+        metric(
+            "throttle_events_total",
+            "counter",
+            "Throttling errors and responses with UnprocessedItems",
+            [("", s["throttle_events"])],
+        )
+        metric(
+            "errors_total",
+            "counter",
+            "Errors and unprocessed items by code",
+            [(f'{{code="{code}"}}', count) for code, count in sorted(s["errors_by_code"].items())],
+        )
+        metric(
+            "consumed_wcu_total",
+            "counter",
+            "Write capacity units reported by ReturnConsumedCapacity",
+            [("", s["consumed_wcu"])],
+        )
+        latency = s["latency_seconds"]
+        with self._lock:
+            latency_sum, latency_count = self.latency.total, self.latency.count
+        metric(
+            "request_latency_seconds",
+            "summary",
+            "BatchWriteItem request latency",
+            [
+                ('{quantile="0.5"}', latency["p50"]),
+                ('{quantile="0.95"}', latency["p95"]),
+                ('{quantile="0.99"}', latency["p99"]),
+            ],
+        )
+        lines.append(f"{prefix}_request_latency_seconds_sum {latency_sum:.6f}")
+        lines.append(f"{prefix}_request_latency_seconds_count {latency_count}")
+        metric(
+            "throughput_items_per_second",
+            "gauge",
+            f"Items written per second over the last {self.window:g}s",
+            [("", s["throughput_items_per_second"])],
+        )
+        if s["eta_seconds"] is not None:
+            metric("eta_seconds", "gauge", "Estimated seconds remaining", [("", s["eta_seconds"])])
+        return "\n".join(lines) + "\n"
+
+    def format_progress(self) -> str:
+        """One-line human-readable status."""
+        s = self.snapshot()
+        done = s["items_written"] + s["items_failed"]
+        total = f" / ~{s['total_records']:,}" if s["total_records"] else ""
+        eta = s["eta_seconds"]
+        latency = s["latency_seconds"]
+        return (
+            f"{done:,}{total} items | {s['throughput_items_per_second']:,.0f} items/s | "
+            f"p50 {latency['p50'] * 1000:.0f}ms p99 {latency['p99'] * 1000:.0f}ms | "
+            f"throttles {s['throttle_events']:,} | WCU {s['consumed_wcu']:,.0f} | "
+            f"ETA {'-' if eta is None else _format_seconds(eta)}"
+        )
+
+    def _trim(self, now: float) -> None:
+        """Drop window entries older than ``window`` (caller holds the lock)."""
+        while self._recent and now - self._recent[0][0] > self.window:
+            self._recent.popleft()
+
+
+def _format_seconds(seconds: float) -> str:
+    """Format seconds as H:MM:SS."""
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}"
+
+
+def estimate_csv_rows(csv_file: str, sample_rows: int = _SAMPLE_ROWS, header: bool = True) -> int:
+    """Estimate the number of data rows in a CSV file from its size.
+
+    Counting lines of a multi-gigabyte file takes longer than an ETA is worth,
+    so the average length of the first rows is extrapolated instead. For a
+    compressed file the uncompressed size is estimated from a sample.
+
+    Args:
+        csv_file: Path to the CSV file (or any file with one record per line)
+        sample_rows: Rows to sample
+        header: Whether the first line is a header (False for JSON Lines)
+
+    Returns:
+        Estimated number of rows, excluding the header
+    """
+    size = estimate_uncompressed_size(csv_file)
+    with open_decompressed(csv_file) as f:
+        header_length = len(f.readline()) if header else 0
+        lengths = [len(line) for _, line in zip(range(sample_rows), f, strict=False)]
+    if not lengths:
+        return 0
+    if len(lengths) < sample_rows:
+        return len(lengths)
+    return round((size - header_length) / (sum(lengths) / len(lengths)))
+
+
+class ProgressReporter:
+    """Background thread that prints a telemetry status line periodically."""
+
+    def __init__(
+        self, telemetry: LoadTelemetry, interval: float = 1.0, stream: TextIO | None = None
+    ):
+        """Initialize reporter.
+
+        Args:
+            telemetry: Telemetry to report
+            interval: Seconds between updates
+            stream: Output stream (default: stderr). On a terminal the line is
+                    redrawn in place, otherwise one line is written per update.
+        """
+        self.telemetry = telemetry
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> "ProgressReporter":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Start printing updates."""
+        self._thread = threading.Thread(target=self._run, name="progress", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Print a final update and stop."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._print()
+        if self.stream.isatty():
+            self.stream.write("\n")
+        self.stream.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._print()
+
+    def _print(self) -> None:
+        line = self.telemetry.format_progress()
+        if self.stream.isatty():
+            self.stream.write(f"\r\033[K{line}")
+        else:
+            self.stream.write(f"{line}\n")
+        self.stream.flush()
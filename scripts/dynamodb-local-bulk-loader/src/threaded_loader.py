@@ -13,21 +13,41 @@
 #
 """Multi-threaded Python implementation for loading CSV data into DynamoDB."""
 
-import csv
 import os
-import random
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections.abc import Iterable, Mapping, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from typing import Any
 
 import boto3
 from botocore.config import Config
-from botocore.exceptions import ClientError
 
+from src.autotune import TuningProfiles
+from src.batch_write import (
+    DELETE,
+    OPERATIONS,
+    PUT,
+    BatchWriteItemWriter,
+    RequestBuilder,
+    delete_requests,
+    put_requests,
+)
+from src.checkpoint import CheckpointJournal, pop_row_ids, written_row_ids
+from src.concurrency import AIMDController, ThreadAdaptiveLimiter
+from src.dead_letter import DeadLetterFile, outcome_dead_letters
+from src.dedupe import BATCH, DEDUPE_MODES, FILE, key_attributes_from
+from src.item_size import MAX_REQUEST_BYTES, wire_write_units, write_units
+from src.loader_base import BaseLoader
 from src.logging_config import get_logger
 from src.models import BatchResult, LoaderConfig, LoadResult
-from src.retry_handler import RetryHandler
+from src.rate_limiter import TokenBucket
+from src.readers import RecordReader, get_reader, materialize
+from src.retry_handler import DEFAULT_BREAKER_THRESHOLD
+from src.schema import INFER_SCHEMA, ItemSchema
+from src.shuffle import FullShuffle, ShuffleStrategy
+from src.skew import HotKeyPacer
+from src.telemetry import LoadTelemetry
 
 logger = get_logger(__name__)
 
@@ -36,9 +56,11 @@ logger = get_logger(__name__)
 DEFAULT_WORKERS = os.cpu_count() or 10  # Fallback to 10 if detection fails
 
 
-class ThreadedDynamoDBLoader:
+class ThreadedDynamoDBLoader(BaseLoader):
     """Multi-threaded loader for CSV data into DynamoDB using boto3."""
 
+    tuning_name = "threaded"
+
     def __init__(
         self,
         table_name: str,
@@ -46,6 +68,29 @@ class ThreadedDynamoDBLoader:
         max_workers: int | None = None,
         batch_size: int = 25,
         max_retries: int = 3,
+        shuffle: ShuffleStrategy | None = None,
+        adaptive_concurrency: bool = False,
+        max_concurrency: int | None = None,
+        max_wcu: float | None = None,
+        target_utilization: float = 1.0,
+        rate_limiter: TokenBucket | None = None,
+        checkpoint_file: str | None = None,
+        resume: bool = False,
+        schema: ItemSchema | str | None = None,
+        session: Any = None,
+        telemetry: LoadTelemetry | None = None,
+        hot_key_pacer: HotKeyPacer | None = None,
+        reader: RecordReader | str | None = None,
+        dead_letter_file: str | None = None,
+        dedupe: str | None = BATCH,
+        key_attributes: Sequence[str] | None = None,
+        max_request_bytes: int = MAX_REQUEST_BYTES,
+        max_request_wcu: int | None = None,
+        auto_tune: bool = False,
+        tuning_profiles: TuningProfiles | None = None,
+        retry_jitter: str = "additive",
+        retry_budget: float | None = None,
+        breaker_threshold: int | None = DEFAULT_BREAKER_THRESHOLD,
     ):
         """Initialize threaded loader with configuration.
 
@@ -57,35 +102,176 @@ class ThreadedDynamoDBLoader:
                         Threaded loader benefits from matching CPU core count.
             batch_size: Number of records per batch
             max_retries: Maximum retry attempts for failed operations
+            shuffle: Strategy used to reorder records before batching.
+                        If None, uses FullShuffle (whole file in memory). Streaming
+                        strategies such as WindowShuffle keep memory bounded, and
+                        IndexShuffle shuffles a CSV file as a whole while holding
+                        only an index of row offsets.
+            adaptive_concurrency: If True, max_workers is only the starting point.
+                        In-flight batches grow while writes succeed and are cut
+                        when DynamoDB throttles (AIMD), up to max_concurrency.
+            max_concurrency: Ceiling for adaptive concurrency (and the thread
+                        pool size in that mode). Defaults to max(64, max_workers).
+            max_wcu: Optional write capacity (WCU/s) available to the load.
+                        Every request is charged its estimated WCUs (item size
+                        rounded up per 1KB) against a token bucket.
+            target_utilization: Fraction of max_wcu to consume (0-1], leaving
+                        the rest for other traffic on the table.
+            rate_limiter: Token bucket to charge instead of creating one from
+                        max_wcu. Share one bucket between loaders to give them
+                        a common budget.
+            checkpoint_file: Optional journal of written rows, appended while
+                        the load runs (see src.checkpoint).
+            resume: If True, skip the rows already recorded in checkpoint_file.
+            schema: Column types for the wire-format fast path: an ItemSchema,
+                        or "infer" to infer one from the first rows of the CSV.
+                        Items are then serialized once and sent through a
+                        low-level client, and numeric columns are stored as N.
+                        If None, items go through the resource API as strings.
+            session: boto3 Session (or a compatible stand-in such as
+                        src.local_dynamodb.LocalSession) used to create the
+                        resource and clients. A new Session is created if None.
+            telemetry: Optional LoadTelemetry fed with every request's latency,
+                        retries, throttling and consumed capacity (see src.telemetry)
+            hot_key_pacer: Optional HotKeyPacer that holds writes to heavy
+                        partition keys below the per-partition limit
+                        (see src.skew.analyze_csv)
+            reader: Input reader (see src.readers), or its name: "csv",
+                        "jsonl", "dynamodb-json" or "parquet". If None, the
+                        reader is picked from the file extension.
+            dead_letter_file: Optional file that receives the items the load
+                        gave up on, with their error code and attempt count
+                        (see src.dead_letter). It is valid DynamoDB JSON
+                        input, so the failed items can be replayed.
+            dedupe: How duplicate primary keys are removed before they reach
+                        BatchWriteItem, which rejects a request containing the
+                        same key twice (see src.dedupe): "batch" coalesces
+                        duplicates within each batch, "file" also keeps only
+                        the last row of every key across the whole file
+                        (last write wins), None sends rows as they are.
+            key_attributes: Primary key attribute names. If None, they are
+                        read with DescribeTable when dedupe is enabled.
+            max_request_bytes: Item payload per BatchWriteItem request; batches
+                        are closed before they exceed it (see src.batch_packer).
+                        Lower it to even out request latency for large items.
+            max_request_wcu: Optional write capacity units per request, so
+                        batches of large items do not drain the write budget
+                        in bursts.
+            auto_tune: If True, the first seconds of each load probe
+                        concurrency levels from max_workers up to
+                        max_concurrency and lock in the fastest one that is
+                        not throttled (see src.autotune). Replaces
+                        adaptive_concurrency.
+            tuning_profiles: Optional store of tuned levels. With auto_tune,
+                        a load starts at the level saved for its table and
+                        host instead of probing, and saves the level it finds.
+            retry_jitter: Backoff jitter strategy: "additive", "full" or
+                        "decorrelated" (see RetryHandler.calculate_delay).
+            retry_budget: Retries allowed per first request (e.g. 0.2), shared
+                        by all workers, so a throttling storm is not amplified
+                        by retries. Items still unprocessed once it is spent
+                        fail. None (the default) or 0 disables the budget.
+            breaker_threshold: Consecutive permanent errors (missing table,
+                        invalid items, ...) after which batches fail without
+                        calling DynamoDB. None or 0 disables the breaker.
         """
         # Auto-detect optimal worker count if not specified
         if max_workers is None:
             max_workers = DEFAULT_WORKERS
             logger.info(f"Auto-detected {max_workers} CPU cores, using {max_workers} workers")
 
+        if auto_tune and adaptive_concurrency:
+            raise ValueError("auto_tune and adaptive_concurrency cannot be combined")
         self.config = LoaderConfig(
             table_name=table_name,
             region=region,
             max_workers=max_workers,
             batch_size=batch_size,
             max_retries=max_retries,
+            adaptive_concurrency=adaptive_concurrency or auto_tune,
+            max_concurrency=max_concurrency,
+            max_wcu=max_wcu,
+            target_utilization=target_utilization,
+            max_request_bytes=max_request_bytes,
+            max_request_wcu=max_request_wcu,
+            retry_jitter=retry_jitter,
+            retry_budget=retry_budget,
+            breaker_threshold=breaker_threshold,
         )
         # Validate configuration on initialization
         self.config.validate()
 
-        self.retry_handler = RetryHandler(
-            max_retries=max_retries,
-            base_delay=self.config.base_delay,
-            max_delay=self.config.max_delay,
-        )
+        # Classifies errors and holds the retry budget and breaker of all workers
+        self.retry_handler = self.config.create_retry_handler()
+
+        self.shuffle_strategy = shuffle if shuffle is not None else FullShuffle()
+
+        # Controller for the current load when adaptive concurrency is enabled
+        self.concurrency_controller: AIMDController | None = None
+        self.auto_tune = auto_tune
+        self.tuning_profiles = tuning_profiles
+
+        if resume and not checkpoint_file:
+            raise ValueError("resume requires a checkpoint_file")
+        self.checkpoint_file = checkpoint_file
+        self.resume = resume
+        # Journal for the current load when checkpointing is enabled
+        self.journal: CheckpointJournal | None = None
+        self.dead_letter_file = dead_letter_file
+        # Dead-letter file for the current load
+        self.dead_letters: DeadLetterFile | None = None
+
+        if dedupe is not None and dedupe not in DEDUPE_MODES:
+            raise ValueError(f"dedupe must be one of {DEDUPE_MODES} or None, got {dedupe!r}")
+        if dedupe == FILE and self.shuffle_strategy.reads_files:
+            raise ValueError(
+                f"dedupe={FILE!r} reads rows in file order; "
+                f"{type(self.shuffle_strategy).__name__} does not"
+            )
+        self.dedupe = dedupe
+        self.key_attributes = tuple(key_attributes) if key_attributes else None
+        # Duplicate rows dropped, and rows over the item size limit, in the current load
+        self.duplicates = 0
+        self.oversized = 0
+
+        if isinstance(schema, str) and schema != INFER_SCHEMA:
+            raise ValueError(f"schema must be an ItemSchema or {INFER_SCHEMA!r}, got {schema!r}")
+        self.schema = schema
+        # Resolved schema and low-level client for the current load (fast path)
+        self.item_schema: ItemSchema | None = schema if isinstance(schema, ItemSchema) else None
+        self.wire_client: Any = None
+        self.session = session
+        self.reader = get_reader(reader) if isinstance(reader, str) else reader
+        # Wraps each batch in PutRequest or DeleteRequest entries
+        self._requests: RequestBuilder = put_requests
 
         # Thread-safe lock for shared resource access
         self._lock = threading.Lock()
 
+        # WCU budget shared by every worker of this loader
+        budget = self.config.write_budget()
+        if rate_limiter is None and budget is not None:
+            rate_limiter = TokenBucket(rate=budget)
+            logger.info(f"Limiting writes to {budget:,.0f} WCU/s")
+        self.rate_limiter = rate_limiter
+
+        # Low-level writer: resubmits only UnprocessedItems, never whole batches
+        self.item_writer = BatchWriteItemWriter(
+            table_name=table_name,
+            retry_handler=self.retry_handler,
+            max_retries=max_retries,
+            on_throttle=self._on_throttle,
+            rate_limiter=rate_limiter,
+            telemetry=telemetry,
+            key_pacer=hot_key_pacer,
+        )
+        self.telemetry = telemetry
+        self.hot_key_pacer = hot_key_pacer
+
         # Configure boto3 with optimized connection pool
         # Connection pool size should match or exceed worker count to prevent bottlenecks
         self.boto_config = Config(
-            max_pool_connections=max_workers + 5,  # Add buffer for overhead
+            max_pool_connections=self._concurrency_slots() + 5,  # Add buffer for overhead
             retries={"max_attempts": 0},  # Disable boto3 retries (we handle our own)
         )
 
@@ -93,145 +279,292 @@ class ThreadedDynamoDBLoader:
         """Load CSV file into DynamoDB with shuffling and parallel processing.
 
         This method:
-        1. Reads all records from the CSV file
+        1. Streams records from the CSV file
         2. Shuffles the records to prevent hot partitions
         3. Splits records into batches
         4. Processes batches concurrently using thread pool
         5. Returns statistics about the load operation
 
+        Batches are submitted to the pool as they are produced, with at most
+        2 * max_workers batches in flight. With a streaming shuffle strategy
+        the file is never held in memory as a whole.
+
+        With a checkpoint_file, the rows that were written are journaled, and
+        ``resume=True`` skips the rows a previous run already wrote. With a
+        dead_letter_file, items that could not be written are saved there
+        instead of being dropped.
+
+        Args:
+            csv_file: Path to the CSV file
+
+        Returns:
+            LoadResult with operation statistics
+        """
+        self.item_schema = self._resolve_schema(csv_file)
+        self.journal = self._open_journal(csv_file)
+        self.dead_letters = self._open_dead_letters()
+        try:
+            result = self._load_csv_pooled(csv_file)
+        finally:
+            if self.journal is not None:
+                self.journal.close()
+            if self.dead_letters is not None:
+                self.dead_letters.close()
+        if self.journal is not None:
+            result.skipped_records = self.journal.skipped
+        if self.dead_letters is not None:
+            result.dead_lettered = self.dead_letters.count
+        return result
+
+    def write_stream(self, records: Iterable[dict[str, Any]], operation: str = PUT) -> LoadResult:
+        """Write a stream of records, or delete a stream of keys, through the pool.
+
+        Used by the table tools (see src.bulk_delete) to reuse the batching,
+        concurrency, retry and rate-limiting machinery for records that do
+        not come from a file. Records are sent as they are: in wire format
+        when the schema is a PassthroughSchema (as for Scan output), as
+        Python values through the resource API when no schema is set. No
+        checkpoint journal is kept.
+
+        Args:
+            records: Records to write, or primary keys to delete
+            operation: "put" or "delete". Deleted keys are never
+                       dead-lettered: replaying a key-only item would write
+                       it back, so failed deletes are recovered by running
+                       the delete again.
+
+        Returns:
+            LoadResult with operation statistics
+        """
+        if operation not in OPERATIONS:
+            raise ValueError(f"operation must be one of {OPERATIONS}, got {operation!r}")
+        if self.schema == INFER_SCHEMA:
+            raise ValueError(f"schema={INFER_SCHEMA!r} needs an input file; pass an ItemSchema")
+        self.item_schema = self.schema if isinstance(self.schema, ItemSchema) else None
+        self.journal = None
+        self.dead_letters = self._open_dead_letters() if operation == PUT else None
+        self._requests = delete_requests if operation == DELETE else put_requests
+        try:
+            result = self._load_pooled(records)
+        finally:
+            self._requests = put_requests
+            if self.dead_letters is not None:
+                self.dead_letters.close()
+        if self.dead_letters is not None:
+            result.dead_lettered = self.dead_letters.count
+        return result
+
+    def _load_csv_pooled(self, csv_file: str) -> LoadResult:
+        """Stream CSV batches through the thread pool.
+
         Args:
             csv_file: Path to the CSV file
 
         Returns:
             LoadResult with operation statistics
         """
-        start_time = time.time()
         logger.info(f"Starting CSV load from {csv_file}")
+        # The reader is a generator: nothing is read before the key attributes are resolved
+        return self._load_pooled(
+            self._iter_csv(csv_file), shuffled=self.shuffle_strategy.reads_files
+        )
 
-        # Read CSV file into memory
-        # Note: For very large files (>1M records), consider streaming or using Spark loader
-        records = self._read_csv(csv_file)
-        total_records = len(records)
-        logger.info(f"Read {total_records} records from CSV")
+    def _load_pooled(
+        self, records: Iterable[Mapping[str, Any]], shuffled: bool = False
+    ) -> LoadResult:
+        """Stream batches of records through the thread pool.
 
-        if total_records == 0:
-            logger.warning("No records to load")
-            return LoadResult(
-                total_records=0,
-                successful_writes=0,
-                failed_writes=0,
-                duration_seconds=time.time() - start_time,
-                errors=[],
-            )
+        Args:
+            records: Records in load order
+            shuffled: True if the records were already shuffled while the file
+                      was read (IndexShuffle)
+
+        Returns:
+            LoadResult with operation statistics
+        """
+        start_time = time.time()
+
+        # Create boto3 session and DynamoDB resource with optimized config
+        # Each thread will get its own client from the resource
+        # boto3 handles thread-safe connection pooling internally
+        session = self.session or boto3.Session(region_name=self.config.region)
+        self.duplicates = self.oversized = 0
+        self._resolve_key_attributes(session)
 
         # CRITICAL: Shuffle records to prevent hot partitions
         # Without shuffling, sequential writes to sorted data (e.g., by timestamp)
         # would target the same partition key range, causing throttling.
         # Shuffling distributes writes randomly across all partitions.
-        logger.info("Shuffling records to prevent hot partitions")
-        random.shuffle(records)
+        logger.info(
+            f"Shuffling records to prevent hot partitions ({type(self.shuffle_strategy).__name__})"
+        )
+        if not shuffled:
+            records = self.shuffle_strategy.shuffle(records)
 
         # Split into batches of configured size (max 25 for DynamoDB BatchWriteItem)
-        batches = self._create_batches(records)
-        logger.info(f"Created {len(batches)} batches of size {self.config.batch_size}")
+        batches = self._iter_batches(records)
+        first_batch = next(batches, None)
 
-        # Process batches concurrently with thread pool
-        successful_writes = 0
-        failed_writes = 0
-        errors = []
+        if first_batch is None:
+            logger.warning("No records to load")
+            empty = LoadResult(
+                total_records=0,
+                successful_writes=0,
+                failed_writes=0,
+                duration_seconds=time.time() - start_time,
+                errors=[],
+            )
+            self._count_dropped(empty)
+            return empty
+
+        result = LoadResult(
+            total_records=0,
+            successful_writes=0,
+            failed_writes=0,
+            duration_seconds=0.0,
+        )
 
-        # Create boto3 session and DynamoDB resource with optimized config
-        # Each thread will get its own client from the resource
-        # boto3 handles thread-safe connection pooling internally
-        session = boto3.Session(region_name=self.config.region)
         dynamodb = session.resource("dynamodb", config=self.boto_config)
         table = dynamodb.Table(self.config.table_name)
+        self.wire_client = self._create_wire_client(session)
 
         # ThreadPoolExecutor manages a pool of worker threads
         # max_workers limits concurrent operations to prevent overwhelming DynamoDB
         # Context manager ensures proper thread cleanup on completion
-        with ThreadPoolExecutor(max_workers=self.config.max_workers) as executor:
-            # Submit all batch write tasks to the thread pool
-            # Each task runs independently in its own thread
-            future_to_batch = {
-                executor.submit(self._write_batch, table, i, batch): (i, batch)
-                for i, batch in enumerate(batches)
-            }
-
-            # Collect results as they complete (not necessarily in submission order)
-            # This allows processing results immediately without waiting for all tasks
-            for future in as_completed(future_to_batch):
-                batch_id, batch = future_to_batch[future]
-                try:
-                    result = future.result()
-                    if result.successful:
-                        successful_writes += result.items_count
-                    else:
-                        failed_writes += result.items_count
-                        if result.error:
-                            errors.append(result.error)
-                except Exception as e:
-                    # Handle exceptions from thread execution
-                    # This catches errors not handled within _write_batch
-                    error_msg = f"Batch {batch_id} failed with exception: {e}"
-                    logger.error(error_msg)
-                    errors.append(error_msg)
-                    failed_writes += len(batch)
-
-        duration = time.time() - start_time
+        # With adaptive concurrency the pool is sized for the ceiling and an
+        # AIMD limiter decides how many of those threads may write at once
+        slots = self._concurrency_slots()
+        limiter = self._create_limiter()
+        max_in_flight = slots * 2
+        with ThreadPoolExecutor(max_workers=slots) as executor:
+            in_flight: dict[Future[BatchResult], tuple[int, list[dict[str, Any]]]] = {}
+
+            def collect(done: Iterable[Future[BatchResult]]) -> None:
+                """Fold finished futures into the result."""
+                for future in done:
+                    batch_id, batch = in_flight.pop(future)
+                    try:
+                        result.add_batch_result(future.result())
+                    except Exception as e:
+                        # Handle exceptions from thread execution
+                        # This catches errors not handled within _write_batch
+                        error_msg = f"Batch {batch_id} failed with exception: {e}"
+                        logger.error(error_msg)
+                        result.errors.append(error_msg)
+                        result.failed_writes += len(batch)
+                        self._dead_letter_batch(batch_id, batch, e)
+
+            batch_id = 0
+            batch: list[dict[str, Any]] | None = first_batch
+            while batch is not None:
+                result.total_records += len(batch)
+                if limiter is None:
+                    future = executor.submit(self._write_batch, table, batch_id, batch)
+                else:
+                    future = executor.submit(
+                        self._write_batch_limited, limiter, table, batch_id, batch
+                    )
+                in_flight[future] = (batch_id, batch)
+                # Bound the number of queued batches so reading never outruns writing
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+                batch_id += 1
+                batch = next(batches, None)
+
+            collect(list(in_flight))
+
+        logger.info(f"Processed {batch_id} batches of size {self.config.batch_size}")
+
+        result.duration_seconds = time.time() - start_time
+        self._count_dropped(result)
+        if self.concurrency_controller is not None:
+            logger.info(f"Adaptive concurrency settled at {self.concurrency_controller.limit}")
+            self._save_tuning()
         logger.info(
-            f"Load complete: {successful_writes} successful, {failed_writes} failed, "
-            f"duration: {duration:.2f}s"
+            f"Load complete: {result.successful_writes} successful, "
+            f"{result.failed_writes} failed, duration: {result.duration_seconds:.2f}s"
         )
 
-        return LoadResult(
-            total_records=total_records,
-            successful_writes=successful_writes,
-            failed_writes=failed_writes,
-            duration_seconds=duration,
-            errors=errors,
-        )
+        return result
 
-    def _read_csv(self, csv_file: str) -> list[dict[str, Any]]:
-        """Read CSV file and return list of records.
-
-        Args:
-            csv_file: Path to CSV file
+    def _create_limiter(self) -> ThreadAdaptiveLimiter | None:
+        """Create the adaptive limiter for one load.
 
         Returns:
-            List of dictionaries representing CSV records
+            Limiter driven by AIMD or the auto-tuner, or None when adaptive
+            concurrency is disabled (the thread pool size is then the only limit)
         """
-        records = []
-        with open(csv_file, encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                records.append(row)
-        return records
+        if not self.config.adaptive_concurrency:
+            self.concurrency_controller = None
+            return None
+        self.concurrency_controller = self._create_controller()
+        return ThreadAdaptiveLimiter(self.concurrency_controller)
 
-    def _create_batches(self, records: list[dict[str, Any]]) -> list[list[dict[str, Any]]]:
-        """Split records into batches.
+    def _create_wire_client(self, session: boto3.Session) -> Any:
+        """Create the low-level client used by the wire-format fast path.
 
-        Args:
-            records: List of records
-
-        Returns:
-            List of batches, where each batch is a list of records
+        Returns None unless a schema is set. Otherwise the table's key types
+        are read once with DescribeTable so that the schema cannot change them.
         """
-        batches = []
-        for i in range(0, len(records), self.config.batch_size):
-            batch = records[i : i + self.config.batch_size]
-            batches.append(batch)
-        return batches
+        if self.item_schema is None:
+            self.item_writer.item_units = write_units
+            return None
+
+        client = session.client("dynamodb", config=self.boto_config)
+        try:
+            response = client.describe_table(TableName=self.config.table_name)
+            definitions = response["Table"]["AttributeDefinitions"]
+            self.item_schema = self.item_schema.with_key_types(definitions)
+        except Exception as e:
+            logger.warning(f"Could not read key types with DescribeTable, using schema as is: {e}")
+        self.item_writer.item_units = wire_write_units
+        return client
+
+    def _resolve_key_attributes(self, session: boto3.Session) -> None:
+        """Read the table's primary key with DescribeTable when dedupe needs it."""
+        if self.dedupe is None or self.key_attributes is not None:
+            return
+        try:
+            client = session.client("dynamodb", config=self.boto_config)
+            response = client.describe_table(TableName=self.config.table_name)
+            self.key_attributes = key_attributes_from(response)
+        except Exception as e:
+            if self.dedupe == FILE:
+                raise ValueError(
+                    f"dedupe={FILE!r} needs the table's key attributes; "
+                    f"pass key_attributes or allow DescribeTable: {e}"
+                ) from e
+            logger.warning(
+                f"Could not read the table key with DescribeTable, not deduplicating: {e}"
+            )
+            return
+        logger.info(f"Deduplicating rows by {', '.join(self.key_attributes)} ({self.dedupe})")
+
+    def _write_batch_limited(
+        self,
+        limiter: ThreadAdaptiveLimiter,
+        table: Any,
+        batch_id: int,
+        items: list[dict[str, Any]],
+    ) -> BatchResult:
+        """Write a batch once the adaptive limiter admits it."""
+        with limiter:
+            return self._write_batch(table, batch_id, items)
 
     def _write_batch(self, table: Any, batch_id: int, items: list[dict[str, Any]]) -> BatchResult:
         """Write a batch of items to DynamoDB with retry logic (thread-safe).
 
-        Uses the retry handler to implement exponential backoff with jitter.
-        This handles transient errors (throttling, network issues) gracefully
-        while failing fast on permanent errors (validation, permissions).
+        Calls BatchWriteItem directly through the table's client, or, when a
+        schema is set, serializes the batch to wire format once and sends it
+        through the low-level client. Only the items DynamoDB returns in
+        UnprocessedItems are resubmitted, each with its own attempt counter and
+        exponential backoff with jitter. Exceptions that fail the whole request
+        (throttling, network issues) are retried by the retry handler. Items
+        that already landed are never rewritten.
 
-        Thread Safety: boto3's batch_writer is thread-safe and can be called
-        from multiple threads concurrently without additional locking.
+        Thread Safety: boto3 clients are thread-safe and can be called from
+        multiple threads concurrently without additional locking.
 
         Args:
             table: boto3 DynamoDB table resource
@@ -241,58 +574,18 @@ class ThreadedDynamoDBLoader:
         Returns:
             BatchResult with operation status
         """
-        retry_count = 0
-
-        def write_operation() -> None:
-            """Actual write operation to be retried.
-
-            Uses batch_writer for efficient batch writes with automatic
-            retry of unprocessed items within the batch.
-            boto3's batch_writer is thread-safe.
-            """
-            nonlocal retry_count
-
-            # batch_writer automatically handles:
-            # - Batching items into groups of 25 (DynamoDB limit)
-            # - Retrying unprocessed items from partial failures
-            # - Thread-safe operation (no additional locking needed)
-            with table.batch_writer() as batch:
-                for item in items:
-                    batch.put_item(Item=item)
-
-        try:
-            # Delegate retry logic to RetryHandler
-            # This implements exponential backoff: delay = base_delay * (2^attempt) + jitter
-            self.retry_handler.retry_sync(write_operation)
-
-            logger.debug(f"Batch {batch_id} written successfully ({len(items)} items)")
-            return BatchResult(
-                batch_id=batch_id,
-                items_count=len(items),
-                successful=True,
-                retry_count=retry_count,
-            )
-
-        except ClientError as e:
-            # DynamoDB-specific errors (throttling, validation, etc.)
-            error_code = e.response.get("Error", {}).get("Code", "Unknown")
-            error_msg = f"Batch {batch_id} failed after retries: {error_code} - {e}"
-            logger.error(error_msg)
-            return BatchResult(
-                batch_id=batch_id,
-                items_count=len(items),
-                successful=False,
-                retry_count=self.config.max_retries,
-                error=error_msg,
-            )
-        except Exception as e:
-            # Unexpected errors (network, programming errors, etc.)
-            error_msg = f"Batch {batch_id} failed with unexpected error: {e}"
-            logger.error(error_msg)
-            return BatchResult(
-                batch_id=batch_id,
-                items_count=len(items),
-                successful=False,
-                retry_count=self.config.max_retries,
-                error=error_msg,
-            )
+        # Columnar readers yield row views; rows become dictionaries only here
+        items = materialize(items)
+        journal = self.journal
+        row_ids = pop_row_ids(items) if journal is not None else None
+        if self.item_schema is None:
+            outcome = self.item_writer.write_sync(table.meta.client, self._requests(items))
+        else:
+            wire_items = self.item_schema.serialize_batch(items)
+            outcome = self.item_writer.write_sync(self.wire_client, self._requests(wire_items))
+        result = self._batch_result(batch_id, items, outcome)
+        if self.dead_letters is not None and outcome.failed:
+            self.dead_letters.write(outcome_dead_letters(batch_id, outcome, self.item_schema))
+        if journal is not None and row_ids is not None:
+            journal.record(written_row_ids(items, row_ids, result.failed_items))
+        return result
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Whole-table operations built on the bulk loader.
+
+`delete` empties a table in place: a parallel segmented Scan reads only the
+key attributes, and the keys are deleted in BatchWriteItem batches through
+the threaded loader's write path (same concurrency, retries and rate
+limiting as a load). The table, its indexes and settings are kept.
+
+`copy` copies a table into another one: a parallel segmented Scan reads the
+source, items are shuffled within a window and written through the same
+write path, with bounded queues between the stages so reading never runs
+ahead of writing.
+
+`export` writes a table to files: each Scan segment streams its pages to its
+own file (CSV, JSON Lines, DynamoDB JSON or Parquet, optionally compressed),
+so the export runs as fast as the segments read. A manifest.json lists the
+files with their item counts.
+"""
+
+import argparse
+import sys
+from collections.abc import Callable
+
+from src.bulk_delete import BulkDeleter
+from src.compression import COMPRESSIONS
+from src.export import EXPORT_FORMATS, JSONL, TableExporter
+from src.models import LoadResult
+from src.scan import DEFAULT_SEGMENTS, ParallelScan
+from src.shuffle import DEFAULT_WINDOW_SIZE
+from src.table_copy import TableCopier
+from src.telemetry import LoadTelemetry, ProgressReporter
+
+
+def confirm(table: str) -> bool:
+    """Ask for the table name before deleting its items."""
+    try:
+        answer = input(f"Delete EVERY item of {table}? Type the table name to confirm: ")
+    except EOFError:
+        return False
+    return answer.strip() == table
+
+
+def print_settings(args: argparse.Namespace) -> None:
+    """Print the scan and write settings shared by all commands."""
+    print(f"Scan Segments:  {args.segments}")
+    print(f"Workers:        {args.workers if args.workers else 'auto-detect'}")
+    if args.adaptive:
+        print(f"Concurrency:    adaptive (ceiling {args.max_concurrency or 'auto'})")
+    print(f"Max Retries:    {args.max_retries}")
+    print(f"Write Budget:   {f'{args.max_wcu:,.0f} WCU/s' if args.max_wcu else 'unlimited'}")
+    print(f"Read Budget:    {f'{args.max_rcu:,.0f} RCU/s' if args.max_rcu else 'unlimited'}")
+    print("=" * 60)
+
+
+def run_with_progress(
+    args: argparse.Namespace, telemetry: LoadTelemetry, run: Callable[[], LoadResult]
+) -> LoadResult:
+    """Run an operation with the live progress line unless it is disabled."""
+    progress = None
+    if not args.no_progress:
+        progress = ProgressReporter(telemetry, interval=args.progress_interval)
+        progress.start()
+    try:
+        return run()
+    finally:
+        if progress is not None:
+            progress.stop()
+
+
+def print_capacity(scan: ParallelScan | None, telemetry: LoadTelemetry) -> None:
+    """Print the scan and write counters of an operation."""
+    if scan is not None:
+        print(f"Scan Pages:        {scan.pages:,}")
+        print(f"Consumed RCU:      {scan.consumed_rcu:,.0f}")
+    metrics = telemetry.snapshot()
+    print(f"Consumed WCU:      {metrics['consumed_wcu']:,.0f}")
+    print(f"Throttle Events:   {metrics['throttle_events']:,}")
+    print("=" * 60)
+
+
+def print_errors(result: LoadResult) -> None:
+    """Print the first errors of an operation."""
+    print(f"\nErrors encountered ({len(result.errors)}):")
+    for error in result.errors[:10]:
+        print(f"  - {error}")
+    if len(result.errors) > 10:
+        print(f"  ... and {len(result.errors) - 10} more errors")
+
+
+def delete(args: argparse.Namespace) -> int:
+    """Delete every item of a table.
+
+    Returns:
+        Process exit code
+    """
+    if not args.yes and not confirm(args.table):
+        print("Aborted: nothing was deleted", file=sys.stderr)
+        return 1
+
+    print("=" * 60)
+    print("Bulk Delete")
+    print("=" * 60)
+    print(f"Table:          {args.table}")
+    print(f"Region:         {args.region}")
+    print_settings(args)
+
+    telemetry = LoadTelemetry()
+    deleter = BulkDeleter(
+        table_name=args.table,
+        region=args.region,
+        segments=args.segments,
+        max_workers=args.workers,
+        max_retries=args.max_retries,
+        adaptive_concurrency=args.adaptive,
+        max_concurrency=args.max_concurrency,
+        max_wcu=args.max_wcu,
+        max_rcu=args.max_rcu,
+        page_size=args.page_size,
+        telemetry=telemetry,
+    )
+    result = run_with_progress(args, telemetry, deleter.delete_all)
+
+    print("\n" + "=" * 60)
+    print("Delete Results")
+    print("=" * 60)
+    print(f"Keys Scanned:      {result.total_records:,}")
+    print(f"Deleted:           {result.successful_writes:,}")
+    print(f"Failed:            {result.failed_writes:,}")
+    print(f"Duration:          {result.duration_seconds:.2f} seconds")
+    print_capacity(deleter.scan, telemetry)
+
+    if result.errors:
+        print_errors(result)
+        print("Run the delete again to remove the items that are left.")
+    return 1 if result.failed_writes else 0
+
+
+def copy(args: argparse.Namespace) -> int:
+    """Copy every item of a table into another table.
+
+    Returns:
+        Process exit code
+    """
+    source_region = args.source_region or args.region
+    dead_letter = args.dead_letter or f"{args.source}-to-{args.destination}.dead-letter.ddbjson"
+
+    print("=" * 60)
+    print("Table Copy")
+    print("=" * 60)
+    print(f"Source:         {args.source} ({source_region})")
+    print(f"Destination:    {args.destination} ({args.region})")
+    print(f"Shuffle Window: {args.window_size:,} items")
+    print(f"Dead Letters:   {dead_letter}")
+    print_settings(args)
+
+    telemetry = LoadTelemetry()
+    copier = TableCopier(
+        source_table=args.source,
+        destination_table=args.destination,
+        region=args.region,
+        source_region=source_region,
+        segments=args.segments,
+        window_size=args.window_size,
+        max_workers=args.workers,
+        max_retries=args.max_retries,
+        adaptive_concurrency=args.adaptive,
+        max_concurrency=args.max_concurrency,
+        max_wcu=args.max_wcu,
+        max_rcu=args.max_rcu,
+        page_size=args.page_size,
+        dead_letter_file=dead_letter,
+        telemetry=telemetry,
+    )
+    result = run_with_progress(args, telemetry, copier.copy)
+
+    print("\n" + "=" * 60)
+    print("Copy Results")
+    print("=" * 60)
+    print(f"Items Read:        {result.total_records:,}")
+    print(f"Successful Writes: {result.successful_writes:,}")
+    print(f"Failed Writes:     {result.failed_writes:,}")
+    if result.dead_lettered:
+        print(f"Dead-Lettered:     {result.dead_lettered:,} ({dead_letter})")
+    print(f"Duration:          {result.duration_seconds:.2f} seconds")
+    print_capacity(copier.scan, telemetry)
+
+    if result.errors:
+        print_errors(result)
+    return 1 if result.failed_writes else 0
+
+
+def export(args: argparse.Namespace) -> int:
+    """Export every item of a table to one file per scan segment.
+
+    Returns:
+        Process exit code
+    """
+    columns = [name.strip() for name in args.columns.split(",")] if args.columns else None
+
+    print("=" * 60)
+    print("Table Export")
+    print("=" * 60)
+    print(f"Table:          {args.table}")
+    print(f"Region:         {args.region}")
+    print(f"Output:         {args.output_dir}")
+    print(f"Format:         {args.format}")
+    print(f"Compression:    {args.compression or 'none'}")
+    print(f"Scan Segments:  {args.segments}")
+    print(f"Read Budget:    {f'{args.max_rcu:,.0f} RCU/s' if args.max_rcu else 'unlimited'}")
+    print("=" * 60)
+
+    exporter = TableExporter(
+        table_name=args.table,
+        output_dir=args.output_dir,
+        format=args.format,
+        compression=args.compression,
+        region=args.region,
+        segments=args.segments,
+        columns=columns,
+        page_size=args.page_size,
+        max_rcu=args.max_rcu,
+        max_retries=args.max_retries,
+        consistent_read=args.consistent_read,
+    )
+    result = exporter.export()
+
+    print("\n" + "=" * 60)
+    print("Export Results")
+    print("=" * 60)
+    for entry in result.files:
+        print(f"  {entry.segment:>4}  {entry.items:>12,}  {entry.path or '(empty segment)'}")
+    print(f"Items Exported:    {result.total_items:,}")
+    print(f"Duration:          {result.duration_seconds:.2f} seconds")
+    print(f"Throughput:        {result.items_per_second():,.0f} items/second")
+    print(f"Consumed RCU:      {result.consumed_rcu:,.0f}")
+    print(f"Manifest:          {result.manifest_path}")
+    print("=" * 60)
+
+    unexported = sorted({name for entry in result.files for name in entry.unexported_attributes})
+    if unexported:
+        print(f"\nAttributes left out of some rows: {', '.join(unexported)}")
+        print("Use --columns, or the jsonl or dynamodb-json format, to keep them.")
+    return 0
+
+
+def add_scan_and_write_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the scan, write and progress options shared by all commands."""
+    parser.add_argument(
+        "--region",
+        "-r",
+        type=str,
+        default="us-east-1",
+        help="AWS region of the table written to (default: us-east-1)",
+    )
+    parser.add_argument(
+        "--segments",
+        type=int,
+        default=DEFAULT_SEGMENTS,
+        help=f"Parallel scan segments (default: {DEFAULT_SEGMENTS})",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=None,
+        help="Maximum items per Scan call (default: 1MB pages)",
+    )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=None,
+        help="Concurrent write batches (default: auto-detect CPU cores)",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Adapt the number of in-flight batches to throttling (AIMD)",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=None,
+        help="Ceiling for --adaptive (default: max(64, workers))",
+    )
+    parser.add_argument(
+        "--max-retries", type=int, default=3, help="Retry attempts per item (default: 3)"
+    )
+    parser.add_argument(
+        "--max-wcu",
+        type=float,
+        default=None,
+        help="Write capacity units per second the writes may consume (default: unlimited)",
+    )
+    parser.add_argument(
+        "--max-rcu",
+        type=float,
+        default=None,
+        help="Read capacity units per second the scan may consume (default: unlimited)",
+    )
+    parser.add_argument("--no-progress", action="store_true", help="Do not print live progress")
+    parser.add_argument(
+        "--progress-interval",
+        type=float,
+        default=2.0,
+        help="Seconds between progress updates (default: 2.0)",
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Whole-table operations (bulk delete, copy, export) built on the bulk loader",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Empty a table (asks for the table name first)
+  python table_tools.py delete --table MyTable
+
+  # Empty a test table without prompting, with 16 scan segments and adaptive concurrency
+  python table_tools.py delete --table MyTable --yes --segments 16 --adaptive
+
+  # Empty a table that is serving traffic, within a read and write budget
+  python table_tools.py delete --table MyTable --max-wcu 1000 --max-rcu 500
+
+  # Copy a table into an existing table with the same key schema
+  python table_tools.py copy --source Orders --destination OrdersCopy
+
+  # Copy across regions, reading at most 2,000 RCU/s from the source
+  python table_tools.py copy --source Orders --destination Orders \\
+      --source-region us-east-1 --region eu-west-1 --max-rcu 2000
+
+  # Export a table to 16 gzip-compressed JSON Lines files
+  python table_tools.py export --table Orders --output-dir ./orders --segments 16 \\
+      --compression gzip
+
+  # Export to Parquet (requires pyarrow) reading at most 1,000 RCU/s
+  python table_tools.py export --table Orders --output-dir ./orders --format parquet \\
+      --compression zstd --max-rcu 1000
+        """,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    delete_parser = commands.add_parser("delete", help="Delete every item of a table")
+    delete_parser.add_argument("--table", "-t", type=str, required=True, help="DynamoDB table name")
+    delete_parser.add_argument(
+        "--yes", "-y", action="store_true", help="Do not ask for confirmation"
+    )
+    add_scan_and_write_arguments(delete_parser)
+
+    copy_parser = commands.add_parser("copy", help="Copy every item of a table into another")
+    copy_parser.add_argument("--source", "-s", type=str, required=True, help="Table to read")
+    copy_parser.add_argument(
+        "--destination",
+        "-d",
+        type=str,
+        required=True,
+        help="Table to write (must exist with the same key schema)",
+    )
+    copy_parser.add_argument(
+        "--source-region",
+        type=str,
+        default=None,
+        help="AWS region of the source table (default: --region)",
+    )
+    copy_parser.add_argument(
+        "--window-size",
+        type=int,
+        default=DEFAULT_WINDOW_SIZE,
+        help=f"Items held by the shuffle window (default: {DEFAULT_WINDOW_SIZE:,})",
+    )
+    copy_parser.add_argument(
+        "--dead-letter",
+        type=str,
+        default=None,
+        help="File receiving items that could not be written "
+        "(default: <source>-to-<destination>.dead-letter.ddbjson)",
+    )
+    add_scan_and_write_arguments(copy_parser)
+
+    export_parser = commands.add_parser("export", help="Export a table to one file per segment")
+    export_parser.add_argument("--table", "-t", type=str, required=True, help="DynamoDB table name")
+    export_parser.add_argument(
+        "--output-dir", "-o", type=str, required=True, help="Directory receiving the files"
+    )
+    export_parser.add_argument(
+        "--format",
+        "-f",
+        choices=EXPORT_FORMATS,
+        default=JSONL,
+        help=f"Output format (default: {JSONL})",
+    )
+    export_parser.add_argument(
+        "--compression",
+        "-c",
+        choices=COMPRESSIONS,
+        default=None,
+        help="Compress the files (Parquet: codec, default snappy)",
+    )
+    export_parser.add_argument(
+        "--columns",
+        type=str,
+        default=None,
+        help="Comma-separated CSV and Parquet columns (default: attributes of the first page)",
+    )
+    export_parser.add_argument(
+        "--region", "-r", type=str, default="us-east-1", help="AWS region (default: us-east-1)"
+    )
+    export_parser.add_argument(
+        "--segments",
+        type=int,
+        default=DEFAULT_SEGMENTS,
+        help=f"Parallel scan segments, one file each (default: {DEFAULT_SEGMENTS})",
+    )
+    export_parser.add_argument(
+        "--page-size",
+        type=int,
+        default=None,
+        help="Maximum items per Scan call (default: 1MB pages)",
+    )
+    export_parser.add_argument(
+        "--max-rcu",
+        type=float,
+        default=None,
+        help="Read capacity units per second the export may consume (default: unlimited)",
+    )
+    export_parser.add_argument(
+        "--max-retries", type=int, default=5, help="Retry attempts per Scan call (default: 5)"
+    )
+    export_parser.add_argument(
+        "--consistent-read", action="store_true", help="Use strongly consistent reads"
+    )
+    args = parser.parse_args()
+
+    try:
+        if args.command == "delete":
+            sys.exit(delete(args))
+        elif args.command == "copy":
+            sys.exit(copy(args))
+        else:
+            sys.exit(export(args))
+    except Exception as e:
+        print(f"\nError: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
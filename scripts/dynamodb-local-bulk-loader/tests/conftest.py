@@ -0,0 +1,45 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Shared pytest fixtures."""
+
+import csv
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any
+
+import pytest
+
+
+@pytest.fixture
+def write_csv(tmp_path) -> Callable[..., str]:
+    """Factory that writes rows to a CSV file under tmp_path.
+
+    The returned function takes an iterable of row dictionaries, and
+    optionally the file name and the header (by default the keys of the
+    first row), and returns the path of the file.
+    """
+
+    def write(
+        rows: Iterable[Mapping[str, Any]],
+        name: str = "data.csv",
+        fieldnames: list[str] | None = None,
+    ) -> str:
+        rows = list(rows)
+        path = tmp_path / name
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames or list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        return str(path)
+
+    return write
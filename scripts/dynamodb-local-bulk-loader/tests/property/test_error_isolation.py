@@ -13,6 +13,7 @@
 #
 """Property-based tests for error isolation."""
 
+import threading
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -89,41 +90,24 @@ async def test_async_loader_error_isolation(
             max_retries=0,  # No retries to make test faster
         )
 
-        # Mock the table and batch writer
+        # Mock the table's low-level BatchWriteItem call
         batch_call_count = 0
 
-        def mock_batch_writer_context():
-            """Mock batch writer context manager factory."""
+        async def mock_batch_write_item(RequestItems):
+            """Fail the requests for specific batches, accept the rest."""
             nonlocal batch_call_count
             current_batch = batch_call_count
             batch_call_count += 1
 
-            mock_batch = AsyncMock()
-
             # Fail specific batches
             if current_batch in failing_indices:
-                mock_batch.put_item.side_effect = create_client_error(
-                    "ProvisionedThroughputExceededException"
-                )
-            else:
-                mock_batch.put_item.return_value = None
-
-            # Create proper async context manager methods
-            async def aenter(self):
-                return mock_batch
-
-            async def aexit(self, exc_type, exc_val, exc_tb):
-                return None
-
-            mock_batch.__aenter__ = aenter
-            mock_batch.__aexit__ = aexit
-
-            return mock_batch
+                raise create_client_error("ProvisionedThroughputExceededException")
+            return {"UnprocessedItems": {}}
 
         with patch("aioboto3.Session") as mock_session:
             mock_resource = AsyncMock()
-            mock_table = AsyncMock()
-            mock_table.batch_writer = mock_batch_writer_context
+            mock_table = MagicMock()
+            mock_table.meta.client.batch_write_item = mock_batch_write_item
 
             mock_resource.__aenter__ = AsyncMock(return_value=mock_resource)
             mock_resource.__aexit__ = AsyncMock(return_value=None)
@@ -211,34 +195,26 @@ def test_threaded_loader_error_isolation(
             max_retries=0,  # No retries to make test faster
         )
 
-        # Mock the table and batch writer
+        # Mock the table's low-level BatchWriteItem call
         batch_call_count = 0
+        count_lock = threading.Lock()
 
-        def mock_batch_writer_context():
-            """Mock batch writer context manager."""
+        def mock_batch_write_item(RequestItems):
+            """Fail the requests for specific batches, accept the rest."""
             nonlocal batch_call_count
-            current_batch = batch_call_count
-            batch_call_count += 1
-
-            mock_batch = MagicMock()
+            with count_lock:
+                current_batch = batch_call_count
+                batch_call_count += 1
 
             # Fail specific batches
             if current_batch in failing_indices:
-                mock_batch.put_item.side_effect = create_client_error(
-                    "ProvisionedThroughputExceededException"
-                )
-            else:
-                mock_batch.put_item.return_value = None
-
-            mock_batch.__enter__ = MagicMock(return_value=mock_batch)
-            mock_batch.__exit__ = MagicMock(return_value=None)
-
-            return mock_batch
+                raise create_client_error("ProvisionedThroughputExceededException")
+            return {"UnprocessedItems": {}}
 
         with patch("boto3.Session") as mock_session:
             mock_resource = MagicMock()
             mock_table = MagicMock()
-            mock_table.batch_writer = mock_batch_writer_context
+            mock_table.meta.client.batch_write_item.side_effect = mock_batch_write_item
 
             mock_resource.Table.return_value = mock_table
             mock_session.return_value.resource.return_value = mock_resource
@@ -0,0 +1,59 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Property-based tests for byte-range sharding."""
+
+import os
+import tempfile
+
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from src.process_loader import iter_csv_range, split_byte_ranges
+
+
+# Feature: dynamodb-csv-bulk-loader, Property 18: Byte Ranges Partition Rows
+# For any CSV file and number of ranges, reading every range yields each data
+# row exactly once and in file order.
+@given(
+    values=st.lists(
+        st.text(
+            alphabet=st.characters(blacklist_characters='\r\n",', blacklist_categories=["Cs"]),
+            max_size=30,
+        ),
+        max_size=60,
+    ),
+    num_ranges=st.integers(min_value=1, max_value=20),
+    line_ending=st.sampled_from(["\n", "\r\n"]),
+)
+@settings(max_examples=100)
+def test_byte_ranges_partition_rows(values: list[str], num_ranges: int, line_ending: str) -> None:
+    """
+    Property 18: Byte Ranges Partition Rows
+    Sharding must never drop, duplicate or split a row.
+    """
+    lines = ["pos,value"] + [f"{i},{value}" for i, value in enumerate(values)]
+    with tempfile.NamedTemporaryFile(mode="wb", suffix=".csv", delete=False) as f:
+        f.write((line_ending.join(lines) + line_ending).encode("utf-8"))
+
+    try:
+        fieldnames, ranges = split_byte_ranges(f.name, num_ranges)
+        rows = [
+            row for start, end in ranges for row in iter_csv_range(f.name, start, end, fieldnames)
+        ]
+    finally:
+        os.unlink(f.name)
+
+    assert len(ranges) <= num_ranges
+    assert [row["pos"] for row in rows] == [str(i) for i in range(len(values))]
+    assert [row["value"] for row in rows] == values
@@ -81,8 +81,9 @@ def test_retry_exponential_backoff(base_delay: float, max_delay: float, attempt:
 
 
 # Feature: dynamodb-csv-bulk-loader, Property 15: Retry Count Limits
-# For any configured maximum retry count M, a failing operation should be
-# retried at most M times before being marked as permanently failed.
+# For any configured maximum retry count M, an operation failing with a
+# transient error should be retried at most M times before being marked as
+# permanently failed.
 @settings(max_examples=100)
 @given(
     max_retries=st.integers(min_value=0, max_value=10),
@@ -104,14 +105,14 @@ def test_retry_count_limits_sync(max_retries: int) -> None:
     def failing_function() -> Any:
         nonlocal attempt_count
         attempt_count += 1
-        raise ValueError(f"Attempt {attempt_count} failed")
+        raise ConnectionError(f"Attempt {attempt_count} failed")
 
     # Attempt to call the failing function
     try:
         handler.retry_sync(failing_function)
         # Should never reach here
         raise AssertionError("Expected exception to be raised")
-    except ValueError as e:
+    except ConnectionError as e:
         # Verify the exception is from the last attempt
         assert f"Attempt {attempt_count} failed" in str(e)
 
@@ -142,7 +143,7 @@ def test_retry_count_limits_async(max_retries: int) -> None:
     async def failing_async_function() -> Any:
         nonlocal attempt_count
         attempt_count += 1
-        raise ValueError(f"Attempt {attempt_count} failed")
+        raise ConnectionError(f"Attempt {attempt_count} failed")
 
     # Attempt to call the failing function
     async def run_test() -> None:
@@ -151,7 +152,7 @@ def test_retry_count_limits_async(max_retries: int) -> None:
             await handler.retry_async(failing_async_function)
             # Should never reach here
             raise AssertionError("Expected exception to be raised")
-        except ValueError as e:
+        except ConnectionError as e:
             # Verify the exception is from the last attempt
             assert f"Attempt {attempt_count} failed" in str(e)
 
@@ -191,7 +192,7 @@ def test_retry_succeeds_before_limit_sync(max_retries: int, success_on_attempt:
         nonlocal attempt_count
         attempt_count += 1
         if attempt_count < success_on_attempt:
-            raise ValueError(f"Attempt {attempt_count} failed")
+            raise ConnectionError(f"Attempt {attempt_count} failed")
         return f"Success on attempt {attempt_count}"
 
     # Call the function
@@ -228,7 +229,7 @@ def test_retry_succeeds_before_limit_async(max_retries: int, success_on_attempt:
         nonlocal attempt_count
         attempt_count += 1
         if attempt_count < success_on_attempt:
-            raise ValueError(f"Attempt {attempt_count} failed")
+            raise ConnectionError(f"Attempt {attempt_count} failed")
         return f"Success on attempt {attempt_count}"
 
     # Run the async test
@@ -0,0 +1,42 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Property-based tests for shuffle strategies."""
+
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from src.shuffle import get_shuffle_strategy
+
+
+# Feature: dynamodb-csv-bulk-loader, Property 17: Shuffle Preserves Records
+# For any input stream, strategy and window size, the shuffled output is a
+# permutation of the input: no record is lost or duplicated.
+@given(
+    count=st.integers(min_value=0, max_value=500),
+    name=st.sampled_from(["full", "window", "bucket", "hash"]),
+    window_size=st.integers(min_value=1, max_value=200),
+    seed=st.integers(min_value=0, max_value=2**32 - 1),
+)
+@settings(max_examples=100)
+def test_shuffle_preserves_records(count: int, name: str, window_size: int, seed: int) -> None:
+    """
+    Property 17: Shuffle Preserves Records
+    Every strategy must emit exactly the records it was given.
+    """
+    records = [{"id": f"id-{i}", "pos": i} for i in range(count)]
+    strategy = get_shuffle_strategy(name, window_size=window_size, seed=seed)
+
+    shuffled = list(strategy.shuffle(iter(records)))
+
+    assert sorted(r["pos"] for r in shuffled) == list(range(count))
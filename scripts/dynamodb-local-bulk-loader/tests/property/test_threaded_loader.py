@@ -84,34 +84,21 @@ def test_thread_safety(num_batches, batch_size, max_workers):
         written_items = []
         items_lock = threading.Lock()
 
-        # Mock the batch writer to track operations
-        def mock_batch_writer_context():
-            """Mock context manager for batch writer."""
-
-            class MockBatchWriter:
-                def __init__(self):
-                    self.items = []
-
-                def put_item(self, Item):
-                    # Thread-safe item tracking
-                    with items_lock:
-                        written_items.append(Item["id"])
-                    self.items.append(Item)
-
-                def __enter__(self):
-                    return self
-
-                def __exit__(self, exc_type, exc_val, exc_tb):
-                    # Track batch completion
-                    with batch_lock:
-                        processed_batches.append(len(self.items))
-                    return False
-
-            return MockBatchWriter()
+        # Mock the low-level BatchWriteItem call to track operations
+        def mock_batch_write_item(RequestItems):
+            """Record every item in the request and report it as processed."""
+            requests = RequestItems["test-table"]
+            # Thread-safe item tracking
+            with items_lock:
+                written_items.extend(r["PutRequest"]["Item"]["id"] for r in requests)
+            # Track batch completion
+            with batch_lock:
+                processed_batches.append(len(requests))
+            return {"UnprocessedItems": {}}
 
         # Create mock table
         mock_table = MagicMock()
-        mock_table.batch_writer.side_effect = mock_batch_writer_context
+        mock_table.meta.client.batch_write_item.side_effect = mock_batch_write_item
 
         # Create loader
         loader = ThreadedDynamoDBLoader(
@@ -21,7 +21,8 @@ from unittest.mock import AsyncMock, MagicMock, patch
 import pytest
 
 from src.async_loader import AsyncDynamoDBLoader
-from src.models import LoaderConfig
+from src.local_dynamodb import AsyncLocalSession, LocalDynamoDB
+from src.models import BatchResult, LoaderConfig
 
 
 class TestAsyncDynamoDBLoader:
@@ -145,13 +146,11 @@ class TestAsyncDynamoDBLoader:
         """Test successful batch write operation."""
         loader = AsyncDynamoDBLoader(table_name="test-table", max_retries=1)
 
-        # Mock the table and batch_writer
+        # Mock the table's low-level client
         mock_table = MagicMock()
-        mock_batch_writer = AsyncMock()
-        mock_batch_writer.__aenter__ = AsyncMock(return_value=mock_batch_writer)
-        mock_batch_writer.__aexit__ = AsyncMock(return_value=None)
-        mock_batch_writer.put_item = AsyncMock()
-        mock_table.batch_writer.return_value = mock_batch_writer
+        mock_table.meta.client.batch_write_item = AsyncMock(
+            return_value={"UnprocessedItems": {}}
+        )
 
         items = [{"id": "1", "name": "test1"}, {"id": "2", "name": "test2"}]
 
@@ -171,14 +170,12 @@ class TestAsyncDynamoDBLoader:
 
         # Mock the table to raise ClientError
         mock_table = MagicMock()
-        mock_batch_writer = AsyncMock()
-        mock_batch_writer.__aenter__ = AsyncMock(
+        mock_table.meta.client.batch_write_item = AsyncMock(
             side_effect=ClientError(
                 {"Error": {"Code": "ProvisionedThroughputExceededException"}},
-                "PutItem",
+                "BatchWriteItem",
             )
         )
-        mock_table.batch_writer.return_value = mock_batch_writer
 
         items = [{"id": "1", "name": "test1"}]
 
@@ -196,11 +193,9 @@ class TestAsyncDynamoDBLoader:
 
         # Mock the table to raise generic exception
         mock_table = MagicMock()
-        mock_batch_writer = AsyncMock()
-        mock_batch_writer.__aenter__ = AsyncMock(
+        mock_table.meta.client.batch_write_item = AsyncMock(
             side_effect=Exception("Unexpected error")
         )
-        mock_table.batch_writer.return_value = mock_batch_writer
 
         items = [{"id": "1", "name": "test1"}]
 
@@ -233,3 +228,103 @@ class TestAsyncDynamoDBLoader:
             import os
 
             os.unlink(csv_file)
+
+    @pytest.mark.asyncio
+    async def test_in_memory_load_uses_fixed_worker_pool(self, tmp_path):
+        """Test that the number of tasks does not grow with the number of batches."""
+        csv_file = tmp_path / "rows.csv"
+        with open(csv_file, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["id", "name"])
+            writer.writeheader()
+            for i in range(2000):
+                writer.writerow({"id": str(i), "name": f"test{i}"})
+
+        db = LocalDynamoDB()
+        loader = AsyncDynamoDBLoader(
+            table_name="test-table",
+            max_workers=4,
+            batch_size=10,
+            session=AsyncLocalSession(db),
+        )
+        write_batch = loader._write_batch
+        tasks = []
+
+        async def counting_write_batch(table, batch_id, items):
+            tasks.append(len(asyncio.all_tasks()))
+            return await write_batch(table, batch_id, items)
+
+        with patch.object(loader, "_write_batch", side_effect=counting_write_batch):
+            result = await loader.load_csv(str(csv_file))
+
+        assert result.successful_writes == 2000
+        assert len(db.tables["test-table"]) == 2000
+        assert len(tasks) == 200
+        # The test's own task plus one task per worker
+        assert max(tasks) <= 5
+
+
+class TestAsyncDynamoDBLoaderStreaming:
+    """Unit tests for the streaming (bounded queue) load path."""
+
+    def test_iter_batches_groups_stream(self):
+        """Test that a record stream is grouped into batches lazily."""
+        loader = AsyncDynamoDBLoader(table_name="test-table", batch_size=3)
+        records = ({"id": str(i)} for i in range(7))
+
+        batches = list(loader._iter_batches(records))
+
+        assert [len(batch) for batch in batches] == [3, 3, 1]
+        assert batches[2][0]["id"] == "6"
+
+    def test_queue_size_validation(self):
+        """Test that a non-positive queue size is rejected."""
+        with pytest.raises(ValueError, match="queue_size must be greater than 0"):
+            AsyncDynamoDBLoader(table_name="test-table", streaming=True, queue_size=0)
+
+    @pytest.mark.asyncio
+    async def test_streaming_load_writes_every_record(self):
+        """Test that streaming mode writes all records without reading the file up front."""
+        with tempfile.NamedTemporaryFile(
+            mode="w", suffix=".csv", delete=False, newline=""
+        ) as f:
+            csv_file = f.name
+            writer = csv.DictWriter(f, fieldnames=["id", "name"])
+            writer.writeheader()
+            for i in range(53):
+                writer.writerow({"id": str(i), "name": f"test{i}"})
+
+        try:
+            loader = AsyncDynamoDBLoader(
+                table_name="test-table",
+                max_workers=3,
+                batch_size=10,
+                streaming=True,
+                queue_size=1,
+            )
+            written = []
+
+            async def fake_write_batch(table, batch_id, items):
+                written.extend(item["id"] for item in items)
+                return BatchResult(
+                    batch_id=batch_id, items_count=len(items), successful=True, retry_count=0
+                )
+
+            with patch("aioboto3.Session") as mock_session, patch.object(
+                loader, "_read_csv", side_effect=AssertionError("file was materialised")
+            ), patch.object(loader, "_write_batch", side_effect=fake_write_batch):
+                mock_resource = AsyncMock()
+                mock_resource.__aenter__ = AsyncMock(return_value=mock_resource)
+                mock_resource.__aexit__ = AsyncMock(return_value=None)
+                mock_resource.Table = AsyncMock(return_value=MagicMock())
+                mock_session.return_value.resource.return_value = mock_resource
+
+                result = await loader.load_csv(csv_file)
+
+            assert result.total_records == 53
+            assert result.successful_writes == 53
+            assert result.failed_writes == 0
+            assert sorted(written, key=int) == [str(i) for i in range(53)]
+        finally:
+            import os
+
+            os.unlink(csv_file)
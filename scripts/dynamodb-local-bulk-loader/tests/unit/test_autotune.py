@@ -0,0 +1,221 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Unit tests for concurrency auto-tuning and tuning profiles."""
+
+import csv
+import json
+
+import pytest
+
+from src.autotune import (
+    AutoTuner,
+    Probe,
+    TuningProfile,
+    TuningProfiles,
+    create_tuner,
+    profile_key,
+)
+from src.local_dynamodb import LocalDynamoDB, LocalSession
+from src.threaded_loader import ThreadedDynamoDBLoader
+
+
+class FakeClock:
+    """Clock advanced by the test."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def tuner_with_clock(initial_limit=4, max_limit=64):
+    """Tuner measuring 1 second windows on a fake clock, with its first window open."""
+    clock = FakeClock()
+    tuner = AutoTuner(initial_limit, max_limit=max_limit, probe_seconds=1.0, clock=clock)
+    tuner.on_success()
+    return tuner, clock
+
+
+def run_window(tuner, clock, successes, throttles=0):
+    """Feed one second of responses, spread evenly, closing the current window."""
+    events = [tuner.on_throttle] * throttles + [tuner.on_success] * successes
+    start = clock.now
+    for i, event in enumerate(events, 1):
+        clock.now = start + i / len(events)
+        event()
+
+
+def run_until_locked(tuner, clock, rates, throttle_rates=None):
+    """Probe with successes per second (and throttles) given per concurrency level."""
+    throttle_rates = throttle_rates or {}
+    while not tuner.locked:
+        run_window(tuner, clock, rates[tuner.limit], throttle_rates.get(tuner.limit, 0))
+
+
+class TestAutoTuner:
+    """Tests for the probing concurrency controller."""
+
+    def test_locks_in_level_where_gains_stop(self):
+        """Test that probing doubles the level until throughput stops improving."""
+        tuner, clock = tuner_with_clock()
+        run_until_locked(tuner, clock, {4: 100, 8: 190, 16: 300, 32: 310})
+        assert [probe.limit for probe in tuner.probes] == [4, 8, 16, 32]
+        assert tuner.limit == 16
+        assert tuner.best.limit == 16
+
+    def test_throttled_level_is_rejected(self):
+        """Test that a level throttling more than the threshold falls back to the best one."""
+        tuner, clock = tuner_with_clock()
+        run_until_locked(tuner, clock, {4: 100, 8: 190, 16: 360}, throttle_rates={16: 40})
+        assert tuner.limit == 8
+        assert tuner.probes[-1].throttle_rate == pytest.approx(0.1)
+
+    def test_stops_at_max_limit(self):
+        """Test that probing never goes past max_limit."""
+        tuner, clock = tuner_with_clock(initial_limit=10, max_limit=30)
+        run_until_locked(tuner, clock, {10: 100, 20: 200, 30: 300})
+        assert [probe.limit for probe in tuner.probes] == [10, 20, 30]
+        assert tuner.limit == 30
+
+    def test_throttled_first_level_halves(self):
+        """Test that throttling at the first level locks in half of it."""
+        tuner, clock = tuner_with_clock(initial_limit=8)
+        run_until_locked(tuner, clock, {8: 100}, throttle_rates={8: 50})
+        assert tuner.limit == 4
+        assert tuner.best is None
+
+    def test_locked_limit_only_decreases(self):
+        """Test that a locked tuner cuts the limit on throttling and never grows it."""
+        clock = FakeClock()
+        tuner = AutoTuner(16, probe_seconds=1.0, locked=True, clock=clock)
+        tuner.on_success()
+        run_window(tuner, clock, 1000)
+        assert tuner.limit == 16
+        run_window(tuner, clock, 100, 10)
+        assert tuner.limit == 8
+        assert tuner.throttle_events == 10
+        assert tuner.probes == []
+
+
+class TestTuningProfiles:
+    """Tests for saved tuning profiles."""
+
+    def test_record_and_reuse(self, tmp_path):
+        """Test that a tuned level is saved and starts the next load locked."""
+        profiles = TuningProfiles(str(tmp_path / "profiles" / "tuning.json"))
+        key = profile_key("threaded", "t", "us-east-1", host="host/8cpu")
+        tuner, clock = tuner_with_clock()
+        run_until_locked(tuner, clock, {4: 100, 8: 190, 16: 195})
+
+        saved = profiles.record(key, 25, tuner)
+        assert saved.workers == 8
+        assert profiles.get(key) == saved
+
+        reused = create_tuner(initial_limit=4, max_limit=64, batch_size=25, profile=saved)
+        assert reused.locked and reused.from_profile
+        assert reused.limit == 8
+        # A limit that came from a profile is not saved again
+        assert profiles.record(key, 25, reused) is None
+
+    def test_profile_for_other_batch_size_is_not_reused(self):
+        """Test that a profile tuned with another batch size makes the load probe."""
+        profile = TuningProfile(workers=32, batch_size=10, batches_per_second=1.0, tuned_at="x")
+        tuner = create_tuner(initial_limit=4, max_limit=64, batch_size=25, profile=profile)
+        assert not tuner.locked
+        assert tuner.limit == 4
+
+    def test_unfinished_tuning_resumes(self, tmp_path):
+        """Test that a load ending while probing lets the next load probe on."""
+        profiles = TuningProfiles(str(tmp_path / "tuning.json"))
+        tuner, clock = tuner_with_clock()
+        run_window(tuner, clock, 100)
+        run_window(tuner, clock, 190)
+        assert not tuner.locked
+
+        saved = profiles.record("key", 25, tuner)
+        assert saved.workers == 8
+        assert not saved.complete
+
+        resumed = create_tuner(initial_limit=4, max_limit=64, batch_size=25, profile=saved)
+        assert not resumed.locked
+        # The level measured by the previous load is not probed again
+        assert resumed.limit == 16
+        assert resumed.probes == [Probe(limit=8, batches_per_second=190.0, throttle_rate=0.0)]
+
+    def test_refresh_and_unreadable_files(self, tmp_path):
+        """Test that refresh ignores saved profiles and a corrupt file is ignored."""
+        path = tmp_path / "tuning.json"
+        profile = TuningProfile(workers=8, batch_size=25, batches_per_second=1.0, tuned_at="x")
+        TuningProfiles(str(path)).save("key", profile)
+        assert TuningProfiles(str(path), refresh=True).get("key") is None
+        path.write_text("{not json")
+        assert TuningProfiles(str(path)).get("key") is None
+
+    @pytest.mark.parametrize(
+        "entry",
+        [
+            {"workers": "many", "batch_size": 25, "batches_per_second": 1.0, "tuned_at": "x"},
+            {"workers": 8, "batch_size": 25, "batches_per_second": None, "tuned_at": "x"},
+            {"workers": 8, "batch_size": 25, "batches_per_second": 1.0},
+            {
+                "workers": 8,
+                "batch_size": 25,
+                "batches_per_second": 1.0,
+                "tuned_at": "x",
+                "complete": "no",
+            },
+            ["not", "a", "profile"],
+        ],
+    )
+    def test_malformed_profile_is_ignored(self, tmp_path, entry):
+        """Test that a profile with missing or wrong-typed values is not used."""
+        path = tmp_path / "tuning.json"
+        path.write_text(json.dumps({"key": entry}))
+        assert TuningProfiles(str(path)).get("key") is None
+
+
+class TestLoaderAutoTune:
+    """Tests for auto-tuning in the loaders."""
+
+    def test_load_starts_at_saved_profile(self, tmp_path):
+        """Test that a load with a saved profile runs at the tuned level."""
+        csv_file = tmp_path / "rows.csv"
+        with open(csv_file, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["id"])
+            writer.writeheader()
+            writer.writerows({"id": str(i)} for i in range(500))
+        profiles = TuningProfiles(str(tmp_path / "tuning.json"))
+        profiles.save(
+            profile_key("threaded", "t", "us-east-1"),
+            TuningProfile(workers=6, batch_size=25, batches_per_second=1.0, tuned_at="x"),
+        )
+        db = LocalDynamoDB()
+        loader = ThreadedDynamoDBLoader(
+            "t",
+            max_workers=2,
+            auto_tune=True,
+            tuning_profiles=profiles,
+            session=LocalSession(db),
+        )
+        result = loader.load_csv(str(csv_file))
+        assert result.successful_writes == 500
+        assert isinstance(loader.concurrency_controller, AutoTuner)
+        assert loader.concurrency_controller.from_profile
+        assert loader.concurrency_controller.limit == 6
+
+    def test_auto_tune_replaces_adaptive(self):
+        """Test that auto-tuning and AIMD cannot both drive the limit."""
+        with pytest.raises(ValueError, match="cannot be combined"):
+            ThreadedDynamoDBLoader("t", auto_tune=True, adaptive_concurrency=True)
@@ -0,0 +1,138 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Unit tests for size-aware batch packing."""
+
+import csv
+
+import pytest
+from botocore.exceptions import ClientError
+
+from src.async_loader import AsyncDynamoDBLoader
+from src.batch_packer import BatchPacker, record_size
+from src.checkpoint import ROW_ID_KEY
+from src.dead_letter import ITEM_TOO_LARGE, read_dead_letters
+from src.item_size import MAX_ITEM_BYTES, estimate_item_size, wire_item_size
+from src.local_dynamodb import AsyncLocalSession, LocalDynamoDB, LocalSession
+from src.threaded_loader import ThreadedDynamoDBLoader
+
+
+def rows(count, payload_bytes):
+    """Rows whose size is 2 + len(id) + 4 + payload_bytes."""
+    return [{"id": str(i), "body": "x" * payload_bytes} for i in range(count)]
+
+
+class TestRecordSize:
+    """Tests for record sizes."""
+
+    def test_matches_item_size_and_ignores_row_id(self):
+        """Test that sizes match src.item_size for plain and wire records."""
+        record = {"id": "é", "amount": 12.5, "tags": ["a", "b"], ROW_ID_KEY: 7}
+        plain = {k: v for k, v in record.items() if k != ROW_ID_KEY}
+        assert record_size(record) == estimate_item_size(plain)
+        wire = {"id": {"S": "é"}, "amount": {"N": "12.5"}, "blob": {"B": b"abc"}}
+        assert record_size(wire, wire_format=True) == wire_item_size(wire)
+
+
+class TestBatchPacker:
+    """Tests for packing against request limits."""
+
+    def test_count_limit(self):
+        """Test that small records fill batches to max_items."""
+        batches = list(BatchPacker(max_items=10).pack(rows(25, 10)))
+        assert [len(batch) for batch in batches] == [10, 10, 5]
+
+    def test_byte_limit(self):
+        """Test that a batch is closed before its payload exceeds max_bytes."""
+        packer = BatchPacker(max_bytes=MAX_ITEM_BYTES)
+        batches = list(packer.pack(rows(7, 150 * 1024)))
+        assert [len(batch) for batch in batches] == [2, 2, 2, 1]
+        assert all(sum(map(record_size, batch)) <= MAX_ITEM_BYTES for batch in batches)
+
+    def test_wcu_limit(self):
+        """Test that batches stay within max_wcu, and a larger item gets its own."""
+        packer = BatchPacker(max_wcu=10)
+        # 3 WCUs each: three per batch
+        batches = list(packer.pack(rows(7, 2500)))
+        assert [len(batch) for batch in batches] == [3, 3, 1]
+        big = list(BatchPacker(max_wcu=10).pack(rows(2, 20 * 1024)))
+        assert [len(batch) for batch in big] == [1, 1]
+
+    def test_oversized_records_are_set_aside(self):
+        """Test that records over 400KB are reported and never packed."""
+        oversized = []
+        records = rows(3, 10)
+        records.insert(1, {"id": "big", "body": "x" * MAX_ITEM_BYTES})
+        packer = BatchPacker(on_oversized=lambda record, size: oversized.append((record, size)))
+        batches = list(packer.pack(records))
+        assert [record["id"] for record in batches[0]] == ["0", "1", "2"]
+        assert [(record["id"], size) for record, size in oversized] == [("big", MAX_ITEM_BYTES + 9)]
+
+    def test_rejects_limits_below_one_item(self):
+        """Test that max_bytes must leave room for the largest item."""
+        with pytest.raises(ValueError):
+            BatchPacker(max_bytes=1024)
+
+
+class TestLoadersPacking:
+    """Tests for loaders packing against the DynamoDB stand-in."""
+
+    def test_stand_in_rejects_oversized_items(self):
+        """Test that the stand-in fails a request holding an item over 400KB."""
+        with pytest.raises(ClientError) as exc_info:
+            LocalDynamoDB().batch_write_item(
+                RequestItems={"t": [{"PutRequest": {"Item": rows(1, MAX_ITEM_BYTES)[0]}}]}
+            )
+        assert exc_info.value.response["Error"]["Code"] == "ValidationException"
+
+    def test_oversized_rows_are_dead_lettered(self, tmp_path):
+        """Test that an oversized row fails alone, before the wire, and lands in the file."""
+        path = tmp_path / "data.csv"
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "body"])
+            for i in range(100):
+                writer.writerow([f"id-{i}", "x" * (500 * 1024 if i == 42 else 10)])
+        dead_letter = str(tmp_path / "dlq.ddbjson")
+        db = LocalDynamoDB()
+        loader = ThreadedDynamoDBLoader(
+            table_name="t",
+            max_workers=2,
+            session=LocalSession(db),
+            dead_letter_file=dead_letter,
+        )
+        result = loader.load_csv(str(path))
+        assert result.total_records == 100
+        assert result.successful_writes == 99
+        assert result.failed_writes == result.dead_lettered == 1
+        assert db.stats.requests == 4
+        (entry,) = read_dead_letters(dead_letter)
+        assert entry["error_code"] == ITEM_TOO_LARGE
+        assert entry["Item"]["id"] == {"S": "id-42"}
+
+    async def test_request_wcu_limit_splits_large_items(self, tmp_path):
+        """Test that max_request_wcu caps the capacity units of every request."""
+        path = tmp_path / "data.jsonl"
+        path.write_text("".join(f'{{"id": "id-{i}", "body": "{"x" * 3000}"}}\n' for i in range(40)))
+        db = LocalDynamoDB()
+        loader = AsyncDynamoDBLoader(
+            table_name="t",
+            max_workers=2,
+            streaming=True,
+            session=AsyncLocalSession(db),
+            max_request_wcu=12,
+        )
+        result = await loader.load_csv(str(path))
+        assert result.successful_writes == 40
+        # 3 WCUs per item: 4 items per request
+        assert db.stats.requests == 10
@@ -0,0 +1,210 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Unit tests for the low-level BatchWriteItem writer."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+from src.batch_write import BUDGET_EXHAUSTED, UNMATCHED, BatchWriteItemWriter, put_requests
+from src.models import BatchResult, LoadResult
+from src.retry_handler import CircuitBreaker, RetryBudget, RetryHandler
+
+
+def make_writer(max_retries: int = 3, on_throttle=None) -> BatchWriteItemWriter:
+    """Create a writer for table 'test-table'."""
+    return BatchWriteItemWriter(
+        table_name="test-table",
+        retry_handler=RetryHandler(max_retries=max_retries, base_delay=0.0, max_delay=0.0),
+        max_retries=max_retries,
+        on_throttle=on_throttle,
+    )
+
+
+def unprocessed(*items: dict) -> dict:
+    """Build a BatchWriteItem response with the given items unprocessed."""
+    return {"UnprocessedItems": {"test-table": put_requests(list(items))}}
+
+
+class TestBatchWriteItemWriterSync:
+    """Unit tests for BatchWriteItemWriter.write_sync."""
+
+    def test_resubmits_only_unprocessed_items(self):
+        """Test that the second request contains only the unprocessed item."""
+        items = [{"id": str(i)} for i in range(5)]
+        client = MagicMock()
+        client.batch_write_item.side_effect = [unprocessed(items[3]), {"UnprocessedItems": {}}]
+
+        with patch("src.batch_write.time.sleep"):
+            outcome = make_writer().write_sync(client, put_requests(items))
+
+        assert outcome.successful
+        assert outcome.rounds == 2
+        second_request = client.batch_write_item.call_args_list[1].kwargs["RequestItems"]
+        assert second_request == {"test-table": put_requests([items[3]])}
+
+    def test_gives_up_on_item_after_max_retries(self):
+        """Test that an item that keeps coming back unprocessed is reported as failed."""
+        items = [{"id": "ok"}, {"id": "stuck"}]
+        client = MagicMock()
+        client.batch_write_item.side_effect = [
+            unprocessed(items[1]),
+            unprocessed(items[1]),
+            unprocessed(items[1]),
+        ]
+
+        with patch("src.batch_write.time.sleep"):
+            outcome = make_writer(max_retries=2).write_sync(client, put_requests(items))
+
+        assert not outcome.successful
+        assert [p.item for p in outcome.failed] == [{"id": "stuck"}]
+        assert outcome.failed[0].attempts == 3
+        assert outcome.reason == "still unprocessed after 2 retries"
+        assert client.batch_write_item.call_count == 3
+
+    def test_exception_after_partial_progress_fails_only_pending(self):
+        """Test that items written in earlier rounds are not counted as failed."""
+        items = [{"id": str(i)} for i in range(4)]
+        error = ClientError({"Error": {"Code": "ValidationException"}}, "BatchWriteItem")
+        client = MagicMock()
+        client.batch_write_item.side_effect = [unprocessed(items[0], items[1]), error, error]
+
+        with patch("time.sleep"):
+            outcome = make_writer(max_retries=1).write_sync(client, put_requests(items))
+
+        assert outcome.error is error
+        assert [p.item for p in outcome.failed] == [{"id": "0"}, {"id": "1"}]
+
+    def test_resubmits_are_charged_to_retry_budget(self):
+        """Test that unprocessed rounds stop once the shared retry budget is spent."""
+        client = MagicMock()
+        client.batch_write_item.return_value = unprocessed({"id": "stuck"})
+        budget = RetryBudget(ratio=0.0, capacity=2)
+        writer = BatchWriteItemWriter(
+            table_name="test-table",
+            retry_handler=RetryHandler(max_retries=10, base_delay=0.0, budget=budget),
+            max_retries=10,
+        )
+
+        with patch("src.batch_write.time.sleep"):
+            outcome = writer.write_sync(client, put_requests([{"id": "stuck"}]))
+
+        assert [p.item for p in outcome.failed] == [{"id": "stuck"}]
+        assert outcome.reason == BUDGET_EXHAUSTED
+        assert client.batch_write_item.call_count == 3
+        assert budget.denied == 1
+
+    def test_resubmits_earn_no_retry_budget(self):
+        """Test that only the first call of a batch earns retry budget."""
+        client = MagicMock()
+        client.batch_write_item.return_value = unprocessed({"id": "stuck"})
+        budget = RetryBudget(ratio=1.0, capacity=10)
+        while budget.try_spend():
+            pass
+        writer = BatchWriteItemWriter(
+            table_name="test-table",
+            retry_handler=RetryHandler(max_retries=10, base_delay=0.0, budget=budget),
+            max_retries=10,
+        )
+
+        with patch("src.batch_write.time.sleep"):
+            writer.write_sync(client, put_requests([{"id": "stuck"}]))
+
+        # The first call earns one resubmit, and the resubmitted call earns none
+        assert client.batch_write_item.call_count == 2
+
+    def test_program_errors_do_not_open_breaker(self):
+        """Test that only DynamoDB errors count towards opening the circuit breaker."""
+        breaker = CircuitBreaker(failure_threshold=1)
+        writer = BatchWriteItemWriter(
+            table_name="test-table",
+            retry_handler=RetryHandler(max_retries=0, base_delay=0.0, breaker=breaker),
+            max_retries=0,
+        )
+        client = MagicMock()
+        client.batch_write_item.side_effect = TypeError("bad item")
+
+        outcome = writer.write_sync(client, put_requests([{"id": "1"}]))
+
+        assert isinstance(outcome.error, TypeError)
+        assert not breaker.is_open
+
+    def test_unmatched_unprocessed_request_fails_every_pending_item(self):
+        """Test that an UnprocessedItems entry that was never sent fails the whole round."""
+        items = [{"id": str(i)} for i in range(3)]
+        client = MagicMock()
+        client.batch_write_item.side_effect = [unprocessed(items[1], {"id": "never-sent"})]
+
+        outcome = make_writer().write_sync(client, put_requests(items))
+
+        assert [p.index for p in outcome.failed] == [0, 1, 2]
+        assert outcome.reason == UNMATCHED
+        assert client.batch_write_item.call_count == 1
+
+    def test_unprocessed_items_report_throttling(self):
+        """Test that UnprocessedItems trigger the throttle callback."""
+        on_throttle = MagicMock()
+        client = MagicMock()
+        client.batch_write_item.side_effect = [unprocessed({"id": "1"}), {}]
+
+        with patch("src.batch_write.time.sleep"):
+            make_writer(on_throttle=on_throttle).write_sync(client, put_requests([{"id": "1"}]))
+
+        on_throttle.assert_called_once()
+
+
+class TestBatchWriteItemWriterAsync:
+    """Unit tests for BatchWriteItemWriter.write_async."""
+
+    @pytest.mark.asyncio
+    async def test_resubmits_only_unprocessed_items(self):
+        """Test that the async path resubmits only unprocessed items."""
+        items = [{"id": str(i)} for i in range(3)]
+        client = MagicMock()
+        client.batch_write_item = AsyncMock(
+            side_effect=[unprocessed(items[0]), {"UnprocessedItems": {}}]
+        )
+
+        with patch("src.batch_write.asyncio.sleep", new=AsyncMock()):
+            outcome = await make_writer().write_async(client, put_requests(items))
+
+        assert outcome.successful
+        second_request = client.batch_write_item.call_args_list[1].kwargs["RequestItems"]
+        assert second_request == {"test-table": put_requests([items[0]])}
+
+
+class TestPartialBatchAccounting:
+    """Unit tests for LoadResult accounting of partially written batches."""
+
+    def test_partial_batch_counts_only_failed_items(self):
+        """Test that landed items in a failed batch count as successful."""
+        result = LoadResult(
+            total_records=25, successful_writes=0, failed_writes=0, duration_seconds=0.0
+        )
+
+        result.add_batch_result(
+            BatchResult(
+                batch_id=0,
+                items_count=25,
+                successful=False,
+                retry_count=3,
+                error="2 items still unprocessed",
+                failed_items=[{"id": "a"}, {"id": "b"}],
+            )
+        )
+
+        assert result.successful_writes == 23
+        assert result.failed_writes == 2
+        assert result.errors == ["2 items still unprocessed"]
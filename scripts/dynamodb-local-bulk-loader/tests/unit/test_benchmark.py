@@ -0,0 +1,94 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Unit tests for the offline loader benchmark harness."""
+
+import json
+
+import pytest
+
+from src.benchmark import (
+    BenchmarkCase,
+    FaultProfile,
+    find_regressions,
+    run_benchmark,
+    sweep,
+)
+
+
+class TestSweep:
+    """Tests for building benchmark cases."""
+
+    def test_cartesian_product(self):
+        """Test that every combination is produced once."""
+        cases = sweep(["async", "threaded"], [4, 8], [10, 25], [100])
+        assert len(cases) == 8
+        assert len({case.key for case in cases}) == 8
+
+    def test_unknown_loader(self):
+        """Test that unknown loader names are rejected."""
+        with pytest.raises(ValueError, match="Unknown loader"):
+            sweep(["rust"], [4], [25], [100])
+
+
+class TestRunBenchmark:
+    """Tests for running cases against the stand-in."""
+
+    def test_report_is_json_serialisable(self, tmp_path):
+        """Test that every loader completes a small case and the report is JSON."""
+        cases = sweep(["async", "async-stream", "threaded"], [2], [10], [50])
+        report = run_benchmark(
+            cases, FaultProfile(latency=0.0, unprocessed_rate=0.1), data_dir=str(tmp_path)
+        )
+
+        assert [r["case"] for r in report["results"]] == [case.key for case in cases]
+        for r in report["results"]:
+            assert r["successful_writes"] == 50
+            assert r["items_written"] == 50
+            assert r["requests"] >= 5
+            assert r["records_per_second"] > 0
+        assert json.loads(json.dumps(report))["settings"]["unprocessed_rate"] == 0.1
+
+    def test_workload_with_repeated_keys(self, tmp_path):
+        """Test that a skewed workload loads every row as its own item."""
+        cases = sweep(["threaded"], [2], [25], [200])
+        report = run_benchmark(
+            cases, FaultProfile(latency=0.0), data_dir=str(tmp_path), workload="mixed"
+        )
+        assert (tmp_path / "benchmark_200_mixed.csv").exists()
+        result = report["results"][0]
+        assert result["successful_writes"] == result["items_written"] == 200
+        assert report["settings"]["workload"] == "mixed"
+
+
+class TestFindRegressions:
+    """Tests for comparing a report with a baseline."""
+
+    @staticmethod
+    def report(rate):
+        case = BenchmarkCase(loader="async", workers=4, batch_size=25, records=100)
+        return {"results": [{"case": case.key, "records_per_second": rate}]}
+
+    def test_drop_beyond_tolerance(self):
+        """Test that a large throughput drop is reported."""
+        regressions = find_regressions(self.report(700), self.report(1000), tolerance=0.2)
+        assert len(regressions) == 1
+        assert "async/w4/b25/n100" in regressions[0]
+
+    def test_drop_within_tolerance(self):
+        """Test that noise within the tolerance is accepted."""
+        assert find_regressions(self.report(850), self.report(1000), tolerance=0.2) == []
+
+    def test_new_cases_ignored(self):
+        """Test that cases missing from the baseline are not regressions."""
+        assert find_regressions(self.report(10), {"results": []}) == []
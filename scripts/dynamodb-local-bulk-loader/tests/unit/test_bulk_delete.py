@@ -0,0 +1,157 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Unit tests for parallel scans and bulk deletes."""
+
+import pytest
+from botocore.exceptions import ClientError
+
+from src.bulk_delete import BulkDeleter
+from src.local_dynamodb import LocalClient, LocalDynamoDB, LocalSession
+from src.retry_handler import RetryHandler
+from src.scan import ParallelScan
+from src.telemetry import LoadTelemetry
+from src.threaded_loader import ThreadedDynamoDBLoader
+
+
+def filled_db(count, **kwargs):
+    """Stand-in with a composite-key table "t" of ``count`` items."""
+    db = LocalDynamoDB(key_attributes=("pk", "sk"), **kwargs)
+    db.tables["t"] = {
+        (f"p{i % 10}", str(i)): {"pk": f"p{i % 10}", "sk": str(i), "body": "x" * 100}
+        for i in range(count)
+    }
+    return db
+
+
+class TestLocalScan:
+    """Tests for Scan on the DynamoDB stand-in."""
+
+    def test_segments_partition_the_table_and_pages_resume(self):
+        """Test that paging through every segment returns each item exactly once."""
+        db = filled_db(500)
+        seen = []
+        for segment in range(3):
+            params = {"TableName": "t", "Segment": segment, "TotalSegments": 3, "Limit": 40}
+            while True:
+                response = db.scan(**params)
+                assert response["Count"] <= 40
+                seen.extend(response["Items"])
+                if "LastEvaluatedKey" not in response:
+                    break
+                params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        assert sorted(int(item["sk"]["S"]) for item in seen) == list(range(500))
+        assert seen[0]["body"] == {"S": "x" * 100}
+
+    def test_projection_and_consumed_capacity(self):
+        """Test that projected pages hold only keys but are charged for whole items."""
+        response = filled_db(100).scan(
+            TableName="t",
+            ProjectionExpression="#a0, sk",
+            ExpressionAttributeNames={"#a0": "pk"},
+            ReturnConsumedCapacity="TOTAL",
+        )
+        assert all(set(item) == {"pk", "sk"} for item in response["Items"])
+        # 100 items of about 110 bytes: 3 x 4KB, at half an RCU each
+        assert response["ConsumedCapacity"]["CapacityUnits"] == 1.5
+
+    def test_rejects_segment_outside_total(self):
+        """Test that Segment must be below TotalSegments."""
+        with pytest.raises(ClientError):
+            filled_db(1).scan(TableName="t", Segment=2, TotalSegments=2)
+
+
+class TestParallelScan:
+    """Tests for the threaded parallel scan."""
+
+    def test_reads_every_item_once(self):
+        """Test that items from all segments arrive once, with per-segment counts."""
+        scan = ParallelScan(
+            LocalClient(filled_db(2000)), "t", segments=4, attributes=("pk", "sk"), page_size=100
+        )
+        keys = [(item["pk"]["S"], item["sk"]["S"]) for item in scan]
+        assert len(keys) == len(set(keys)) == 2000
+        assert sum(scan.segment_counts) == scan.items == 2000
+        assert all(count > 0 for count in scan.segment_counts)
+        assert scan.consumed_rcu > 0
+
+    def test_retries_throttled_pages(self):
+        """Test that throttled Scan calls are retried."""
+        db = filled_db(300, throttle_rate=0.3, seed=1)
+        retry_handler = RetryHandler(max_retries=20, base_delay=0.0, max_delay=0.0)
+        scan = ParallelScan(
+            LocalClient(db), "t", segments=2, page_size=20, retry_handler=retry_handler
+        )
+        assert len(list(scan)) == 300
+        assert db.stats.throttled_requests > 0
+
+    def test_reraises_segment_errors(self):
+        """Test that a segment failing past its retries fails the iteration."""
+
+        class BrokenClient:
+            def scan(self, **kwargs):
+                raise RuntimeError("connection reset")
+
+        scan = ParallelScan(BrokenClient(), "t", segments=2, retry_handler=RetryHandler(0))
+        with pytest.raises(RuntimeError, match="connection reset"):
+            list(scan)
+
+    def test_stops_when_consumer_leaves_early(self):
+        """Test that closing the scan stops segment threads blocked on a full queue."""
+        scan = ParallelScan(
+            LocalClient(filled_db(1000)), "t", segments=4, page_size=10, max_pages=1
+        )
+        with scan:
+            pages = scan.iter_pages()
+            next(pages)
+            pages.close()
+        assert not any(thread.is_alive() for thread in scan._threads)
+        assert scan.items < 1000
+
+
+class TestBulkDeleter:
+    """Tests for bulk deletes against the DynamoDB stand-in."""
+
+    def test_empties_table_despite_faults(self):
+        """Test that every item is deleted through throttling and unprocessed items."""
+        db = filled_db(3000, throttle_rate=0.05, unprocessed_rate=0.05, seed=7)
+        telemetry = LoadTelemetry()
+        deleter = BulkDeleter(
+            "t",
+            segments=4,
+            max_workers=4,
+            max_retries=10,
+            session=LocalSession(db),
+            telemetry=telemetry,
+        )
+        deleter.loader.retry_handler.max_delay = 0.0
+        result = deleter.delete_all()
+        assert result.total_records == result.successful_writes == 3000
+        assert result.failed_writes == 0
+        assert db.item_count("t") == 0
+        assert telemetry.items_written == 3000
+        assert deleter.scan.items == 3000
+
+    def test_empty_table(self):
+        """Test that deleting from an empty table does nothing."""
+        result = BulkDeleter("t", session=LocalSession(filled_db(0))).delete_all()
+        assert result.total_records == 0
+
+    def test_loader_put_operation_writes_records(self):
+        """Test that write_stream writes a stream of Python records."""
+        db = LocalDynamoDB()
+        loader = ThreadedDynamoDBLoader("t", max_workers=2, session=LocalSession(db))
+        result = loader.write_stream({"id": str(i)} for i in range(60))
+        assert result.successful_writes == db.item_count("t") == 60
+        with pytest.raises(ValueError):
+            loader.write_stream([], operation="update")
@@ -0,0 +1,316 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Unit tests for the checkpoint journal and resumable loads."""
+
+import json
+from array import array
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.async_loader import AsyncDynamoDBLoader
+from src.checkpoint import (
+    ROW_ID_KEY,
+    CheckpointJournal,
+    _sorted_unique,
+    pop_row_ids,
+    tag_rows,
+    written_row_ids,
+)
+from src.process_loader import _load_range, _RangeTask, split_byte_ranges
+from src.shuffle import IndexShuffle
+from src.threaded_loader import ThreadedDynamoDBLoader
+
+
+@pytest.fixture
+def csv_file(write_csv):
+    """CSV file with 40 rows."""
+    return write_csv({"id": str(i), "name": f"test{i}"} for i in range(40))
+
+
+def rejecting_client(written, rejected_ids):
+    """Client mock that stores items and leaves rejected_ids unprocessed."""
+
+    def batch_write_item(RequestItems):
+        unprocessed = []
+        for request in RequestItems["test-table"]:
+            item = request["PutRequest"]["Item"]
+            assert ROW_ID_KEY not in item
+            if item["id"] in rejected_ids:
+                unprocessed.append(request)
+            else:
+                written.append(item["id"])
+        return {"UnprocessedItems": {"test-table": unprocessed} if unprocessed else {}}
+
+    return batch_write_item
+
+
+class TestCheckpointJournal:
+    """Unit tests for CheckpointJournal."""
+
+    def test_round_trip(self, csv_file, tmp_path):
+        """Test that recorded ids are read back sorted and deduplicated."""
+        path = str(tmp_path / "load.ckpt")
+        journal = CheckpointJournal(path, csv_file)
+        journal.start()
+        journal.record([5, 1, 3])
+        journal.record([3, 9])
+        journal.close()
+
+        assert list(CheckpointJournal(path, csv_file).load_completed()) == [1, 3, 5, 9]
+
+    def test_sorted_unique_merges_runs(self):
+        """Test that ids sorted in several runs are merged without duplicates."""
+        ids = array("Q", [9, 3, 7, 3, 1, 9, 2, 8, 1, 5])
+
+        assert list(_sorted_unique(ids, run_length=3)) == [1, 2, 3, 5, 7, 8, 9]
+
+    def test_add_buffers_until_flushed(self, csv_file, tmp_path):
+        """Test that add never writes and reports when a flush is due."""
+        path = str(tmp_path / "load.ckpt")
+        journal = CheckpointJournal(path, csv_file, flush_interval=0)
+        journal.start()
+
+        assert journal.add([4, 2]) is True
+        assert list(CheckpointJournal(path, csv_file).load_completed()) == []
+        journal.flush()
+        assert list(CheckpointJournal(path, csv_file).load_completed()) == [2, 4]
+        journal.close()
+
+    def test_torn_entry_is_ignored(self, csv_file, tmp_path):
+        """Test that a partial trailing entry from a crash is dropped."""
+        path = str(tmp_path / "load.ckpt")
+        journal = CheckpointJournal(path, csv_file)
+        journal.start()
+        journal.record([7])
+        journal.close()
+        with open(path, "ab") as f:
+            f.write(b"\x01\x02\x03")
+
+        assert list(CheckpointJournal(path, csv_file).load_completed()) == [7]
+
+    def test_buffered_until_flush_interval(self, csv_file, tmp_path):
+        """Test that ids are only appended once the flush interval has passed."""
+        path = str(tmp_path / "load.ckpt")
+        journal = CheckpointJournal(path, csv_file, flush_interval=3600)
+        journal.start()
+        journal.record([1, 2])
+
+        assert list(CheckpointJournal(path, csv_file).load_completed()) == []
+        journal.close()
+        assert list(CheckpointJournal(path, csv_file).load_completed()) == [1, 2]
+
+    def test_resume_rejects_other_source(self, csv_file, tmp_path):
+        """Test that a journal written for another file is not reused."""
+        path = str(tmp_path / "load.ckpt")
+        journal = CheckpointJournal(path, csv_file)
+        journal.start()
+        journal.close()
+
+        other = tmp_path / "other.csv"
+        other.write_text("id\n1\n")
+        with pytest.raises(ValueError, match="different source"):
+            CheckpointJournal(path, str(other)).start(resume=True)
+
+    def test_skip_completed(self, csv_file, tmp_path):
+        """Test that completed rows are dropped and counted."""
+        journal = CheckpointJournal(str(tmp_path / "load.ckpt"), csv_file)
+        journal.completed.extend([0, 2, 3, 9])
+        records = tag_rows({"id": str(i)} for i in range(6))
+
+        remaining = [r["id"] for r in journal.skip_completed(records)]
+
+        assert remaining == ["1", "4", "5"]
+        assert journal.skipped == 3
+
+    def test_written_row_ids_excludes_failed_items(self):
+        """Test that only rows DynamoDB accepted are journaled."""
+        items = list(tag_rows({"id": str(i)} for i in range(4)))
+        row_ids = pop_row_ids(items)
+
+        assert all(ROW_ID_KEY not in item for item in items)
+        assert written_row_ids(items, row_ids, [items[1], items[3]]) == [0, 2]
+        assert written_row_ids(items, row_ids, []) == [0, 1, 2, 3]
+
+
+class TestResumableLoads:
+    """Unit tests for interrupted and resumed loads."""
+
+    def test_threaded_resume_writes_only_remaining_rows(self, csv_file, tmp_path):
+        """Test that a resumed load skips rows a previous run wrote."""
+        checkpoint = str(tmp_path / "load.ckpt")
+        first, second = [], []
+
+        with patch("boto3.Session") as mock_session:
+            mock_table = MagicMock()
+            mock_session.return_value.resource.return_value.Table.return_value = mock_table
+
+            mock_table.meta.client.batch_write_item.side_effect = rejecting_client(
+                first, {"3", "17", "38"}
+            )
+            result = ThreadedDynamoDBLoader(
+                table_name="test-table",
+                max_workers=3,
+                batch_size=5,
+                max_retries=0,
+                checkpoint_file=checkpoint,
+            ).load_csv(csv_file)
+            assert result.failed_writes == 3
+
+            mock_table.meta.client.batch_write_item.side_effect = rejecting_client(second, set())
+            result = ThreadedDynamoDBLoader(
+                table_name="test-table",
+                max_workers=3,
+                batch_size=5,
+                checkpoint_file=checkpoint,
+                resume=True,
+            ).load_csv(csv_file)
+
+        assert sorted(second, key=int) == ["3", "17", "38"]
+        assert result.skipped_records == 37
+        assert result.total_records == 3
+        assert result.successful_writes == 3
+
+    def test_threaded_index_shuffle_resume(self, csv_file, tmp_path):
+        """Test that an index-shuffled load journals byte offsets and resumes from them."""
+        checkpoint = str(tmp_path / "load.ckpt")
+        first, second = [], []
+
+        with patch("boto3.Session") as mock_session:
+            mock_table = MagicMock()
+            mock_session.return_value.resource.return_value.Table.return_value = mock_table
+
+            for written, rejected, resume in ((first, {"3", "38"}, False), (second, set(), True)):
+                mock_table.meta.client.batch_write_item.side_effect = rejecting_client(
+                    written, rejected
+                )
+                result = ThreadedDynamoDBLoader(
+                    table_name="test-table",
+                    max_workers=3,
+                    batch_size=5,
+                    max_retries=0,
+                    shuffle=IndexShuffle(seed=1),
+                    checkpoint_file=checkpoint,
+                    resume=resume,
+                ).load_csv(csv_file)
+
+        assert sorted(first, key=int) != first
+        assert sorted(second, key=int) == ["3", "38"]
+        assert result.skipped_records == 38
+        with open(checkpoint, "rb") as f:
+            assert json.loads(f.readline())["ids"] == "offset"
+
+    @pytest.mark.asyncio
+    async def test_async_index_shuffle_streams(self, csv_file, tmp_path):
+        """Test that the async loader reads through the index instead of into memory."""
+        written = []
+
+        async def batch_write_item(RequestItems):
+            return rejecting_client(written, set())(RequestItems)
+
+        with patch("aioboto3.Session") as mock_session:
+            mock_table = MagicMock()
+            mock_table.meta.client.batch_write_item = batch_write_item
+            mock_resource = AsyncMock()
+            mock_resource.__aenter__ = AsyncMock(return_value=mock_resource)
+            mock_resource.__aexit__ = AsyncMock(return_value=None)
+            mock_resource.Table = AsyncMock(return_value=mock_table)
+            mock_session.return_value.resource.return_value = mock_resource
+
+            loader = AsyncDynamoDBLoader(
+                table_name="test-table", batch_size=4, shuffle=IndexShuffle(seed=1)
+            )
+            with patch.object(loader, "_read_csv", side_effect=AssertionError):
+                result = await loader.load_csv(csv_file)
+
+        assert result.successful_writes == 40
+        assert sorted(written, key=int) == [str(i) for i in range(40)]
+        assert sorted(written, key=int) != written
+
+    @pytest.mark.asyncio
+    async def test_async_streaming_resume(self, csv_file, tmp_path):
+        """Test that the streaming async path journals and resumes."""
+        checkpoint = str(tmp_path / "load.ckpt")
+        journal = CheckpointJournal(checkpoint, csv_file)
+        journal.start()
+        journal.record(range(0, 40, 2))
+        journal.close()
+        written = []
+
+        async def batch_write_item(RequestItems):
+            return rejecting_client(written, set())(RequestItems)
+
+        with patch("aioboto3.Session") as mock_session:
+            mock_table = MagicMock()
+            mock_table.meta.client.batch_write_item = batch_write_item
+            mock_resource = AsyncMock()
+            mock_resource.__aenter__ = AsyncMock(return_value=mock_resource)
+            mock_resource.__aexit__ = AsyncMock(return_value=None)
+            mock_resource.Table = AsyncMock(return_value=mock_table)
+            mock_session.return_value.resource.return_value = mock_resource
+
+            result = await AsyncDynamoDBLoader(
+                table_name="test-table",
+                batch_size=4,
+                streaming=True,
+                checkpoint_file=checkpoint,
+                resume=True,
+            ).load_csv(csv_file)
+
+        assert sorted(written, key=int) == [str(i) for i in range(1, 40, 2)]
+        assert result.skipped_records == 20
+        assert list(CheckpointJournal(checkpoint, csv_file).load_completed()) == list(range(40))
+
+    def test_process_range_resume_by_byte_offset(self, csv_file, tmp_path):
+        """Test that process workers journal byte offsets and skip them on resume."""
+        checkpoint = str(tmp_path / "load.ckpt")
+        fieldnames, ranges = split_byte_ranges(csv_file, 2)
+        CheckpointJournal(checkpoint, csv_file, id_kind="offset").start()
+
+        def run(rejected, resume):
+            written = []
+
+            async def batch_write_item(RequestItems):
+                return rejecting_client(written, rejected)(RequestItems)
+
+            with patch("aioboto3.Session") as mock_session:
+                mock_table = MagicMock()
+                mock_table.meta.client.batch_write_item = batch_write_item
+                mock_resource = AsyncMock()
+                mock_resource.__aenter__ = AsyncMock(return_value=mock_resource)
+                mock_resource.__aexit__ = AsyncMock(return_value=None)
+                mock_resource.Table = AsyncMock(return_value=mock_table)
+                mock_session.return_value.resource.return_value = mock_resource
+                for start, end in ranges:
+                    _load_range(
+                        _RangeTask(
+                            csv_file=csv_file,
+                            start=start,
+                            end=end,
+                            fieldnames=fieldnames,
+                            table_name="test-table",
+                            region="us-east-1",
+                            workers=2,
+                            batch_size=5,
+                            max_retries=0,
+                            shuffle_window=10,
+                            seed=None,
+                            checkpoint_file=checkpoint,
+                            resume=resume,
+                        )
+                    )
+            return written
+
+        assert len(run({"5", "30"}, resume=False)) == 38
+        assert sorted(run(set(), resume=True), key=int) == ["5", "30"]
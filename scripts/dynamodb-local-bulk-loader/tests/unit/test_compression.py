@@ -0,0 +1,147 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Unit tests for compressed input."""
+
+import bz2
+import gzip
+import json
+
+import pytest
+
+from src.async_loader import AsyncDynamoDBLoader
+from src.compression import (
+    ThreadedDecompressor,
+    detect_compression,
+    estimate_uncompressed_size,
+    open_input,
+    strip_compression_suffix,
+)
+from src.local_dynamodb import AsyncLocalSession, LocalDynamoDB, LocalSession
+from src.process_loader import ProcessPoolDynamoDBLoader
+from src.readers import CsvReader, JsonLinesReader, reader_for
+from src.skew import analyze_csv
+from src.telemetry import estimate_csv_rows
+from src.threaded_loader import ThreadedDynamoDBLoader
+
+CSV_TEXT = "id,name\n" + "".join(f"id-{i},name-{i}\n" for i in range(2000))
+
+
+@pytest.fixture
+def gzip_csv(tmp_path):
+    """gzip-compressed CSV with 2,000 rows."""
+    path = tmp_path / "data.csv.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(CSV_TEXT)
+    return str(path)
+
+
+class TestDetection:
+    """Tests for detecting compression."""
+
+    def test_by_extension_and_magic_bytes(self, tmp_path, gzip_csv):
+        """Test that compression is found from the extension or the first bytes."""
+        assert detect_compression(gzip_csv) == "gzip"
+        unnamed = tmp_path / "data.bin"
+        unnamed.write_bytes(bz2.compress(b"id\n1\n"))
+        assert detect_compression(str(unnamed)) == "bz2"
+        plain = tmp_path / "data.csv"
+        plain.write_text(CSV_TEXT)
+        assert detect_compression(str(plain)) is None
+
+    def test_reader_ignores_compression_suffix(self, tmp_path):
+        """Test that readers are picked from the extension under the compression one."""
+        assert strip_compression_suffix("data.jsonl.zst") == "data.jsonl"
+        assert isinstance(reader_for("data.jsonl.gz"), JsonLinesReader)
+        assert isinstance(reader_for("data.csv.bz2"), CsvReader)
+
+
+class TestOpenInput:
+    """Tests for reading compressed files through the background thread."""
+
+    @pytest.mark.parametrize("suffix, compress", [(".gz", gzip.compress), (".bz2", bz2.compress)])
+    def test_round_trip(self, tmp_path, suffix, compress):
+        """Test that the decompressed text matches the original."""
+        path = tmp_path / f"data.csv{suffix}"
+        path.write_bytes(compress(CSV_TEXT.encode()))
+        with open_input(str(path), newline="") as f:
+            assert f.read() == CSV_TEXT
+
+    def test_small_chunks_and_queue(self, gzip_csv):
+        """Test that content survives chunks smaller than the reads."""
+        with ThreadedDecompressor(gzip_csv, chunk_size=7, max_chunks=2) as raw:
+            assert raw.read().decode() == CSV_TEXT
+
+    def test_corrupt_input_raises_in_reader(self, tmp_path):
+        """Test that a decompression error reaches the reading thread."""
+        path = tmp_path / "bad.csv.gz"
+        path.write_bytes(gzip.compress(CSV_TEXT.encode())[:200] + b"\x00" * 100)
+        with pytest.raises((OSError, EOFError)):
+            with open_input(str(path)) as f:
+                f.read()
+
+    def test_close_stops_thread(self, tmp_path):
+        """Test that closing early stops a thread blocked on a full queue."""
+        path = tmp_path / "big.csv.gz"
+        path.write_bytes(gzip.compress(b"x" * 5_000_000))
+        raw = ThreadedDecompressor(str(path), chunk_size=1024, max_chunks=2)
+        assert raw.read(10) == b"x" * 10
+        raw.close()
+        assert not raw._thread.is_alive()
+
+    def test_zstd(self, tmp_path):
+        """Test zstd input when a zstd implementation is available."""
+        zstandard = pytest.importorskip("zstandard")
+        path = tmp_path / "data.csv.zst"
+        path.write_bytes(zstandard.ZstdCompressor().compress(CSV_TEXT.encode()))
+        with open_input(str(path), newline="") as f:
+            assert f.read() == CSV_TEXT
+
+
+class TestCompressedLoads:
+    """Tests for loading and analyzing compressed files."""
+
+    def test_estimates(self, tmp_path, gzip_csv):
+        """Test that row estimates use the uncompressed size."""
+        plain = tmp_path / "data.csv"
+        plain.write_text(CSV_TEXT)
+        assert estimate_uncompressed_size(gzip_csv) == len(CSV_TEXT)
+        assert estimate_csv_rows(gzip_csv) == estimate_csv_rows(str(plain))
+
+    def test_threaded_loader_and_skew(self, gzip_csv):
+        """Test that a gzip CSV loads and analyzes like the plain file."""
+        db = LocalDynamoDB()
+        loader = ThreadedDynamoDBLoader(table_name="t", max_workers=2, session=LocalSession(db))
+        result = loader.load_csv(gzip_csv)
+        assert result.successful_writes == 2000
+        assert db.tables["t"][("id-7",)]["name"] == "name-7"
+        assert analyze_csv(gzip_csv).total_records == 2000
+
+    async def test_async_streaming_loads_jsonl_bz2(self, tmp_path):
+        """Test a streamed load of bzip2 JSON Lines."""
+        path = tmp_path / "data.jsonl.bz2"
+        lines = "".join(json.dumps({"id": f"id-{i}", "n": i}) + "\n" for i in range(500))
+        path.write_bytes(bz2.compress(lines.encode()))
+        db = LocalDynamoDB()
+        loader = AsyncDynamoDBLoader(
+            table_name="t", max_workers=2, streaming=True, session=AsyncLocalSession(db)
+        )
+        result = await loader.load_csv(str(path))
+        assert result.successful_writes == 500
+        assert db.item_count("t") == 500
+
+    def test_process_loader_rejects_compressed(self, gzip_csv):
+        """Test that the byte-range loader refuses compressed input."""
+        loader = ProcessPoolDynamoDBLoader(table_name="t", num_processes=1)
+        with pytest.raises(ValueError, match="byte ranges"):
+            loader.load_csv(gzip_csv)
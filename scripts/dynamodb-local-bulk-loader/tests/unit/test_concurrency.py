@@ -0,0 +1,170 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Unit tests for adaptive (AIMD) concurrency control."""
+
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from botocore.exceptions import ClientError
+
+from src.concurrency import AIMDController, AsyncAdaptiveLimiter, ThreadAdaptiveLimiter
+from src.threaded_loader import ThreadedDynamoDBLoader
+
+
+class TestAIMDController:
+    """Unit tests for AIMDController."""
+
+    def test_additive_increase_per_round(self):
+        """Test that one round of successes (limit successes) adds about one slot."""
+        controller = AIMDController(initial_limit=4, max_limit=100)
+
+        for _ in range(5):
+            controller.on_success()
+        assert controller.limit == 5
+
+        for _ in range(5):
+            controller.on_success()
+        assert controller.limit == 6
+
+    def test_increase_is_capped(self):
+        """Test that the limit never exceeds max_limit."""
+        controller = AIMDController(initial_limit=8, max_limit=10)
+
+        for _ in range(1000):
+            controller.on_success()
+
+        assert controller.limit == 10
+
+    def test_multiplicative_decrease(self):
+        """Test that throttling halves the limit."""
+        controller = AIMDController(initial_limit=40, max_limit=64, cooldown=0)
+
+        controller.on_throttle()
+
+        assert controller.limit == 20
+        assert controller.throttle_events == 1
+
+    def test_decrease_respects_min_limit(self):
+        """Test that the limit never drops below min_limit."""
+        controller = AIMDController(initial_limit=4, min_limit=2, cooldown=0)
+
+        for _ in range(10):
+            controller.on_throttle()
+
+        assert controller.limit == 2
+
+    def test_cooldown_coalesces_throttle_bursts(self):
+        """Test that a burst of throttles within the cooldown cuts the limit once."""
+        controller = AIMDController(initial_limit=32, max_limit=64, cooldown=60)
+
+        for _ in range(5):
+            controller.on_throttle()
+
+        assert controller.limit == 16
+        assert controller.throttle_events == 5
+
+    def test_invalid_parameters(self):
+        """Test parameter validation."""
+        with pytest.raises(ValueError, match="decrease_factor"):
+            AIMDController(initial_limit=1, decrease_factor=1.5)
+        with pytest.raises(ValueError, match="max_limit must be >= min_limit"):
+            AIMDController(initial_limit=1, max_limit=1, min_limit=2)
+
+
+class TestAdaptiveLimiters:
+    """Unit tests for the async and thread limiters."""
+
+    @pytest.mark.asyncio
+    async def test_async_limiter_bounds_in_flight(self):
+        """Test that no more than limit coroutines hold the async limiter."""
+        controller = AIMDController(initial_limit=3, max_limit=3)
+        limiter = AsyncAdaptiveLimiter(controller)
+        peak = 0
+
+        async def task():
+            nonlocal peak
+            async with limiter:
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(task() for _ in range(20)))
+
+        assert peak == 3
+        assert limiter.in_flight == 0
+
+    def test_thread_limiter_bounds_in_flight(self):
+        """Test that no more than limit threads hold the thread limiter."""
+        controller = AIMDController(initial_limit=2, max_limit=2)
+        limiter = ThreadAdaptiveLimiter(controller)
+        peak = 0
+        lock = threading.Lock()
+
+        def task():
+            nonlocal peak
+            with limiter:
+                with lock:
+                    peak = max(peak, limiter.in_flight)
+                time.sleep(0.01)
+
+        threads = [threading.Thread(target=task) for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert peak == 2
+        assert limiter.in_flight == 0
+
+
+class TestLoaderThrottlingFeedback:
+    """Test that loaders feed throttling errors into the controller."""
+
+    def test_threaded_write_batch_reports_throttling(self):
+        """Test that a throttled write lowers the adaptive limit."""
+        loader = ThreadedDynamoDBLoader(
+            table_name="test-table", max_workers=8, max_retries=0, adaptive_concurrency=True
+        )
+        loader._create_limiter()
+        loader.concurrency_controller.cooldown = 0
+
+        mock_table = MagicMock()
+        mock_table.meta.client.batch_write_item.side_effect = ClientError(
+            {"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "x"}},
+            "BatchWriteItem",
+        )
+
+        result = loader._write_batch(mock_table, 0, [{"id": "1"}])
+
+        assert result.successful is False
+        assert loader.concurrency_controller.limit == 4
+        assert loader.concurrency_controller.throttle_events == 1
+
+    def test_adaptive_mode_sizes_pool_for_ceiling(self):
+        """Test that adaptive mode uses max_concurrency as the slot count."""
+        loader = ThreadedDynamoDBLoader(
+            table_name="test-table", max_workers=4, adaptive_concurrency=True, max_concurrency=32
+        )
+
+        assert loader._concurrency_slots() == 32
+        assert loader.boto_config.max_pool_connections == 37
+
+    def test_max_concurrency_below_workers_rejected(self):
+        """Test that max_concurrency below max_workers is rejected."""
+        with pytest.raises(ValueError, match="max_concurrency must be >= max_workers"):
+            ThreadedDynamoDBLoader(
+                table_name="test-table", max_workers=8, adaptive_concurrency=True, max_concurrency=4
+            )
@@ -20,13 +20,22 @@ of the CSVGenerator class.
 import csv
 import tempfile
 import uuid
+from collections import Counter
 from datetime import datetime
 from decimal import Decimal
 from pathlib import Path
 
 import pytest
 
-from src.csv_generator import CSVGenerator
+from src.csv_generator import (
+    DEFAULT_CHUNK_BYTES,
+    DEFAULT_CHUNK_SIZE,
+    MAX_DESCRIPTION_BYTES,
+    CSVGenerator,
+    WorkloadProfile,
+    get_workload_profile,
+)
+from src.readers import CsvReader
 
 
 class TestCSVGeneratorEdgeCases:
@@ -346,3 +355,133 @@ class TestCSVGeneratorDataQuality:
 
         finally:
             Path(tmp_path).unlink(missing_ok=True)
+
+
+class TestCSVGeneratorChunks:
+    """Test chunked and parallel generation."""
+
+    def test_rows_continue_across_chunks(self, tmp_path) -> None:
+        """Test that chunks add up to the requested count with sorted, unique rows."""
+        path = tmp_path / "chunks.csv"
+        CSVGenerator(output_file=str(path), num_records=250, chunk_size=40).generate()
+
+        with open(path, encoding="utf-8") as csvfile:
+            records = list(csv.DictReader(csvfile))
+
+        assert len(records) == 250
+        timestamps = [datetime.fromisoformat(record["timestamp"]) for record in records]
+        assert timestamps == sorted(set(timestamps))
+        assert (timestamps[-1] - timestamps[0]).total_seconds() == 249
+        ids = {record["id"] for record in records}
+        assert len(ids) == 250
+        assert all(uuid.UUID(id_value).version == 4 for id_value in ids)
+
+    def test_same_file_for_any_worker_count(self, tmp_path) -> None:
+        """Test that a seeded file does not depend on the number of worker processes."""
+        serial = tmp_path / "serial.csv"
+        parallel = tmp_path / "parallel.csv"
+        CSVGenerator(str(serial), num_records=300, chunk_size=64, seed=7).generate()
+        CSVGenerator(str(parallel), num_records=300, chunk_size=64, seed=7, workers=2).generate()
+        assert serial.read_bytes() == parallel.read_bytes()
+
+        other = tmp_path / "other.csv"
+        CSVGenerator(str(other), num_records=300, chunk_size=64, seed=8).generate()
+        assert other.read_bytes() != serial.read_bytes()
+
+    def test_invalid_settings(self, tmp_path) -> None:
+        """Test that workers and chunk_size must be positive."""
+        with pytest.raises(ValueError, match="workers"):
+            CSVGenerator(str(tmp_path / "x.csv"), workers=0)
+        with pytest.raises(ValueError, match="chunk_size"):
+            CSVGenerator(str(tmp_path / "x.csv"), chunk_size=0)
+
+
+def read_rows(path) -> list[dict[str, str]]:
+    """Read every row of a generated CSV file with the loaders' CSV reader."""
+    return list(CsvReader().iter_records(str(path)))
+
+
+class TestWorkloadProfiles:
+    """Test key skew, sort key fan-out, item sizes and bursts."""
+
+    def test_zipf_keys_skew_towards_hottest(self, tmp_path) -> None:
+        """Test that Zipfian keys repeat with the lowest ranks hottest and items stay distinct."""
+        path = tmp_path / "zipf.csv"
+        profile = WorkloadProfile(partition_keys=100, key_skew=1.2)
+        CSVGenerator(str(path), num_records=2000, chunk_size=300, seed=1, profile=profile).generate()
+
+        rows = read_rows(path)
+        assert list(rows[0]) == profile.fieldnames
+        counts = Counter(row["id"] for row in rows)
+        assert len(counts) <= 100
+        assert counts.most_common(1)[0][0] == "key-00"
+        assert counts["key-00"] > 10 * counts.get("key-50", 1)
+        assert len({(row["id"], row["sk"]) for row in rows}) == 2000
+
+    def test_chunks_of_large_items_are_capped_by_bytes(self, tmp_path) -> None:
+        """Test that profiles with large items get fewer rows per chunk."""
+        profile = get_workload_profile("large-items")
+        generator = CSVGenerator(str(tmp_path / "x.csv"), seed=1, profile=profile)
+        path = tmp_path / "large.csv"
+        CSVGenerator(str(path), num_records=2000, seed=1, profile=profile).generate()
+
+        assert generator.chunk_size * profile.expected_row_bytes <= DEFAULT_CHUNK_BYTES
+        assert CSVGenerator(str(tmp_path / "y.csv")).chunk_size == DEFAULT_CHUNK_SIZE
+        assert path.stat().st_size / 2000 == pytest.approx(profile.expected_row_bytes, rel=0.2)
+
+    def test_sort_keys_stay_grouped_across_chunks(self, tmp_path) -> None:
+        """Test that each partition key gets its full run of rows, even with odd chunk sizes."""
+        path = tmp_path / "fanout.csv"
+        profile = WorkloadProfile(sort_keys_per_partition=5)
+        CSVGenerator(str(path), num_records=103, chunk_size=7, seed=1, profile=profile).generate()
+
+        ids = [row["id"] for row in read_rows(path)]
+        groups = [ids[i : i + 5] for i in range(0, len(ids), 5)]
+        assert all(len(set(group)) == 1 for group in groups)
+        assert len({group[0] for group in groups}) == len(groups) == 21
+
+    def test_item_sizes_are_log_normal_and_capped(self, tmp_path) -> None:
+        """Test that description sizes spread around the median without passing the item limit."""
+        path = tmp_path / "sizes.csv"
+        profile = WorkloadProfile(item_size_median=2000, item_size_sigma=2.5)
+        CSVGenerator(str(path), num_records=400, seed=3, profile=profile).generate()
+
+        sizes = sorted(len(row["description"].encode("utf-8")) for row in read_rows(path))
+        assert 1000 < sizes[len(sizes) // 2] < 4000
+        assert sizes[0] < 200
+        assert sizes[-1] == MAX_DESCRIPTION_BYTES
+
+    def test_bursts_hit_one_key_within_milliseconds(self, tmp_path) -> None:
+        """Test that burst rows share one key and are 1ms apart, even across a chunk boundary."""
+        path = tmp_path / "bursty.csv"
+        profile = WorkloadProfile(burst_every=50, burst_rows=20)
+        CSVGenerator(str(path), num_records=100, chunk_size=40, seed=1, profile=profile).generate()
+
+        rows = read_rows(path)
+        timestamps = [datetime.fromisoformat(row["timestamp"]) for row in rows]
+        assert timestamps == sorted(set(timestamps))
+        burst = rows[30:50]
+        assert len({row["id"] for row in burst}) == 1
+        assert (timestamps[49] - timestamps[30]).total_seconds() == pytest.approx(0.019)
+        assert (timestamps[50] - timestamps[49]).total_seconds() == pytest.approx(0.001)
+        assert len({row["id"] for row in rows[:30]}) == 30
+        assert rows[80]["id"] != rows[30]["id"]
+
+    def test_invalid_profiles(self) -> None:
+        """Test that inconsistent profile settings and unknown names are rejected."""
+        with pytest.raises(ValueError, match="burst_rows"):
+            WorkloadProfile(burst_every=10, burst_rows=10)
+        with pytest.raises(ValueError, match="item_size_median"):
+            WorkloadProfile(item_size_median=MAX_DESCRIPTION_BYTES + 1)
+        with pytest.raises(ValueError, match="Unknown workload profile"):
+            get_workload_profile("hot")
+        assert get_workload_profile("uniform").fieldnames == [
+            "id",
+            "timestamp",
+            "category",
+            "user_name",
+            "email",
+            "amount",
+            "status",
+            "description",
+        ]
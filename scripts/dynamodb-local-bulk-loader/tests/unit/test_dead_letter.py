@@ -0,0 +1,140 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Unit tests for the dead-letter file and replay."""
+
+import os
+
+import pytest
+
+from src.async_loader import AsyncDynamoDBLoader
+from src.dead_letter import (
+    UNPROCESSED,
+    DeadLetter,
+    DeadLetterFile,
+    read_dead_letters,
+    summarize,
+)
+from src.local_dynamodb import AsyncLocalSession, LocalDynamoDB, LocalSession
+from src.readers import DynamoDBJsonReader
+from src.schema import ItemSchema
+from src.threaded_loader import ThreadedDynamoDBLoader
+
+
+@pytest.fixture
+def csv_file(write_csv):
+    """CSV with 530 rows."""
+    return write_csv({"id": f"id-{i}", "amount": str(i)} for i in range(530))
+
+
+class TestDeadLetterFile:
+    """Tests for writing and reading dead letters."""
+
+    def test_binary_round_trip_through_reader(self, tmp_path):
+        """Test that entries are DynamoDB JSON the export reader reads back."""
+        path = str(tmp_path / "dlq.ddbjson")
+        entry = DeadLetter(
+            item={"id": {"S": "a"}, "blob": {"B": b"\x00\xff"}, "n": {"N": "1"}},
+            error_code="ValidationException",
+            error="bad item",
+            attempts=2,
+            batch_id=7,
+        )
+        dead_letters = DeadLetterFile(path)
+        dead_letters.write([entry])
+        dead_letters.close()
+        assert list(DynamoDBJsonReader().iter_records(path)) == [entry.item]
+        assert next(read_dead_letters(path))["attempts"] == 2
+        assert summarize(path) == {"ValidationException": 1}
+
+    def test_created_only_on_failure(self, tmp_path, csv_file):
+        """Test that a clean load removes the previous file and creates none."""
+        path = tmp_path / "dlq.ddbjson"
+        path.write_text("stale\n")
+        loader = ThreadedDynamoDBLoader(
+            table_name="t",
+            max_workers=2,
+            session=LocalSession(LocalDynamoDB()),
+            dead_letter_file=str(path),
+        )
+        result = loader.load_csv(csv_file)
+        assert result.failed_writes == 0
+        assert result.dead_lettered == 0
+        assert not path.exists()
+
+
+class TestLoadersDeadLetter:
+    """Tests for loaders writing failed items and replaying them."""
+
+    async def test_unprocessed_items_are_dead_lettered_and_replayed(self, tmp_path, csv_file):
+        """Test that exhausted items land in the file and a replay writes exactly them."""
+        path = str(tmp_path / "dlq.ddbjson")
+        db = LocalDynamoDB(unprocessed_rate=0.5, seed=1)
+        loader = ThreadedDynamoDBLoader(
+            table_name="t",
+            max_workers=2,
+            max_retries=1,
+            session=LocalSession(db),
+            schema=ItemSchema({"amount": "N"}),
+            dead_letter_file=path,
+        )
+        loader.retry_handler.max_delay = 0.0
+        result = loader.load_csv(csv_file)
+        assert 0 < result.failed_writes == result.dead_lettered
+        entries = list(read_dead_letters(path))
+        assert len(entries) == result.failed_writes
+        assert {entry["error_code"] for entry in entries} == {UNPROCESSED}
+        assert {entry["error"] for entry in entries} == {"still unprocessed after 1 retries"}
+        assert {entry["attempts"] for entry in entries} == {2}
+        assert entries[0]["Item"]["amount"].keys() == {"N"}
+        assert db.item_count("t") == 530 - result.failed_writes
+
+        db.unprocessed_rate = 0.0
+        stored = db.stats.items_written
+        replay = AsyncDynamoDBLoader(
+            table_name="t",
+            max_workers=2,
+            streaming=True,
+            session=AsyncLocalSession(db),
+            reader=DynamoDBJsonReader(),
+            dead_letter_file=str(tmp_path / "again.ddbjson"),
+        )
+        replayed = await replay.load_csv(path)
+        assert replayed.successful_writes == result.failed_writes
+        assert db.stats.items_written - stored == result.failed_writes
+        assert db.item_count("t") == 530
+        assert db.tables["t"][("id-3",)]["amount"] == {"N": "3"}
+
+    async def test_raised_batch_counts_its_own_size(self, tmp_path, csv_file):
+        """Test that a batch that raises counts and dead-letters its items, not batch_size."""
+        path = str(tmp_path / "dlq.ddbjson")
+        loader = AsyncDynamoDBLoader(
+            table_name="t",
+            max_workers=2,
+            batch_size=25,
+            session=AsyncLocalSession(LocalDynamoDB()),
+            dead_letter_file=path,
+        )
+
+        async def broken(client, requests):
+            raise RuntimeError("connection reset")
+
+        loader.item_writer.write_async = broken
+        result = await loader.load_csv(csv_file)
+        # 21 full batches and one of 5 rows
+        assert result.failed_writes == 530
+        assert result.dead_lettered == 530
+        assert summarize(path) == {"RuntimeError": 530}
+        items = {entry["Item"]["id"]["S"] for entry in read_dead_letters(path)}
+        assert len(items) == 530
+        assert os.path.getsize(path) > 0
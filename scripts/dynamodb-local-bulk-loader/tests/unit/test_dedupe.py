@@ -0,0 +1,194 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Unit tests for duplicate key detection and coalescing."""
+
+import pytest
+
+from src.async_loader import AsyncDynamoDBLoader
+from src.batch_packer import BatchPacker
+from src.dedupe import BloomFilter, LastWriteIndex, key_attributes_from, record_key
+from src.local_dynamodb import AsyncLocalSession, LocalDynamoDB, LocalSession
+from src.shuffle import FullShuffle
+from src.threaded_loader import ThreadedDynamoDBLoader
+
+# 300 rows over 100 keys; the version column counts the occurrences of a key
+ROWS = [{"id": f"id-{i % 100}", "version": str(i // 100)} for i in range(300)]
+
+
+@pytest.fixture
+def csv_file(write_csv):
+    """CSV in which every key appears three times."""
+    return write_csv(ROWS)
+
+
+class TestKeys:
+    """Tests for reading keys from tables and records."""
+
+    def test_key_attributes_from_describe_table(self):
+        """Test that the partition key comes first whatever the response order."""
+        description = {
+            "Table": {
+                "KeySchema": [
+                    {"AttributeName": "sk", "KeyType": "RANGE"},
+                    {"AttributeName": "pk", "KeyType": "HASH"},
+                ]
+            }
+        }
+        assert key_attributes_from(description) == ("pk", "sk")
+        with pytest.raises(ValueError):
+            key_attributes_from({"Table": {"KeySchema": []}})
+
+    def test_record_key(self):
+        """Test that Python and wire values give the same key and missing keys give None."""
+        assert record_key({"pk": "a", "sk": 1}, ("pk", "sk")) == ("a", "1")
+        assert record_key({"pk": {"S": "a"}, "sk": {"N": "1"}}, ("pk", "sk")) == ("a", "1")
+        assert record_key({"pk": "a"}, ("pk", "sk")) is None
+
+
+class TestCoalesceBatches:
+    """Tests for batch-level coalescing."""
+
+    def test_later_record_replaces_earlier_and_batches_stay_full(self):
+        """Test last-wins coalescing within full batches of distinct keys."""
+        replaced = []
+        packer = BatchPacker(key_attributes=("id",), on_duplicate=replaced.append)
+        batches = list(packer.pack(ROWS))
+        assert all(len({row["id"] for row in batch}) == len(batch) for batch in batches)
+        assert [len(batch) for batch in batches] == [25] * 12
+        # Batches hold 25 consecutive rows, so keys never meet within one
+        assert replaced == []
+
+        rows = [{"id": "a", "v": "1"}, {"id": "b"}, {"id": "a", "v": "2"}, {"id": "c"}]
+        packer = BatchPacker(max_items=3, key_attributes=("id",), on_duplicate=replaced.append)
+        batches = list(packer.pack(rows + [{"id": "d"}]))
+        assert batches == [[{"id": "b"}, {"id": "a", "v": "2"}, {"id": "c"}], [{"id": "d"}]]
+        assert replaced == [{"id": "a", "v": "1"}]
+
+
+class TestLastWriteIndex:
+    """Tests for file-level last-write-wins."""
+
+    @pytest.mark.parametrize("exact_limit", [1_000_000, 0])
+    def test_keeps_last_occurrence(self, exact_limit):
+        """Test that only the last row of each key survives, with a set or a Bloom filter."""
+        index = LastWriteIndex(("id",), expected_records=300, exact_limit=exact_limit)
+        index.build(ROWS)
+        dropped = []
+        kept = list(index.last_only(ROWS, dropped.append))
+        assert kept == ROWS[200:]
+        assert len(dropped) == 200
+        assert type(index.seen).__name__ == ("_HashSet" if exact_limit else "BloomFilter")
+
+    def test_bloom_false_positives_never_drop_rows(self):
+        """Test that an undersized filter only adds candidates, never drops unique rows."""
+        index = LastWriteIndex(("id",), expected_records=2, exact_limit=0)
+        rows = [{"id": str(i)} for i in range(500)]
+        index.build(rows)
+        assert len(index.last_row) > 0
+        assert list(index.last_only(rows)) == rows
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        """Test that every added value is reported as present."""
+        bloom = BloomFilter(capacity=1000)
+        values = [i * 0x9E3779B97F4A7C15 % 2**64 for i in range(1000)]
+        assert not any(bloom.add(value) for value in values[:1])
+        for value in values:
+            bloom.add(value)
+        assert all(bloom.add(value) for value in values)
+
+
+class TestLoadersDedupe:
+    """Tests for loaders deduplicating against the DynamoDB stand-in."""
+
+    def test_threaded_batch_mode_writes_without_validation_errors(self, csv_file):
+        """Test that duplicates meeting in a batch are coalesced instead of failing it."""
+        db = LocalDynamoDB()
+        loader = ThreadedDynamoDBLoader(
+            table_name="t",
+            max_workers=2,
+            session=LocalSession(db),
+            shuffle=FullShuffle(seed=3),
+        )
+        result = loader.load_csv(csv_file)
+        assert result.failed_writes == 0
+        assert result.duplicate_records > 0
+        assert result.successful_writes + result.duplicate_records == 300
+        assert db.item_count("t") == 100
+
+    def test_without_dedupe_duplicates_fail_batches(self, csv_file):
+        """Test that the stand-in rejects batches with duplicates when dedupe is off."""
+        loader = ThreadedDynamoDBLoader(
+            table_name="t",
+            max_workers=2,
+            session=LocalSession(LocalDynamoDB()),
+            shuffle=FullShuffle(seed=3),
+            dedupe=None,
+        )
+        loader.retry_handler.max_delay = 0.0
+        result = loader.load_csv(csv_file)
+        assert result.failed_writes > 0
+        assert any("ValidationException" in error for error in result.errors)
+
+    @pytest.mark.parametrize("streaming", [False, True])
+    async def test_async_file_mode_last_write_wins(self, csv_file, streaming):
+        """Test that whole-file dedupe stores the last row of every key despite the shuffle."""
+        db = LocalDynamoDB()
+        loader = AsyncDynamoDBLoader(
+            table_name="t",
+            max_workers=2,
+            streaming=streaming,
+            session=AsyncLocalSession(db),
+            dedupe="file",
+        )
+        result = await loader.load_csv(csv_file)
+        assert result.total_records == result.successful_writes == 100
+        assert result.duplicate_records == 200
+        assert db.stats.items_written == 100
+        assert {item["version"] for item in db.tables["t"].values()} == {"2"}
+
+    def test_file_mode_needs_key_attributes(self, csv_file):
+        """Test that file mode fails when the key cannot be read."""
+
+        class NoDescribeSession(LocalSession):
+            def client(self, service_name, **kwargs):
+                raise RuntimeError("no access")
+
+        loader = ThreadedDynamoDBLoader(
+            table_name="t", session=NoDescribeSession(LocalDynamoDB()), dedupe="file"
+        )
+        with pytest.raises(ValueError, match="key attributes"):
+            loader.load_csv(csv_file)
+
+    def test_resume_skips_coalesced_rows(self, tmp_path, csv_file):
+        """Test that rows replaced within a batch are journaled as done."""
+        checkpoint = str(tmp_path / "load.checkpoint")
+        db = LocalDynamoDB()
+        first = ThreadedDynamoDBLoader(
+            table_name="t",
+            max_workers=2,
+            session=LocalSession(db),
+            shuffle=FullShuffle(seed=3),
+            checkpoint_file=checkpoint,
+        ).load_csv(csv_file)
+        assert first.duplicate_records > 0
+
+        resumed = ThreadedDynamoDBLoader(
+            table_name="t",
+            max_workers=2,
+            session=LocalSession(db),
+            checkpoint_file=checkpoint,
+            resume=True,
+        ).load_csv(csv_file)
+        assert resumed.skipped_records == 300
+        assert resumed.total_records == 0
@@ -0,0 +1,172 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Unit tests for parallel table exports."""
+
+import csv
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+from src.export import TableExporter, json_value, read_manifest
+from src.local_dynamodb import LocalClient, LocalDynamoDB, LocalSession
+from src.scan import ParallelScan
+from src.threaded_loader import ThreadedDynamoDBLoader
+
+
+def item(i):
+    """Typed item with every kind of AttributeValue."""
+    return {
+        "id": {"S": f"id-{i}"},
+        "count": {"N": str(i)},
+        "price": {"N": "12345678901234567890.125"},
+        "blob": {"B": bytes([i % 256, 1])},
+        "meta": {"M": {"tags": {"L": [{"S": "é"}, {"NULL": True}]}, "ok": {"BOOL": True}}},
+        "sizes": {"NS": ["1", "2.5"]},
+    }
+
+
+@pytest.fixture
+def db():
+    """Stand-in with a table "t" of 600 typed items."""
+    db = LocalDynamoDB()
+    db.tables["t"] = {(f"id-{i}",): item(i) for i in range(600)}
+    return db
+
+
+def export(db, tmp_path, **kwargs):
+    """Export table "t" in 4 segments."""
+    exporter = TableExporter("t", str(tmp_path), segments=4, session=LocalSession(db), **kwargs)
+    return exporter.export()
+
+
+class TestValues:
+    """Tests for value conversion."""
+
+    def test_json_value_keeps_numbers_exact(self):
+        """Test that N values are copied digit for digit and binary becomes base64."""
+        value = {"M": {"n": {"N": "12345678901234567890.125"}, "b": {"B": b"\x00"}}}
+        assert json_value(value) == '{"n":12345678901234567890.125,"b":"AA=="}'
+
+
+class TestTableExporter:
+    """Tests for exports from the DynamoDB stand-in."""
+
+    def test_manifest_counts_every_item(self, db, tmp_path):
+        """Test that each segment gets its own file and the manifest adds up."""
+        result = export(db, tmp_path)
+        manifest = read_manifest(str(tmp_path))
+        assert manifest["total_items"] == result.total_items == 600
+        assert [entry["segment"] for entry in manifest["files"]] == [0, 1, 2, 3]
+        assert sum(entry["items"] for entry in manifest["files"]) == 600
+        for entry in manifest["files"]:
+            lines = (tmp_path / entry["path"]).read_text().splitlines()
+            assert len(lines) == entry["items"] > 0
+
+    def test_rerun_removes_stale_segment_files(self, db, tmp_path):
+        """Test that files of an earlier export with more segments are deleted."""
+        TableExporter("t", str(tmp_path), segments=8, session=LocalSession(db)).export()
+        (tmp_path / "other.txt").write_text("kept")
+
+        result = export(db, tmp_path)
+
+        expected = {entry.path for entry in result.files} | {"manifest.json", "other.txt"}
+        assert {path.name for path in tmp_path.iterdir()} == expected
+
+    def test_dynamodb_json_round_trip(self, db, tmp_path):
+        """Test that a DynamoDB JSON export loads back into an identical table."""
+        result = export(db, tmp_path, format="dynamodb-json", compression="gzip")
+        restored = LocalDynamoDB()
+        loader = ThreadedDynamoDBLoader("t", max_workers=2, session=LocalSession(restored))
+        for entry in result.files:
+            assert entry.path.endswith(".ddbjson.gz")
+            loader.load_csv(str(tmp_path / entry.path))
+        assert restored.tables["t"] == db.tables["t"]
+
+    def test_jsonl_is_plain_json(self, db, tmp_path):
+        """Test that JSON Lines files hold plain values with exact numbers."""
+        result = export(db, tmp_path, compression="gzip")
+        with gzip.open(tmp_path / result.files[0].path, "rt", encoding="utf-8") as f:
+            line = f.readline()
+        record = json.loads(line, parse_float=str)
+        assert record["price"] == "12345678901234567890.125"
+        assert record["meta"] == {"tags": ["é", None], "ok": True}
+        assert record["sizes"] == [1, "2.5"]
+
+    def test_csv_columns_and_late_attributes(self, db, tmp_path):
+        """Test that the key comes first and attributes missing from the header are reported."""
+        db.tables["t"][("id-late",)] = {"id": {"S": "id-late"}, "extra": {"S": "x"}}
+        result = export(db, tmp_path, format="csv", columns=["id", "count"])
+        rows = []
+        for entry in result.files:
+            with open(tmp_path / entry.path, newline="") as f:
+                reader = csv.reader(f)
+                assert next(reader) == ["id", "count"]
+                rows.extend(reader)
+        assert len(rows) == 601
+        assert ["id-7", "7"] in rows
+        unexported = {name for entry in result.files for name in entry.unexported_attributes}
+        assert unexported == {"price", "blob", "meta", "sizes", "extra"}
+
+    def test_parquet_column_types(self, db, tmp_path):
+        """Test Parquet column types and that values not fitting them are reported."""
+        pq = pytest.importorskip("pyarrow.parquet")
+        db.tables["t"][("id-frac",)] = {"id": {"S": "id-frac"}, "count": {"N": "2.5"}}
+        result = export(db, tmp_path, format="parquet", compression="zstd", parquet_row_group=50)
+        tables = [pq.read_table(tmp_path / entry.path) for entry in result.files]
+        schema = tables[0].schema
+        assert str(schema.field("count").type) == "int64"
+        assert str(schema.field("price").type) == "double"
+        assert str(schema.field("blob").type) == "binary"
+        assert str(schema.field("meta").type) == "string"
+        assert sum(table.num_rows for table in tables) == 601
+        frac = [
+            row
+            for table in tables
+            for row in table.select(["id", "count"]).to_pylist()
+            if row["id"] == "id-frac"
+        ]
+        assert frac == [{"id": "id-frac", "count": None}]
+        assert any("count" in entry.unexported_attributes for entry in result.files)
+
+    def test_failed_export_leaves_no_manifest(self, db, tmp_path):
+        """Test that an export whose scan fails raises and writes no manifest."""
+        (tmp_path / "manifest.json").write_text("{}")
+
+        class FailingSession(LocalSession):
+            def client(self, service_name, **kwargs):
+                client = super().client(service_name, **kwargs)
+                client.scan = lambda **params: (_ for _ in ()).throw(RuntimeError("scan failed"))
+                return client
+
+        exporter = TableExporter(
+            "t", str(tmp_path), segments=2, max_retries=0, session=FailingSession(db)
+        )
+        with pytest.raises(RuntimeError, match="scan failed"):
+            exporter.export()
+        assert not (Path(tmp_path) / "manifest.json").exists()
+
+    def test_run_stops_other_segments_on_error(self, db):
+        """Test that a failing page callback stops the whole scan."""
+        scan = ParallelScan(LocalClient(db), "t", segments=4, page_size=10)
+
+        def on_page(page):
+            if page.segment == 0:
+                raise OSError("disk full")
+
+        with pytest.raises(OSError, match="disk full"):
+            scan.run(on_page)
+        assert not any(thread.is_alive() for thread in scan._threads)
+        assert scan.items < 600
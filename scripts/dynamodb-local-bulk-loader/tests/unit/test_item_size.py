@@ -0,0 +1,74 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Unit tests for DynamoDB item size and WCU estimation."""
+
+from decimal import Decimal
+
+import pytest
+
+from src.item_size import attribute_value_size, estimate_item_size, write_units
+
+
+class TestItemSize:
+    """Unit tests for item size estimation."""
+
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        [
+            ("abc", 3),
+            ("é", 2),  # UTF-8 bytes, not characters
+            (12345, 4),  # 5 significant digits -> 3 bytes + 1
+            (Decimal("100"), 2),  # trailing zeros are trimmed
+            (Decimal("0.001"), 2),
+            (b"\x00\x01", 2),
+            (True, 1),
+            (None, 1),
+            (["a", "bc"], 3 + 2 + 3),
+            ({"k": "v"}, 3 + 1 + 1 + 1),
+            ({"a", "bb"}, 3),
+        ],
+    )
+    def test_attribute_value_size(self, value, expected):
+        """Test size rules for each attribute type."""
+        assert attribute_value_size(value) == expected
+
+    def test_item_size_counts_attribute_names(self):
+        """Test that attribute names count towards item size."""
+        assert estimate_item_size({"id": "1", "amount": 12}) == (2 + 1) + (6 + 2)
+
+    def test_generated_csv_row_is_one_wcu(self):
+        """Test that a typical generated CSV row costs one WCU."""
+        row = {
+            "id": "0b6f5c2e-5f9a-4e1c-8f5d-0c0c6a1e2b3d",
+            "timestamp": "2024-01-01T00:00:00",
+            "category": "electronics",
+            "user_name": "Jane Doe",
+            "email": "jane@example.com",
+            "amount": "123.45",
+            "status": "completed",
+            "description": "Lorem ipsum dolor sit amet",
+        }
+        assert write_units(row) == 1
+
+
+class TestWriteUnits:
+    """Unit tests for WCU rounding."""
+
+    @pytest.mark.parametrize(
+        ("payload", "expected"),
+        [(0, 1), (1022, 1), (1023, 2), (2046, 2), (2047, 3), (400 * 1024 - 2, 400)],
+    )
+    def test_rounds_up_per_kilobyte(self, payload, expected):
+        """Test that every started 1KB costs a full WCU (key "id" adds 2 bytes)."""
+        assert write_units({"id": "x" * payload}) == expected
@@ -0,0 +1,150 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Unit tests for the LocalDynamoDB stand-in and loaders running against it."""
+
+import pytest
+from botocore.exceptions import ClientError
+
+from src.async_loader import AsyncDynamoDBLoader
+from src.local_dynamodb import AsyncLocalSession, LocalDynamoDB, LocalSession
+from src.schema import INFER_SCHEMA
+from src.threaded_loader import ThreadedDynamoDBLoader
+
+
+@pytest.fixture
+def csv_file(write_csv):
+    """CSV file with 200 rows."""
+    return write_csv({"id": f"id-{i}", "amount": str(i)} for i in range(200))
+
+
+def put(item_id):
+    """PutRequest for an item with the given id."""
+    return {"PutRequest": {"Item": {"id": item_id}}}
+
+
+class TestLocalDynamoDB:
+    """Tests for the stand-in itself."""
+
+    def test_stores_items(self):
+        """Test that put and delete requests are applied."""
+        db = LocalDynamoDB()
+        db.batch_write_item(RequestItems={"t": [put("a"), put("b")]})
+        db.batch_write_item(RequestItems={"t": [put("a")]})
+        db.batch_write_item(RequestItems={"t": [{"DeleteRequest": {"Key": {"id": "b"}}}]})
+        assert db.item_count("t") == 1
+        assert db.stats.items_written == 3
+        assert db.stats.requests == 3
+
+    def test_wire_and_python_keys_match(self):
+        """Test that wire-format and Python-value items share one key space."""
+        db = LocalDynamoDB()
+        db.batch_write_item(RequestItems={"t": [put("a")]})
+        db.batch_write_item(RequestItems={"t": [put({"S": "a"})]})
+        assert db.item_count("t") == 1
+
+    def test_scan_sees_writes_between_scans(self):
+        """Test that the cached scan order is dropped when the table is written."""
+        db = LocalDynamoDB()
+        db.batch_write_item(RequestItems={"t": [put("b"), put("d")]})
+        assert [i["id"]["S"] for i in db.scan(TableName="t")["Items"]] == ["b", "d"]
+
+        db.batch_write_item(RequestItems={"t": [put("a"), put("c")]})
+        db.batch_write_item(RequestItems={"t": [{"DeleteRequest": {"Key": {"id": "d"}}}]})
+        assert [i["id"]["S"] for i in db.scan(TableName="t")["Items"]] == ["a", "b", "c"]
+
+    def test_rejects_duplicate_keys(self):
+        """Test that a request with the same key twice fails as a whole like DynamoDB."""
+        db = LocalDynamoDB()
+        with pytest.raises(ClientError) as exc_info:
+            db.batch_write_item(RequestItems={"t": [put("a"), put("b"), put({"S": "a"})]})
+        assert exc_info.value.response["Error"]["Code"] == "ValidationException"
+        assert db.item_count("t") == 0
+
+    def test_rejects_oversized_batches(self):
+        """Test that more than 25 requests fail validation like DynamoDB."""
+        with pytest.raises(ClientError) as exc_info:
+            LocalDynamoDB().batch_write_item(RequestItems={"t": [put(str(i)) for i in range(26)]})
+        assert exc_info.value.response["Error"]["Code"] == "ValidationException"
+
+    def test_fault_injection_is_seeded(self):
+        """Test that the same seed produces the same throttles and unprocessed items."""
+
+        def run():
+            db = LocalDynamoDB(throttle_rate=0.3, unprocessed_rate=0.2, seed=7)
+            outcomes = []
+            for i in range(50):
+                try:
+                    response = db.batch_write_item(
+                        RequestItems={"t": [put(f"{i}-{j}") for j in range(10)]}
+                    )
+                    outcomes.append(len(response["UnprocessedItems"].get("t", [])))
+                except ClientError as e:
+                    outcomes.append(e.response["Error"]["Code"])
+            return outcomes, db.stats
+
+        first, stats = run()
+        assert run()[0] == first
+        assert stats.throttled_requests > 0
+        assert stats.unprocessed_items > 0
+
+    @pytest.mark.parametrize("rate", [-0.1, 1.0])
+    def test_invalid_rates(self, rate):
+        """Test that rates outside [0, 1) are rejected."""
+        with pytest.raises(ValueError, match="throttle_rate"):
+            LocalDynamoDB(throttle_rate=rate)
+
+
+class TestLoadersAgainstLocalDynamoDB:
+    """Tests for loaders injected with a stand-in session."""
+
+    def test_threaded_loader_recovers_from_faults(self, csv_file):
+        """Test that every row lands despite throttling and unprocessed items."""
+        db = LocalDynamoDB(throttle_rate=0.1, unprocessed_rate=0.1, seed=1)
+        loader = ThreadedDynamoDBLoader(
+            table_name="t", max_workers=4, max_retries=10, session=LocalSession(db)
+        )
+        result = loader.load_csv(csv_file)
+
+        assert result.successful_writes == 200
+        assert db.item_count("t") == 200
+        assert db.stats.unprocessed_items > 0
+
+    def test_sustained_unprocessed_items_are_all_written(self, write_csv):
+        """Test that a load whose requests keep coming back partly unprocessed writes every row."""
+        csv_file = write_csv({"id": f"id-{i}"} for i in range(5000))
+        db = LocalDynamoDB(unprocessed_rate=0.1, seed=1)
+        loader = ThreadedDynamoDBLoader(
+            table_name="t", max_workers=4, max_retries=10, session=LocalSession(db)
+        )
+        loader.retry_handler.max_delay = 0.0
+        result = loader.load_csv(csv_file)
+
+        assert result.failed_writes == 0
+        assert db.item_count("t") == 5000
+
+    @pytest.mark.asyncio
+    async def test_async_streaming_wire_path(self, csv_file):
+        """Test the async streaming loader with the schema fast path."""
+        db = LocalDynamoDB(latency=0.001, seed=1)
+        loader = AsyncDynamoDBLoader(
+            table_name="t",
+            max_workers=4,
+            streaming=True,
+            schema=INFER_SCHEMA,
+            session=AsyncLocalSession(db),
+        )
+        result = await loader.load_csv(csv_file)
+
+        assert result.successful_writes == 200
+        assert db.tables["t"][("id-5",)]["amount"] == {"N": "5"}
@@ -0,0 +1,237 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Unit tests for ProcessPoolDynamoDBLoader."""
+
+import csv
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src import process_loader
+from src.process_loader import (
+    ProcessPoolDynamoDBLoader,
+    _load_range,
+    _RangeTask,
+    iter_csv_range,
+    split_byte_ranges,
+)
+
+
+@pytest.fixture
+def csv_file(write_csv):
+    """CSV file with 100 rows of varying length."""
+    return write_csv({"id": str(i), "name": "x" * (i % 17)} for i in range(100))
+
+
+def mock_aioboto3_session(mock_session, batch_write_item):
+    """Configure a patched aioboto3.Session whose table uses batch_write_item."""
+    mock_table = MagicMock()
+    mock_table.meta.client.batch_write_item = batch_write_item
+    mock_resource = AsyncMock()
+    mock_resource.__aenter__ = AsyncMock(return_value=mock_resource)
+    mock_resource.__aexit__ = AsyncMock(return_value=None)
+    mock_resource.Table = AsyncMock(return_value=mock_table)
+    mock_session.return_value.resource.return_value = mock_resource
+
+
+class InlineExecutor(ThreadPoolExecutor):
+    """Thread-backed stand-in for ProcessPoolExecutor."""
+
+    def __init__(self, max_workers, mp_context=None, initializer=None, initargs=()):
+        super().__init__(max_workers=max_workers, initializer=initializer, initargs=initargs)
+
+
+class TestByteRanges:
+    """Unit tests for byte-range splitting."""
+
+    @pytest.mark.parametrize("num_ranges", [1, 2, 3, 7, 16])
+    def test_ranges_cover_every_row_once(self, csv_file, num_ranges):
+        """Test that the ranges partition the data rows exactly."""
+        fieldnames, ranges = split_byte_ranges(csv_file, num_ranges)
+
+        rows = [
+            row["id"]
+            for start, end in ranges
+            for row in iter_csv_range(csv_file, start, end, fieldnames)
+        ]
+
+        assert fieldnames == ["id", "name"]
+        assert len(ranges) == num_ranges
+        assert rows == [str(i) for i in range(100)]
+
+    def test_ranges_are_line_aligned(self, csv_file):
+        """Test that every range starts right after a newline."""
+        _, ranges = split_byte_ranges(csv_file, 5)
+
+        with open(csv_file, "rb") as f:
+            data = f.read()
+        for start, _ in ranges:
+            assert data[start - 1 : start] == b"\n"
+
+    def test_more_ranges_than_rows(self):
+        """Test that empty ranges are dropped for tiny files."""
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False, newline="") as f:
+            f.write("id\r\n1\r\n2\r\n")
+        try:
+            fieldnames, ranges = split_byte_ranges(f.name, 10)
+            rows = [r for s, e in ranges for r in iter_csv_range(f.name, s, e, fieldnames)]
+
+            assert len(ranges) <= 2
+            assert [r["id"] for r in rows] == ["1", "2"]
+        finally:
+            os.unlink(f.name)
+
+    def test_quoted_line_breaks_keep_rows_and_offsets(self, tmp_path):
+        """Test that rows spanning several lines are read whole, with their own offsets."""
+        path = tmp_path / "multiline.csv"
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "text"])
+            for i in range(60):
+                writer.writerow([str(i), "one\n\ntwo" if i % 3 == 0 else "x"])
+                if i % 5 == 0:
+                    f.write("\r\n")
+        with open(path, newline="") as f:
+            expected = list(csv.DictReader(f))
+        data = path.read_bytes()
+
+        fieldnames, ranges = split_byte_ranges(str(path), 4)
+        rows = [
+            row
+            for start, end in ranges
+            for row in iter_csv_range(str(path), start, end, fieldnames, row_id_key="_offset")
+        ]
+
+        assert [{k: v for k, v in row.items() if k != "_offset"} for row in rows] == expected
+        for row in rows:
+            assert data[row["_offset"] :].startswith(f"{row['id']},".encode())
+
+    def test_boundary_inside_quoted_field_uses_one_range(self, tmp_path):
+        """Test that a file whose split would cut a quoted field is not split."""
+        path = tmp_path / "long_field.csv"
+        path.write_text('id,text\n1,x\n2,"' + "line\n" * 100 + '"\n3,y\n')
+
+        fieldnames, ranges = split_byte_ranges(str(path), 4)
+        rows = [r["id"] for s, e in ranges for r in iter_csv_range(str(path), s, e, fieldnames)]
+
+        assert len(ranges) == 1
+        assert rows == ["1", "2", "3"]
+
+    def test_header_only_file_has_no_ranges(self):
+        """Test that a file with only a header produces no ranges."""
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as f:
+            f.write("id,name\n")
+        try:
+            assert split_byte_ranges(f.name, 4) == (["id", "name"], [])
+        finally:
+            os.unlink(f.name)
+
+
+class TestProcessPoolDynamoDBLoader:
+    """Unit tests for ProcessPoolDynamoDBLoader."""
+
+    def test_initialization_validates_config(self):
+        """Test that invalid settings are rejected."""
+        with pytest.raises(ValueError, match="num_processes must be greater than 0"):
+            ProcessPoolDynamoDBLoader(table_name="test-table", num_processes=0)
+        with pytest.raises(ValueError, match="max_wcu must be greater than 0"):
+            ProcessPoolDynamoDBLoader(table_name="test-table", max_wcu=0)
+        with pytest.raises(ValueError, match="table_name must be a non-empty string"):
+            ProcessPoolDynamoDBLoader(table_name="")
+
+    def test_load_range_writes_its_rows(self, csv_file):
+        """Test that a worker loads exactly the rows of its range."""
+        fieldnames, ranges = split_byte_ranges(csv_file, 3)
+        start, end = ranges[1]
+        expected = {r["id"] for r in iter_csv_range(csv_file, start, end, fieldnames)}
+        written = []
+
+        async def batch_write_item(RequestItems):
+            written.extend(r["PutRequest"]["Item"]["id"] for r in RequestItems["test-table"])
+            return {"UnprocessedItems": {}}
+
+        task = _RangeTask(
+            csv_file=csv_file,
+            start=start,
+            end=end,
+            fieldnames=fieldnames,
+            table_name="test-table",
+            region="us-east-1",
+            workers=2,
+            batch_size=10,
+            max_retries=1,
+            shuffle_window=8,
+            seed=1,
+        )
+        with patch("aioboto3.Session") as mock_session:
+            mock_aioboto3_session(mock_session, batch_write_item)
+            result = _load_range(task)
+
+        assert result.total_records == len(expected)
+        assert result.successful_writes == len(expected)
+        assert set(written) == expected
+
+    def test_load_csv_merges_range_results(self, csv_file):
+        """Test that results from all ranges are merged into one LoadResult."""
+
+        async def batch_write_item(RequestItems):
+            requests = RequestItems["test-table"]
+            # Reject row 42 so the merged result carries one failure
+            unprocessed = [r for r in requests if r["PutRequest"]["Item"]["id"] == "42"]
+            return {"UnprocessedItems": {"test-table": unprocessed} if unprocessed else {}}
+
+        loader = ProcessPoolDynamoDBLoader(
+            table_name="test-table", num_processes=4, workers_per_process=2, max_retries=0
+        )
+        with (
+            patch("aioboto3.Session") as mock_session,
+            patch.object(process_loader, "ProcessPoolExecutor", InlineExecutor),
+        ):
+            mock_aioboto3_session(mock_session, batch_write_item)
+            result = loader.load_csv(csv_file)
+
+        assert result.total_records == 100
+        assert result.successful_writes == 99
+        assert result.failed_writes == 1
+        assert len(result.errors) == 1
+
+    def test_failed_range_counts_its_rows(self, csv_file):
+        """Test that the rows of a range whose worker failed are counted as failed."""
+        load_range = process_loader._load_range
+
+        def fail_first_range(task):
+            if task.start == split_byte_ranges(csv_file, 4)[1][0][0]:
+                raise RuntimeError("worker died")
+            return load_range(task)
+
+        async def batch_write_item(RequestItems):
+            return {"UnprocessedItems": {}}
+
+        loader = ProcessPoolDynamoDBLoader(
+            table_name="test-table", num_processes=4, workers_per_process=2
+        )
+        with (
+            patch("aioboto3.Session") as mock_session,
+            patch.object(process_loader, "ProcessPoolExecutor", InlineExecutor),
+            patch.object(process_loader, "_load_range", fail_first_range),
+        ):
+            mock_aioboto3_session(mock_session, batch_write_item)
+            result = loader.load_csv(csv_file)
+
+        assert result.total_records == 100
+        assert result.failed_writes == result.total_records - result.successful_writes > 0
+        assert "worker died" in result.errors[0]
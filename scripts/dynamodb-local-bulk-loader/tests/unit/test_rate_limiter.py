@@ -0,0 +1,150 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Unit tests for token-bucket rate limiting."""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src import process_loader
+from src.async_loader import AsyncDynamoDBLoader
+from src.batch_write import BatchWriteItemWriter, put_requests
+from src.rate_limiter import SharedTokenBucket, TokenBucket
+from src.retry_handler import RetryHandler
+from src.threaded_loader import ThreadedDynamoDBLoader
+
+
+def _reserve_in_worker(tokens: float) -> float:
+    """Reserve tokens from the rate limiter installed in a worker process."""
+    return process_loader._worker_rate_limiter._reserve(tokens)
+
+
+class TestTokenBucket:
+    """Unit tests for TokenBucket."""
+
+    def test_burst_within_capacity_does_not_wait(self):
+        """Test that a full bucket serves up to capacity tokens immediately."""
+        bucket = TokenBucket(rate=10, capacity=50)
+
+        assert bucket._reserve(25) == 0.0
+        assert bucket._reserve(25) == 0.0
+
+    def test_debt_is_paid_back_at_rate(self):
+        """Test that reservations beyond the balance wait debt / rate seconds."""
+        with patch("src.rate_limiter.time.monotonic", return_value=100.0):
+            bucket = TokenBucket(rate=10, capacity=10)
+            assert bucket._reserve(10) == 0.0
+            assert bucket._reserve(5) == pytest.approx(0.5)
+            assert bucket._reserve(5) == pytest.approx(1.0)
+
+    def test_reserve_does_not_wait(self):
+        """Test that the public reserve returns the wait instead of sleeping."""
+        with (
+            patch("src.rate_limiter.time.monotonic", return_value=100.0),
+            patch("src.rate_limiter.time.sleep") as sleep,
+        ):
+            bucket = TokenBucket(rate=10, capacity=10)
+            assert bucket.reserve(10) == 0.0
+            assert bucket.reserve(5) == pytest.approx(0.5)
+        sleep.assert_not_called()
+
+    def test_refill_is_capped_at_capacity(self):
+        """Test that an idle bucket never accumulates more than capacity."""
+        with patch("src.rate_limiter.time.monotonic", return_value=0.0):
+            bucket = TokenBucket(rate=10, capacity=20)
+        with patch("src.rate_limiter.time.monotonic", return_value=3600.0):
+            assert bucket._reserve(20) == 0.0
+            assert bucket._reserve(10) == pytest.approx(1.0)
+
+    def test_invalid_parameters(self):
+        """Test that non-positive rate or capacity is rejected."""
+        with pytest.raises(ValueError, match="rate must be greater than 0"):
+            TokenBucket(rate=0)
+        with pytest.raises(ValueError, match="capacity must be greater than 0"):
+            TokenBucket(rate=1, capacity=0)
+
+    @pytest.mark.asyncio
+    async def test_acquire_async_sleeps_for_debt(self):
+        """Test that acquire_async waits for the reserved time."""
+        bucket = TokenBucket(rate=10, capacity=1)
+        with patch("src.rate_limiter.asyncio.sleep") as mock_sleep:
+            mock_sleep.return_value = None
+            waited = await bucket.acquire_async(11)
+
+        assert waited == pytest.approx(1.0, abs=0.01)
+        mock_sleep.assert_called_once()
+
+
+class TestSharedTokenBucket:
+    """Unit tests for SharedTokenBucket."""
+
+    def test_balance_is_shared_across_processes(self):
+        """Test that a worker process draws from the parent's balance."""
+        context = multiprocessing.get_context("spawn")
+        # Refill is negligible, so the second reservation must wait ~10 / 0.001 s
+        bucket = SharedTokenBucket(rate=0.001, capacity=10, context=context)
+        assert bucket._reserve(10) == 0.0
+
+        with ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=context,
+            initializer=process_loader._init_worker,
+            initargs=(bucket,),
+        ) as executor:
+            wait = executor.submit(_reserve_in_worker, 10).result()
+
+        assert wait > 9000
+        assert bucket._state[0] == pytest.approx(-10, abs=0.1)
+
+
+class TestRateLimitedWriter:
+    """Unit tests for rate limiting in BatchWriteItemWriter."""
+
+    def test_writer_charges_one_token_per_wcu(self):
+        """Test that every BatchWriteItem call reserves the requests' WCUs."""
+        limiter = MagicMock()
+        writer = BatchWriteItemWriter(
+            table_name="test-table",
+            retry_handler=RetryHandler(max_retries=1, base_delay=0, max_delay=0),
+            max_retries=1,
+            rate_limiter=limiter,
+        )
+        client = MagicMock()
+        client.batch_write_item.return_value = {"UnprocessedItems": {}}
+
+        # Six 1KB-or-less items and one 2.5KB item (3 WCUs)
+        items = [{"id": str(i)} for i in range(6)] + [{"id": "big", "data": "x" * 2500}]
+
+        outcome = writer.write_sync(client, put_requests(items))
+
+        assert outcome.successful
+        limiter.acquire_sync.assert_called_once_with(9.0)
+
+    def test_loader_builds_bucket_from_write_budget(self):
+        """Test that max_wcu and target_utilization set the bucket's refill rate."""
+        loader = ThreadedDynamoDBLoader(
+            table_name="test-table", max_workers=2, max_wcu=4000, target_utilization=0.25
+        )
+
+        assert loader.rate_limiter.rate == 1000
+        assert loader.item_writer.rate_limiter is loader.rate_limiter
+
+    def test_invalid_write_budget(self):
+        """Test that max_wcu and target_utilization are validated."""
+        with pytest.raises(ValueError, match="max_wcu must be greater than 0"):
+            AsyncDynamoDBLoader(table_name="test-table", max_wcu=-1)
+        with pytest.raises(ValueError, match="target_utilization must be between 0 and 1"):
+            AsyncDynamoDBLoader(table_name="test-table", max_wcu=100, target_utilization=1.5)
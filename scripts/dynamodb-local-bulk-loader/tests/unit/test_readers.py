@@ -0,0 +1,205 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Unit tests for the input readers."""
+
+import base64
+import csv
+import datetime
+import json
+from decimal import Decimal
+
+import pytest
+
+from src.async_loader import AsyncDynamoDBLoader
+from src.checkpoint import pop_row_ids, tag_rows
+from src.local_dynamodb import AsyncLocalSession, LocalDynamoDB, LocalSession
+from src.readers import (
+    ColumnarRow,
+    CsvReader,
+    DynamoDBJsonReader,
+    JsonLinesReader,
+    ParquetReader,
+    get_reader,
+    materialize,
+    reader_for,
+)
+from src.threaded_loader import ThreadedDynamoDBLoader
+
+
+def write_lines(path, records):
+    with open(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def jsonl_file(tmp_path):
+    """JSON Lines file with 100 records."""
+    records = [{"id": f"id-{i}", "amount": i + 0.5, "tags": ["a", "b"]} for i in range(100)]
+    return write_lines(tmp_path / "data.jsonl", records)
+
+
+@pytest.fixture
+def export_file(tmp_path):
+    """DynamoDB JSON export with 50 items."""
+    records = [
+        {
+            "Item": {
+                "id": {"S": f"id-{i}"},
+                "amount": {"N": str(i)},
+                "blob": {"B": base64.b64encode(b"\x00\x01").decode()},
+            }
+        }
+        for i in range(50)
+    ]
+    return write_lines(tmp_path / "export.json", records)
+
+
+@pytest.fixture
+def parquet_file(tmp_path):
+    """Parquet file with 300 rows across several record batches."""
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    table = pa.table(
+        {
+            "id": [f"id-{i}" for i in range(300)],
+            "price": [None if i % 10 == 0 else i / 4 for i in range(300)],
+            "count": list(range(300)),
+            "created": [datetime.datetime(2024, 1, 1, 12, 0, i % 60) for i in range(300)],
+        }
+    )
+    path = tmp_path / "data.parquet"
+    pq.write_table(table, path, row_group_size=100)
+    return str(path)
+
+
+class TestCsvReader:
+    """Tests for the CSV reader."""
+
+    def test_reads_fields_over_default_limit(self, tmp_path):
+        """Test that rows with a field over the csv module's 128KB default are read."""
+        path = tmp_path / "large.csv"
+        path.write_text("id,payload\n1," + "x" * 200_000 + "\n")
+        previous = csv.field_size_limit(131072)
+        try:
+            records = list(CsvReader().iter_records(str(path)))
+        finally:
+            csv.field_size_limit(previous)
+        assert len(records[0]["payload"]) == 200_000
+
+
+class TestLineReaders:
+    """Tests for the JSON Lines and DynamoDB JSON readers."""
+
+    def test_jsonl_reads_numbers_as_decimal(self, jsonl_file):
+        """Test that floats are parsed as Decimal so they can be stored as N."""
+        records = list(JsonLinesReader().iter_records(jsonl_file))
+        assert len(records) == 100
+        assert records[1] == {"id": "id-1", "amount": Decimal("1.5"), "tags": ["a", "b"]}
+        assert JsonLinesReader().estimate_records(jsonl_file) == 100
+
+    def test_jsonl_rejects_non_objects(self, tmp_path):
+        """Test that a line that is not an object is reported with its line number."""
+        path = write_lines(tmp_path / "bad.jsonl", [{"id": "1"}, [1, 2]])
+        with pytest.raises(ValueError, match="bad.jsonl:2"):
+            list(JsonLinesReader().iter_records(path))
+
+    def test_export_items_are_unwrapped_and_binary_decoded(self, export_file):
+        """Test that export lines yield wire-format items with raw bytes for B."""
+        items = list(DynamoDBJsonReader().iter_records(export_file))
+        assert items[3] == {"id": {"S": "id-3"}, "amount": {"N": "3"}, "blob": {"B": b"\x00\x01"}}
+
+
+class TestReaderSelection:
+    """Tests for picking readers by name and extension."""
+
+    def test_by_extension(self, tmp_path, jsonl_file, export_file):
+        """Test extension detection, including sniffing .json files."""
+        assert isinstance(reader_for("data.csv"), CsvReader)
+        assert isinstance(reader_for("data.unknown"), CsvReader)
+        assert isinstance(reader_for(jsonl_file), JsonLinesReader)
+        assert isinstance(reader_for("data.parquet"), ParquetReader)
+        assert isinstance(reader_for(export_file), DynamoDBJsonReader)
+        plain = write_lines(tmp_path / "plain.json", [{"Item": "not typed"}])
+        assert isinstance(reader_for(plain), JsonLinesReader)
+
+    def test_unknown_name(self):
+        """Test that an unknown format name is rejected."""
+        with pytest.raises(ValueError, match="Unknown input format"):
+            get_reader("xml")
+
+
+class TestParquetReader:
+    """Tests for columnar Parquet reading."""
+
+    def test_rows_are_views_until_materialized(self, parquet_file):
+        """Test that rows are columnar views with nulls dropped and types converted."""
+        rows = list(ParquetReader(batch_rows=64).iter_records(parquet_file))
+        assert len(rows) == 300
+        assert all(isinstance(row, ColumnarRow) for row in rows)
+        assert "price" not in rows[0]
+        assert rows[1]["price"] == Decimal("0.25")
+        assert rows[1]["created"] == "2024-01-01T12:00:01"
+        items = materialize(rows[:2])
+        assert items[1] == {
+            "id": "id-1",
+            "price": Decimal("0.25"),
+            "count": 1,
+            "created": "2024-01-01T12:00:01",
+        }
+        assert ParquetReader().estimate_records(parquet_file) == 300
+
+    def test_rows_carry_checkpoint_ids(self, parquet_file):
+        """Test that row ids can be attached and removed like dictionary keys."""
+        rows = list(tag_rows(ParquetReader().iter_records(parquet_file)))
+        batch = materialize(rows[10:12])
+        assert pop_row_ids(batch) == [10, 11]
+        assert "__checkpoint_row_id" not in batch[0]
+
+
+class TestLoadersWithReaders:
+    """Tests for loaders reading non-CSV input."""
+
+    def test_threaded_loader_loads_jsonl(self, jsonl_file):
+        """Test that JSON Lines records are written with their types."""
+        db = LocalDynamoDB()
+        loader = ThreadedDynamoDBLoader(table_name="t", max_workers=2, session=LocalSession(db))
+        result = loader.load_csv(jsonl_file)
+        assert result.successful_writes == 100
+        assert db.tables["t"][("id-7",)]["amount"] == Decimal("7.5")
+
+    async def test_async_loader_passes_export_items_through(self, export_file):
+        """Test that typed export items go through the wire path unchanged."""
+        db = LocalDynamoDB()
+        loader = AsyncDynamoDBLoader(
+            table_name="t", max_workers=2, session=AsyncLocalSession(db), schema="infer"
+        )
+        result = await loader.load_csv(export_file)
+        assert result.successful_writes == 50
+        assert db.tables["t"][("id-3",)] == {
+            "id": {"S": "id-3"},
+            "amount": {"N": "3"},
+            "blob": {"B": b"\x00\x01"},
+        }
+
+    async def test_async_streaming_loads_parquet(self, parquet_file):
+        """Test that a streamed Parquet load writes every row."""
+        db = LocalDynamoDB()
+        loader = AsyncDynamoDBLoader(
+            table_name="t", max_workers=2, streaming=True, session=AsyncLocalSession(db)
+        )
+        result = await loader.load_csv(parquet_file)
+        assert result.successful_writes == 300
+        assert db.item_count("t") == 300
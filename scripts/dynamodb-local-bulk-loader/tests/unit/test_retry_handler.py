@@ -0,0 +1,201 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Unit tests for error-aware retries, jitter, retry budgets and the circuit breaker."""
+
+import asyncio
+import csv
+
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from src.local_dynamodb import LocalDynamoDB, LocalSession
+from src.retry_handler import CircuitBreaker, CircuitOpenError, RetryBudget, RetryHandler
+from src.threaded_loader import ThreadedDynamoDBLoader
+
+
+def client_error(code: str) -> ClientError:
+    """ClientError with an AWS error code."""
+    return ClientError({"Error": {"Code": code, "Message": code}}, "BatchWriteItem")
+
+
+class FakeClock:
+    """Clock advanced by the test."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def failing(error: Exception):
+    """Function raising ``error`` on every call, counting the calls."""
+
+    def func():
+        func.calls += 1
+        raise error
+
+    func.calls = 0
+    return func
+
+
+def handler(**kwargs) -> RetryHandler:
+    """Handler with no backoff delay."""
+    return RetryHandler(**{"max_retries": 3, "base_delay": 0.0, "max_delay": 0.0, **kwargs})
+
+
+class TestErrorClassification:
+    """Tests for choosing the retry action from the error."""
+
+    def test_permanent_error_is_not_retried(self):
+        """Test that a ValidationException is raised after one call."""
+        func = failing(client_error("ValidationException"))
+        with pytest.raises(ClientError):
+            handler().retry_sync(func)
+        assert func.calls == 1
+
+    @pytest.mark.parametrize(
+        "error",
+        [
+            client_error("ProvisionedThroughputExceededException"),
+            client_error("InternalServerError"),
+            EndpointConnectionError(endpoint_url="https://dynamodb"),
+        ],
+    )
+    def test_throttling_and_transient_errors_are_retried(self, error):
+        """Test that throttling and transient errors use every retry."""
+        func = failing(error)
+        with pytest.raises(type(error)):
+            handler().retry_sync(func)
+        assert func.calls == 4
+
+    def test_unknown_error_is_not_retried(self):
+        """Test that an unclassified exception is raised at once."""
+        func = failing(RuntimeError("bug"))
+        with pytest.raises(RuntimeError):
+            handler().retry_sync(func)
+        assert func.calls == 1
+
+    def test_async_permanent_error_is_not_retried(self):
+        """Test that retry_async gives up on a permanent error too."""
+        calls = 0
+
+        async def func():
+            nonlocal calls
+            calls += 1
+            raise client_error("ResourceNotFoundException")
+
+        with pytest.raises(ClientError):
+            asyncio.run(handler().retry_async(func))
+        assert calls == 1
+
+
+class TestJitter:
+    """Tests for the backoff jitter strategies."""
+
+    def test_full_jitter_stays_below_exponential_delay(self):
+        """Test that full jitter draws between 0 and the capped exponential delay."""
+        retry = RetryHandler(base_delay=0.1, max_delay=1.0, jitter="full")
+        for attempt in range(8):
+            assert 0 <= retry.calculate_delay(attempt) <= min(0.1 * 2**attempt, 1.0)
+
+    def test_decorrelated_jitter_grows_from_previous_delay(self):
+        """Test that decorrelated jitter draws between base and three times the previous delay."""
+        retry = RetryHandler(base_delay=0.1, max_delay=5.0, jitter="decorrelated")
+        previous = None
+        for attempt in range(20):
+            delay = retry.calculate_delay(attempt, previous)
+            upper = 3 * (previous if previous is not None else 0.1)
+            assert 0.1 <= delay <= min(upper, 5.0)
+            previous = delay
+
+    def test_unknown_strategy(self):
+        """Test that an unknown jitter strategy is rejected."""
+        with pytest.raises(ValueError, match="jitter"):
+            RetryHandler(jitter="none")
+
+
+class TestRetryBudget:
+    """Tests for the shared retry budget."""
+
+    def test_exhausted_budget_stops_retries(self):
+        """Test that retries stop once the shared budget is spent."""
+        budget = RetryBudget(ratio=0.0, capacity=2)
+        retry = handler(budget=budget)
+        func = failing(client_error("ThrottlingException"))
+        with pytest.raises(ClientError):
+            retry.retry_sync(func)
+        assert func.calls == 3
+        with pytest.raises(ClientError):
+            retry.retry_sync(func)
+        assert func.calls == 4
+        assert budget.denied == 2
+
+    def test_first_attempts_earn_retries(self):
+        """Test that every first attempt adds a fraction of a retry."""
+        budget = RetryBudget(ratio=0.5, capacity=1)
+        assert budget.try_spend()
+        assert not budget.try_spend()
+        budget.record_attempt()
+        budget.record_attempt()
+        assert budget.try_spend()
+
+
+class TestCircuitBreaker:
+    """Tests for failing fast after repeated permanent errors."""
+
+    def test_opens_after_permanent_errors_and_recovers(self):
+        """Test that the breaker refuses calls once open and closes after a successful trial."""
+        clock = FakeClock()
+        retry = handler(breaker=CircuitBreaker(failure_threshold=2, reset_seconds=10, clock=clock))
+        func = failing(client_error("AccessDeniedException"))
+        for _ in range(2):
+            with pytest.raises(ClientError):
+                retry.retry_sync(func)
+        assert retry.breaker.is_open
+
+        with pytest.raises(CircuitOpenError):
+            retry.retry_sync(func)
+        assert func.calls == 2
+
+        clock.now = 10
+        assert retry.retry_sync(lambda: "ok") == "ok"
+        assert not retry.breaker.is_open
+
+    def test_throttling_does_not_open_breaker(self):
+        """Test that only permanent errors count towards opening the breaker."""
+        retry = handler(max_retries=0, breaker=CircuitBreaker(failure_threshold=1))
+        with pytest.raises(ClientError):
+            retry.retry_sync(failing(client_error("ThrottlingException")))
+        assert not retry.breaker.is_open
+
+    def test_load_fails_fast_on_permanent_errors(self, tmp_path):
+        """Test that a load against the wrong key schema stops calling DynamoDB."""
+        csv_file = tmp_path / "rows.csv"
+        with open(csv_file, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["id"])
+            writer.writeheader()
+            writer.writerows({"id": str(i)} for i in range(1000))
+        # Every request misses the table's key attribute: a permanent ValidationException
+        db = LocalDynamoDB(key_attributes=("pk",))
+        loader = ThreadedDynamoDBLoader(
+            "t",
+            max_workers=2,
+            breaker_threshold=5,
+            dead_letter_file=str(tmp_path / "dead.ddbjson"),
+            session=LocalSession(db),
+        )
+        result = loader.load_csv(str(csv_file))
+        assert result.failed_writes == 1000
+        assert db.stats.requests < 10
@@ -0,0 +1,190 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Unit tests for column schemas and the wire-format fast path."""
+
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from boto3.dynamodb.types import TypeSerializer
+
+from src.async_loader import AsyncDynamoDBLoader
+from src.item_size import wire_write_units, write_units
+from src.schema import INFER_SCHEMA, ItemSchema
+from src.threaded_loader import ThreadedDynamoDBLoader
+
+
+@pytest.fixture
+def csv_file(write_csv):
+    """CSV file with string, numeric and boolean columns."""
+    return write_csv(
+        {
+            "id": f"{i:04d}",
+            "zip": f"0{i}123",
+            "amount": f"{i}.5",
+            "active": "true" if i % 2 else "false",
+        }
+        for i in range(20)
+    )
+
+
+def stored_items(calls):
+    """Items sent in BatchWriteItem calls recorded by a mock."""
+    return [
+        request["PutRequest"]["Item"]
+        for call in calls
+        for request in call.kwargs["RequestItems"]["test-table"]
+    ]
+
+
+KEY_DEFINITIONS = {
+    "Table": {"AttributeDefinitions": [{"AttributeName": "id", "AttributeType": "S"}]}
+}
+
+
+class TestItemSchema:
+    """Tests for parsing, inference and serialization."""
+
+    def test_parse(self):
+        """Test parsing a declared schema."""
+        schema = ItemSchema.parse("amount:N, active:bool,")
+        assert schema == ItemSchema({"amount": "N", "active": "BOOL"})
+
+    @pytest.mark.parametrize("spec", ["amount", ":N", "amount:X"])
+    def test_parse_rejects_invalid_entries(self, spec):
+        """Test that malformed entries and unknown types are rejected."""
+        with pytest.raises(ValueError):
+            ItemSchema.parse(spec)
+
+    def test_infer(self, csv_file):
+        """Test that numbers and booleans are inferred, codes with leading zeros stay S."""
+        schema = ItemSchema.from_csv(csv_file)
+        assert schema.columns == {"id": "S", "zip": "S", "amount": "N", "active": "BOOL"}
+
+    def test_infer_ignores_empty_values(self):
+        """Test that empty values neither decide nor break a column's type."""
+        schema = ItemSchema.infer([{"a": "", "b": "1"}, {"a": "", "b": ""}, {"a": "", "b": "2"}])
+        assert schema.columns == {"a": "S", "b": "N"}
+
+    def test_serialize(self):
+        """Test conversion of each column type."""
+        schema = ItemSchema({"amount": "N", "active": "BOOL"})
+        item = schema.serialize({"id": "0001", "amount": "12.50", "active": "TRUE"})
+        assert item == {"id": {"S": "0001"}, "amount": {"N": "12.50"}, "active": {"BOOL": True}}
+
+    def test_serialize_omits_empty_typed_values(self):
+        """Test that empty N and BOOL values are left out of the item."""
+        schema = ItemSchema({"amount": "N", "active": "BOOL"})
+        assert schema.serialize({"id": "1", "amount": "", "active": ""}) == {"id": {"S": "1"}}
+
+    def test_serialize_keeps_mismatched_values_as_strings(self):
+        """Test that a value that does not match its column type is stored as S."""
+        schema = ItemSchema({"amount": "N"})
+        assert schema.serialize({"amount": "n/a"}) == {"amount": {"S": "n/a"}}
+
+    def test_serialize_matches_type_serializer_for_python_values(self):
+        """Test that non-string values serialize as boto3 would."""
+        record = {"tags": ["a", "b"], "meta": {"k": 1}, "count": 3, "ratio": Decimal("0.5")}
+        expected = {k: TypeSerializer().serialize(v) for k, v in record.items()}
+        assert ItemSchema({"count": "N", "ratio": "N"}).serialize(record) == expected
+
+    def test_with_key_types(self):
+        """Test that key attributes take the table's declared types."""
+        schema = ItemSchema({"id": "N", "amount": "N"}).with_key_types(
+            [{"AttributeName": "id", "AttributeType": "S"}]
+        )
+        assert schema.columns == {"id": "S", "amount": "N"}
+
+    def test_wire_write_units_match_python_estimate(self):
+        """Test that wire-format and Python-value WCU estimates agree."""
+        record = {"id": "x" * 1500, "amount": Decimal("12.5"), "active": True}
+        wire = ItemSchema({"amount": "N", "active": "BOOL"}).serialize(record)
+        assert wire_write_units(wire) == write_units(record) == 2
+
+
+class TestWireFastPath:
+    """Tests for loaders sending wire-format items through a low-level client."""
+
+    def test_threaded_loader_sends_numbers(self, csv_file):
+        """Test that the threaded loader stores numeric columns as N."""
+        with patch("boto3.Session") as mock_session:
+            mock_table = MagicMock()
+            mock_session.return_value.resource.return_value.Table.return_value = mock_table
+            mock_client = mock_session.return_value.client.return_value
+            mock_client.describe_table.return_value = KEY_DEFINITIONS
+            mock_client.batch_write_item.return_value = {"UnprocessedItems": {}}
+
+            loader = ThreadedDynamoDBLoader(
+                table_name="test-table", max_workers=2, schema=INFER_SCHEMA
+            )
+            result = loader.load_csv(csv_file)
+
+        assert result.successful_writes == 20
+        mock_table.meta.client.batch_write_item.assert_not_called()
+        items = stored_items(mock_client.batch_write_item.call_args_list)
+        assert len(items) == 20
+        assert all("N" in item["amount"] and "BOOL" in item["active"] for item in items)
+        assert all("S" in item["zip"] for item in items)
+
+    def test_key_type_from_table_overrides_schema(self, csv_file):
+        """Test that a key column keeps the table's type even if declared otherwise."""
+        with patch("boto3.Session") as mock_session:
+            mock_client = mock_session.return_value.client.return_value
+            mock_client.describe_table.return_value = KEY_DEFINITIONS
+            mock_client.batch_write_item.return_value = {"UnprocessedItems": {}}
+
+            loader = ThreadedDynamoDBLoader(
+                table_name="test-table", max_workers=1, schema=ItemSchema({"id": "N"})
+            )
+            loader.load_csv(csv_file)
+
+        items = stored_items(mock_client.batch_write_item.call_args_list)
+        assert {item["id"]["S"] for item in items} == {f"{i:04d}" for i in range(20)}
+
+    @pytest.mark.asyncio
+    async def test_async_loader_sends_numbers(self, csv_file):
+        """Test that the async loader writes through the low-level client."""
+        mock_client = AsyncMock()
+        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
+        mock_client.__aexit__ = AsyncMock(return_value=None)
+        mock_client.describe_table = AsyncMock(return_value=KEY_DEFINITIONS)
+        mock_client.batch_write_item = AsyncMock(return_value={"UnprocessedItems": {}})
+
+        with patch("aioboto3.Session") as mock_session:
+            mock_resource = AsyncMock()
+            mock_resource.__aenter__ = AsyncMock(return_value=mock_resource)
+            mock_resource.__aexit__ = AsyncMock(return_value=None)
+            mock_resource.Table = AsyncMock(return_value=MagicMock())
+            mock_session.return_value.resource.return_value = mock_resource
+            mock_session.return_value.client.return_value = mock_client
+
+            loader = AsyncDynamoDBLoader(
+                table_name="test-table",
+                max_workers=2,
+                streaming=True,
+                schema=ItemSchema({"amount": "N"}),
+            )
+            result = await loader.load_csv(csv_file)
+
+        assert result.successful_writes == 20
+        items = stored_items(mock_client.batch_write_item.call_args_list)
+        assert sorted(Decimal(item["amount"]["N"]) for item in items) == [
+            Decimal(f"{i}.5") for i in range(20)
+        ]
+        assert loader.wire_client is None
+
+    def test_invalid_schema_string_rejected(self):
+        """Test that only "infer" is accepted as a string schema."""
+        with pytest.raises(ValueError, match="schema must be"):
+            ThreadedDynamoDBLoader(table_name="test-table", max_workers=1, schema="amount:N")
@@ -0,0 +1,227 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Unit tests for shuffle strategies."""
+
+import csv
+import gzip
+
+import pytest
+
+from src.async_loader import AsyncDynamoDBLoader
+from src.shuffle import (
+    BucketInterleaveShuffle,
+    FullShuffle,
+    IndexShuffle,
+    PartitionHashShuffle,
+    WindowShuffle,
+    get_shuffle_strategy,
+)
+from src.threaded_loader import ThreadedDynamoDBLoader
+
+
+def make_records(count: int) -> list[dict]:
+    """Create records whose id encodes their original position."""
+    return [{"id": f"id-{i}", "pos": i} for i in range(count)]
+
+
+class TestShuffleStrategies:
+    """Unit tests for the individual shuffle strategies."""
+
+    @pytest.mark.parametrize(
+        "strategy",
+        [
+            FullShuffle(seed=1),
+            WindowShuffle(window_size=50, seed=1),
+            BucketInterleaveShuffle(window_size=50, num_buckets=5, seed=1),
+            PartitionHashShuffle(window_size=50, num_lanes=8, seed=1),
+        ],
+    )
+    def test_output_is_permutation(self, strategy):
+        """Test that every strategy emits each record exactly once."""
+        records = make_records(1000)
+
+        shuffled = list(strategy.shuffle(records))
+
+        assert sorted(r["pos"] for r in shuffled) == list(range(1000))
+        assert [r["pos"] for r in shuffled] != list(range(1000))
+
+    def test_seed_makes_order_reproducible(self):
+        """Test that the same seed produces the same order."""
+        records = make_records(500)
+
+        first = [r["pos"] for r in WindowShuffle(window_size=64, seed=7).shuffle(records)]
+        second = [r["pos"] for r in WindowShuffle(window_size=64, seed=7).shuffle(records)]
+
+        assert first == second
+
+    def test_window_shuffle_is_lazy(self):
+        """Test that window shuffle emits output before the input is exhausted."""
+        consumed = 0
+
+        def stream():
+            nonlocal consumed
+            for record in make_records(10_000):
+                consumed += 1
+                yield record
+
+        output = WindowShuffle(window_size=100, seed=3).shuffle(stream())
+        next(output)
+
+        assert consumed == 101
+
+    def test_window_shuffle_displacement_is_local(self):
+        """Test that records are only emitted after at most window_size newer records."""
+        shuffled = list(WindowShuffle(window_size=100, seed=5).shuffle(make_records(5000)))
+
+        # A record emitted at output position p must have been read already
+        for out_pos, record in enumerate(shuffled[: 5000 - 100]):
+            assert record["pos"] <= out_pos + 100
+
+    def test_bucket_interleave_spreads_consecutive_writes(self):
+        """Test that consecutive outputs come from different buckets of the window."""
+        shuffled = list(
+            BucketInterleaveShuffle(window_size=100, num_buckets=10, seed=2).shuffle(
+                make_records(100)
+            )
+        )
+
+        buckets = [r["pos"] // 10 for r in shuffled[:10]]
+        assert sorted(buckets) == list(range(10))
+
+    def test_partition_hash_round_robins_lanes(self):
+        """Test that consecutive outputs come from different hash lanes."""
+        strategy = PartitionHashShuffle(window_size=400, num_lanes=4, seed=0)
+        records = make_records(400)
+
+        shuffled = list(strategy.shuffle(records))
+
+        lanes = [strategy._lane(r) for r in shuffled[:4]]
+        assert len(set(lanes)) == 4
+
+    def test_invalid_window_size(self):
+        """Test that non-positive window sizes are rejected."""
+        with pytest.raises(ValueError, match="window_size must be greater than 0"):
+            WindowShuffle(window_size=0)
+
+    def test_full_shuffle_is_not_bounded(self):
+        """Test that only the full shuffle materialises its input."""
+        assert FullShuffle.bounded_memory is False
+        assert WindowShuffle.bounded_memory is True
+
+
+class TestIndexShuffle:
+    """Unit tests for the offset index shuffle."""
+
+    @pytest.fixture
+    def csv_file(self, tmp_path):
+        """CSV file with quoted line breaks, blank lines and ragged rows."""
+        path = tmp_path / "data.csv"
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "text", "n"])
+            for i in range(300):
+                writer.writerow([str(i), f'line one\nline "{i}"\n\nend', str(i)])
+            f.write("\r\n300,short\r\n301,a,b,extra\r\n")
+        return str(path)
+
+    def test_reads_rows_like_dict_reader(self, csv_file):
+        """Test that every row is returned once, parsed as csv.DictReader parses it."""
+        with open(csv_file, newline="") as f:
+            expected = list(csv.DictReader(f))
+
+        rows = list(IndexShuffle(seed=1).iter_csv(csv_file))
+
+        assert sorted(rows, key=lambda r: int(r["id"])) == expected
+        assert [r["id"] for r in rows] != [r["id"] for r in expected]
+
+    def test_stray_quotes_and_whitespace_lines(self, tmp_path):
+        """Test that stray quotes in unquoted fields and whitespace-only lines parse as in csv."""
+        path = tmp_path / "stray.csv"
+        path.write_text('id,name\n1,12" pizza\n2,x\n \n3,"a\nb"\n4,6" sub\n5,y\n')
+        with open(path, newline="") as f:
+            expected = list(csv.DictReader(f))
+
+        rows = list(IndexShuffle(seed=3).iter_csv(str(path)))
+
+        assert len(expected) == 6
+        assert sorted(rows, key=lambda r: r["id"]) == sorted(expected, key=lambda r: r["id"])
+
+    def test_reads_files_itself(self, csv_file):
+        """Test that the loaders' file hook reads through the index only for IndexShuffle."""
+        assert IndexShuffle.reads_files and not IndexShuffle.bounded_memory
+        assert WindowShuffle().iter_file(csv_file) is None
+        assert len(list(IndexShuffle().iter_file(csv_file))) == 302
+
+    def test_same_seed_same_order(self, csv_file):
+        """Test that the seed makes the read order reproducible."""
+        first = [r["id"] for r in IndexShuffle(seed=4).iter_csv(csv_file)]
+        second = [r["id"] for r in IndexShuffle(seed=4).iter_csv(csv_file)]
+
+        assert first == second
+
+    def test_row_ids_and_skip(self, csv_file):
+        """Test that rows carry their byte offset and skipped offsets are left out."""
+        rows = list(IndexShuffle(seed=2).iter_csv(csv_file, row_id_key="_row"))
+        with open(csv_file, "rb") as f:
+            data = f.read()
+        for row in rows[:20]:
+            assert data[row["_row"] :].startswith(f"{row['id']},".encode())
+
+        skip = sorted(row["_row"] for row in rows[:100])
+        remaining = list(IndexShuffle(seed=2).iter_csv(csv_file, skip=skip))
+
+        assert len(remaining) == len(rows) - 100
+        assert {r["id"] for r in remaining} == {r["id"] for r in rows[100:]}
+
+    def test_empty_file(self, tmp_path):
+        """Test that an empty file yields no rows."""
+        path = tmp_path / "empty.csv"
+        path.write_bytes(b"")
+
+        assert list(IndexShuffle().iter_csv(str(path))) == []
+
+    def test_rejects_compressed_file(self, tmp_path):
+        """Test that compressed input, which cannot be mapped, is rejected."""
+        path = tmp_path / "data.csv.gz"
+        with gzip.open(path, "wt") as f:
+            f.write("id\n1\n")
+
+        with pytest.raises(ValueError, match="uncompressed"):
+            list(IndexShuffle().iter_csv(str(path)))
+
+    def test_loaders_reject_file_dedupe(self):
+        """Test that file dedupe, which needs file order, cannot be combined with it."""
+        with pytest.raises(ValueError, match="file order"):
+            ThreadedDynamoDBLoader(table_name="t", shuffle=IndexShuffle(), dedupe="file")
+        with pytest.raises(ValueError, match="file order"):
+            AsyncDynamoDBLoader(table_name="t", shuffle=IndexShuffle(), dedupe="file")
+
+
+class TestGetShuffleStrategy:
+    """Unit tests for the strategy factory."""
+
+    def test_creates_strategies_by_name(self):
+        """Test that each registered name maps to its class."""
+        assert isinstance(get_shuffle_strategy("full"), FullShuffle)
+        assert isinstance(get_shuffle_strategy("window", window_size=10), WindowShuffle)
+        assert isinstance(get_shuffle_strategy("bucket"), BucketInterleaveShuffle)
+        assert isinstance(get_shuffle_strategy("index", seed=3), IndexShuffle)
+        strategy = get_shuffle_strategy("hash", partition_key="pk")
+        assert isinstance(strategy, PartitionHashShuffle)
+        assert strategy.partition_key == "pk"
+
+    def test_unknown_name(self):
+        """Test that unknown names raise ValueError."""
+        with pytest.raises(ValueError, match="Unknown shuffle strategy"):
+            get_shuffle_strategy("sorted")
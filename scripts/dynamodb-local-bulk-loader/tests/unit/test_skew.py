@@ -0,0 +1,198 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Unit tests for partition key skew analysis and hot-key pacing."""
+
+import csv
+import random
+from collections import Counter
+
+import pytest
+
+from src.batch_write import BatchWriteItemWriter, put_requests
+from src.local_dynamodb import LocalClient, LocalDynamoDB, LocalSession
+from src.retry_handler import RetryHandler
+from src.skew import (
+    CountMinSketch,
+    HeavyHitters,
+    HotKeyPacer,
+    KeyFrequency,
+    SkewReport,
+    analyze_csv,
+    analyze_keys,
+    key_value,
+)
+from src.threaded_loader import ThreadedDynamoDBLoader
+
+
+@pytest.fixture
+def skewed_csv(tmp_path):
+    """CSV where 20% of 5,000 rows share the partition key "hot"."""
+    path = tmp_path / "skewed.csv"
+    rng = random.Random(3)
+    ids = ["hot"] * 1000 + [f"key-{i}" for i in range(4000)]
+    rng.shuffle(ids)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "value"])
+        for i, key in enumerate(ids):
+            writer.writerow([key, f"value-{i}"])
+    return str(path)
+
+
+class TestCountMinSketch:
+    """Tests for frequency estimation."""
+
+    def test_never_underestimates(self):
+        """Test that estimates are at least the true counts and close for a wide sketch."""
+        rng = random.Random(1)
+        keys = [f"k{int(rng.paretovariate(1.2))}" for _ in range(20000)]
+        sketch = CountMinSketch(width=4096, depth=4)
+        for key in keys:
+            sketch.add(key)
+        bound = 2.72 / 4096 * len(keys)
+        for key, count in Counter(keys).most_common(50):
+            assert count <= sketch.estimate(key) <= count + bound
+        assert sketch.total == len(keys)
+
+    def test_invalid_dimensions(self):
+        """Test that width and depth must be positive."""
+        with pytest.raises(ValueError, match="width"):
+            CountMinSketch(width=0)
+        with pytest.raises(ValueError, match="depth"):
+            CountMinSketch(depth=0)
+
+
+class TestHeavyHitters:
+    """Tests for top-k tracking."""
+
+    def test_finds_frequent_keys_with_bounded_candidates(self):
+        """Test that the most frequent keys are found with at most k candidates."""
+        rng = random.Random(2)
+        keys = ["a"] * 3000 + ["b"] * 2000 + ["c"] * 1000 + [str(i) for i in range(10000)]
+        rng.shuffle(keys)
+        tracker = HeavyHitters(k=5)
+        for key in keys:
+            tracker.add(key)
+        top = tracker.top()
+        assert len(tracker.candidates) == 5
+        assert [key for key, _ in top[:3]] == ["a", "b", "c"]
+        assert top[0][1] >= 3000
+
+
+class TestSkewReport:
+    """Tests for analysis and rate estimates."""
+
+    def test_analyze_csv_reports_hot_key(self, skewed_csv):
+        """Test that a key holding 20% of the rows is reported with its share."""
+        report = analyze_csv(skewed_csv, top_k=5)
+        assert report.total_records == 5000
+        assert report.heavy_hitters[0].key == "hot"
+        assert report.top_share == pytest.approx(0.2, abs=0.01)
+        assert report.average_item_wcu == 1.0
+
+    def test_rate_estimates(self):
+        """Test per-key WCU/s, hot keys and the load rate ceiling."""
+        hot = KeyFrequency(key="hot", count=200, share=0.2)
+        cold = KeyFrequency(key="cold", count=10, share=0.01)
+        report = SkewReport("id", 1000, [hot, cold], average_item_wcu=2.0)
+        assert report.key_wcu(hot, 10000) == pytest.approx(4000)
+        assert report.hot_keys(10000) == [hot]
+        assert report.max_load_rate() == pytest.approx(2500)
+        data = report.to_dict(load_rate=10000)
+        assert data["max_load_rate"] == 2500
+        assert data["heavy_hitters"][0]["hot"] is True
+        assert data["heavy_hitters"][1]["hot"] is False
+
+    def test_missing_partition_key_column(self, skewed_csv):
+        """Test that an unknown partition key column is rejected."""
+        with pytest.raises(ValueError, match="customer_id"):
+            analyze_csv(skewed_csv, partition_key="customer_id")
+
+    def test_rows_without_key_are_counted_not_tracked(self):
+        """Test that missing keys count towards the total only."""
+        report = analyze_keys(["a", None, "a", None])
+        assert report.total_records == 4
+        assert report.heavy_hitters == [KeyFrequency(key="a", count=2, share=0.5)]
+        assert report.max_load_rate() == pytest.approx(2000)
+
+
+class TestHotKeyPacer:
+    """Tests for per-key pacing."""
+
+    def test_key_value_reads_wire_format(self):
+        """Test that keys are read from Python and wire-format items alike."""
+        assert key_value({"id": "a"}, "id") == "a"
+        assert key_value({"id": {"N": "5"}}, "id") == "5"
+        assert key_value({"other": "a"}, "id") is None
+
+    def test_only_hot_keys_wait(self):
+        """Test that hot-key items wait once their bucket is spent and others do not."""
+        pacer = HotKeyPacer(["hot"], max_key_wcu=10)
+        cold = [({"id": f"c{i}"}, 1.0) for i in range(100)]
+        assert pacer._reserve(cold) == 0.0
+        assert pacer._reserve([({"id": "hot"}, 1.0)] * 10) == 0.0
+        assert pacer._reserve([({"id": "hot"}, 1.0)] * 5) == pytest.approx(0.5, abs=0.05)
+
+    def test_from_report_min_share(self):
+        """Test that from_report paces heavy hitters above min_share."""
+        report = SkewReport(
+            "pk",
+            100,
+            [KeyFrequency("a", 50, 0.5), KeyFrequency("b", 1, 0.01)],
+            average_item_wcu=1.0,
+        )
+        pacer = HotKeyPacer.from_report(report, max_key_wcu=100, min_share=0.1)
+        assert set(pacer.buckets) == {"a"}
+        assert pacer.partition_key == "pk"
+
+    def test_invalid_rate(self):
+        """Test that max_key_wcu must be positive."""
+        with pytest.raises(ValueError, match="max_key_wcu"):
+            HotKeyPacer(["a"], max_key_wcu=0)
+
+    def test_writer_charges_pacer(self):
+        """Test that the writer charges hot-key items before each request."""
+        calls = []
+
+        class RecordingPacer(HotKeyPacer):
+            def acquire_sync(self, items):
+                calls.append([key_value(item, "id") for item, _ in items])
+                return 0.0
+
+        writer = BatchWriteItemWriter(
+            table_name="t",
+            retry_handler=RetryHandler(max_retries=1),
+            max_retries=1,
+            key_pacer=RecordingPacer(["hot"]),
+        )
+        outcome = writer.write_sync(
+            LocalClient(LocalDynamoDB()), put_requests([{"id": "hot"}, {"id": "cold"}])
+        )
+        assert outcome.successful
+        assert calls == [["hot", "cold"]]
+
+    def test_threaded_loader_paces_hot_key(self, skewed_csv):
+        """Test that a paced load writes every row, holding the hot key to its rate."""
+        db = LocalDynamoDB()
+        pacer = HotKeyPacer.from_report(analyze_csv(skewed_csv, top_k=3), max_key_wcu=10000)
+        loader = ThreadedDynamoDBLoader(
+            table_name="t", max_workers=4, session=LocalSession(db), hot_key_pacer=pacer
+        )
+        result = loader.load_csv(skewed_csv)
+        assert result.failed_writes == 0
+        # Hot rows that met in a batch were coalesced before the write
+        assert result.successful_writes + result.duplicate_records == 5000
+        assert db.stats.items_written == result.successful_writes
+        # The 1,000 hot rows overwrite one item
+        assert db.item_count("t") == 4001
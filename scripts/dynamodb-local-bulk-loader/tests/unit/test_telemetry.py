@@ -0,0 +1,194 @@
+#
+#  Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  This file is licensed under the Apache License, Version 2.0 (the "License").
+#  You may not use this file except in compliance with the License. A copy of
+#  the License is located at
+#
+#  http://aws.amazon.com/apache2.0/
+#
+#  This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+#  CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#  specific language governing permissions and limitations under the License.
+#
+"""Unit tests for load telemetry."""
+
+import io
+import json
+
+import pytest
+from botocore.exceptions import ClientError
+
+from src.batch_write import BatchWriteItemWriter, put_requests
+from src.local_dynamodb import LocalClient, LocalDynamoDB
+from src.retry_handler import RetryHandler
+from src.telemetry import (
+    LatencyHistogram,
+    LoadTelemetry,
+    ProgressReporter,
+    estimate_csv_rows,
+)
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def throttle_error():
+    return ClientError(
+        {"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "slow down"}},
+        "BatchWriteItem",
+    )
+
+
+class TestLatencyHistogram:
+    """Tests for percentile estimation."""
+
+    def test_percentiles_within_bucket_error(self):
+        """Test that percentiles are within about 5% of the exact values."""
+        histogram = LatencyHistogram()
+        for ms in range(1, 1001):
+            histogram.record(ms / 1000)
+        assert histogram.percentile(0.50) == pytest.approx(0.500, rel=0.05)
+        assert histogram.percentile(0.99) == pytest.approx(0.990, rel=0.05)
+        assert histogram.percentile(1.0) == pytest.approx(1.0)
+
+    def test_empty(self):
+        """Test that an empty histogram reports zero."""
+        assert LatencyHistogram().percentile(0.5) == 0.0
+
+    def test_merge(self):
+        """Test that merged histograms match one fed with all observations."""
+        a, b, combined = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for i in range(1, 100):
+            (a if i % 2 else b).record(i / 100)
+            combined.record(i / 100)
+        a.merge(b)
+        assert a.count == combined.count
+        assert a.percentile(0.9) == combined.percentile(0.9)
+
+
+class TestLoadTelemetry:
+    """Tests for counters, throughput and export."""
+
+    def test_records_responses_and_errors(self):
+        """Test unprocessed items, throttles, consumed capacity and error codes."""
+        telemetry = LoadTelemetry()
+        telemetry.record_response(
+            0.01,
+            25,
+            {
+                "UnprocessedItems": {"t": [{}, {}]},
+                "ConsumedCapacity": [{"TableName": "t", "CapacityUnits": 23.0}],
+            },
+        )
+        telemetry.record_error(0.02, throttle_error())
+        telemetry.record_error(0.03, TimeoutError())
+        telemetry.record_failed(2)
+
+        snapshot = telemetry.snapshot()
+        assert snapshot["requests"] == 3
+        assert snapshot["items_written"] == 23
+        assert snapshot["items_failed"] == 2
+        assert snapshot["consumed_wcu"] == 23.0
+        assert snapshot["throttle_events"] == 2
+        assert snapshot["errors_by_code"] == {
+            "UnprocessedItems": 2,
+            "ProvisionedThroughputExceededException": 1,
+            "TimeoutError": 1,
+        }
+
+    def test_rolling_throughput_and_eta(self):
+        """Test that throughput only counts the window and drives the ETA."""
+        clock = FakeClock()
+        telemetry = LoadTelemetry(total_records=1000, window=10.0, clock=clock)
+        clock.now += 5
+        telemetry.record_response(0.01, 100, {})
+        clock.now += 20
+        telemetry.record_response(0.01, 100, {})
+        clock.now += 5
+
+        # Only the second request falls in the last 10 seconds
+        assert telemetry.throughput() == pytest.approx(10.0)
+        assert telemetry.eta() == pytest.approx(80.0)
+
+    def test_eta_unknown_without_total(self):
+        """Test that the ETA is None when the total is unknown."""
+        assert LoadTelemetry().eta() is None
+
+    def test_prometheus_export(self):
+        """Test the Prometheus text format."""
+        telemetry = LoadTelemetry(total_records=10)
+        telemetry.record_response(0.05, 5, {"ConsumedCapacity": [{"CapacityUnits": 5.0}]})
+        telemetry.record_error(0.01, throttle_error())
+        text = telemetry.to_prometheus()
+
+        assert "# TYPE dynamodb_loader_requests_total counter" in text
+        assert "dynamodb_loader_requests_total 2" in text
+        assert (
+            'dynamodb_loader_errors_total{code="ProvisionedThroughputExceededException"} 1' in text
+        )
+        assert "dynamodb_loader_consumed_wcu_total 5.0" in text
+        assert 'dynamodb_loader_request_latency_seconds{quantile="0.99"}' in text
+        assert "dynamodb_loader_request_latency_seconds_count 2" in text
+        assert "dynamodb_loader_eta_seconds" in text
+
+    def test_json_export(self):
+        """Test that the JSON export round-trips."""
+        telemetry = LoadTelemetry()
+        telemetry.record_response(0.05, 5, {})
+        assert json.loads(telemetry.to_json())["items_written"] == 5
+
+    def test_progress_reporter(self):
+        """Test that the reporter prints a final status line."""
+        telemetry = LoadTelemetry(total_records=100)
+        telemetry.record_response(0.012, 25, {})
+        stream = io.StringIO()
+        with ProgressReporter(telemetry, interval=60, stream=stream):
+            pass
+        line = stream.getvalue()
+        assert line.startswith("25 / ~100 items")
+        assert "throttles 0" in line
+
+
+class TestWriterTelemetry:
+    """Tests for the writer feeding telemetry."""
+
+    def test_writer_requests_consumed_capacity(self):
+        """Test that the writer asks for and records consumed capacity."""
+        db = LocalDynamoDB(unprocessed_rate=0.3, seed=3)
+        telemetry = LoadTelemetry()
+        writer = BatchWriteItemWriter(
+            table_name="t",
+            retry_handler=RetryHandler(max_retries=0),
+            max_retries=10,
+            telemetry=telemetry,
+        )
+        writer._backoff = lambda pending: 0.0
+        items = [{"id": str(i), "payload": "x" * 1500} for i in range(20)]
+        outcome = writer.write_sync(LocalClient(db), put_requests(items))
+
+        snapshot = telemetry.snapshot()
+        assert outcome.successful
+        assert snapshot["items_written"] == 20
+        # Each item is about 1.5KB, i.e. 2 WCUs
+        assert snapshot["consumed_wcu"] == 40.0
+        assert snapshot["errors_by_code"]["UnprocessedItems"] == db.stats.unprocessed_items
+        assert snapshot["requests"] == db.stats.requests
+
+
+def test_estimate_csv_rows(tmp_path):
+    """Test row estimates for small (exact) and large (extrapolated) files."""
+    small = tmp_path / "small.csv"
+    small.write_text("id\n" + "".join(f"{i}\n" for i in range(10)))
+    assert estimate_csv_rows(str(small)) == 10
+
+    large = tmp_path / "large.csv"
+    large.write_text("id,name\n" + "".join(f"{i:06d},abc\n" for i in range(5000)))
+    assert estimate_csv_rows(str(large)) == 5000
@@ -142,13 +142,9 @@ class TestThreadedDynamoDBLoader:
         """Test successful batch write operation."""
         loader = ThreadedDynamoDBLoader(table_name="test-table", max_retries=1)
 
-        # Mock the table and batch_writer
+        # Mock the table's low-level client
         mock_table = MagicMock()
-        mock_batch_writer = MagicMock()
-        mock_batch_writer.__enter__ = MagicMock(return_value=mock_batch_writer)
-        mock_batch_writer.__exit__ = MagicMock(return_value=None)
-        mock_batch_writer.put_item = MagicMock()
-        mock_table.batch_writer.return_value = mock_batch_writer
+        mock_table.meta.client.batch_write_item.return_value = {"UnprocessedItems": {}}
 
         items = [{"id": "1", "name": "test1"}, {"id": "2", "name": "test2"}]
 
@@ -167,14 +163,10 @@ class TestThreadedDynamoDBLoader:
 
         # Mock the table to raise ClientError
         mock_table = MagicMock()
-        mock_batch_writer = MagicMock()
-        mock_batch_writer.__enter__ = MagicMock(
-            side_effect=ClientError(
-                {"Error": {"Code": "ProvisionedThroughputExceededException"}},
-                "PutItem",
-            )
+        mock_table.meta.client.batch_write_item.side_effect = ClientError(
+            {"Error": {"Code": "ProvisionedThroughputExceededException"}},
+            "BatchWriteItem",
         )
-        mock_table.batch_writer.return_value = mock_batch_writer
 
         items = [{"id": "1", "name": "test1"}]
 
@@ -191,11 +183,7 @@ class TestThreadedDynamoDBLoader:
 
         # Mock the table to raise generic exception
         mock_table = MagicMock()
-        mock_batch_writer = MagicMock()
-        mock_batch_writer.__enter__ = MagicMock(
-            side_effect=Exception("Unexpected error")
-        )
-        mock_table.batch_writer.return_value = mock_batch_writer
+        mock_table.meta.client.batch_write_item.side_effect = Exception("Unexpected error")
 
         items = [{"id": "1", "name": "test1"}]
 
@@ -253,31 +241,19 @@ class TestThreadedDynamoDBLoader:
                 table_name="test-table", max_workers=3, batch_size=2
             )
 
-            # Mock boto3 and batch writer
+            # Mock boto3 and the low-level client
             with patch("boto3.Session") as mock_session:
                 mock_resource = MagicMock()
                 mock_table = MagicMock()
 
-                # Track batch writer calls
-                batch_writer_calls = []
-
-                def mock_batch_writer_context():
-                    class MockBatchWriter:
-                        def __init__(self):
-                            batch_writer_calls.append(self)
-
-                        def put_item(self, Item):
-                            pass
-
-                        def __enter__(self):
-                            return self
-
-                        def __exit__(self, exc_type, exc_val, exc_tb):
-                            return False
+                # Track BatchWriteItem calls
+                batch_write_calls = []
 
-                    return MockBatchWriter()
+                def mock_batch_write_item(RequestItems):
+                    batch_write_calls.append(RequestItems)
+                    return {"UnprocessedItems": {}}
 
-                mock_table.batch_writer.side_effect = mock_batch_writer_context
+                mock_table.meta.client.batch_write_item.side_effect = mock_batch_write_item
                 mock_resource.Table.return_value = mock_table
                 mock_session.return_value.resource.return_value = mock_resource
 
@@ -289,7 +265,7 @@ class TestThreadedDynamoDBLoader:
             assert result.failed_writes == 0
 
             # Verify correct number of batches (10 records / 2 batch_size = 5 batches)
-            assert len(batch_writer_calls) == 5
+            assert len(batch_write_calls) == 5
 
         finally:
             import os
@@ -316,11 +292,7 @@ class TestThreadedDynamoDBLoader:
             with patch("boto3.Session") as mock_session:
                 mock_resource = MagicMock()
                 mock_table = MagicMock()
-                mock_batch_writer = MagicMock()
-                mock_batch_writer.__enter__ = MagicMock(
-                    side_effect=Exception("Test error")
-                )
-                mock_table.batch_writer.return_value = mock_batch_writer
+                mock_table.meta.client.batch_write_item.side_effect = Exception("Test error")
                 mock_resource.Table.return_value = mock_table
                 mock_session.return_value.resource.return_value = mock_resource
 
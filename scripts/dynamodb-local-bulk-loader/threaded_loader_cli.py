@@ -10,6 +10,18 @@ import argparse
 import sys
 from pathlib import Path
 
+from src.autotune import DEFAULT_PROFILE_FILE, TuningProfiles
+from src.item_size import MAX_REQUEST_BYTES
+from src.readers import READERS, CsvReader, get_reader, reader_for
+from src.retry_handler import (
+    DEFAULT_BREAKER_THRESHOLD,
+    DEFAULT_RETRY_BUDGET,
+    JITTER_STRATEGIES,
+)
+from src.schema import INFER_SCHEMA, ItemSchema
+from src.shuffle import DEFAULT_WINDOW_SIZE, SHUFFLE_STRATEGIES, get_shuffle_strategy
+from src.skew import DEFAULT_KEY_WCU, HotKeyPacer, analyze_csv, analyze_records
+from src.telemetry import LoadTelemetry, ProgressReporter
 from src.threaded_loader import ThreadedDynamoDBLoader
 
 
@@ -30,14 +42,67 @@ Examples:
 
   # Load with custom retry settings
   python threaded_loader_cli.py --csv data.csv --table MyTable --max-retries 5
+
+  # Let concurrency find the table's capacity instead of sweeping --workers
+  python threaded_loader_cli.py --csv data.csv --table MyTable --adaptive --max-concurrency 100
+
+  # Probe concurrency for the first seconds and reuse the result on later loads of the table
+  python threaded_loader_cli.py --csv data.csv --table MyTable --auto-tune
+
+  # Shuffle within a 50k-row window instead of the whole file
+  python threaded_loader_cli.py --csv data.csv --table MyTable --shuffle window --shuffle-window 50000
+
+  # Hold a steady 50% of a 4,000 WCU table for a load into a shared table
+  python threaded_loader_cli.py --csv data.csv --table MyTable --max-wcu 4000 --target-utilization 0.5
+
+  # Journal progress, then pick up where an interrupted run stopped
+  python threaded_loader_cli.py --csv sample_1m.csv --table MyTable --checkpoint load.ckpt
+  python threaded_loader_cli.py --csv sample_1m.csv --table MyTable --checkpoint load.ckpt --resume
+
+  # Even out request latency for large items: at most 2MB and 200 WCU per request
+  python threaded_loader_cli.py --csv data.csv --table MyTable --max-request-kb 2048 --max-request-wcu 200
+
+  # Keep items that still fail after their retries, then replay only those
+  python threaded_loader_cli.py --csv data.csv --table MyTable --dead-letter failed.ddbjson
+  python dead_letters.py replay failed.ddbjson --table MyTable
+
+  # Keep only the last row of every primary key across the whole file (last write wins)
+  python threaded_loader_cli.py --csv data.csv --table MyTable --dedupe file
+
+  # Store numeric columns as numbers, serializing straight to wire format
+  python threaded_loader_cli.py --csv data.csv --table MyTable --schema infer
+  python threaded_loader_cli.py --csv data.csv --table MyTable --schema amount:N,active:BOOL
+
+  # Export load metrics for Prometheus (node_exporter textfile collector) and as JSON
+  python threaded_loader_cli.py --csv data.csv --table MyTable --metrics-prometheus load.prom --metrics-json load.json
+
+  # Load JSON Lines, a DynamoDB export, or Parquet (format from the extension)
+  python threaded_loader_cli.py --input data.jsonl --table MyTable
+  python threaded_loader_cli.py --input export.json --table MyTable --format dynamodb-json
+  python threaded_loader_cli.py --input data.parquet --table MyTable
+
+  # Stream compressed input, decompressing on a background thread
+  python threaded_loader_cli.py --input data.csv.gz --table MyTable --stream
+
+  # Keep heavily repeated partition keys below the per-partition write limit
+  python threaded_loader_cli.py --csv data.csv --table MyTable --pace-hot-keys --partition-key customer_id
         """,
     )
 
     parser.add_argument(
         "--csv",
+        "--input",
+        dest="csv",
         type=str,
         required=True,
-        help="Path to input CSV file",
+        help="Path to the input file (CSV, JSON Lines, DynamoDB JSON export or Parquet)",
+    )
+
+    parser.add_argument(
+        "--format",
+        choices=sorted(READERS),
+        default=None,
+        help="Input format (default: from the file extension; .json files are sniffed)",
     )
 
     parser.add_argument(
@@ -72,6 +137,22 @@ Examples:
         help="Batch size for write operations (default: 25, max: 25)",
     )
 
+    parser.add_argument(
+        "--max-request-kb",
+        type=int,
+        default=MAX_REQUEST_BYTES // 1024,
+        help="Item payload per request in KB; batches of large items are closed early "
+        f"(default: {MAX_REQUEST_BYTES // 1024}, the BatchWriteItem limit; minimum 400)",
+    )
+
+    parser.add_argument(
+        "--max-request-wcu",
+        type=int,
+        default=None,
+        help="Write capacity units per request, so batches of large items do not "
+        "drain the write budget in bursts (default: unlimited)",
+    )
+
     parser.add_argument(
         "--max-retries",
         type=int,
@@ -79,47 +160,339 @@ Examples:
         help="Maximum retry attempts for failed operations (default: 3)",
     )
 
+    parser.add_argument(
+        "--retry-jitter",
+        choices=list(JITTER_STRATEGIES),
+        default="additive",
+        help="Backoff jitter: additive (exponential + up to 1s), full (random up to the "
+        "exponential delay) or decorrelated (default: additive)",
+    )
+
+    parser.add_argument(
+        "--retry-budget",
+        type=float,
+        default=None,
+        help=f"Retries allowed per first request across all workers (e.g. {DEFAULT_RETRY_BUDGET}), "
+        "so throttling is not amplified by retries; items still unprocessed once it is spent "
+        "are failed (default: no budget)",
+    )
+
+    parser.add_argument(
+        "--breaker-threshold",
+        type=int,
+        default=DEFAULT_BREAKER_THRESHOLD,
+        help="Consecutive permanent errors (missing table, invalid items) after which "
+        f"batches fail without calling DynamoDB; 0 disables (default: {DEFAULT_BREAKER_THRESHOLD})",
+    )
+
+    parser.add_argument(
+        "--shuffle",
+        choices=sorted(SHUFFLE_STRATEGIES),
+        default=None,
+        help="Shuffle strategy used to avoid hot partitions (default: full)",
+    )
+
+    parser.add_argument(
+        "--shuffle-window",
+        type=int,
+        default=DEFAULT_WINDOW_SIZE,
+        help="Records held in memory by the window, bucket and hash strategies "
+        f"(default: {DEFAULT_WINDOW_SIZE})",
+    )
+
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Adapt concurrency to throttling feedback (AIMD), starting at --workers",
+    )
+
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=None,
+        help="Upper bound on in-flight batches with --adaptive or --auto-tune "
+        "(default: max(64, workers))",
+    )
+
+    parser.add_argument(
+        "--auto-tune",
+        action="store_true",
+        help="Probe concurrency levels from --workers up to --max-concurrency during the "
+        "first seconds of the load, lock in the fastest one and save it per table and host",
+    )
+
+    parser.add_argument(
+        "--tuning-profiles",
+        type=str,
+        default=DEFAULT_PROFILE_FILE,
+        help="File of tuned settings used by --auto-tune "
+        "(default: ~/.dynamodb-local-bulk-loader/tuning-profiles.json)",
+    )
+
+    parser.add_argument(
+        "--retune",
+        action="store_true",
+        help="With --auto-tune, probe again instead of using the saved profile",
+    )
+
+    parser.add_argument(
+        "--max-wcu",
+        type=float,
+        default=None,
+        help="Write capacity units per second available to the load (default: unlimited)",
+    )
+
+    parser.add_argument(
+        "--target-utilization",
+        type=float,
+        default=1.0,
+        help="Fraction of --max-wcu to consume, e.g. 0.5 to leave half for live traffic "
+        "(default: 1.0)",
+    )
+
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default=None,
+        help="Journal file recording written rows so an interrupted load can be resumed "
+        "(default with --resume: <csv>.checkpoint)",
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip rows recorded in the checkpoint journal by a previous run",
+    )
+
+    parser.add_argument(
+        "--dead-letter",
+        type=str,
+        default=None,
+        help="File receiving items that could not be written "
+        "(default: <input>.dead-letter.ddbjson, created only on failure)",
+    )
+
+    parser.add_argument(
+        "--dedupe",
+        choices=["none", "batch", "file"],
+        default="batch",
+        help="Drop rows whose primary key repeats before they reach BatchWriteItem: "
+        "'batch' coalesces duplicates within a batch, 'file' keeps only the last row "
+        "of every key in the file (default: batch)",
+    )
+
+    parser.add_argument(
+        "--schema",
+        type=str,
+        default=None,
+        help='Column types ("infer", or e.g. "amount:N,active:BOOL"); items are sent in '
+        "wire format through a low-level client (default: every value as a string)",
+    )
+
+    parser.add_argument(
+        "--pace-hot-keys",
+        action="store_true",
+        help="Analyze partition key skew first and pace writes to heavy keys so each "
+        "stays below --hot-key-wcu",
+    )
+
+    parser.add_argument(
+        "--partition-key",
+        type=str,
+        default="id",
+        help="Partition key column analyzed by --pace-hot-keys (default: id)",
+    )
+
+    parser.add_argument(
+        "--hot-key-wcu",
+        type=float,
+        default=DEFAULT_KEY_WCU,
+        help=f"WCU/s allowed per heavy key with --pace-hot-keys (default: {DEFAULT_KEY_WCU:.0f})",
+    )
+
+    parser.add_argument(
+        "--no-progress",
+        action="store_true",
+        help="Do not print live progress (throughput, latency, throttles, ETA)",
+    )
+
+    parser.add_argument(
+        "--progress-interval",
+        type=float,
+        default=2.0,
+        help="Seconds between progress updates (default: 2.0)",
+    )
+
+    parser.add_argument(
+        "--metrics-json",
+        type=str,
+        default=None,
+        help="Write load telemetry (latency percentiles, retries, WCU) to this JSON file",
+    )
+
+    parser.add_argument(
+        "--metrics-prometheus",
+        type=str,
+        default=None,
+        help="Write load telemetry in Prometheus text format to this file",
+    )
+
     args = parser.parse_args()
+    if args.auto_tune and args.adaptive:
+        parser.error("--auto-tune and --adaptive cannot be combined")
 
     # Validate CSV file exists
     csv_path = Path(args.csv)
     if not csv_path.exists():
-        print(f"Error: CSV file not found: {args.csv}", file=sys.stderr)
+        print(f"Error: input file not found: {args.csv}", file=sys.stderr)
         sys.exit(1)
 
+    checkpoint = args.checkpoint
+    if args.resume and checkpoint is None:
+        checkpoint = f"{args.csv}.checkpoint"
+
+    dead_letter = args.dead_letter or f"{args.csv}.dead-letter.ddbjson"
+
+    write_budget = "unlimited"
+    if args.max_wcu:
+        write_budget = (
+            f"{args.max_wcu * args.target_utilization:,.0f} WCU/s "
+            f"({args.target_utilization:.0%} of {args.max_wcu:,.0f})"
+        )
+
+    hot_keys = "no"
+    if args.pace_hot_keys:
+        hot_keys = f"paced at {args.hot_key_wcu:,.0f} WCU/s per key ({args.partition_key})"
+
     print("=" * 60)
     print("Multi-threaded DynamoDB CSV Loader")
     print("=" * 60)
-    print(f"CSV File:      {args.csv}")
+    print(f"Input File:    {args.csv} ({args.format or 'auto'})")
     print(f"Table:         {args.table}")
     print(f"Region:        {args.region}")
     print(f"Workers:       {args.workers if args.workers else 'auto (CPU cores)'}")
-    print(f"Batch Size:    {args.batch_size}")
-    print(f"Max Retries:   {args.max_retries}")
+    request_limit = f"{args.batch_size} items, {args.max_request_kb:,} KB"
+    if args.max_request_wcu:
+        request_limit += f", {args.max_request_wcu:,} WCU"
+    print(f"Batch Size:    {request_limit}")
+    retries = f"{args.max_retries}, {args.retry_jitter} jitter"
+    retries += f", budget {args.retry_budget:.0%}" if args.retry_budget else ", no budget"
+    retries += f", breaker after {args.breaker_threshold}" if args.breaker_threshold else ""
+    print(f"Max Retries:   {retries}")
+    print(f"Shuffle:       {args.shuffle or 'default'}")
+    concurrency = "adaptive" if args.adaptive else "fixed"
+    if args.auto_tune:
+        concurrency = f"auto-tune{' (retune)' if args.retune else ''}, {args.tuning_profiles}"
+    print(f"Concurrency:   {concurrency}")
+    print(f"Write Budget:  {write_budget}")
+    print(f"Checkpoint:    {checkpoint or 'none'}{' (resume)' if args.resume else ''}")
+    print(f"Dead Letters:  {dead_letter}")
+    print(f"Dedupe:        {args.dedupe}")
+    print(f"Schema:        {args.schema or 'none (strings)'}")
+    print(f"Hot Keys:      {hot_keys}")
     print("=" * 60)
 
     try:
+        schema = args.schema
+        if schema is not None and schema != INFER_SCHEMA:
+            schema = ItemSchema.parse(schema)
+        shuffle = (
+            get_shuffle_strategy(args.shuffle, window_size=args.shuffle_window)
+            if args.shuffle
+            else None
+        )
+        reader = get_reader(args.format) if args.format else reader_for(args.csv)
+        hot_key_pacer = None
+        if args.pace_hot_keys:
+            if isinstance(reader, CsvReader):
+                report = analyze_csv(args.csv, partition_key=args.partition_key)
+            else:
+                report = analyze_records(
+                    reader.iter_records(args.csv), partition_key=args.partition_key
+                )
+            hot_key_pacer = HotKeyPacer.from_report(report, args.hot_key_wcu)
+            print(
+                f"Top key share: {report.top_share:.2%}; throttling expected above "
+                f"{report.max_load_rate():,.0f} rows/s without pacing"
+            )
+        # Telemetry is fed by every BatchWriteItem call; the ETA uses an estimated row count
+        telemetry = LoadTelemetry(total_records=reader.estimate_records(args.csv))
         loader = ThreadedDynamoDBLoader(
             table_name=args.table,
             region=args.region,
             max_workers=args.workers,
             batch_size=args.batch_size,
+            max_request_bytes=args.max_request_kb * 1024,
+            max_request_wcu=args.max_request_wcu,
             max_retries=args.max_retries,
+            retry_jitter=args.retry_jitter,
+            retry_budget=args.retry_budget or None,
+            breaker_threshold=args.breaker_threshold or None,
+            shuffle=shuffle,
+            adaptive_concurrency=args.adaptive,
+            max_concurrency=args.max_concurrency,
+            auto_tune=args.auto_tune,
+            tuning_profiles=TuningProfiles(args.tuning_profiles, refresh=args.retune),
+            max_wcu=args.max_wcu,
+            target_utilization=args.target_utilization,
+            checkpoint_file=checkpoint,
+            resume=args.resume,
+            dead_letter_file=dead_letter,
+            dedupe=None if args.dedupe == "none" else args.dedupe,
+            schema=schema,
+            telemetry=telemetry,
+            hot_key_pacer=hot_key_pacer,
+            reader=reader,
         )
 
         # Run load operation
-        result = loader.load_csv(args.csv)
+        progress = None
+        if not args.no_progress:
+            progress = ProgressReporter(telemetry, interval=args.progress_interval)
+            progress.start()
+        try:
+            result = loader.load_csv(args.csv)
+        finally:
+            if progress is not None:
+                progress.stop()
 
         print("\n" + "=" * 60)
         print("Load Results")
         print("=" * 60)
         print(f"Total Records:     {result.total_records:,}")
+        if result.skipped_records:
+            print(f"Skipped (resumed): {result.skipped_records:,}")
+        if result.duplicate_records:
+            print(f"Duplicate Keys:    {result.duplicate_records:,} (superseded, not written)")
         print(f"Successful Writes: {result.successful_writes:,}")
         print(f"Failed Writes:     {result.failed_writes:,}")
+        if result.dead_lettered:
+            print(f"Dead-Lettered:     {result.dead_lettered:,} ({dead_letter})")
         print(f"Success Rate:      {result.success_rate():.2f}%")
         print(f"Duration:          {result.duration_seconds:.2f} seconds")
+        if args.auto_tune and loader.concurrency_controller is not None:
+            print(f"Tuned Concurrency: {loader.concurrency_controller.limit}")
+        metrics = telemetry.snapshot()
+        latency = metrics["latency_seconds"]
+        print(
+            f"Request Latency:   p50 {latency['p50'] * 1000:.1f}ms, "
+            f"p95 {latency['p95'] * 1000:.1f}ms, p99 {latency['p99'] * 1000:.1f}ms"
+        )
+        print(f"Requests:          {metrics['requests']:,}")
+        print(f"Throttle Events:   {metrics['throttle_events']:,}")
+        print(f"Consumed WCU:      {metrics['consumed_wcu']:,.0f}")
+        if metrics["errors_by_code"]:
+            errors = ", ".join(f"{k}={v:,}" for k, v in sorted(metrics["errors_by_code"].items()))
+            print(f"Errors:            {errors}")
         print("=" * 60)
 
+        if args.metrics_json:
+            with open(args.metrics_json, "w", encoding="utf-8") as f:
+                f.write(telemetry.to_json())
+        if args.metrics_prometheus:
+            with open(args.metrics_prometheus, "w", encoding="utf-8") as f:
+                f.write(telemetry.to_prometheus())
+
         if result.errors:
             print(f"\nErrors encountered ({len(result.errors)}):")
             for error in result.errors[:10]:  # Show first 10 errors
@@ -127,6 +500,10 @@ Examples:
             if len(result.errors) > 10:
                 print(f"  ... and {len(result.errors) - 10} more errors")
 
+        if result.dead_lettered:
+            print("\nReplay the failed items with:")
+            print(f"  python dead_letters.py replay {dead_letter} --table {args.table}")
+
         if result.failed_writes > 0:
             sys.exit(1)
 